@@ -0,0 +1,119 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Benchmarks of reading slides with cuCIM, OpenSlide and tifffile.
+
+Requires pytest-benchmark. Synthetic images are generated once per session.
+Usage::
+
+    pytest benchmarks/clara --benchmark-json=read.json
+    pytest benchmarks/clara --benchmark-compare  # compare to saved runs
+
+Set ``CUCIM_BENCH_IMAGE_SIZE`` to change the size of the synthetic images.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from cucim.clara import filesystem
+from cucim.clara._bench import generate_image, open_backend
+
+IMAGE_SIZE = int(os.environ.get('CUCIM_BENCH_IMAGE_SIZE', 8192))
+PATCH_SIZE = 256
+BATCH_SIZE = 32
+
+BACKENDS = ['cucim', 'openslide', 'tifffile']
+
+
+@pytest.fixture(scope='session', params=[256, 512],
+                ids=lambda tile_size: f'tile{tile_size}')
+def image_path(request, tmp_path_factory):
+    path = tmp_path_factory.getbasetemp() / f'bench-{request.param}.tif'
+    if not path.exists():
+        generate_image(path, IMAGE_SIZE, request.param)
+    return str(path)
+
+
+@pytest.fixture(params=BACKENDS)
+def reader(request, image_path):
+    try:
+        reader = open_backend(request.param, image_path)
+    except ImportError as e:
+        pytest.skip(str(e))
+    reader.path = image_path
+    yield reader
+    reader.close()
+
+
+def random_locations(reader, count, seed=0):
+    rng = np.random.default_rng(seed)
+    xs = rng.integers(0, reader.width - PATCH_SIZE + 1, count)
+    ys = rng.integers(0, reader.height - PATCH_SIZE + 1, count)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+@pytest.mark.parametrize('cache', ['warm', 'cold'])
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_open(benchmark, image_path, backend, cache):
+    def setup():
+        if cache == 'cold':
+            filesystem.discard_page_cache(image_path)
+
+    def open_image():
+        open_backend(backend, image_path).close()
+
+    try:
+        open_image()
+    except ImportError as e:
+        pytest.skip(str(e))
+    benchmark.pedantic(open_image, setup=setup, rounds=20)
+
+
+@pytest.mark.parametrize('cache', ['warm', 'cold'])
+def test_random_patch(benchmark, reader, cache):
+    locations = iter(random_locations(reader, 1000))
+
+    def setup():
+        if cache == 'cold':
+            filesystem.discard_page_cache(reader.path)
+        return (next(locations),), {}
+
+    def read(location):
+        reader.read(location[0], location[1], PATCH_SIZE, PATCH_SIZE)
+
+    benchmark.pedantic(read, setup=setup, rounds=100)
+
+
+def test_grid(benchmark, reader):
+    def read_grid():
+        for y in range(0, reader.height - PATCH_SIZE + 1, PATCH_SIZE):
+            for x in range(0, reader.width - PATCH_SIZE + 1, PATCH_SIZE):
+                reader.read(x, y, PATCH_SIZE, PATCH_SIZE)
+
+    benchmark.pedantic(read_grid, rounds=3)
+
+
+@pytest.mark.parametrize('num_workers', [1, 4, os.cpu_count()])
+def test_batch(benchmark, reader, num_workers):
+    locations = random_locations(reader, BATCH_SIZE)
+
+    def read(location):
+        reader.read(location[0], location[1], PATCH_SIZE, PATCH_SIZE)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        benchmark(lambda: list(executor.map(read, locations)))
@@ -67,12 +67,15 @@ public:
     std::vector<int64_t> level_dimension(uint16_t level) const;
     const std::vector<float>& level_downsamples() const;
     float level_downsample(uint16_t level) const;
+    const std::vector<int64_t>& level_tile_sizes() const;
+    std::vector<int64_t> level_tile_size(uint16_t level) const;
 
 private:
     uint16_t level_count_;
     uint16_t level_ndim_;
     std::vector<int64_t> level_dimensions_;
     std::vector<float> level_downsamples_;
+    std::vector<int64_t> level_tile_sizes_;
 };
 
 /**
@@ -91,6 +94,22 @@ class EXPORT_VISIBLE CuImage : public std::enable_shared_from_this<CuImage>
 public:
     CuImage(const filesystem::Path& path);
     CuImage(const filesystem::Path& path, const std::string& plugin_name);
+    /**
+     * Open an image whose file content is in memory.
+     *
+     * The memory is not copied (tiles are decoded directly from it), so `buffer` needs to stay valid during the
+     * lifetime of this object. `buffer_owner` (if given) is kept by this object until the image is closed, so it can
+     * own the memory.
+     *
+     * @param buffer Pointer to the content of the file
+     * @param size Size of the content in bytes
+     * @param name Name used as the path of the image
+     * @param buffer_owner Object keeping `buffer` valid
+     */
+    CuImage(const void* buffer,
+            size_t size,
+            const filesystem::Path& name = "<memory>",
+            std::shared_ptr<void> buffer_owner = nullptr);
     CuImage(const CuImage& cuimg) = delete;
     CuImage(CuImage&& cuimg);
     CuImage(const CuImage* cuimg,
@@ -153,7 +172,28 @@ public:
     std::set<std::string> associated_images() const;
     CuImage associated_image(const std::string& name) const;
 
-    void save(std::string file_path) const;
+    /**
+     * Save the image to a file.
+     *
+     * With the 'ppm' format, the (loaded) image is written to a PPM file. Otherwise, a tiled, pyramidal BigTIFF file
+     * is written (see `ImageWriter`). If the image is not loaded (opened from a file), its level 0 is read and
+     * written band by band.
+     *
+     * @param file_path
+     * @param format "tiff" or "ppm". If empty, "ppm" is used for paths ending with ".ppm" and "tiff" otherwise
+     * @param compression "jpeg", "deflate" or "raw"
+     * @param tile_size Size of (square) tiles
+     * @param quality JPEG quality (1-100) or deflate compression level (0-12). -1 for the default
+     * @param level_count Number of resolution levels (0: until a level fits in a tile)
+     * @param num_workers Number of threads compressing tiles (0: number of CPU cores)
+     */
+    void save(std::string file_path,
+              std::string format = std::string{},
+              std::string compression = "jpeg",
+              uint32_t tile_size = 256,
+              int32_t quality = -1,
+              uint16_t level_count = 0,
+              uint32_t num_workers = 0) const;
 
 private:
     using Mutex = std::mutex;
@@ -162,6 +202,8 @@ private:
     explicit CuImage();
 
     void ensure_init();
+    void parse_file();
+    void save_ppm(const std::string& file_path) const;
     bool crop_image(io::format::ImageMetadataDesc* metadata,
                     io::format::ImageReaderRegionRequestDesc* request,
                     io::format::ImageDataDesc* out_image_data) const;
@@ -177,8 +219,60 @@ private:
     bool is_loaded_ = false;
     DimIndices dim_indices_{};
     std::set<std::string> associated_images_;
+    std::shared_ptr<void> buffer_owner_; /// Keeps the memory of an image opened from memory valid
 };
 
+/**
+ * Writer of tiled, pyramidal BigTIFF images.
+ *
+ * Regions of the level 0 image are given (in any order) by `write_region()`. Tiles are compressed on a thread pool
+ * and lower-resolution levels are generated (2x2 box downsampling) while tiles are written. The file is complete
+ * once `close()` is called.
+ */
+class EXPORT_VISIBLE ImageWriter
+{
+public:
+    /**
+     * @param file_path
+     * @param shape Shape of the level 0 image ({height, width, channels})
+     * @param dtype Data type of the image (uint8 or uint16)
+     * @param compression "jpeg" (8-bit RGB or grayscale images), "deflate" or "raw"
+     * @param tile_size Size of (square) tiles. Needs to be a multiple of 16
+     * @param quality JPEG quality (1-100) or deflate compression level (0-12). -1 for the default
+     * @param level_count Number of resolution levels (0: until a level fits in a tile)
+     * @param num_workers Number of threads compressing tiles (0: number of CPU cores)
+     */
+    ImageWriter(const filesystem::Path& file_path,
+                const Shape& shape,
+                const DLDataType& dtype,
+                const std::string& compression = "jpeg",
+                uint32_t tile_size = 256,
+                int32_t quality = -1,
+                uint16_t level_count = 0,
+                uint32_t num_workers = 0);
+    ImageWriter(const ImageWriter&) = delete;
+    ~ImageWriter();
+
+    /**
+     * Write a region of the level 0 image.
+     *
+     * @param location Location ({x, y}) of the region. It needs to be a multiple of the tile size
+     * @param data Pixels of the region ("YXC" dimensions, on CPU memory). Its size needs to be a multiple of the tile
+     * size, except at the right and bottom edges of the image. Extra channels (e.g., alpha) are ignored
+     */
+    void write_region(const std::vector<int64_t>& location, const DLTensor& data);
+
+    /**
+     * Finish writing the file (lower-resolution levels and directories) and close it.
+     */
+    void close();
+
+    bool is_closed() const;
+
+private:
+    io::format::IImageFormat* image_formats_ = nullptr;
+    CuCIMFileHandle file_handle_{};
+};
 
 } // namespace cucim
 
@@ -20,6 +20,7 @@
 #include "file_path.h"
 #include <memory>
 #include <mutex>
+#include <vector>
 
 namespace cucim::filesystem
 {
@@ -94,6 +95,33 @@ bool EXPORT_VISIBLE close(const std::shared_ptr<CuFileDriver>& fd);
  */
 ssize_t EXPORT_VISIBLE pread(const std::shared_ptr<CuFileDriver>& fd, void* buf, size_t count, off_t file_offset, off_t buf_offset = 0);
 
+/**
+ * A request for reading a range of a file, used by `preadv()`.
+ */
+struct ReadRequest
+{
+    void* buf = nullptr; /// A buffer where read bytes are stored (either in CPU memory or in GPU memory)
+    size_t count = 0; /// The number of bytes to read
+    off_t file_offset = 0; /// An offset from the start of the file
+    off_t buf_offset = 0; /// An offset from the start of the buffer
+};
+
+/**
+ * Read multiple ranges from file driver `fd`. The file offset is not changed.
+ *
+ * If `num_workers` is larger than 1, the requests are distributed over up to `num_workers` threads (including the
+ * calling thread). Otherwise, the requests are processed sequentially in the calling thread. The worker threads (and
+ * their bounce buffers) are created on first use and reused by later calls.
+ *
+ * @param fd A std::shared_ptr object of CuFileDriver.
+ * @param requests A list of read requests.
+ * @param num_workers The maximum number of threads to use. Default value is 0 (sequential).
+ * @return A list of the number of bytes read for each request (-1 for a failed request).
+ */
+std::vector<ssize_t> EXPORT_VISIBLE preadv(const std::shared_ptr<CuFileDriver>& fd,
+                                           const std::vector<ReadRequest>& requests,
+                                           uint32_t num_workers = 0);
+
 /**
  * Write up to `count` bytes from the buffer `buf` at offset `buf_offset` to the file driver `fd` at offset
  * `file_offset` (from the start of the file). The file offset is not changed.
@@ -175,6 +203,7 @@ public:
     CuFileDriver(int fd, bool no_gds = false, bool use_mmap = false, const char* file_path = nullptr);
 
     ssize_t pread(void* buf, size_t count, off_t file_offset, off_t buf_offset = 0) const;
+    std::vector<ssize_t> preadv(const std::vector<ReadRequest>& requests, uint32_t num_workers = 0) const;
     ssize_t pwrite(const void* buf, size_t count, off_t file_offset, off_t buf_offset = 0);
 
     bool close();
@@ -21,6 +21,7 @@
 #include "cucim/filesystem/file_handle.h"
 #include "dlpack/dlpack.h"
 
+#include <array>
 #include <memory_resource>
 #include <string>
 
@@ -39,6 +40,7 @@ struct ResolutionInfoDesc
     uint16_t level_ndim;
     int64_t* level_dimensions;
     float* level_downsamples;
+    int64_t* level_tile_sizes; /// Tile size (width, height) of each level ((0, 0) if not tiled). Can be nullptr.
 };
 
 struct AssociatedImageInfoDesc
@@ -104,6 +106,7 @@ public:
     ImageMetadata& level_ndim(uint16_t level_ndim);
     ImageMetadata& level_dimensions(const std::pmr::vector<int64_t>& level_dimensions);
     ImageMetadata& level_downsamples(const std::pmr::vector<float>& level_downsamples);
+    ImageMetadata& level_tile_sizes(const std::pmr::vector<int64_t>& level_tile_sizes);
 
     // AssociatedImageInfoDesc
     ImageMetadata& image_count(uint16_t image_count);
@@ -132,6 +135,7 @@ private:
 
     std::pmr::vector<int64_t> level_dimensions_{ &res_ };
     std::pmr::vector<float> level_downsamples_{ &res_ };
+    std::pmr::vector<int64_t> level_tile_sizes_{ &res_ };
 
     std::pmr::vector<std::pmr::string> image_names_{ &res_ };
 #else
@@ -146,6 +150,7 @@ private:
 
     std::pmr::vector<int64_t> level_dimensions_{ &res_ };
     std::pmr::vector<float> level_downsamples_{ &res_ };
+    std::pmr::vector<int64_t> level_tile_sizes_{ &res_ };
 
     std::pmr::vector<std::string> image_names_{ &res_ };
 #endif
@@ -193,6 +198,18 @@ struct ImageParserDesc
      * @return
      */
     bool(CUCIM_ABI* close)(CuCIMFileHandle* handle);
+
+    /**
+     * Open an image file whose content is in memory.
+     *
+     * The memory is not copied so it needs to stay valid until the handle is closed.
+     *
+     * @param buffer Pointer to the content of the file
+     * @param size Size of the content in bytes
+     * @param name Name of the file (used as the path of the handle)
+     * @return
+     */
+    CuCIMFileHandle(CUCIM_ABI* open_buffer)(const void* buffer, size_t size, const char* name);
 };
 
 struct ImageReaderRegionRequestDesc
@@ -224,18 +241,49 @@ struct ImageReaderDesc
                           ImageMetadataDesc* out_metadata);
 };
 
+struct ImageWriterOptionsDesc
+{
+    const char* compression; /// Compression of tiles ("jpeg", "deflate" or "raw"). "jpeg" if nullptr or empty.
+    uint32_t tile_width; /// Width of tiles (multiple of 16). 256 if 0.
+    uint32_t tile_height; /// Height of tiles (multiple of 16). 256 if 0.
+    int32_t quality; /// JPEG quality (1-100) or deflate compression level (0-12). -1 for the default.
+    uint16_t level_count; /// Number of resolution levels (0: until a level fits in a tile).
+    uint32_t num_workers; /// Number of threads compressing tiles (0: number of CPU cores).
+};
+
 struct ImageWriterDesc
 {
     /**
+     * Create an image file to be written region by region.
+     *
+     * @param file_path
+     * @param metadata Metadata of the (level 0) image to write. `ndim`, `dims` ("YXC"), `shape` and `dtype` are used.
+     * @param options
+     * @return
+     */
+    CuCIMFileHandle(CUCIM_ABI* create)(const char* file_path,
+                                       const ImageMetadataDesc* metadata,
+                                       const ImageWriterOptionsDesc* options);
+
+    /**
+     * Write a region of the level 0 image.
+     *
+     * Lower-resolution levels are generated from the level 0 image by the writer.
+     *
+     * @param handle
+     * @param location Location (x, y) of the region. It needs to be aligned to the tile grid.
+     * @param image_data Pixels of the region ("YXC" dimensions, on CPU memory).
+     * @return
+     */
+    bool(CUCIM_ABI* write)(const CuCIMFileHandle* handle, const int64_t* location, const ImageDataDesc* image_data);
+
+    /**
+     * Finish writing the file and close it.
      *
      * @param handle
-     * @param metadata
-     * @param image_data
      * @return
      */
-    bool(CUCIM_ABI* write)(const CuCIMFileHandle* handle,
-                           const ImageMetadataDesc* metadata,
-                           const ImageDataDesc* image_data);
+    bool(CUCIM_ABI* close)(CuCIMFileHandle* handle);
 };
 
 struct ImageFormatDesc
@@ -251,7 +299,7 @@ struct ImageFormatDesc
 
 struct IImageFormat
 {
-    CUCIM_PLUGIN_INTERFACE("cucim::io::IImageFormat", 0, 1)
+    CUCIM_PLUGIN_INTERFACE("cucim::io::IImageFormat", 0, 3)
     ImageFormatDesc* formats;
     size_t format_count;
 };
@@ -24,6 +24,10 @@
 
 /**
  * Host memory allocator for exchanged data
+ *
+ * Memory is served from a size-class pool (see `cucim::memory::HostMemoryPool`) and must be released with
+ * `cucim_free()`, not `free()`.
+ *
  * @param size Number of bytes to allocate
  * @return Pointer to the allocated memory
  */
@@ -0,0 +1,155 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#ifndef CUCIM_MEMORY_POOL_H
+#define CUCIM_MEMORY_POOL_H
+
+#include "cucim/macros/defines.h"
+
+#include <array>
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+#include <mutex>
+#include <vector>
+
+namespace cucim::memory
+{
+
+/**
+ * Alignment (in bytes) of the memory returned by the host memory pool.
+ */
+constexpr size_t kHostPoolAlignment = 64;
+
+/**
+ * Smallest/largest block size (as a power of two) served from the pool. Smaller or larger requests are
+ * forwarded to the system allocator.
+ */
+constexpr size_t kHostPoolMinBlockShift = 12; // 4 KiB
+constexpr size_t kHostPoolMaxBlockShift = 28; // 256 MiB
+
+/**
+ * Each power-of-two range is split into this many size classes so that at most 25% of a block is wasted.
+ */
+constexpr size_t kHostPoolSubClasses = 4;
+constexpr size_t kHostPoolClassCount = (kHostPoolMaxBlockShift - kHostPoolMinBlockShift) * kHostPoolSubClasses + 1;
+
+struct HostMemoryPoolStats
+{
+    uint64_t allocations = 0; /// Number of allocation requests
+    uint64_t thread_cache_hits = 0; /// Requests served from the calling thread's cache
+    uint64_t global_hits = 0; /// Requests served from the shared free lists
+    uint64_t misses = 0; /// Pooled requests that had to allocate a new block
+    uint64_t bypassed = 0; /// Requests too small/large for the pool (or made while the pool was disabled)
+    uint64_t cached_bytes = 0; /// Bytes currently retained (thread caches + shared free lists)
+    uint64_t cached_blocks = 0; /// Blocks currently retained
+    uint64_t released_bytes = 0; /// Bytes given back to the system because of the retention limits or `trim()`
+};
+
+/**
+ * Size-class pooled allocator for host memory used by `cucim_malloc()`/`cucim_free()`.
+ *
+ * Region rasters and tile scratch buffers are allocated and released at a high rate while extracting patches.
+ * Instead of returning such blocks to the system allocator (and paying for page faults on the next allocation),
+ * freed blocks are kept in a small per-thread cache and then in a shared, size-bounded free list.
+ *
+ * Every block is prefixed with a header holding its size class so `deallocate()` doesn't need the size.
+ * Blocks allocated while the pool is disabled are released directly to the system.
+ */
+class EXPORT_VISIBLE HostMemoryPool
+{
+public:
+    static HostMemoryPool& instance();
+
+    void* allocate(size_t size);
+    void deallocate(void* ptr);
+
+    inline bool is_enabled() const
+    {
+        return enabled_.load(std::memory_order_relaxed);
+    }
+    /**
+     * Enable/disable pooling. Disabling the pool also releases all cached blocks.
+     */
+    void enable(bool value = true);
+
+    /**
+     * Maximum number of bytes retained in the shared free lists (default: 1 GiB).
+     */
+    size_t max_cached_bytes() const;
+    void max_cached_bytes(size_t nbytes);
+
+    /**
+     * Maximum number of blocks per size class retained in each thread's cache (default: 4, 0 disables
+     * thread caching).
+     */
+    size_t thread_cache_blocks() const;
+    void thread_cache_blocks(size_t count);
+
+    /**
+     * Release all cached blocks to the system.
+     *
+     * Blocks cached by other threads are released the next time the threads allocate or free memory.
+     */
+    void trim();
+
+    HostMemoryPoolStats stats() const;
+    void reset_stats();
+
+    /**
+     * Returns the index of the size class serving `size` bytes, or `kHostPoolClassCount` if `size` is not
+     * served by the pool.
+     */
+    static size_t size_class(size_t size);
+    /**
+     * Returns the block size (in bytes, excluding the header) of the size class.
+     */
+    static size_t class_block_size(size_t class_index);
+
+private:
+    HostMemoryPool() = default;
+
+    struct ThreadCache;
+    friend struct ThreadCache;
+
+    ThreadCache* thread_cache();
+    void* allocate_block(size_t class_index, size_t size);
+    void release_block(void* block);
+    bool push_global(size_t class_index, void* block, bool is_cached);
+    void* pop_global(size_t class_index);
+    void release_global();
+
+    std::atomic<bool> enabled_{ true };
+    std::atomic<size_t> max_cached_bytes_{ static_cast<size_t>(1) << 30 };
+    std::atomic<size_t> thread_cache_blocks_{ 4 };
+    std::atomic<uint64_t> trim_epoch_{ 0 };
+
+    std::mutex mutex_;
+    std::array<std::vector<void*>, kHostPoolClassCount> free_lists_;
+    size_t global_cached_bytes_ = 0;
+
+    std::atomic<uint64_t> allocations_{ 0 };
+    std::atomic<uint64_t> thread_cache_hits_{ 0 };
+    std::atomic<uint64_t> global_hits_{ 0 };
+    std::atomic<uint64_t> misses_{ 0 };
+    std::atomic<uint64_t> bypassed_{ 0 };
+    std::atomic<uint64_t> cached_bytes_{ 0 };
+    std::atomic<uint64_t> cached_blocks_{ 0 };
+    std::atomic<uint64_t> released_bytes_{ 0 };
+};
+
+} // namespace cucim::memory
+
+#endif // CUCIM_MEMORY_POOL_H
@@ -0,0 +1,190 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#ifndef CUCIM_PROFILER_H
+#define CUCIM_PROFILER_H
+
+#include "cucim/macros/defines.h"
+
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <mutex>
+#include <vector>
+
+namespace cucim::profiler
+{
+
+/**
+ * Stages of the region-reading path that are measured by the profiler.
+ */
+enum class Stage : uint8_t
+{
+    kReadRegion = 0, /// Whole `CuImage::read_region()` call
+    kFileRead, /// File I/O (pread) of compressed image data
+    kDecodeJpeg, /// JPEG decoding (libjpeg-turbo)
+    kDecodeDeflate, /// Deflate decoding (libdeflate)
+    kDecodeLibTiff, /// Decoding through libtiff (per tile/strip, or its RGBA interface as the slow path)
+    kCopy, /// Copying/cropping decoded pixels into the output buffer
+    kAllocation, /// Allocation (and initialization) of output/scratch buffers
+    kCount
+};
+
+constexpr size_t kStageCount = static_cast<size_t>(Stage::kCount);
+
+/**
+ * Number of buckets in the latency histogram.
+ *
+ * Bucket `i` counts the events whose duration `d` (in nanoseconds) satisfies `2^(i-1) <= d < 2^i`
+ * (bucket 0 holds zero-duration events and the last bucket holds everything larger).
+ */
+constexpr size_t kHistogramBins = 40;
+
+/**
+ * Maximum number of trace events kept in memory. Events beyond this limit are dropped (and counted).
+ */
+constexpr size_t kMaxTraceEvents = 1 << 20;
+
+/**
+ * Returns the name of the stage (e.g., "decode_jpeg").
+ */
+EXPORT_VISIBLE const char* stage_name(Stage stage);
+
+struct StageStats
+{
+    Stage stage = Stage::kReadRegion;
+    uint64_t count = 0;
+    uint64_t total_ns = 0;
+    uint64_t min_ns = 0;
+    uint64_t max_ns = 0;
+    uint64_t bytes = 0;
+    std::array<uint64_t, kHistogramBins> histogram{};
+};
+
+struct TraceEvent
+{
+    Stage stage = Stage::kReadRegion;
+    uint64_t start_ns = 0; /// relative to the time the profiler is enabled/reset
+    uint64_t duration_ns = 0;
+    uint64_t bytes = 0;
+    uint64_t thread_id = 0;
+};
+
+/**
+ * Process-wide profiler for the region-reading path.
+ *
+ * The profiler is disabled by default. While disabled, instrumented code only pays for a relaxed atomic load.
+ * Counters are lock-free; trace events (only recorded if tracing is requested) are guarded by a mutex.
+ */
+class EXPORT_VISIBLE Profiler
+{
+public:
+    static Profiler& instance();
+
+    inline bool is_enabled() const
+    {
+        return enabled_.load(std::memory_order_relaxed);
+    }
+    inline bool is_tracing() const
+    {
+        return tracing_.load(std::memory_order_relaxed);
+    }
+
+    void enable(bool trace = false);
+    void disable();
+    void reset();
+
+    /**
+     * Records an event for the stage.
+     *
+     * @param stage The stage the event belongs to
+     * @param start_ns Start time of the event in nanoseconds (value of `now_ns()`)
+     * @param duration_ns Duration of the event in nanoseconds
+     * @param bytes Number of bytes processed during the event (0 if not applicable)
+     */
+    void record(Stage stage, uint64_t start_ns, uint64_t duration_ns, uint64_t bytes = 0);
+
+    std::vector<StageStats> stats() const;
+    std::vector<TraceEvent> trace_events() const;
+    uint64_t dropped_trace_events() const;
+
+    static uint64_t now_ns();
+
+private:
+    Profiler();
+
+    struct AtomicStageStats
+    {
+        std::atomic<uint64_t> count{ 0 };
+        std::atomic<uint64_t> total_ns{ 0 };
+        std::atomic<uint64_t> min_ns{ UINT64_MAX };
+        std::atomic<uint64_t> max_ns{ 0 };
+        std::atomic<uint64_t> bytes{ 0 };
+        std::array<std::atomic<uint64_t>, kHistogramBins> histogram{};
+    };
+
+    std::atomic<bool> enabled_{ false };
+    std::atomic<bool> tracing_{ false };
+    std::atomic<uint64_t> origin_ns_{ 0 };
+    std::array<AtomicStageStats, kStageCount> stage_stats_;
+
+    mutable std::mutex trace_mutex_;
+    std::vector<TraceEvent> trace_events_;
+    std::atomic<uint64_t> dropped_trace_events_{ 0 };
+};
+
+/**
+ * Measures the lifetime of the object and records it to the profiler as an event of the given stage.
+ *
+ * Nothing is measured if the profiler is disabled when the object is constructed.
+ */
+class ScopedStage
+{
+public:
+    explicit ScopedStage(Stage stage, uint64_t bytes = 0) : stage_(stage), bytes_(bytes)
+    {
+        if (Profiler::instance().is_enabled())
+        {
+            start_ns_ = Profiler::now_ns();
+            active_ = true;
+        }
+    }
+    ScopedStage(const ScopedStage&) = delete;
+    ScopedStage& operator=(const ScopedStage&) = delete;
+
+    inline void add_bytes(uint64_t bytes)
+    {
+        bytes_ += bytes;
+    }
+
+    ~ScopedStage()
+    {
+        if (active_)
+        {
+            Profiler::instance().record(stage_, start_ns_, Profiler::now_ns() - start_ns_, bytes_);
+        }
+    }
+
+private:
+    Stage stage_;
+    uint64_t bytes_ = 0;
+    uint64_t start_ns_ = 0;
+    bool active_ = false;
+};
+
+} // namespace cucim::profiler
+
+#endif // CUCIM_PROFILER_H
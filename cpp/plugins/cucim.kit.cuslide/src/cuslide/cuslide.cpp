@@ -26,6 +26,8 @@
 //#include "tiffio.h"
 //#include "tif_dir.h"
 #include "tiff/tiff.h"
+#include "tiff/tiff_writer.h"
+#include "tiff/virtual_levels.h"
 #include <fcntl.h>
 #include <cassert>
 #include <cstring>
@@ -85,6 +87,13 @@ static CuCIMFileHandle CUCIM_ABI parser_open(const char* file_path)
     return tif->file_handle();
 }
 
+static CuCIMFileHandle CUCIM_ABI parser_open_buffer(const void* buffer, size_t size, const char* name)
+{
+    auto tif = new cuslide::tiff::TIFF(buffer, size, name);
+    tif->construct_ifds();
+    return tif->file_handle();
+}
+
 static bool CUCIM_ABI parser_parse(CuCIMFileHandle* handle, cucim::io::format::ImageMetadataDesc* out_metadata_desc)
 {
     if (!out_metadata_desc || !out_metadata_desc->handle)
@@ -100,6 +109,9 @@ static bool CUCIM_ABI parser_parse(CuCIMFileHandle* handle, cucim::io::format::I
 
     size_t ifd_count = tif->ifd_count();
     size_t level_count = tif->level_count();
+    // Lower-resolution levels generated on the fly (if the file has no small-enough level)
+    const cuslide::tiff::VirtualLevels* virtual_levels = tif->virtual_levels();
+    size_t virtual_level_count = virtual_levels ? virtual_levels->level_count() : 0;
     for (size_t i = 0; i < ifd_count; i++)
     {
         const std::shared_ptr<cuslide::tiff::IFD>& ifd = tif->ifd(i);
@@ -137,12 +149,25 @@ static bool CUCIM_ABI parser_parse(CuCIMFileHandle* handle, cucim::io::format::I
     std::pmr::vector<int64_t> shape(
         { level0_ifd->height(), level0_ifd->width(), level0_ifd->samples_per_pixel() }, &resource);
 
-    DLDataType dtype{ kDLUInt, 8, 1 };
+    DLDataType dtype{ kDLUInt, static_cast<uint8_t>(level0_ifd->read_bits_per_sample()), 1 };
 
     // TODO: Fill correct values for cucim::io::format::ImageMetadataDesc
-    // TODO: Do not assume channel names as 'RGB'
-    std::pmr::vector<std::string_view> channel_names(
-        { std::string_view{ "R" }, std::string_view{ "G" }, std::string_view{ "B" } }, &resource);
+    std::pmr::vector<std::string_view> channel_names(&resource);
+    const uint32_t samples_per_pixel = level0_ifd->samples_per_pixel();
+    if (samples_per_pixel <= 2)
+    {
+        channel_names.emplace_back(std::string_view{ "I" });
+    }
+    else
+    {
+        channel_names.emplace_back(std::string_view{ "R" });
+        channel_names.emplace_back(std::string_view{ "G" });
+        channel_names.emplace_back(std::string_view{ "B" });
+    }
+    if (samples_per_pixel == 2 || samples_per_pixel == 4)
+    {
+        channel_names.emplace_back(std::string_view{ "A" });
+    }
 
     // TODO: Set correct spacing value
     std::pmr::vector<float> spacing(&resource);
@@ -170,13 +195,32 @@ static bool CUCIM_ABI parser_parse(CuCIMFileHandle* handle, cucim::io::format::I
 
     const uint16_t level_ndim = 2;
     std::pmr::vector<int64_t> level_dimensions(&resource);
-    level_dimensions.reserve(level_count * 2);
+    level_dimensions.reserve((level_count + virtual_level_count) * 2);
     for (size_t i = 0; i < level_count; ++i)
     {
         const auto& level_ifd = tif->level_ifd(i);
         level_dimensions.emplace_back(level_ifd->width());
         level_dimensions.emplace_back(level_ifd->height());
     }
+    for (size_t i = 0; i < virtual_level_count; ++i)
+    {
+        level_dimensions.emplace_back(virtual_levels->level_width(i));
+        level_dimensions.emplace_back(virtual_levels->level_height(i));
+    }
+
+    std::pmr::vector<int64_t> level_tile_sizes(&resource);
+    level_tile_sizes.reserve((level_count + virtual_level_count) * 2);
+    for (size_t i = 0; i < level_count; ++i)
+    {
+        const auto& level_ifd = tif->level_ifd(i);
+        level_tile_sizes.emplace_back(level_ifd->tile_width());
+        level_tile_sizes.emplace_back(level_ifd->tile_height());
+    }
+    for (size_t i = 0; i < virtual_level_count; ++i)
+    {
+        level_tile_sizes.emplace_back(cuslide::tiff::VirtualLevels::kTileSize);
+        level_tile_sizes.emplace_back(cuslide::tiff::VirtualLevels::kTileSize);
+    }
 
     std::pmr::vector<float> level_downsamples(&resource);
     float orig_width = static_cast<float>(shape[1]);
@@ -186,6 +230,11 @@ static bool CUCIM_ABI parser_parse(CuCIMFileHandle* handle, cucim::io::format::I
         const auto& level_ifd = tif->level_ifd(i);
         level_downsamples.emplace_back(((orig_width / level_ifd->width()) + (orig_height / level_ifd->height())) / 2);
     }
+    for (size_t i = 0; i < virtual_level_count; ++i)
+    {
+        level_downsamples.emplace_back(
+            ((orig_width / virtual_levels->level_width(i)) + (orig_height / virtual_levels->level_height(i))) / 2);
+    }
 
     const size_t associated_image_count = tif->associated_image_count();
     std::pmr::vector<std::string_view> associated_image_names(&resource);
@@ -213,10 +262,11 @@ static bool CUCIM_ABI parser_parse(CuCIMFileHandle* handle, cucim::io::format::I
     out_metadata.origin(origin);
     out_metadata.direction(direction);
     out_metadata.coord_sys(coord_sys);
-    out_metadata.level_count(level_count);
+    out_metadata.level_count(level_count + virtual_level_count);
     out_metadata.level_ndim(level_ndim);
     out_metadata.level_dimensions(level_dimensions);
     out_metadata.level_downsamples(level_downsamples);
+    out_metadata.level_tile_sizes(level_tile_sizes);
     out_metadata.image_count(associated_image_count);
     out_metadata.image_names(associated_image_names);
     out_metadata.raw_data(raw_data);
@@ -245,24 +295,63 @@ static bool CUCIM_ABI reader_read(const CuCIMFileHandle* handle,
     return result;
 }
 
+static CuCIMFileHandle CUCIM_ABI writer_create(const char* file_path,
+                                               const cucim::io::format::ImageMetadataDesc* metadata,
+                                               const cucim::io::format::ImageWriterOptionsDesc* options)
+{
+    if (!metadata || metadata->ndim != 3 || !metadata->dims || std::string_view(metadata->dims) != "YXC")
+    {
+        throw std::invalid_argument("Only images with 'YXC' dimensions can be written!");
+    }
+    if (metadata->dtype.code != kDLUInt)
+    {
+        throw std::invalid_argument("Only images of unsigned integer type can be written!");
+    }
+    cucim::io::format::ImageWriterOptionsDesc default_options{ nullptr, 0, 0, -1, 0, 0 };
+    auto writer = new cuslide::tiff::TiffWriter(
+        file_path, static_cast<uint32_t>(metadata->shape[1]), static_cast<uint32_t>(metadata->shape[0]),
+        static_cast<uint16_t>(metadata->shape[2]), metadata->dtype.bits, options ? *options : default_options);
+    return writer->file_handle();
+}
+
 static bool CUCIM_ABI writer_write(const CuCIMFileHandle* handle,
-                                   const cucim::io::format::ImageMetadataDesc* metadata,
+                                   const int64_t* location,
                                    const cucim::io::format::ImageDataDesc* image_data)
 {
-    (void)handle;
-    (void)metadata;
-    (void)image_data;
+    auto writer = static_cast<cuslide::tiff::TiffWriter*>(handle->client_data);
+    writer->write_region(location[0], location[1], image_data->container);
+    return true;
+}
 
+static bool CUCIM_ABI writer_close(CuCIMFileHandle* handle)
+{
+    auto writer = static_cast<cuslide::tiff::TiffWriter*>(handle->client_data);
+    handle->client_data = nullptr;
+    if (!writer)
+    {
+        return true;
+    }
+    try
+    {
+        writer->close();
+    }
+    catch (...)
+    {
+        delete writer;
+        throw;
+    }
+    delete writer;
     return true;
 }
 
 void fill_interface(cucim::io::format::IImageFormat& iface)
 {
     static cucim::io::format::ImageCheckerDesc image_checker = { 0, 80, checker_is_valid };
-    static cucim::io::format::ImageParserDesc image_parser = { parser_open, parser_parse, parser_close };
+    static cucim::io::format::ImageParserDesc image_parser = { parser_open, parser_parse, parser_close,
+                                                                parser_open_buffer };
 
     static cucim::io::format::ImageReaderDesc image_reader = { reader_read };
-    static cucim::io::format::ImageWriterDesc image_writer = { writer_write };
+    static cucim::io::format::ImageWriterDesc image_writer = { writer_create, writer_write, writer_close };
 
     // clang-format off
     static cucim::io::format::ImageFormatDesc image_format_desc = {
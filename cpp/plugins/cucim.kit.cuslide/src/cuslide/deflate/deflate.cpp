@@ -22,6 +22,8 @@
 
 #include "deflate.h"
 
+#include <cucim/profiler/profiler.h>
+
 #include <stdexcept>
 #include <unistd.h>
 #include "libdeflate.h"
@@ -54,6 +56,7 @@ bool decode_deflate(int fd,
             throw std::runtime_error("Unable to allocate buffer for libdeflate!");
         }
 
+        cucim::profiler::ScopedStage file_read_stage(cucim::profiler::Stage::kFileRead, size);
         if (pread(fd, deflate_buf, size, offset) < 1)
         {
             throw std::runtime_error("Unable to read file for libdeflate!");
@@ -66,9 +69,39 @@ bool decode_deflate(int fd,
     }
 
     size_t out_size;
-    libdeflate_zlib_decompress(d, deflate_buf, size /*in_nbytes*/, *dest, dest_nbytes /*out_nbytes_avail*/, &out_size);
+    {
+        cucim::profiler::ScopedStage decode_stage(cucim::profiler::Stage::kDecodeDeflate, dest_nbytes);
+        libdeflate_zlib_decompress(
+            d, deflate_buf, size /*in_nbytes*/, *dest, dest_nbytes /*out_nbytes_avail*/, &out_size);
+    }
 
     libdeflate_free_decompressor(d);
+    if (fd != -1)
+    {
+        free(deflate_buf);
+    }
+    return true;
+}
+
+bool encode_deflate(const uint8_t* src, uint64_t src_nbytes, int level, std::vector<uint8_t>& out)
+{
+    struct libdeflate_compressor* c;
+
+    c = libdeflate_alloc_compressor(level < 0 ? 6 : level);
+
+    if (c == nullptr)
+    {
+        throw std::runtime_error("Unable to allocate compressor for libdeflate!");
+    }
+
+    out.resize(libdeflate_zlib_compress_bound(c, src_nbytes));
+    size_t out_size = libdeflate_zlib_compress(c, src, src_nbytes, out.data(), out.size());
+    libdeflate_free_compressor(c);
+    if (out_size == 0)
+    {
+        return false;
+    }
+    out.resize(out_size);
     return true;
 }
 
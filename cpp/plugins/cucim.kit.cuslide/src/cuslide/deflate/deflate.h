@@ -19,6 +19,8 @@
 
 #include <cucim/io/device.h>
 
+#include <vector>
+
 namespace cuslide::deflate
 {
 
@@ -29,5 +31,16 @@ bool decode_deflate(int fd,
                     uint8_t** dest,
                     uint64_t dest_nbytes,
                     const cucim::io::Device& out_device);
+
+/**
+ * Compresses data into a zlib stream (as stored in TIFF files with the deflate compression).
+ *
+ * @param src Data to compress
+ * @param src_nbytes Size of the data in bytes
+ * @param level Compression level (0-12). -1 for the default level (6)
+ * @param out Output buffer (resized to the size of the compressed data)
+ * @return true if succeeded
+ */
+bool encode_deflate(const uint8_t* src, uint64_t src_nbytes, int level, std::vector<uint8_t>& out);
 }
 #endif // CUSLIDE_DEFLATE_H
@@ -27,6 +27,8 @@
 
 #include "libjpeg_turbo.h"
 
+#include <cucim/profiler/profiler.h>
+
 #include <cstring>
 #include <jpeglib.h>
 #include <setjmp.h>
@@ -113,8 +115,11 @@ bool decode_libjpeg(int fd,
         if ((jpeg_buf = (unsigned char*)tjAlloc(size)) == nullptr)
             THROW_UNIX("allocating JPEG buffer");
 
-        if (pread(fd, jpeg_buf, size, offset) < 1)
-            THROW_UNIX("reading input file");
+        {
+            cucim::profiler::ScopedStage file_read_stage(cucim::profiler::Stage::kFileRead, size);
+            if (pread(fd, jpeg_buf, size, offset) < 1)
+                THROW_UNIX("reading input file");
+        }
     }
     else
     {
@@ -148,8 +153,12 @@ bool decode_libjpeg(int fd,
             THROW_UNIX("allocating uncompressed image buffer");
     }
 
-    if (tjDecompress2(tjInstance, jpeg_buf, size, (unsigned char*)*dest, width, 0, height, pixelFormat, flags) < 0)
-        THROW_TJ("decompressing JPEG image");
+    {
+        cucim::profiler::ScopedStage decode_stage(
+            cucim::profiler::Stage::kDecodeJpeg, static_cast<uint64_t>(width) * height * tjPixelSize[pixelFormat]);
+        if (tjDecompress2(tjInstance, jpeg_buf, size, (unsigned char*)*dest, width, 0, height, pixelFormat, flags) < 0)
+            THROW_TJ("decompressing JPEG image");
+    }
 
     if (fd != -1)
     {
@@ -168,6 +177,44 @@ bailout:
     return false;
 }
 
+bool encode_libjpeg(const uint8_t* src,
+                    uint32_t width,
+                    uint32_t height,
+                    uint16_t samples_per_pixel,
+                    int quality,
+                    std::vector<uint8_t>& out)
+{
+    int retval = 0;
+    (void)retval; // retval is used by macro THROW
+    tjhandle tjInstance = nullptr;
+    unsigned char* jpeg_buf = nullptr;
+    unsigned long jpeg_size = 0;
+    int pixelFormat = (samples_per_pixel == 1) ? TJPF_GRAY : TJPF_RGB;
+    int subsamp = (samples_per_pixel == 1) ? TJSAMP_GRAY : DEFAULT_SUBSAMP;
+
+    if (samples_per_pixel != 1 && samples_per_pixel != 3)
+        THROW("checking the number of samples", "JPEG compression needs 1 or 3 samples per pixel");
+
+    if ((tjInstance = tjInitCompress()) == nullptr)
+        THROW_TJ("initializing compressor");
+
+    if (tjCompress2(tjInstance, src, width, 0, height, pixelFormat, &jpeg_buf, &jpeg_size, subsamp,
+                    quality < 0 ? DEFAULT_QUALITY : quality, 0) < 0)
+        THROW_TJ("compressing image");
+
+    out.assign(jpeg_buf, jpeg_buf + jpeg_size);
+    tjFree(jpeg_buf);
+    tjDestroy(tjInstance);
+    return true;
+
+bailout:
+    if (tjInstance)
+        tjDestroy(tjInstance);
+    if (jpeg_buf)
+        tjFree(jpeg_buf);
+    return false;
+}
+
 bool read_jpeg_header_tables(const void* handle, const void* jpeg_buf, unsigned long jpeg_size)
 {
     tjinstance* instance = (tjinstance*)handle;
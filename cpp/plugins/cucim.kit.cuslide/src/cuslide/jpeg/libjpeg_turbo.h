@@ -19,6 +19,8 @@
 
 #include <cucim/io/device.h>
 
+#include <vector>
+
 namespace cuslide::jpeg
 {
 
@@ -45,6 +47,24 @@ bool decode_libjpeg(int fd,
  * @param jpeg_size jpeg buffer size
  * @return true if it succeeds
  */
+/**
+ * Compresses an 8-bit RGB (or grayscale) image into a JPEG stream (YCbCr 4:4:4 for RGB images).
+ *
+ * @param src Pixels (interleaved)
+ * @param width Width of the image
+ * @param height Height of the image
+ * @param samples_per_pixel 3 (RGB) or 1 (grayscale)
+ * @param quality JPEG quality (1-100). -1 for the default quality
+ * @param out Output buffer (resized to the size of the JPEG stream)
+ * @return true if succeeded
+ */
+bool encode_libjpeg(const uint8_t* src,
+                    uint32_t width,
+                    uint32_t height,
+                    uint16_t samples_per_pixel,
+                    int quality,
+                    std::vector<uint8_t>& out);
+
 bool read_jpeg_header_tables(const void* handle, const void* jpeg_buf, unsigned long jpeg_size);
 
 bool get_dimension(const void* image_buf, uint64_t offset, uint64_t size, int* out_width, int* out_height);
@@ -20,11 +20,16 @@
 #include "cuslide/jpeg/libjpeg_turbo.h"
 #include "cuslide/deflate/deflate.h"
 
+#include <cucim/profiler/profiler.h>
 #include <tiffio.h>
 #include <tiffiop.h> // this is not included in the released library
 #include <turbojpeg.h>
 #include <fmt/format.h>
 
+#include <algorithm>
+#include <mutex>
+#include <unistd.h>
+
 
 namespace cuslide::tiff
 {
@@ -61,6 +66,8 @@ IFD::IFD(TIFF* tiff, uint16_t index, ifd_offset_t offset) : tiff_(tiff), ifd_ind
     planar_config_ = tif_dir.td_planarconfig;
     photometric_ = tif_dir.td_photometric;
     compression_ = tif_dir.td_compression;
+    sample_format_ = tif_dir.td_sampleformat;
+    rows_per_strip_ = std::min(tif_dir.td_rowsperstrip, height_);
 
     //    ret = TIFFGetField(tif, TIFFTAG_IMAGEWIDTH, &width_);
     //    ret = TIFFGetField(tif, TIFFTAG_IMAGELENGTH, &height_);
@@ -100,6 +107,11 @@ IFD::IFD(TIFF* tiff, uint16_t index, ifd_offset_t offset) : tiff_(tiff), ifd_ind
             jpegtable_.insert(jpegtable_.end(), jpegtable_data, jpegtable_data + jpegtable_count);
         }
 
+    }
+
+    // Tile/strip offsets are needed to read regions piece by piece
+    if (is_read_optimizable() || is_read_piecewise())
+    {
         image_piece_count_ = tif_dir.td_stripoffset_entry.tdir_count;
 
         image_piece_offsets_.reserve(image_piece_count_);
@@ -152,8 +164,10 @@ bool IFD::read(const TIFF* tiff,
     {
         if (!raster)
         {
+            cucim::profiler::ScopedStage alloc_stage(cucim::profiler::Stage::kAllocation, w * h * samples_per_pixel_);
+            // No need to initialize the memory: read_region_tiles() writes every pixel of the region (either decoded
+            // pixels or the background value for out-of-boundary/empty tiles).
             raster = cucim_malloc(w * h * samples_per_pixel_); // RGB image
-            memset(raster, 0, w * h * 3);
         }
 
 
@@ -162,6 +176,21 @@ bool IFD::read(const TIFF* tiff,
             fmt::print(stderr, "[Error] Failed to read region with libjpeg!\n");
         }
     }
+    else if (is_read_piecewise())
+    {
+        n_ch = samples_per_pixel_;
+        const uint64_t raster_nbytes = w * h * n_ch * (bits_per_sample_ / 8);
+        if (!raster)
+        {
+            cucim::profiler::ScopedStage alloc_stage(cucim::profiler::Stage::kAllocation, raster_nbytes);
+            raster = cucim_malloc(raster_nbytes);
+        }
+
+        if (!read_region_pieces(tiff, this, sx, sy, w, h, raster, out_device))
+        {
+            fmt::print(stderr, "[Error] Failed to read region with libtiff!\n");
+        }
+    }
     else
     {
         // Handle out-of-boundary case
@@ -173,6 +202,7 @@ bool IFD::read(const TIFF* tiff,
                 "Cannot handle the out-of-boundary cases for a non-RGB image or a non-Jpeg/Deflate-compressed image."));
         }
 
+        std::lock_guard<std::mutex> client_lock(tiff->client_mutex_);
         if (tif->tif_curdir != ifd_index)
         {
             TIFFSetDirectory(tif, ifd_index);
@@ -190,6 +220,8 @@ bool IFD::read(const TIFF* tiff,
                 npixels = w * h;
                 if (!raster)
                 {
+                    cucim::profiler::ScopedStage alloc_stage(
+                        cucim::profiler::Stage::kAllocation, npixels * sizeof(uint32_t));
                     raster = cucim_malloc(npixels * sizeof(uint32_t));
                 }
                 img.col_offset = sx;
@@ -198,6 +230,8 @@ bool IFD::read(const TIFF* tiff,
 
                 if (raster != nullptr)
                 {
+                    cucim::profiler::ScopedStage decode_stage(
+                        cucim::profiler::Stage::kDecodeLibTiff, npixels * sizeof(uint32_t));
                     if (!TIFFRGBAImageGet(&img, (uint32_t*)raster, w, h))
                     {
                         memset(raster, 0, w * h * sizeof(uint32_t));
@@ -217,7 +251,7 @@ bool IFD::read(const TIFF* tiff,
     out_image_data->container.data = raster;
     out_image_data->container.ctx = DLContext{ static_cast<DLDeviceType>(cucim::io::DeviceType::kCPU), 0 };
     out_image_data->container.ndim = ndim;
-    out_image_data->container.dtype = metadata->dtype;
+    out_image_data->container.dtype = DLDataType{ kDLUInt, static_cast<uint8_t>(read_bits_per_sample()), 1 };
     out_image_data->container.shape = shape;
     out_image_data->container.strides = nullptr; // Tensor is compact and row-majored
     out_image_data->container.byte_offset = 0;
@@ -287,6 +321,22 @@ uint16_t IFD::compression() const
 {
     return compression_;
 }
+uint32_t IFD::rows_per_strip() const
+{
+    return rows_per_strip_;
+}
+uint32_t IFD::read_samples_per_pixel() const
+{
+    if (is_read_optimizable() || is_read_piecewise())
+    {
+        return samples_per_pixel_;
+    }
+    return 4; // RGBA
+}
+uint32_t IFD::read_bits_per_sample() const
+{
+    return is_read_piecewise() ? bits_per_sample_ : 8;
+}
 uint16_t IFD::subifd_count() const
 {
     return subifd_count_;
@@ -317,6 +367,17 @@ bool IFD::is_read_optimizable() const
            !tiff_->is_in_read_config(TIFF::kUseLibTiff);
 }
 
+bool IFD::is_read_piecewise() const
+{
+    return !is_read_optimizable() && (bits_per_sample_ == 8 || bits_per_sample_ == 16) && samples_per_pixel_ >= 1 &&
+           samples_per_pixel_ <= 4 && (planar_config_ == PLANARCONFIG_CONTIG || samples_per_pixel_ == 1) &&
+           (photometric_ == PHOTOMETRIC_MINISBLACK || photometric_ == PHOTOMETRIC_MINISWHITE ||
+            (photometric_ == PHOTOMETRIC_RGB && samples_per_pixel_ >= 3)) &&
+           sample_format_ == SAMPLEFORMAT_UINT && compression_ != COMPRESSION_OJPEG &&
+           (compression_ == COMPRESSION_NONE || TIFFIsCODECConfigured(compression_)) &&
+           !tiff_->is_in_read_config(TIFF::kUseLibTiff);
+}
+
 bool IFD::read_region_tiles(const TIFF* tiff,
                             const IFD* ifd,
                             const int64_t sx,
@@ -377,9 +438,15 @@ bool IFD::read_region_tiles(const TIFF* tiff,
     const int pixel_format = TJPF_RGB; // TODO: support other pixel format
     const int pixel_size_nbytes = tjPixelSize[pixel_format];
     const size_t tile_raster_nbytes = tw * th * pixel_size_nbytes;
-    uint8_t* tile_raster = static_cast<uint8_t*>(cucim_malloc(tile_raster_nbytes));
+    uint8_t* tile_raster = nullptr;
+    {
+        cucim::profiler::ScopedStage alloc_stage(cucim::profiler::Stage::kAllocation, tile_raster_nbytes);
+        tile_raster = static_cast<uint8_t*>(cucim_malloc(tile_raster_nbytes));
+    }
 
     int tiff_file = tiff->file_handle_.fd;
+    // If the file is in memory, tiles are decoded directly from the buffer (no copy).
+    uint8_t* tiff_buffer = const_cast<uint8_t*>(tiff->memory_buffer_.data);
 
 
     //    uint32_t nbytes_offset_sx = offset_sx * samples_per_pixel;
@@ -409,6 +476,11 @@ bool IFD::read_region_tiles(const TIFF* tiff,
         {
             auto tiledata_offset = static_cast<uint64_t>(ifd->image_piece_offsets_[index]);
             auto tiledata_size = static_cast<uint64_t>(ifd->image_piece_bytecounts_[index]);
+            // Pieces beyond the end of an in-memory file (truncated buffer) are read as background.
+            if (tiff_buffer && !tiff->memory_buffer_.contains(tiledata_offset, tiledata_size))
+            {
+                tiledata_size = 0;
+            }
 
             uint32_t tile_pixel_offset_x = (offset_x == offset_sx) ? pixel_offset_sx : 0;
             uint32_t nbytes_tile_pixel_size_x = (offset_x == offset_ex) ?
@@ -421,15 +493,18 @@ bool IFD::read_region_tiles(const TIFF* tiff,
             {
                 if (compression_method == COMPRESSION_JPEG)
                 {
-                    cuslide::jpeg::decode_libjpeg(tiff_file, nullptr, tiledata_offset, tiledata_size, jpegtable_data,
-                                                  jpegtable_count, &tile_raster, out_device);
+                    cuslide::jpeg::decode_libjpeg(tiff_file, tiff_buffer, tiledata_offset, tiledata_size,
+                                                  jpegtable_data, jpegtable_count, &tile_raster, out_device);
                 }
                 else
                 {
-                    cuslide::deflate::decode_deflate(tiff_file, nullptr, tiledata_offset, tiledata_size, &tile_raster,
-                                                     tile_raster_nbytes, out_device);
+                    cuslide::deflate::decode_deflate(tiff_file, tiff_buffer, tiledata_offset, tiledata_size,
+                                                     &tile_raster, tile_raster_nbytes, out_device);
                 }
 
+                cucim::profiler::ScopedStage copy_stage(
+                    cucim::profiler::Stage::kCopy, static_cast<uint64_t>(nbytes_tile_pixel_size_x) *
+                                                       (tile_pixel_offset_ey - tile_pixel_offset_sy + 1));
                 for (uint32_t ty = tile_pixel_offset_sy; ty <= tile_pixel_offset_ey;
                      ++ty, dest_pixel_index += dest_pixel_step_y, nbytes_tile_index += nbytes_tw)
                 {
@@ -497,7 +572,11 @@ bool IFD::read_region_tiles_boundary(const TIFF* tiff,
     uint32_t th = ifd->tile_height_;
 
     const size_t tile_raster_nbytes = tw * th * pixel_size_nbytes;
-    uint8_t* tile_raster = static_cast<uint8_t*>(cucim_malloc(tile_raster_nbytes));
+    uint8_t* tile_raster = nullptr;
+    {
+        cucim::profiler::ScopedStage alloc_stage(cucim::profiler::Stage::kAllocation, tile_raster_nbytes);
+        tile_raster = static_cast<uint8_t*>(cucim_malloc(tile_raster_nbytes));
+    }
 
     // TODO: revert this once we can get RGB data instead of RGBA
     uint32_t samples_per_pixel = 3; // ifd->samples_per_pixel();
@@ -566,6 +645,8 @@ bool IFD::read_region_tiles_boundary(const TIFF* tiff,
 
 
     int tiff_file = tiff->file_handle_.fd;
+    // If the file is in memory, tiles are decoded directly from the buffer (no copy).
+    uint8_t* tiff_buffer = const_cast<uint8_t*>(tiff->memory_buffer_.data);
 
     uint32_t dest_pixel_step_y = w * samples_per_pixel;
     uint32_t nbytes_tw = tw * samples_per_pixel;
@@ -592,6 +673,11 @@ bool IFD::read_region_tiles_boundary(const TIFF* tiff,
                 tiledata_offset = static_cast<uint64_t>(ifd->image_piece_offsets_[index]);
                 tiledata_size = static_cast<uint64_t>(ifd->image_piece_bytecounts_[index]);
             }
+            // Pieces beyond the end of an in-memory file (truncated buffer) are read as background.
+            if (tiff_buffer && !tiff->memory_buffer_.contains(tiledata_offset, tiledata_size))
+            {
+                tiledata_size = 0;
+            }
 
             uint32_t tile_pixel_offset_x = (offset_x == offset_sx) ? pixel_offset_sx : 0;
             uint32_t nbytes_tile_pixel_size_x = (offset_x == offset_ex) ?
@@ -636,15 +722,18 @@ bool IFD::read_region_tiles_boundary(const TIFF* tiff,
 
                 if (compression_method == COMPRESSION_JPEG)
                 {
-                    cuslide::jpeg::decode_libjpeg(tiff_file, nullptr, tiledata_offset, tiledata_size, jpegtable_data,
-                                                  jpegtable_count, &tile_raster, out_device);
+                    cuslide::jpeg::decode_libjpeg(tiff_file, tiff_buffer, tiledata_offset, tiledata_size,
+                                                  jpegtable_data, jpegtable_count, &tile_raster, out_device);
                 }
                 else
                 {
-                    cuslide::deflate::decode_deflate(tiff_file, nullptr, tiledata_offset, tiledata_size, &tile_raster,
-                                                     tile_raster_nbytes, out_device);
+                    cuslide::deflate::decode_deflate(tiff_file, tiff_buffer, tiledata_offset, tiledata_size,
+                                                     &tile_raster, tile_raster_nbytes, out_device);
                 }
 
+                cucim::profiler::ScopedStage copy_stage(
+                    cucim::profiler::Stage::kCopy, static_cast<uint64_t>(nbytes_tile_pixel_size_x) *
+                                                       (tile_pixel_offset_ey - tile_pixel_offset_sy + 1));
                 if (copy_partial)
                 {
                     uint32_t fill_gap_x = nbytes_tile_pixel_size_x - fixed_nbytes_tile_pixel_size_x;
@@ -704,6 +793,188 @@ bool IFD::read_region_tiles_boundary(const TIFF* tiff,
     return true;
 }
 
+bool IFD::read_region_pieces(const TIFF* tiff,
+                             const IFD* ifd,
+                             const int64_t sx,
+                             const int64_t sy,
+                             const int64_t w,
+                             const int64_t h,
+                             void* raster,
+                             const cucim::io::Device& out_device)
+{
+    (void)out_device;
+
+    ::TIFF* tif = tiff->tiff_client_;
+    const uint8_t background_value = tiff->background_value_;
+    const uint16_t compression_method = ifd->compression_;
+    const uint32_t width = ifd->width_;
+    const uint32_t height = ifd->height_;
+    const uint32_t bytes_per_sample = ifd->bits_per_sample_ / 8;
+    const uint64_t pixel_nbytes = static_cast<uint64_t>(ifd->samples_per_pixel_) * bytes_per_sample;
+
+    // A strip is a piece as wide as the image
+    const bool is_tiled = ifd->tile_width_ != 0;
+    const uint32_t piece_width = is_tiled ? ifd->tile_width_ : width;
+    const uint32_t piece_height = is_tiled ? ifd->tile_height_ : ifd->rows_per_strip_;
+    if (piece_width == 0 || piece_height == 0)
+    {
+        return false;
+    }
+    const uint32_t piece_columns = (width + piece_width - 1) / piece_width;
+    const uint64_t piece_stride = piece_width * pixel_nbytes;
+    const uint64_t piece_nbytes = piece_stride * piece_height;
+    const uint64_t dest_stride = w * pixel_nbytes;
+    auto dest_start_ptr = static_cast<uint8_t*>(raster);
+
+    // Part of the region inside the image
+    const int64_t x0 = std::max<int64_t>(sx, 0);
+    const int64_t y0 = std::max<int64_t>(sy, 0);
+    const int64_t x1 = std::min<int64_t>(sx + w, width);
+    const int64_t y1 = std::min<int64_t>(sy + h, height);
+    if (sx < 0 || sy < 0 || sx + w > width || sy + h > height)
+    {
+        memset(dest_start_ptr, background_value, h * dest_stride);
+    }
+    if (x0 >= x1 || y0 >= y1)
+    {
+        return true;
+    }
+
+    uint8_t* piece_raster = nullptr;
+    {
+        cucim::profiler::ScopedStage alloc_stage(cucim::profiler::Stage::kAllocation, piece_nbytes);
+        piece_raster = static_cast<uint8_t*>(cucim_malloc(piece_nbytes));
+    }
+
+    // Uncompressed pieces are read directly. Other compressions are decoded by libtiff (one piece at a time), whose
+    // handle can't be shared between threads.
+    const bool is_uncompressed = compression_method == COMPRESSION_NONE;
+    std::unique_lock<std::mutex> client_lock(tiff->client_mutex_, std::defer_lock);
+    if (!is_uncompressed)
+    {
+        client_lock.lock();
+        if (tif->tif_curdir != ifd->ifd_index_)
+        {
+            TIFFSetDirectory(tif, ifd->ifd_index_);
+        }
+    }
+    const int tiff_file = tiff->file_handle_.fd;
+    const uint8_t* tiff_buffer = tiff->memory_buffer_.data;
+    const bool is_byte_swapped = TIFFIsByteSwapped(tif);
+    const bool is_min_is_white = ifd->photometric_ == PHOTOMETRIC_MINISWHITE;
+
+    bool result = true;
+    for (int64_t piece_y = y0 / piece_height; piece_y <= (y1 - 1) / piece_height; ++piece_y)
+    {
+        for (int64_t piece_x = x0 / piece_width; piece_x <= (x1 - 1) / piece_width; ++piece_x)
+        {
+            const uint32_t index = static_cast<uint32_t>(piece_y * piece_columns + piece_x);
+            const int64_t px = piece_x * piece_width;
+            const int64_t py = piece_y * piece_height;
+            const int64_t copy_x0 = std::max<int64_t>(x0, px);
+            const int64_t copy_x1 = std::min<int64_t>(x1, px + piece_width);
+            const int64_t copy_y0 = std::max<int64_t>(y0, py);
+            const int64_t copy_y1 = std::min<int64_t>(y1, py + piece_height);
+            const uint64_t copy_nbytes = (copy_x1 - copy_x0) * pixel_nbytes;
+
+            const uint64_t piece_offset =
+                index < ifd->image_piece_offsets_.size() ? ifd->image_piece_offsets_[index] : 0;
+            const uint64_t piece_size =
+                index < ifd->image_piece_bytecounts_.size() ? ifd->image_piece_bytecounts_[index] : 0;
+            bool is_decoded = false;
+            // Bytes of the piece raster that hold decoded data, and that are copied to the region
+            uint64_t data_begin = 0;
+            uint64_t data_end = piece_nbytes;
+            uint64_t needed_end = piece_nbytes;
+            if (piece_size > 0)
+            {
+                if (is_uncompressed)
+                {
+                    // Only the bytes from the first to the last copied pixel (e.g., a few rows of a large strip)
+                    data_begin = (copy_y0 - py) * piece_stride + (copy_x0 - px) * pixel_nbytes;
+                    needed_end = (copy_y1 - 1 - py) * piece_stride + (copy_x1 - px) * pixel_nbytes;
+                    data_end = std::min(needed_end, piece_size);
+                    const uint64_t nbytes = data_end > data_begin ? data_end - data_begin : 0;
+                    cucim::profiler::ScopedStage read_stage(cucim::profiler::Stage::kFileRead, nbytes);
+                    if (nbytes == 0)
+                    {
+                        is_decoded = false;
+                    }
+                    else if (tiff_buffer)
+                    {
+                        // The piece may be beyond the end of the in-memory file (truncated buffer)
+                        is_decoded = tiff->memory_buffer_.contains(piece_offset, data_end);
+                        if (is_decoded)
+                        {
+                            memcpy(piece_raster + data_begin, tiff_buffer + piece_offset + data_begin, nbytes);
+                        }
+                    }
+                    else
+                    {
+                        is_decoded = ::pread(tiff_file, piece_raster + data_begin, nbytes, piece_offset + data_begin) ==
+                                     static_cast<ssize_t>(nbytes);
+                    }
+                    if (is_decoded && is_byte_swapped && bytes_per_sample == 2)
+                    {
+                        TIFFSwabArrayOfShort(reinterpret_cast<uint16_t*>(piece_raster + data_begin), nbytes / 2);
+                    }
+                }
+                else
+                {
+                    cucim::profiler::ScopedStage decode_stage(cucim::profiler::Stage::kDecodeLibTiff, piece_nbytes);
+                    is_decoded = (is_tiled ? TIFFReadEncodedTile(tif, index, piece_raster, piece_nbytes) :
+                                             TIFFReadEncodedStrip(tif, index, piece_raster, piece_nbytes)) >= 0;
+                }
+                if (!is_decoded)
+                {
+                    fmt::print(
+                        stderr, "[Error] Failed to read the piece {} of the IFD {}!\n", index, ifd->ifd_index_);
+                    result = false;
+                }
+                else if (is_min_is_white)
+                {
+                    // Zero is white: invert the values so that the region is like a MinIsBlack image
+                    if (bytes_per_sample == 2)
+                    {
+                        auto samples = reinterpret_cast<uint16_t*>(piece_raster + data_begin);
+                        std::transform(samples, samples + (data_end - data_begin) / 2, samples,
+                                       [](uint16_t value) { return static_cast<uint16_t>(~value); });
+                    }
+                    else
+                    {
+                        std::transform(piece_raster + data_begin, piece_raster + data_end, piece_raster + data_begin,
+                                       [](uint8_t value) { return static_cast<uint8_t>(~value); });
+                    }
+                }
+                if (is_decoded && data_end < needed_end)
+                {
+                    // The piece is shorter than its pixels (truncated): the missing ones are read as background
+                    memset(piece_raster + data_end, background_value, needed_end - data_end);
+                }
+            }
+
+            cucim::profiler::ScopedStage copy_stage(cucim::profiler::Stage::kCopy, copy_nbytes * (copy_y1 - copy_y0));
+            uint8_t* dest_ptr = dest_start_ptr + (copy_y0 - sy) * dest_stride + (copy_x0 - sx) * pixel_nbytes;
+            const uint8_t* src_ptr = piece_raster + (copy_y0 - py) * piece_stride + (copy_x0 - px) * pixel_nbytes;
+            for (int64_t y = copy_y0; y < copy_y1; ++y, dest_ptr += dest_stride, src_ptr += piece_stride)
+            {
+                if (is_decoded)
+                {
+                    memcpy(dest_ptr, src_ptr, copy_nbytes);
+                }
+                else
+                {
+                    // Empty (or corrupted) pieces
+                    memset(dest_ptr, background_value, copy_nbytes);
+                }
+            }
+        }
+    }
+
+    cucim_free(piece_raster);
+    return result;
+}
+
 } // namespace cuslide::tiff
 
 
@@ -31,6 +31,7 @@ namespace cuslide::tiff
 
 // Forward declaration.
 class TIFF;
+class VirtualLevels;
 
 class EXPORT_VISIBLE IFD : public std::enable_shared_from_this<IFD>
 {
@@ -56,6 +57,21 @@ public:
                                            void* raster,
                                            const cucim::io::Device& out_device);
 
+    /**
+     * Reads a region by decoding only the tiles (or strips) intersecting the region.
+     *
+     * Pixels out of the boundary of the image (or of empty tiles) are set to the background value. Regions have
+     * `samples_per_pixel()` channels of `bits_per_sample()` bits (8 or 16).
+     */
+    static bool read_region_pieces(const TIFF* tiff,
+                                   const IFD* ifd,
+                                   const int64_t sx,
+                                   const int64_t sy,
+                                   const int64_t w,
+                                   const int64_t h,
+                                   void* raster,
+                                   const cucim::io::Device& out_device);
+
     bool read(const TIFF* tiff,
               const cucim::io::format::ImageMetadataDesc* metadata,
               const cucim::io::format::ImageReaderRegionRequestDesc* request,
@@ -78,6 +94,17 @@ public:
     uint16_t planar_config() const;
     uint16_t photometric() const;
     uint16_t compression() const;
+    uint32_t rows_per_strip() const;
+
+    /**
+     * Returns the number of channels of regions read from the IFD (4 (RGBA) if the IFD is read with libtiff's RGBA
+     * interface).
+     */
+    uint32_t read_samples_per_pixel() const;
+    /**
+     * Returns the number of bits per sample of regions read from the IFD.
+     */
+    uint32_t read_bits_per_sample() const;
 
     uint16_t subifd_count() const;
     std::vector<uint64_t>& subifd_offsets();
@@ -89,8 +116,9 @@ public:
     // Hidden methods for benchmarking
     void write_offsets_(const char* file_path);
 
-    // Make TIFF available to access private members of IFD
+    // Make TIFF (and VirtualLevels) available to access private members of IFD
     friend class TIFF;
+    friend class VirtualLevels;
 
 private:
     TIFF* tiff_; // cannot use shared_ptr as IFD is created during the construction of TIFF using 'new'
@@ -111,6 +139,8 @@ private:
     uint16_t planar_config_ = 0;
     uint16_t photometric_ = 0;
     uint16_t compression_ = 0;
+    uint16_t sample_format_ = 0;
+    uint32_t rows_per_strip_ = 0;
 
     uint16_t subifd_count_ = 0;
     std::vector<uint64_t> subifd_offsets_;
@@ -129,6 +159,11 @@ private:
      * @return
      */
     bool is_read_optimizable() const;
+    /**
+     * Returns true if regions can be read with `read_region_pieces()` (any compression supported by libtiff, unsigned
+     * 8/16-bit grayscale or RGB(A) pixels).
+     */
+    bool is_read_piecewise() const;
 };
 } // namespace cuslide::tiff
 
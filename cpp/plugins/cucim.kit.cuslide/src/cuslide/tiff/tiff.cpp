@@ -16,6 +16,7 @@
 
 #include "tiff.h"
 #include "ifd.h"
+#include "virtual_levels.h"
 #include "cuslide/jpeg/libjpeg_turbo.h"
 
 #include <algorithm>
@@ -186,6 +187,74 @@ static void parse_philips_tiff_metadata(const pugi::xml_node& node,
     }
 }
 
+// libtiff client procedures for files held in memory (MemoryBuffer)
+static tmsize_t memory_read_proc(thandle_t handle, void* buf, tmsize_t size)
+{
+    auto memory = static_cast<MemoryBuffer*>(handle);
+    if (size <= 0 || memory->offset >= memory->size)
+    {
+        return 0;
+    }
+    uint64_t nbytes = std::min(static_cast<uint64_t>(size), memory->size - memory->offset);
+    memcpy(buf, memory->data + memory->offset, nbytes);
+    memory->offset += nbytes;
+    return static_cast<tmsize_t>(nbytes);
+}
+
+static tmsize_t memory_write_proc(thandle_t, void*, tmsize_t)
+{
+    return -1; // read-only
+}
+
+static toff_t memory_seek_proc(thandle_t handle, toff_t offset, int whence)
+{
+    auto memory = static_cast<MemoryBuffer*>(handle);
+    int64_t base = 0;
+    switch (whence)
+    {
+    case SEEK_SET:
+        break;
+    case SEEK_CUR:
+        base = memory->offset;
+        break;
+    case SEEK_END:
+        base = memory->size;
+        break;
+    default:
+        return static_cast<toff_t>(-1);
+    }
+    int64_t new_offset = base + static_cast<int64_t>(offset);
+    if (new_offset < 0)
+    {
+        return static_cast<toff_t>(-1);
+    }
+    memory->offset = new_offset;
+    return memory->offset;
+}
+
+static int memory_close_proc(thandle_t)
+{
+    return 0;
+}
+
+static toff_t memory_size_proc(thandle_t handle)
+{
+    return static_cast<MemoryBuffer*>(handle)->size;
+}
+
+static int memory_map_proc(thandle_t handle, void** base, toff_t* size)
+{
+    // Let libtiff read strips/tiles directly from the buffer
+    auto memory = static_cast<MemoryBuffer*>(handle);
+    *base = const_cast<uint8_t*>(memory->data);
+    *size = memory->size;
+    return 1;
+}
+
+static void memory_unmap_proc(thandle_t, void*, toff_t)
+{
+}
+
 TIFF::~TIFF()
 {
     close();
@@ -217,6 +286,32 @@ TIFF::TIFF(const cucim::filesystem::Path& file_path, int mode, uint64_t read_con
 {
     read_config_ = read_config;
 }
+TIFF::TIFF(const void* buffer, uint64_t size, const cucim::filesystem::Path& name) : file_path_(name)
+{
+    if (buffer == nullptr)
+    {
+        throw std::invalid_argument(fmt::format("Cannot open {}: the buffer is empty!", name));
+    }
+    // Copy file name (Allocated memory would be freed at close() method.)
+    char* file_path_cstr = static_cast<char*>(cucim_malloc(name.size() + 1));
+    memcpy(file_path_cstr, name.c_str(), name.size());
+    file_path_cstr[name.size()] = '\0';
+
+    memory_buffer_ = MemoryBuffer{ static_cast<const uint8_t*>(buffer), size, 0 };
+    tiff_client_ = ::TIFFClientOpen(file_path_cstr, "r", &memory_buffer_, memory_read_proc, memory_write_proc,
+                                    memory_seek_proc, memory_close_proc, memory_size_proc, memory_map_proc,
+                                    memory_unmap_proc);
+    if (tiff_client_ == nullptr)
+    {
+        cucim_free(file_path_cstr);
+        throw std::invalid_argument(fmt::format("Cannot open {} as a TIFF file!", name));
+    }
+    file_handle_ = CuCIMFileHandle{ -1, nullptr, FileHandleType::kMemoryMapped, file_path_cstr, this };
+
+    is_big_endian_ = ::TIFFIsBigEndian(tiff_client_);
+
+    metadata_ = new json{};
+}
 
 std::shared_ptr<TIFF> TIFF::open(const cucim::filesystem::Path& file_path, int mode)
 {
@@ -236,11 +331,13 @@ std::shared_ptr<TIFF> TIFF::open(const cucim::filesystem::Path& file_path, int m
 
 void TIFF::close()
 {
+    virtual_levels_.reset();
     if (tiff_client_)
     {
         TIFFClose(tiff_client_);
         tiff_client_ = nullptr;
     }
+    memory_buffer_ = MemoryBuffer{};
     if (file_handle_.path)
     {
         cucim_free(file_handle_.path);
@@ -306,6 +403,8 @@ void TIFF::construct_ifds()
             return height_a > height_b;
         }
     });
+
+    virtual_levels_ = VirtualLevels::create(this);
 }
 void TIFF::resolve_vendor_format()
 {
@@ -545,13 +644,14 @@ bool TIFF::read(const cucim::io::format::ImageMetadataDesc* metadata,
     // TODO: assume length of location/size to 2.
     constexpr int32_t ndims = 2;
 
-    if (request->level >= level_to_ifd_idx_.size())
+    const size_t file_level_count = level_to_ifd_idx_.size();
+    const size_t total_level_count = file_level_count + (virtual_levels_ ? virtual_levels_->level_count() : 0);
+    if (request->level >= total_level_count)
     {
-        throw std::invalid_argument(fmt::format(
-            "Invalid level ({}) in the request! (Should be < {})", request->level, level_to_ifd_idx_.size()));
+        throw std::invalid_argument(
+            fmt::format("Invalid level ({}) in the request! (Should be < {})", request->level, total_level_count));
     }
     auto main_ifd = ifds_[level_to_ifd_idx_[0]];
-    auto ifd = ifds_[level_to_ifd_idx_[request->level]];
     auto original_img_width = main_ifd->width();
     auto original_img_height = main_ifd->height();
 
@@ -581,6 +681,11 @@ bool TIFF::read(const cucim::io::format::ImageMetadataDesc* metadata,
     {
         request->location[i] /= downsample_factor;
     }
+    if (request->level >= file_level_count)
+    {
+        return virtual_levels_->read(request->level - file_level_count, metadata, request, out_image_data);
+    }
+    auto ifd = ifds_[level_to_ifd_idx_[request->level]];
     return ifd->read(this, metadata, request, out_image_data);
 }
 
@@ -640,8 +745,15 @@ bool TIFF::read_associated_image(const cucim::io::format::ImageMetadataDesc* met
             const void* jpegtable_data = image_ifd->jpegtable_.data();
             uint32_t jpegtable_count = image_ifd->jpegtable_.size();
 
-            if (!cuslide::jpeg::decode_libjpeg(file_handle_.fd, nullptr /*jpeg_buf*/, offset, size, jpegtable_data,
-                                               jpegtable_count, &raster, out_device))
+            if (memory_buffer_.data && !memory_buffer_.contains(offset, size))
+            {
+                cucim_free(raster);
+                fmt::print(stderr, "[Error] The associated image is beyond the end of the in-memory file!\n");
+                return false;
+            }
+
+            if (!cuslide::jpeg::decode_libjpeg(file_handle_.fd, const_cast<uint8_t*>(memory_buffer_.data), offset,
+                                               size, jpegtable_data, jpegtable_count, &raster, out_device))
             {
                 cucim_free(raster);
                 fmt::print(stderr, "[Error] Failed to read region with libjpeg!\n");
@@ -811,6 +923,10 @@ CuCIMFileHandle TIFF::file_handle() const
 {
     return file_handle_;
 }
+const uint8_t* TIFF::file_buffer() const
+{
+    return memory_buffer_.data;
+}
 ::TIFF* TIFF::client() const
 {
     return tiff_client_;
@@ -835,6 +951,10 @@ size_t TIFF::level_count() const
 {
     return level_to_ifd_idx_.size();
 }
+VirtualLevels* TIFF::virtual_levels() const
+{
+    return virtual_levels_.get();
+}
 const std::map<std::string, AssociatedImageBufferDesc>& TIFF::associated_images() const
 {
     return associated_images_;
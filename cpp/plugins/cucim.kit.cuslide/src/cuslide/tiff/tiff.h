@@ -32,12 +32,31 @@
 #include <memory>
 #include <vector>
 #include <map>
+#include <mutex>
 
 typedef struct tiff TIFF;
 
 namespace cuslide::tiff
 {
 
+class VirtualLevels;
+
+/**
+ * Content of a TIFF file held in memory (not owned) and the current offset used by libtiff.
+ */
+struct MemoryBuffer
+{
+    const uint8_t* data = nullptr;
+    uint64_t size = 0;
+    uint64_t offset = 0;
+
+    /// Returns true if the `nbytes` bytes at `pos` are within the buffer.
+    bool contains(uint64_t pos, uint64_t nbytes) const
+    {
+        return pos <= size && nbytes <= size - pos;
+    }
+};
+
 /**
  * TIFF file handler class.
  *
@@ -49,6 +68,11 @@ class EXPORT_VISIBLE TIFF : public std::enable_shared_from_this<TIFF>
 public:
     TIFF(const cucim::filesystem::Path& file_path, int mode);
     TIFF(const cucim::filesystem::Path& file_path, int mode, uint64_t config);
+    /**
+     * Open a TIFF file whose content is in memory. The memory is not copied: tiles are decoded directly from
+     * `buffer`, which needs to stay valid until the object is closed.
+     */
+    TIFF(const void* buffer, uint64_t size, const cucim::filesystem::Path& name);
     static std::shared_ptr<TIFF> open(const cucim::filesystem::Path& file_path, int mode);
     static std::shared_ptr<TIFF> open(const cucim::filesystem::Path& file_path, int mode, uint64_t config);
     void close();
@@ -70,12 +94,22 @@ public:
 
     cucim::filesystem::Path file_path() const;
     CuCIMFileHandle file_handle() const;
+    /**
+     * Returns the content of the file if the file is in memory, nullptr otherwise.
+     */
+    const uint8_t* file_buffer() const;
     ::TIFF* client() const;
     const std::vector<ifd_offset_t>& ifd_offsets() const;
     std::shared_ptr<IFD> ifd(size_t index) const;
     std::shared_ptr<IFD> level_ifd(size_t level_index) const;
     size_t ifd_count() const;
     size_t level_count() const;
+    /**
+     * Returns the lower-resolution levels generated from the smallest level (nullptr if there is none).
+     *
+     * Virtual levels follow the levels of the file (`level_count()`) in the metadata.
+     */
+    VirtualLevels* virtual_levels() const;
     const std::map<std::string, AssociatedImageBufferDesc>& associated_images() const;
     size_t associated_image_count() const;
     bool is_big_endian() const;
@@ -99,10 +133,12 @@ public:
 
     // Make IFD available to access private members of TIFF
     friend class IFD;
+    friend class VirtualLevels;
 
 private:
     cucim::filesystem::Path file_path_;
     CuCIMFileHandle file_handle_{};
+    MemoryBuffer memory_buffer_{}; /// File content if the file is in memory
     ::TIFF* tiff_client_ = nullptr;
     std::vector<ifd_offset_t> ifd_offsets_; /// IFD offset for an index (IFD index)
     std::vector<std::shared_ptr<IFD>> ifds_; /// IFD object for an index (IFD index)
@@ -114,6 +150,8 @@ private:
     uint64_t read_config_ = 0;
     TiffType tiff_type_ = TiffType::Generic;
     void* metadata_ = nullptr;
+    mutable std::mutex client_mutex_; /// Guards `tiff_client_` (libtiff's handle is not thread-safe)
+    std::unique_ptr<VirtualLevels> virtual_levels_;
 };
 } // namespace cuslide::tiff
 
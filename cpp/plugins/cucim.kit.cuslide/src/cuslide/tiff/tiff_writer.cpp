@@ -0,0 +1,702 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "tiff_writer.h"
+
+#include "cuslide/deflate/deflate.h"
+#include "cuslide/jpeg/libjpeg_turbo.h"
+
+#include <cucim/memory/memory_manager.h>
+#include <fmt/format.h>
+
+#include <algorithm>
+#include <cerrno>
+#include <cstring>
+#include <fcntl.h>
+#include <iterator>
+#include <stdexcept>
+#include <unistd.h>
+
+namespace cuslide::tiff
+{
+
+// TIFF tags/values written (see https://www.awaresystems.be/imaging/tiff/tifftags.html)
+constexpr uint16_t kTagNewSubfileType = 254;
+constexpr uint16_t kTagImageWidth = 256;
+constexpr uint16_t kTagImageLength = 257;
+constexpr uint16_t kTagBitsPerSample = 258;
+constexpr uint16_t kTagCompression = 259;
+constexpr uint16_t kTagPhotometric = 262;
+constexpr uint16_t kTagSamplesPerPixel = 277;
+constexpr uint16_t kTagPlanarConfig = 284;
+constexpr uint16_t kTagSoftware = 305;
+constexpr uint16_t kTagTileWidth = 322;
+constexpr uint16_t kTagTileLength = 323;
+constexpr uint16_t kTagTileOffsets = 324;
+constexpr uint16_t kTagTileByteCounts = 325;
+constexpr uint16_t kTagExtraSamples = 338;
+constexpr uint16_t kTagYCbCrSubSampling = 530;
+
+constexpr uint16_t kTypeAscii = 2;
+constexpr uint16_t kTypeShort = 3;
+constexpr uint16_t kTypeLong = 4;
+constexpr uint16_t kTypeLong8 = 16;
+
+constexpr uint16_t kCompressionNone = 1;
+constexpr uint16_t kCompressionJpeg = 7;
+constexpr uint16_t kCompressionAdobeDeflate = 8;
+
+constexpr uint16_t kPhotometricMinIsBlack = 1;
+constexpr uint16_t kPhotometricRGB = 2;
+constexpr uint16_t kPhotometricYCbCr = 6;
+
+constexpr uint32_t kDefaultTileSize = 256;
+constexpr uint64_t kBigTiffHeaderSize = 16;
+
+static void write_all(int fd, const void* data, uint64_t size, uint64_t offset)
+{
+    auto ptr = static_cast<const uint8_t*>(data);
+    while (size > 0)
+    {
+        ssize_t written = ::pwrite(fd, ptr, size, offset);
+        if (written < 0)
+        {
+            if (errno == EINTR)
+            {
+                continue;
+            }
+            throw std::runtime_error(fmt::format("Writing the TIFF file failed: {}", strerror(errno)));
+        }
+        ptr += written;
+        offset += written;
+        size -= written;
+    }
+}
+
+template <typename T>
+static void downsample_2x2(const T* src,
+                           uint32_t src_width,
+                           uint32_t src_height,
+                           uint32_t tile_width,
+                           uint16_t samples_per_pixel,
+                           T* dest,
+                           uint32_t dest_x,
+                           uint32_t dest_y)
+{
+    const uint32_t width = (src_width + 1) / 2;
+    const uint32_t height = (src_height + 1) / 2;
+    const uint64_t row_stride = static_cast<uint64_t>(tile_width) * samples_per_pixel;
+    for (uint32_t y = 0; y < height; ++y)
+    {
+        const T* row0 = src + (2 * y) * row_stride;
+        const T* row1 = src + std::min(2 * y + 1, src_height - 1) * row_stride;
+        T* out = dest + (dest_y + y) * row_stride + static_cast<uint64_t>(dest_x) * samples_per_pixel;
+        for (uint32_t x = 0; x < width; ++x)
+        {
+            const uint64_t x0 = static_cast<uint64_t>(2 * x) * samples_per_pixel;
+            const uint64_t x1 = static_cast<uint64_t>(std::min(2 * x + 1, src_width - 1)) * samples_per_pixel;
+            for (uint16_t c = 0; c < samples_per_pixel; ++c)
+            {
+                uint32_t sum = row0[x0 + c] + row0[x1 + c] + row1[x0 + c] + row1[x1 + c];
+                *out++ = static_cast<T>((sum + 2) / 4);
+            }
+        }
+    }
+}
+
+TiffWriter::TiffWriter(const cucim::filesystem::Path& file_path,
+                       uint32_t width,
+                       uint32_t height,
+                       uint16_t samples_per_pixel,
+                       uint16_t bits_per_sample,
+                       const cucim::io::format::ImageWriterOptionsDesc& options)
+    : file_path_(file_path), samples_per_pixel_(samples_per_pixel), bits_per_sample_(bits_per_sample)
+{
+    if (width == 0 || height == 0)
+    {
+        throw std::invalid_argument("The image to write is empty!");
+    }
+    if (samples_per_pixel < 1 || samples_per_pixel > 4)
+    {
+        throw std::invalid_argument(
+            fmt::format("Images with {} samples per pixel cannot be written (should be 1-4)!", samples_per_pixel));
+    }
+    if (bits_per_sample != 8 && bits_per_sample != 16)
+    {
+        throw std::invalid_argument(
+            fmt::format("Images with {} bits per sample cannot be written (should be 8 or 16)!", bits_per_sample));
+    }
+
+    std::string compression = (options.compression && *options.compression) ? options.compression : "jpeg";
+    if (compression == "jpeg")
+    {
+        if (bits_per_sample != 8 || (samples_per_pixel != 1 && samples_per_pixel != 3))
+        {
+            throw std::invalid_argument(
+                "JPEG compression needs 8-bit RGB or grayscale images (use 'deflate' compression instead)!");
+        }
+        compression_ = kCompressionJpeg;
+    }
+    else if (compression == "deflate")
+    {
+        compression_ = kCompressionAdobeDeflate;
+    }
+    else if (compression == "raw")
+    {
+        compression_ = kCompressionNone;
+    }
+    else
+    {
+        throw std::invalid_argument(
+            fmt::format("Compression '{}' is not supported (should be 'jpeg', 'deflate' or 'raw')!", compression));
+    }
+    quality_ = options.quality;
+
+    tile_width_ = options.tile_width ? options.tile_width : kDefaultTileSize;
+    tile_height_ = options.tile_height ? options.tile_height : kDefaultTileSize;
+    if (tile_width_ % 16 != 0 || tile_height_ % 16 != 0)
+    {
+        throw std::invalid_argument(
+            fmt::format("Tile size ({}x{}) should be a multiple of 16!", tile_width_, tile_height_));
+    }
+
+    // Each level is half the size of the previous one, until it fits in a tile (or `level_count` is reached).
+    uint32_t level_width = width;
+    uint32_t level_height = height;
+    while (true)
+    {
+        Level level;
+        level.width = level_width;
+        level.height = level_height;
+        level.columns = (level_width + tile_width_ - 1) / tile_width_;
+        level.rows = (level_height + tile_height_ - 1) / tile_height_;
+        level.offsets.resize(static_cast<size_t>(level.columns) * level.rows, 0);
+        level.byte_counts.resize(static_cast<size_t>(level.columns) * level.rows, 0);
+        levels_.emplace_back(std::move(level));
+
+        bool is_last = options.level_count ? levels_.size() >= options.level_count :
+                                             (level_width <= tile_width_ && level_height <= tile_height_);
+        if (is_last || (level_width == 1 && level_height == 1))
+        {
+            break;
+        }
+        level_width = (level_width + 1) / 2;
+        level_height = (level_height + 1) / 2;
+    }
+    written_tiles_.resize(levels_[0].offsets.size(), false);
+
+    // Copy file path (Allocated memory would be freed at close() method.)
+    file_path_cstr_ = static_cast<char*>(cucim_malloc(file_path.size() + 1));
+    memcpy(file_path_cstr_, file_path.c_str(), file_path.size());
+    file_path_cstr_[file_path.size()] = '\0';
+
+    fd_ = ::open(file_path_cstr_, O_WRONLY | O_CREAT | O_TRUNC, 0666);
+    if (fd_ == -1)
+    {
+        cucim_free(file_path_cstr_);
+        file_path_cstr_ = nullptr;
+        throw std::invalid_argument(fmt::format("Cannot create {}!", file_path));
+    }
+    // The header is written by close() once the offset of the first directory is known.
+    file_end_ = kBigTiffHeaderSize;
+
+    uint32_t num_workers = options.num_workers ? options.num_workers : std::thread::hardware_concurrency();
+    num_workers = std::max(num_workers, 1U);
+    // Bound the memory used by the tiles waiting for compression
+    max_queued_ = num_workers * 2;
+    workers_.reserve(num_workers);
+    for (uint32_t i = 0; i < num_workers; ++i)
+    {
+        workers_.emplace_back(&TiffWriter::worker_loop, this);
+    }
+}
+
+TiffWriter::~TiffWriter()
+{
+    try
+    {
+        close();
+    }
+    catch (const std::exception& e)
+    {
+        fmt::print(stderr, "[Error] Failed to write {}: {}\n", file_path_, e.what());
+    }
+}
+
+CuCIMFileHandle TiffWriter::file_handle()
+{
+    return CuCIMFileHandle{ fd_, nullptr, FileHandleType::kPosix, file_path_cstr_, this };
+}
+
+void TiffWriter::write_region(int64_t sx, int64_t sy, const DLTensor& region)
+{
+    rethrow_error();
+    if (fd_ == -1)
+    {
+        throw std::runtime_error("The TIFF writer is closed!");
+    }
+    if (region.ndim != 3)
+    {
+        throw std::invalid_argument("The region to write should have 3 dimensions (YXC)!");
+    }
+    if (region.ctx.device_type != kDLCPU && region.ctx.device_type != kDLCPUPinned)
+    {
+        throw std::invalid_argument("The region to write should be on CPU memory!");
+    }
+    if (region.dtype.code != kDLUInt || region.dtype.bits != bits_per_sample_ || region.dtype.lanes != 1)
+    {
+        throw std::invalid_argument(fmt::format("The region to write should be of uint{} type!", bits_per_sample_));
+    }
+    const int64_t h = region.shape[0];
+    const int64_t w = region.shape[1];
+    const int64_t channels = region.shape[2];
+    if (channels < samples_per_pixel_)
+    {
+        throw std::invalid_argument(
+            fmt::format("The region has {} channels but the image has {}!", channels, samples_per_pixel_));
+    }
+    const Level& level0 = levels_[0];
+    if (sx < 0 || sy < 0 || w <= 0 || h <= 0 || sx + w > level0.width || sy + h > level0.height)
+    {
+        throw std::invalid_argument(fmt::format("The region ({}, {}, {}x{}) is out of the image ({}x{})!", sx, sy, w,
+                                                h, level0.width, level0.height));
+    }
+    if (sx % tile_width_ || sy % tile_height_ || (w % tile_width_ && sx + w != level0.width) ||
+        (h % tile_height_ && sy + h != level0.height))
+    {
+        throw std::invalid_argument(fmt::format(
+            "The region ({}, {}, {}x{}) should be aligned to the tiles ({}x{})!", sx, sy, w, h, tile_width_,
+            tile_height_));
+    }
+
+    // Strides in elements (C-contiguous if not given). The channels need to be contiguous.
+    const int64_t channel_stride = region.strides ? region.strides[2] : 1;
+    const int64_t pixel_stride = region.strides ? region.strides[1] : channels;
+    const int64_t row_stride = region.strides ? region.strides[0] : w * channels;
+    if (channel_stride != 1)
+    {
+        throw std::invalid_argument("The channels of the region to write should be contiguous!");
+    }
+
+    const uint32_t bytes_per_sample = bits_per_sample_ / 8;
+    const uint64_t pixel_bytes = static_cast<uint64_t>(samples_per_pixel_) * bytes_per_sample;
+    const uint64_t tile_bytes = static_cast<uint64_t>(tile_width_) * tile_height_ * pixel_bytes;
+    const uint8_t* src = static_cast<const uint8_t*>(region.data) + region.byte_offset;
+
+    for (int64_t ty = sy; ty < sy + h; ty += tile_height_)
+    {
+        for (int64_t tx = sx; tx < sx + w; tx += tile_width_)
+        {
+            const uint32_t column = tx / tile_width_;
+            const uint32_t row = ty / tile_height_;
+            {
+                std::scoped_lock<std::mutex> lock(pending_mutex_);
+                const size_t index = static_cast<size_t>(row) * level0.columns + column;
+                if (written_tiles_[index])
+                {
+                    throw std::invalid_argument(fmt::format("Tile ({}, {}) is already written!", column, row));
+                }
+                written_tiles_[index] = true;
+            }
+
+            // Copy the tile (edge tiles are padded with zeros)
+            std::vector<uint8_t> tile(tile_bytes, 0);
+            const int64_t copy_width = std::min<int64_t>(tile_width_, sx + w - tx);
+            const int64_t copy_height = std::min<int64_t>(tile_height_, sy + h - ty);
+            for (int64_t y = 0; y < copy_height; ++y)
+            {
+                const uint8_t* src_row = src + ((ty - sy + y) * row_stride + (tx - sx) * pixel_stride) *
+                                                   static_cast<int64_t>(bytes_per_sample);
+                uint8_t* dest_row = tile.data() + y * tile_width_ * pixel_bytes;
+                if (pixel_stride == samples_per_pixel_)
+                {
+                    memcpy(dest_row, src_row, copy_width * pixel_bytes);
+                }
+                else
+                {
+                    for (int64_t x = 0; x < copy_width; ++x)
+                    {
+                        memcpy(dest_row + x * pixel_bytes, src_row + x * pixel_stride * bytes_per_sample,
+                               pixel_bytes);
+                    }
+                }
+            }
+            submit([this, column, row, tile = std::move(tile)]() mutable {
+                process_tile(0, column, row, std::move(tile));
+            });
+        }
+    }
+}
+
+void TiffWriter::close()
+{
+    if (fd_ == -1)
+    {
+        return;
+    }
+
+    std::exception_ptr error;
+    try
+    {
+        wait_idle();
+        rethrow_error();
+
+        // Write the tiles of lower-resolution levels whose child tiles were not all written.
+        for (uint16_t level = 1; level < levels_.size(); ++level)
+        {
+            std::vector<std::pair<std::tuple<uint16_t, uint32_t, uint32_t>, PendingTile>> tiles;
+            {
+                std::scoped_lock<std::mutex> lock(pending_mutex_);
+                auto first = pending_tiles_.lower_bound({ level, 0, 0 });
+                auto last = pending_tiles_.lower_bound({ static_cast<uint16_t>(level + 1), 0, 0 });
+                std::move(first, last, std::back_inserter(tiles));
+                pending_tiles_.erase(first, last);
+            }
+            for (auto& [key, tile] : tiles)
+            {
+                submit([this, key = key, data = std::move(tile.data)]() mutable {
+                    process_tile(std::get<0>(key), std::get<1>(key), std::get<2>(key), std::move(data));
+                });
+            }
+            wait_idle();
+            rethrow_error();
+        }
+
+        write_directories();
+    }
+    catch (...)
+    {
+        error = std::current_exception();
+    }
+
+    {
+        std::scoped_lock<std::mutex> lock(queue_mutex_);
+        stopping_ = true;
+    }
+    queue_cv_.notify_all();
+    for (auto& worker : workers_)
+    {
+        worker.join();
+    }
+    workers_.clear();
+
+    ::close(fd_);
+    fd_ = -1;
+    if (file_path_cstr_)
+    {
+        cucim_free(file_path_cstr_);
+        file_path_cstr_ = nullptr;
+    }
+    if (error)
+    {
+        std::rethrow_exception(error);
+    }
+}
+
+void TiffWriter::submit(std::function<void()> task)
+{
+    {
+        std::unique_lock<std::mutex> lock(queue_mutex_);
+        idle_cv_.wait(lock, [this] { return queue_.size() < max_queued_ || error_; });
+        if (error_)
+        {
+            std::rethrow_exception(error_);
+        }
+        queue_.emplace_back(std::move(task));
+    }
+    queue_cv_.notify_one();
+}
+
+void TiffWriter::worker_loop()
+{
+    while (true)
+    {
+        std::function<void()> task;
+        {
+            std::unique_lock<std::mutex> lock(queue_mutex_);
+            queue_cv_.wait(lock, [this] { return stopping_ || !queue_.empty(); });
+            if (queue_.empty())
+            {
+                return;
+            }
+            task = std::move(queue_.front());
+            queue_.pop_front();
+            ++active_tasks_;
+        }
+        idle_cv_.notify_all();
+
+        try
+        {
+            task();
+        }
+        catch (...)
+        {
+            std::scoped_lock<std::mutex> lock(queue_mutex_);
+            if (!error_)
+            {
+                error_ = std::current_exception();
+            }
+        }
+
+        {
+            std::scoped_lock<std::mutex> lock(queue_mutex_);
+            --active_tasks_;
+        }
+        idle_cv_.notify_all();
+    }
+}
+
+void TiffWriter::wait_idle()
+{
+    std::unique_lock<std::mutex> lock(queue_mutex_);
+    idle_cv_.wait(lock, [this] { return queue_.empty() && active_tasks_ == 0; });
+}
+
+void TiffWriter::rethrow_error()
+{
+    std::scoped_lock<std::mutex> lock(queue_mutex_);
+    if (error_)
+    {
+        std::rethrow_exception(error_);
+    }
+}
+
+void TiffWriter::process_tile(uint16_t level, uint32_t column, uint32_t row, std::vector<uint8_t> data)
+{
+    std::vector<uint8_t> encoded;
+    encode_tile(data, encoded);
+    uint64_t offset = append(encoded);
+
+    Level& tile_level = levels_[level];
+    size_t index = static_cast<size_t>(row) * tile_level.columns + column;
+    tile_level.offsets[index] = offset;
+    tile_level.byte_counts[index] = encoded.size();
+
+    if (level + 1U < levels_.size())
+    {
+        downsample_tile(level, column, row, data);
+    }
+}
+
+void TiffWriter::encode_tile(const std::vector<uint8_t>& data, std::vector<uint8_t>& out) const
+{
+    switch (compression_)
+    {
+    case kCompressionJpeg:
+        if (!cuslide::jpeg::encode_libjpeg(data.data(), tile_width_, tile_height_, samples_per_pixel_, quality_, out))
+        {
+            throw std::runtime_error("Failed to compress a tile with libjpeg-turbo!");
+        }
+        break;
+    case kCompressionAdobeDeflate:
+        if (!cuslide::deflate::encode_deflate(data.data(), data.size(), quality_, out))
+        {
+            throw std::runtime_error("Failed to compress a tile with libdeflate!");
+        }
+        break;
+    default:
+        out = data;
+    }
+}
+
+void TiffWriter::downsample_tile(uint16_t level, uint32_t column, uint32_t row, const std::vector<uint8_t>& data)
+{
+    const Level& child_level = levels_[level];
+    const uint16_t parent_level = level + 1;
+    const uint32_t parent_column = column / 2;
+    const uint32_t parent_row = row / 2;
+    const auto key = std::make_tuple(parent_level, parent_column, parent_row);
+
+    uint8_t* parent_data;
+    {
+        std::scoped_lock<std::mutex> lock(pending_mutex_);
+        auto [it, inserted] = pending_tiles_.try_emplace(key);
+        if (inserted)
+        {
+            it->second.data.resize(data.size(), 0);
+            it->second.remaining = std::min(2U, child_level.columns - parent_column * 2) *
+                                   std::min(2U, child_level.rows - parent_row * 2);
+        }
+        parent_data = it->second.data.data();
+    }
+
+    // Each child tile fills a quarter of its parent tile (map nodes are stable so no lock is needed).
+    const uint32_t width = std::min(tile_width_, child_level.width - column * tile_width_);
+    const uint32_t height = std::min(tile_height_, child_level.height - row * tile_height_);
+    const uint32_t dest_x = (column % 2) * (tile_width_ / 2);
+    const uint32_t dest_y = (row % 2) * (tile_height_ / 2);
+    if (bits_per_sample_ == 16)
+    {
+        downsample_2x2(reinterpret_cast<const uint16_t*>(data.data()), width, height, tile_width_, samples_per_pixel_,
+                       reinterpret_cast<uint16_t*>(parent_data), dest_x, dest_y);
+    }
+    else
+    {
+        downsample_2x2(data.data(), width, height, tile_width_, samples_per_pixel_, parent_data, dest_x, dest_y);
+    }
+
+    std::vector<uint8_t> parent_tile;
+    {
+        std::scoped_lock<std::mutex> lock(pending_mutex_);
+        auto it = pending_tiles_.find(key);
+        if (--it->second.remaining > 0)
+        {
+            return;
+        }
+        parent_tile = std::move(it->second.data);
+        pending_tiles_.erase(it);
+    }
+    process_tile(parent_level, parent_column, parent_row, std::move(parent_tile));
+}
+
+uint64_t TiffWriter::append(const std::vector<uint8_t>& data)
+{
+    uint64_t offset;
+    {
+        std::scoped_lock<std::mutex> lock(file_mutex_);
+        offset = file_end_;
+        // Keep offsets word-aligned as recommended by the TIFF specification
+        file_end_ += data.size() + (data.size() & 1);
+    }
+    write_all(fd_, data.data(), data.size(), offset);
+    return offset;
+}
+
+namespace
+{
+struct DirectoryEntry
+{
+    uint16_t tag;
+    uint16_t type;
+    uint64_t count;
+    std::vector<uint8_t> value;
+};
+
+template <typename T>
+DirectoryEntry make_entry(uint16_t tag, uint16_t type, const std::vector<T>& values)
+{
+    DirectoryEntry entry{ tag, type, values.size(), std::vector<uint8_t>(values.size() * sizeof(T)) };
+    memcpy(entry.value.data(), values.data(), entry.value.size());
+    return entry;
+}
+
+DirectoryEntry make_ascii_entry(uint16_t tag, const std::string& text)
+{
+    DirectoryEntry entry{ tag, kTypeAscii, text.size() + 1, std::vector<uint8_t>(text.begin(), text.end()) };
+    entry.value.push_back(0);
+    return entry;
+}
+
+template <typename T>
+void put(std::vector<uint8_t>& buffer, uint64_t pos, T value)
+{
+    memcpy(buffer.data() + pos, &value, sizeof(T));
+}
+} // namespace
+
+void TiffWriter::write_directories()
+{
+    // BigTIFF (little-endian) directories: 8-byte entry count, 20-byte entries and 8-byte offset of the next one.
+    // Values larger than 8 bytes are stored right after their directory.
+    uint64_t offset;
+    {
+        std::scoped_lock<std::mutex> lock(file_mutex_);
+        offset = file_end_;
+    }
+    const uint64_t first_ifd_offset = offset;
+
+    for (size_t level_index = 0; level_index < levels_.size(); ++level_index)
+    {
+        const Level& level = levels_[level_index];
+        uint16_t photometric = kPhotometricMinIsBlack;
+        if (samples_per_pixel_ >= 3)
+        {
+            photometric = (compression_ == kCompressionJpeg) ? kPhotometricYCbCr : kPhotometricRGB;
+        }
+
+        std::vector<DirectoryEntry> entries;
+        entries.emplace_back(
+            make_entry<uint32_t>(kTagNewSubfileType, kTypeLong, { level_index ? 1U : 0U })); // Reduced image
+        entries.emplace_back(make_entry<uint32_t>(kTagImageWidth, kTypeLong, { level.width }));
+        entries.emplace_back(make_entry<uint32_t>(kTagImageLength, kTypeLong, { level.height }));
+        entries.emplace_back(make_entry<uint16_t>(
+            kTagBitsPerSample, kTypeShort, std::vector<uint16_t>(samples_per_pixel_, bits_per_sample_)));
+        entries.emplace_back(make_entry<uint16_t>(kTagCompression, kTypeShort, { compression_ }));
+        entries.emplace_back(make_entry<uint16_t>(kTagPhotometric, kTypeShort, { photometric }));
+        entries.emplace_back(make_entry<uint16_t>(kTagSamplesPerPixel, kTypeShort, { samples_per_pixel_ }));
+        entries.emplace_back(make_entry<uint16_t>(kTagPlanarConfig, kTypeShort, { 1 })); // Contiguous
+        entries.emplace_back(make_ascii_entry(kTagSoftware, "cuCIM"));
+        entries.emplace_back(make_entry<uint32_t>(kTagTileWidth, kTypeLong, { tile_width_ }));
+        entries.emplace_back(make_entry<uint32_t>(kTagTileLength, kTypeLong, { tile_height_ }));
+        entries.emplace_back(make_entry<uint64_t>(kTagTileOffsets, kTypeLong8, level.offsets));
+        entries.emplace_back(make_entry<uint64_t>(kTagTileByteCounts, kTypeLong8, level.byte_counts));
+        if (samples_per_pixel_ == 2 || samples_per_pixel_ == 4)
+        {
+            entries.emplace_back(make_entry<uint16_t>(kTagExtraSamples, kTypeShort, { 2 })); // Unassociated alpha
+        }
+        if (photometric == kPhotometricYCbCr)
+        {
+            entries.emplace_back(make_entry<uint16_t>(kTagYCbCrSubSampling, kTypeShort, { 1, 1 })); // 4:4:4
+        }
+
+        const uint64_t ifd_size = 8 + entries.size() * 20 + 8;
+        uint64_t extra_size = 0;
+        for (const auto& entry : entries)
+        {
+            if (entry.value.size() > 8)
+            {
+                extra_size += entry.value.size() + (entry.value.size() & 1);
+            }
+        }
+        std::vector<uint8_t> buffer(ifd_size + extra_size, 0);
+        const uint64_t next_offset = offset + buffer.size();
+
+        put<uint64_t>(buffer, 0, entries.size());
+        uint64_t extra_pos = ifd_size;
+        for (size_t i = 0; i < entries.size(); ++i)
+        {
+            const auto& entry = entries[i];
+            const uint64_t pos = 8 + i * 20;
+            put<uint16_t>(buffer, pos, entry.tag);
+            put<uint16_t>(buffer, pos + 2, entry.type);
+            put<uint64_t>(buffer, pos + 4, entry.count);
+            if (entry.value.size() <= 8)
+            {
+                memcpy(buffer.data() + pos + 12, entry.value.data(), entry.value.size());
+            }
+            else
+            {
+                put<uint64_t>(buffer, pos + 12, offset + extra_pos);
+                memcpy(buffer.data() + extra_pos, entry.value.data(), entry.value.size());
+                extra_pos += entry.value.size() + (entry.value.size() & 1);
+            }
+        }
+        put<uint64_t>(buffer, ifd_size - 8, (level_index + 1 < levels_.size()) ? next_offset : 0);
+        write_all(fd_, buffer.data(), buffer.size(), offset);
+        offset = next_offset;
+    }
+
+    // BigTIFF header: byte order, version (43), offset size (8), reserved (0) and offset of the first directory
+    std::vector<uint8_t> header(kBigTiffHeaderSize, 0);
+    header[0] = 'I';
+    header[1] = 'I';
+    put<uint16_t>(header, 2, 43);
+    put<uint16_t>(header, 4, 8);
+    put<uint64_t>(header, 8, first_ifd_offset);
+    write_all(fd_, header.data(), header.size(), 0);
+}
+
+} // namespace cuslide::tiff
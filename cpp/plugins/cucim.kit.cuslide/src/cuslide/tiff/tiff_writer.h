@@ -0,0 +1,134 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#ifndef CUSLIDE_TIFF_WRITER_H
+#define CUSLIDE_TIFF_WRITER_H
+
+#include <cucim/filesystem/file_handle.h>
+#include <cucim/filesystem/file_path.h>
+#include <cucim/io/format/image_format.h>
+
+#include <condition_variable>
+#include <cstdint>
+#include <deque>
+#include <exception>
+#include <functional>
+#include <map>
+#include <mutex>
+#include <thread>
+#include <tuple>
+#include <vector>
+
+namespace cuslide::tiff
+{
+
+/**
+ * Writer of tiled, pyramidal BigTIFF files.
+ *
+ * Tiles of the level 0 are given (in any order) by `write_region()`. Each tile is compressed on a thread pool and
+ * appended to the file as soon as it is ready, then downsampled (2x2 box filter) into its parent tile of the next
+ * level. A tile of a lower-resolution level is compressed as soon as all of its child tiles are written, so only the
+ * tiles whose children are partially written are kept in memory (about one row of tiles per level when tiles are
+ * written in row-major order).
+ *
+ * The directories (IFDs) are written at the end of the file by `close()`.
+ */
+class TiffWriter
+{
+public:
+    TiffWriter(const cucim::filesystem::Path& file_path,
+               uint32_t width,
+               uint32_t height,
+               uint16_t samples_per_pixel,
+               uint16_t bits_per_sample,
+               const cucim::io::format::ImageWriterOptionsDesc& options);
+    TiffWriter(const TiffWriter&) = delete;
+    ~TiffWriter();
+
+    /**
+     * Writes a region of the level 0.
+     *
+     * The region (with `YXC` dimensions on CPU memory) needs to be aligned to the tile grid: its location has to be a
+     * multiple of the tile size and its size too, except at the right and bottom edges of the image. If the region
+     * has more channels than the image, extra channels (e.g., alpha) are ignored.
+     */
+    void write_region(int64_t sx, int64_t sy, const DLTensor& region);
+
+    /**
+     * Writes the pending tiles of the lower-resolution levels and the directories, and closes the file.
+     */
+    void close();
+
+    CuCIMFileHandle file_handle();
+
+private:
+    struct Level
+    {
+        uint32_t width = 0;
+        uint32_t height = 0;
+        uint32_t columns = 0;
+        uint32_t rows = 0;
+        std::vector<uint64_t> offsets;
+        std::vector<uint64_t> byte_counts;
+    };
+    struct PendingTile
+    {
+        std::vector<uint8_t> data;
+        uint32_t remaining = 0;
+    };
+
+    void submit(std::function<void()> task);
+    void worker_loop();
+    void wait_idle();
+    void rethrow_error();
+
+    void process_tile(uint16_t level, uint32_t column, uint32_t row, std::vector<uint8_t> data);
+    void encode_tile(const std::vector<uint8_t>& data, std::vector<uint8_t>& out) const;
+    void downsample_tile(uint16_t level, uint32_t column, uint32_t row, const std::vector<uint8_t>& data);
+    uint64_t append(const std::vector<uint8_t>& data);
+    void write_directories();
+
+    cucim::filesystem::Path file_path_;
+    int fd_ = -1;
+    char* file_path_cstr_ = nullptr;
+    uint16_t samples_per_pixel_ = 0;
+    uint16_t bits_per_sample_ = 0;
+    uint16_t compression_ = 0;
+    int quality_ = -1;
+    uint32_t tile_width_ = 0;
+    uint32_t tile_height_ = 0;
+    std::vector<Level> levels_;
+    std::vector<bool> written_tiles_;
+
+    std::mutex file_mutex_;
+    uint64_t file_end_ = 0;
+
+    std::mutex pending_mutex_;
+    std::map<std::tuple<uint16_t, uint32_t, uint32_t>, PendingTile> pending_tiles_;
+
+    std::mutex queue_mutex_;
+    std::condition_variable queue_cv_;
+    std::condition_variable idle_cv_;
+    std::deque<std::function<void()>> queue_;
+    size_t max_queued_ = 0;
+    size_t active_tasks_ = 0;
+    bool stopping_ = false;
+    std::exception_ptr error_;
+    std::vector<std::thread> workers_;
+};
+
+} // namespace cuslide::tiff
+
+#endif // CUSLIDE_TIFF_WRITER_H
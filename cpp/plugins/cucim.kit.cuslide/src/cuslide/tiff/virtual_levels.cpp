@@ -0,0 +1,481 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "virtual_levels.h"
+
+#include "ifd.h"
+#include "tiff.h"
+
+#include <cucim/memory/memory_manager.h>
+#include <cucim/profiler/profiler.h>
+#include <fmt/format.h>
+
+#include <algorithm>
+#include <cerrno>
+#include <climits>
+#include <cstdlib>
+#include <cstring>
+#include <fcntl.h>
+#include <functional>
+#include <stdexcept>
+#include <sys/stat.h>
+#include <unistd.h>
+
+namespace cuslide::tiff
+{
+
+constexpr char kCacheMagic[8] = { 'C', 'U', 'C', 'I', 'M', 'V', 'L', '\0' };
+constexpr uint32_t kCacheVersion = 1;
+constexpr uint64_t kCacheHeaderSize = 4096; // the tile flags follow the header
+constexpr uint64_t kCacheAlignment = 4096;
+
+/**
+ * Header of the cache file. The cache is valid only if the whole header matches the slide.
+ */
+struct CacheHeader
+{
+    char magic[8];
+    uint32_t version;
+    uint32_t tile_size;
+    uint64_t file_size; /// Size of the slide
+    int64_t file_mtime_ns; /// Modification time of the slide
+    uint32_t width; /// Size of the smallest level of the slide
+    uint32_t height;
+    uint16_t channels;
+    uint16_t bits_per_sample;
+    uint16_t level_count;
+    uint16_t reserved;
+};
+static_assert(sizeof(CacheHeader) == 48, "CacheHeader shouldn't have padding");
+
+static std::string default_cache_dir()
+{
+    if (const char* cache_dir = std::getenv("CUCIM_CACHE_DIR"); cache_dir && *cache_dir)
+    {
+        return fmt::format("{}/levels", cache_dir);
+    }
+    if (const char* xdg_cache_home = std::getenv("XDG_CACHE_HOME"); xdg_cache_home && *xdg_cache_home)
+    {
+        return fmt::format("{}/cucim/levels", xdg_cache_home);
+    }
+    const char* home = std::getenv("HOME");
+    return fmt::format("{}/.cache/cucim/levels", home ? home : "/tmp");
+}
+
+static bool make_dirs(const std::string& path)
+{
+    for (size_t pos = path.find('/', 1); pos != std::string::npos; pos = path.find('/', pos + 1))
+    {
+        std::string parent = path.substr(0, pos);
+        if (::mkdir(parent.c_str(), 0755) != 0 && errno != EEXIST)
+        {
+            return false;
+        }
+    }
+    return ::mkdir(path.c_str(), 0755) == 0 || errno == EEXIST;
+}
+
+/**
+ * Downsamples an image (`width` x `height` pixels) by area averaging of 2x2 pixels. At odd edges, the average of the
+ * available pixels is used.
+ */
+template <typename T>
+static void downsample_2x2(
+    const T* src, int64_t width, int64_t height, uint16_t channels, T* dest, int64_t dest_width_stride)
+{
+    const int64_t src_stride = width * channels;
+    const int64_t dest_width = (width + 1) / 2;
+    const int64_t dest_height = (height + 1) / 2;
+    for (int64_t y = 0; y < dest_height; ++y)
+    {
+        const T* src_row = src + (2 * y) * src_stride;
+        const int64_t next_row_offset = (2 * y + 1 < height) ? src_stride : 0;
+        T* dest_row = dest + y * dest_width_stride * channels;
+        for (int64_t x = 0; x < dest_width; ++x)
+        {
+            const T* pixel = src_row + 2 * x * channels;
+            const int64_t next_column_offset = (2 * x + 1 < width) ? channels : 0;
+            const uint32_t count = (next_row_offset ? 2 : 1) * (next_column_offset ? 2 : 1);
+            for (uint16_t c = 0; c < channels; ++c)
+            {
+                uint32_t sum = pixel[c];
+                if (next_column_offset)
+                {
+                    sum += pixel[next_column_offset + c];
+                }
+                if (next_row_offset)
+                {
+                    sum += pixel[next_row_offset + c];
+                    if (next_column_offset)
+                    {
+                        sum += pixel[next_row_offset + next_column_offset + c];
+                    }
+                }
+                dest_row[x * channels + c] = static_cast<T>((sum + count / 2) / count);
+            }
+        }
+    }
+}
+
+std::unique_ptr<VirtualLevels> VirtualLevels::create(TIFF* tiff)
+{
+    if (const char* enabled = std::getenv("CUCIM_VIRTUAL_LEVELS"); enabled && std::strcmp(enabled, "0") == 0)
+    {
+        return nullptr;
+    }
+    size_t level_count = tiff->level_count();
+    if (level_count == 0)
+    {
+        return nullptr;
+    }
+    auto base_ifd = tiff->level_ifd(level_count - 1);
+    if (base_ifd->width() <= kTileSize && base_ifd->height() <= kTileSize)
+    {
+        return nullptr;
+    }
+    return std::make_unique<VirtualLevels>(tiff, base_ifd, tiff->background_value_);
+}
+
+VirtualLevels::VirtualLevels(TIFF* tiff, std::shared_ptr<IFD> base_ifd, uint8_t background_value)
+    : tiff_(tiff), base_ifd_(std::move(base_ifd)), background_value_(background_value)
+{
+    // Same pixel format as regions read from the base level
+    channels_ = static_cast<uint16_t>(base_ifd_->read_samples_per_pixel());
+    bits_per_sample_ = static_cast<uint16_t>(base_ifd_->read_bits_per_sample());
+    pixel_nbytes_ = static_cast<uint64_t>(channels_) * (bits_per_sample_ / 8);
+    tile_nbytes_ = static_cast<uint64_t>(kTileSize) * kTileSize * pixel_nbytes_;
+
+    uint32_t width = base_ifd_->width();
+    uint32_t height = base_ifd_->height();
+    uint64_t tile_count = 0;
+    while (width > kTileSize || height > kTileSize)
+    {
+        width = (width + 1) / 2;
+        height = (height + 1) / 2;
+        Level level;
+        level.width = width;
+        level.height = height;
+        level.columns = (width + kTileSize - 1) / kTileSize;
+        level.rows = (height + kTileSize - 1) / kTileSize;
+        level.first_tile = tile_count;
+        tile_count += static_cast<uint64_t>(level.columns) * level.rows;
+        levels_.push_back(level);
+    }
+    data_offset_ = (kCacheHeaderSize + tile_count + kCacheAlignment - 1) / kCacheAlignment * kCacheAlignment;
+}
+
+VirtualLevels::~VirtualLevels()
+{
+    if (cache_fd_ != -1)
+    {
+        ::close(cache_fd_);
+        cache_fd_ = -1;
+    }
+}
+
+size_t VirtualLevels::level_count() const
+{
+    return levels_.size();
+}
+uint32_t VirtualLevels::level_width(size_t index) const
+{
+    return levels_.at(index).width;
+}
+uint32_t VirtualLevels::level_height(size_t index) const
+{
+    return levels_.at(index).height;
+}
+const std::string& VirtualLevels::cache_path() const
+{
+    return cache_path_;
+}
+
+void VirtualLevels::open_cache()
+{
+    const CuCIMFileHandle file_handle = tiff_->file_handle();
+    if (file_handle.fd != -1)
+    {
+        const std::string& file_path = tiff_->file_path();
+        // Next to the slide
+        if (open_cache_file(file_path + ".cucim-levels"))
+        {
+            return;
+        }
+        // In the cache folder (named after the absolute path of the slide)
+        std::string cache_dir = default_cache_dir();
+        char real_path[PATH_MAX];
+        std::string abs_path = ::realpath(file_path.c_str(), real_path) ? std::string(real_path) : file_path;
+        std::string base_name = abs_path.substr(abs_path.find_last_of('/') + 1);
+        if (make_dirs(cache_dir) &&
+            open_cache_file(fmt::format(
+                "{}/{:016x}-{}.cucim-levels", cache_dir, std::hash<std::string>{}(abs_path), base_name)))
+        {
+            return;
+        }
+    }
+
+    // Temporary (unlinked) file, for images in memory or if no cache folder is writable
+    const char* tmp_dir = std::getenv("TMPDIR");
+    std::string tmp_template = fmt::format("{}/cucim-levels-XXXXXX", (tmp_dir && *tmp_dir) ? tmp_dir : "/tmp");
+    int fd = ::mkstemp(tmp_template.data());
+    if (fd == -1)
+    {
+        throw std::runtime_error(fmt::format("Cannot create a cache file for virtual levels ({})!", strerror(errno)));
+    }
+    ::unlink(tmp_template.c_str());
+    cache_fd_ = fd;
+    cache_path_.clear();
+}
+
+bool VirtualLevels::open_cache_file(const std::string& path)
+{
+    struct stat file_stat
+    {
+    };
+    if (::fstat(tiff_->file_handle().fd, &file_stat) != 0)
+    {
+        return false;
+    }
+    CacheHeader expected{};
+    memcpy(expected.magic, kCacheMagic, sizeof(kCacheMagic));
+    expected.version = kCacheVersion;
+    expected.tile_size = kTileSize;
+    expected.file_size = file_stat.st_size;
+    expected.file_mtime_ns = static_cast<int64_t>(file_stat.st_mtim.tv_sec) * 1000000000 + file_stat.st_mtim.tv_nsec;
+    expected.width = base_ifd_->width();
+    expected.height = base_ifd_->height();
+    expected.channels = channels_;
+    expected.bits_per_sample = bits_per_sample_;
+    expected.level_count = static_cast<uint16_t>(levels_.size());
+
+    int fd = ::open(path.c_str(), O_RDWR);
+    if (fd != -1)
+    {
+        CacheHeader header{};
+        if (::pread(fd, &header, sizeof(header), 0) == static_cast<ssize_t>(sizeof(header)) &&
+            memcmp(&header, &expected, sizeof(header)) == 0)
+        {
+            cache_fd_ = fd;
+            cache_path_ = path;
+            return true;
+        }
+        ::close(fd);
+    }
+
+    // Create a new cache (tiles are written sparsely) under a temporary name and rename it into place. An invalid
+    // cache file is replaced, not truncated, as other processes may still be reading tiles from it.
+    std::string tmp_path = path + ".XXXXXX";
+    fd = ::mkstemp(tmp_path.data());
+    if (fd == -1)
+    {
+        return false;
+    }
+    if (::fchmod(fd, 0644) != 0 ||
+        ::pwrite(fd, &expected, sizeof(expected), 0) != static_cast<ssize_t>(sizeof(expected)) ||
+        ::rename(tmp_path.c_str(), path.c_str()) != 0)
+    {
+        ::close(fd);
+        ::unlink(tmp_path.c_str());
+        return false;
+    }
+    cache_fd_ = fd;
+    cache_path_ = path;
+    return true;
+}
+
+bool VirtualLevels::is_tile_cached(uint64_t tile_index) const
+{
+    // Flags are read from the file (a hole or a read past the end of the file means that the tile is not cached) so
+    // that the tiles written by other processes are used too.
+    uint8_t flag = 0;
+    return ::pread(cache_fd_, &flag, 1, kCacheHeaderSize + tile_index) == 1 && flag;
+}
+
+void VirtualLevels::read_base_region(const cucim::io::format::ImageMetadataDesc* metadata,
+                                     int64_t sx,
+                                     int64_t sy,
+                                     int64_t w,
+                                     int64_t h,
+                                     std::vector<uint8_t>& out)
+{
+    int64_t location[2] = { sx, sy };
+    int64_t size[2] = { w, h };
+    cucim::io::format::ImageReaderRegionRequestDesc request{};
+    request.location = location;
+    request.size = size;
+    request.device = const_cast<char*>("cpu");
+
+    cucim::io::format::ImageDataDesc image_data{};
+    if (!base_ifd_->read(tiff_, metadata, &request, &image_data))
+    {
+        throw std::runtime_error("Failed to read the region of the level used to generate virtual levels!");
+    }
+    auto data = static_cast<uint8_t*>(image_data.container.data);
+    out.assign(data, data + w * h * pixel_nbytes_);
+    cucim_free(image_data.container.data);
+    cucim_free(image_data.container.shape);
+}
+
+void VirtualLevels::load_tile(size_t index,
+                              uint32_t column,
+                              uint32_t row,
+                              const cucim::io::format::ImageMetadataDesc* metadata,
+                              std::vector<uint8_t>& tile)
+{
+    const Level& level = levels_[index];
+    const uint64_t tile_index = level.first_tile + static_cast<uint64_t>(row) * level.columns + column;
+    const uint64_t tile_offset = data_offset_ + tile_index * tile_nbytes_;
+    tile.resize(tile_nbytes_);
+
+    if (is_tile_cached(tile_index) &&
+        ::pread(cache_fd_, tile.data(), tile_nbytes_, tile_offset) == static_cast<ssize_t>(tile_nbytes_))
+    {
+        return;
+    }
+
+    // Gather the 2x2 tiles of the finer level covered by the tile
+    const uint32_t src_width = index == 0 ? base_ifd_->width() : levels_[index - 1].width;
+    const uint32_t src_height = index == 0 ? base_ifd_->height() : levels_[index - 1].height;
+    const int64_t sx = static_cast<int64_t>(column) * kTileSize * 2;
+    const int64_t sy = static_cast<int64_t>(row) * kTileSize * 2;
+    const int64_t sw = std::min<int64_t>(kTileSize * 2, src_width - sx);
+    const int64_t sh = std::min<int64_t>(kTileSize * 2, src_height - sy);
+    const int64_t src_stride = sw * pixel_nbytes_;
+
+    std::vector<uint8_t> src;
+    if (index == 0)
+    {
+        read_base_region(metadata, sx, sy, sw, sh, src);
+    }
+    else
+    {
+        src.resize(sh * src_stride);
+        std::vector<uint8_t> child;
+        for (int64_t oy = 0; oy < sh; oy += kTileSize)
+        {
+            for (int64_t ox = 0; ox < sw; ox += kTileSize)
+            {
+                load_tile(index - 1, static_cast<uint32_t>((sx + ox) / kTileSize),
+                          static_cast<uint32_t>((sy + oy) / kTileSize), metadata, child);
+                const int64_t cw = std::min<int64_t>(kTileSize, sw - ox);
+                const int64_t ch = std::min<int64_t>(kTileSize, sh - oy);
+                for (int64_t y = 0; y < ch; ++y)
+                {
+                    memcpy(src.data() + (oy + y) * src_stride + ox * pixel_nbytes_,
+                           child.data() + y * kTileSize * pixel_nbytes_, cw * pixel_nbytes_);
+                }
+            }
+        }
+    }
+
+    // Area averaging (pixels of the finer level out of its boundary are not included)
+    std::fill(tile.begin(), tile.end(), 0);
+    if (bits_per_sample_ == 16)
+    {
+        downsample_2x2(reinterpret_cast<const uint16_t*>(src.data()), sw, sh, channels_,
+                       reinterpret_cast<uint16_t*>(tile.data()), kTileSize);
+    }
+    else
+    {
+        downsample_2x2(src.data(), sw, sh, channels_, tile.data(), kTileSize);
+    }
+
+    // Store the tile (the flag is written after the pixels so an interrupted write is never used). Processes writing
+    // the same tile write the same pixels. A tile that can't be stored is computed again when it is read next time.
+    const uint8_t flag = 1;
+    if (::pwrite(cache_fd_, tile.data(), tile_nbytes_, tile_offset) != static_cast<ssize_t>(tile_nbytes_) ||
+        ::pwrite(cache_fd_, &flag, 1, kCacheHeaderSize + tile_index) != 1)
+    {
+        return;
+    }
+}
+
+bool VirtualLevels::read(size_t index,
+                         const cucim::io::format::ImageMetadataDesc* metadata,
+                         const cucim::io::format::ImageReaderRegionRequestDesc* request,
+                         cucim::io::format::ImageDataDesc* out_image_data)
+{
+    std::lock_guard<std::mutex> lock(mutex_);
+
+    if (cache_fd_ == -1)
+    {
+        open_cache();
+    }
+
+    const Level& level = levels_.at(index);
+    const int64_t sx = request->location[0];
+    const int64_t sy = request->location[1];
+    const int64_t w = request->size[0];
+    const int64_t h = request->size[1];
+    const int64_t dest_stride = w * pixel_nbytes_;
+
+    void* raster = nullptr;
+    DLTensor* out_buf = request->buf;
+    if (out_buf && out_buf->data)
+    {
+        raster = out_buf->data;
+    }
+    else
+    {
+        cucim::profiler::ScopedStage alloc_stage(cucim::profiler::Stage::kAllocation, h * dest_stride);
+        raster = cucim_malloc(h * dest_stride);
+    }
+    auto dest = static_cast<uint8_t*>(raster);
+    memset(dest, background_value_, h * dest_stride);
+
+    // Copy the part of the tiles in the region
+    const int64_t x0 = std::max<int64_t>(sx, 0);
+    const int64_t y0 = std::max<int64_t>(sy, 0);
+    const int64_t x1 = std::min<int64_t>(sx + w, level.width);
+    const int64_t y1 = std::min<int64_t>(sy + h, level.height);
+    std::vector<uint8_t> tile;
+    for (int64_t row = y0 / kTileSize; y0 < y1 && row <= (y1 - 1) / kTileSize; ++row)
+    {
+        for (int64_t column = x0 / kTileSize; x0 < x1 && column <= (x1 - 1) / kTileSize; ++column)
+        {
+            load_tile(index, static_cast<uint32_t>(column), static_cast<uint32_t>(row), metadata, tile);
+
+            const int64_t tx0 = std::max<int64_t>(x0, column * kTileSize);
+            const int64_t tx1 = std::min<int64_t>(x1, (column + 1) * kTileSize);
+            const int64_t ty0 = std::max<int64_t>(y0, row * kTileSize);
+            const int64_t ty1 = std::min<int64_t>(y1, (row + 1) * kTileSize);
+            for (int64_t y = ty0; y < ty1; ++y)
+            {
+                memcpy(dest + (y - sy) * dest_stride + (tx0 - sx) * pixel_nbytes_,
+                       tile.data() + ((y - row * kTileSize) * kTileSize + (tx0 - column * kTileSize)) * pixel_nbytes_,
+                       (tx1 - tx0) * pixel_nbytes_);
+            }
+        }
+    }
+
+    int ndim = 3;
+    int64_t* shape = static_cast<int64_t*>(cucim_malloc(sizeof(int64_t) * ndim));
+    shape[0] = h;
+    shape[1] = w;
+    shape[2] = channels_;
+
+    out_image_data->container.data = raster;
+    out_image_data->container.ctx = DLContext{ static_cast<DLDeviceType>(cucim::io::DeviceType::kCPU), 0 };
+    out_image_data->container.ndim = ndim;
+    out_image_data->container.dtype = DLDataType{ kDLUInt, static_cast<uint8_t>(bits_per_sample_), 1 };
+    out_image_data->container.shape = shape;
+    out_image_data->container.strides = nullptr; // Tensor is compact and row-majored
+    out_image_data->container.byte_offset = 0;
+
+    return true;
+}
+
+} // namespace cuslide::tiff
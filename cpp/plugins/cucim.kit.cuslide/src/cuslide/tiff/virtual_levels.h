@@ -0,0 +1,125 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#ifndef CUSLIDE_VIRTUAL_LEVELS_H
+#define CUSLIDE_VIRTUAL_LEVELS_H
+
+#include <cucim/io/format/image_format.h>
+
+#include <cstdint>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <vector>
+
+namespace cuslide::tiff
+{
+
+class TIFF;
+class IFD;
+
+/**
+ * Lower-resolution levels generated from the smallest level of a TIFF file.
+ *
+ * If the smallest level of the file is larger than a tile, levels are added (each level is half the size of the
+ * previous one, rounded up) until a level fits in a tile. A tile of a virtual level is computed when first read, by
+ * area averaging (2x2 box filter) the pixels of the next finer level, and stored in a cache file, so each tile is
+ * computed only once.
+ *
+ * The cache file is created next to the slide (`<slide path>.cucim-levels`) or, if the folder is not writable, in
+ * `$CUCIM_CACHE_DIR/levels` (`$XDG_CACHE_HOME/cucim/levels` or `~/.cache/cucim/levels` by default). It is invalidated
+ * when the size or the modification time of the slide changes. Tiles of images opened from memory are cached in a
+ * temporary file.
+ *
+ * Processes reading the same slide share the cache file. An invalid cache file is replaced by a new file renamed into
+ * place (never truncated, as other processes may be reading it), and the flag of a tile is read from the file before
+ * the tile is used.
+ *
+ * Virtual levels can be disabled by setting the `CUCIM_VIRTUAL_LEVELS` environment variable to `0`.
+ */
+class VirtualLevels
+{
+public:
+    static constexpr uint32_t kTileSize = 256;
+
+    /**
+     * Returns virtual levels for the TIFF file (nullptr if its smallest level already fits in a tile or if virtual
+     * levels are disabled).
+     */
+    static std::unique_ptr<VirtualLevels> create(TIFF* tiff);
+
+    VirtualLevels(TIFF* tiff, std::shared_ptr<IFD> base_ifd, uint8_t background_value);
+    VirtualLevels(const VirtualLevels&) = delete;
+    ~VirtualLevels();
+
+    size_t level_count() const;
+    uint32_t level_width(size_t index) const;
+    uint32_t level_height(size_t index) const;
+    const std::string& cache_path() const;
+
+    /**
+     * Reads a region of the virtual level `index` (0 is the first level after the real levels).
+     *
+     * Unlike `TIFF::read()`, `request->location` is the location at the level. Pixels out of the boundary of the
+     * level are filled with the background value.
+     */
+    bool read(size_t index,
+              const cucim::io::format::ImageMetadataDesc* metadata,
+              const cucim::io::format::ImageReaderRegionRequestDesc* request,
+              cucim::io::format::ImageDataDesc* out_image_data);
+
+private:
+    struct Level
+    {
+        uint32_t width = 0;
+        uint32_t height = 0;
+        uint32_t columns = 0;
+        uint32_t rows = 0;
+        uint64_t first_tile = 0; /// Index of the first tile of the level in the cache file
+    };
+
+    void open_cache();
+    bool open_cache_file(const std::string& path);
+    bool is_tile_cached(uint64_t tile_index) const;
+    void load_tile(size_t index,
+                   uint32_t column,
+                   uint32_t row,
+                   const cucim::io::format::ImageMetadataDesc* metadata,
+                   std::vector<uint8_t>& tile);
+    void read_base_region(const cucim::io::format::ImageMetadataDesc* metadata,
+                          int64_t sx,
+                          int64_t sy,
+                          int64_t w,
+                          int64_t h,
+                          std::vector<uint8_t>& out);
+
+    TIFF* tiff_ = nullptr;
+    std::shared_ptr<IFD> base_ifd_;
+    uint8_t background_value_ = 0;
+    uint16_t channels_ = 0;
+    uint16_t bits_per_sample_ = 0;
+    uint64_t pixel_nbytes_ = 0;
+    uint64_t tile_nbytes_ = 0;
+    std::vector<Level> levels_;
+
+    std::mutex mutex_;
+    std::string cache_path_;
+    int cache_fd_ = -1;
+    uint64_t data_offset_ = 0;
+};
+
+} // namespace cuslide::tiff
+
+#endif // CUSLIDE_VIRTUAL_LEVELS_H
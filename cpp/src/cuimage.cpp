@@ -16,12 +16,14 @@
 
 #include "cucim/cuimage.h"
 
+#include <algorithm>
 #include <iostream>
 #include <fstream>
 #include <cstring>
 #include <sys/stat.h>
 
 #include "cucim/core/framework.h"
+#include "cucim/profiler/profiler.h"
 #include <fmt/format.h>
 
 namespace cucim
@@ -66,6 +68,15 @@ ResolutionInfo::ResolutionInfo(io::format::ResolutionInfoDesc desc)
         level_dimensions_.end(), &desc.level_dimensions[0], &desc.level_dimensions[level_count_ * level_ndim_]);
     level_downsamples_.insert(
         level_downsamples_.end(), &desc.level_downsamples[0], &desc.level_downsamples[level_count_]);
+    if (desc.level_tile_sizes)
+    {
+        level_tile_sizes_.insert(
+            level_tile_sizes_.end(), &desc.level_tile_sizes[0], &desc.level_tile_sizes[level_count_ * level_ndim_]);
+    }
+    else
+    {
+        level_tile_sizes_.resize(level_count_ * level_ndim_, 0);
+    }
 }
 uint16_t ResolutionInfo::level_count() const
 {
@@ -98,6 +109,21 @@ float ResolutionInfo::level_downsample(uint16_t level) const
     }
     return level_downsamples_.at(level);
 }
+const std::vector<int64_t>& ResolutionInfo::level_tile_sizes() const
+{
+    return level_tile_sizes_;
+}
+std::vector<int64_t> ResolutionInfo::level_tile_size(uint16_t level) const
+{
+    if (level >= level_count_)
+    {
+        throw std::invalid_argument(fmt::format("'level' should be less than {}", level_count_));
+    }
+    std::vector<int64_t> result;
+    auto start_index = level_tile_sizes_.begin() + (level * level_ndim_);
+    result.insert(result.end(), start_index, start_index + level_ndim_);
+    return result;
+}
 
 DetectedFormat detect_format(filesystem::Path path)
 {
@@ -107,6 +133,36 @@ DetectedFormat detect_format(filesystem::Path path)
 }
 
 
+static io::format::IImageFormat* load_image_formats(Framework* framework)
+{
+    if (!framework)
+    {
+        CUCIM_ERROR("Framework is not initialized!");
+    }
+    auto plugin_root = framework->get_plugin_root();
+    // TODO: Here 'LINUX' path separator is used. Need to make it generalize once filesystem library is
+    // available.
+    std::string plugin_file_path = (plugin_root && *plugin_root != 0) ?
+                                       fmt::format("{}/cucim.kit.cuslide@{}.{}.{}.so", plugin_root,
+                                                   CUCIM_VERSION_MAJOR, CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH) :
+                                       fmt::format("cucim.kit.cuslide@{}.{}.{}.so", CUCIM_VERSION_MAJOR,
+                                                   CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH);
+    struct stat st_buff;
+    if (stat(plugin_file_path.c_str(), &st_buff) != 0)
+    {
+        plugin_file_path = fmt::format(
+            "cucim.kit.cuslide@{}.{}.{}.so", CUCIM_VERSION_MAJOR, CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH);
+    }
+    auto image_formats =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(plugin_file_path.c_str());
+    if (image_formats == nullptr)
+    {
+        throw std::runtime_error(fmt::format("Dependent library 'cucim.kit.cuslide@{}.{}.{}.so' cannot be loaded!",
+                                             CUCIM_VERSION_MAJOR, CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH));
+    }
+    return image_formats;
+}
+
 Framework* CuImage::framework_ = cucim::acquire_framework("cucim");
 
 CuImage::CuImage(const filesystem::Path& path)
@@ -120,7 +176,31 @@ CuImage::CuImage(const filesystem::Path& path)
     //    printf("[GB] file_handle: %s\n", file_handle_.path);
     //    fmt::print("[GB] CuImage path char: '{}'\n", file_handle_.path[0]);
 
+    parse_file();
+}
+CuImage::CuImage(const filesystem::Path& path, const std::string& plugin_name)
+{
+    // TODO: implement this
+    (void)path;
+    (void)plugin_name;
+}
+CuImage::CuImage(const void* buffer, size_t size, const filesystem::Path& name, std::shared_ptr<void> buffer_owner)
+    : buffer_owner_(std::move(buffer_owner))
+{
+    ensure_init();
+
+    auto& image_parser = image_formats_->formats[0].image_parser;
+    if (!image_parser.open_buffer)
+    {
+        throw std::runtime_error("The image format plugin doesn't support opening an image from memory!");
+    }
+    file_handle_ = image_parser.open_buffer(buffer, size, name.c_str());
 
+    parse_file();
+}
+
+void CuImage::parse_file()
+{
     io::format::ImageMetadata& image_metadata = *(new io::format::ImageMetadata{});
     image_metadata_ = &image_metadata.desc();
     is_loaded_ = image_formats_->formats[0].image_parser.parse(&file_handle_, image_metadata_);
@@ -136,12 +216,6 @@ CuImage::CuImage(const filesystem::Path& path)
         }
     }
 }
-CuImage::CuImage(const filesystem::Path& path, const std::string& plugin_name)
-{
-    // TODO: implement this
-    (void)path;
-    (void)plugin_name;
-}
 
 // CuImage::CuImage(const CuImage& cuimg) : std::enable_shared_from_this<CuImage>()
 //{
@@ -161,6 +235,7 @@ CuImage::CuImage(CuImage&& cuimg) : std::enable_shared_from_this<CuImage>()
     std::swap(is_loaded_, cuimg.is_loaded_);
     std::swap(dim_indices_, cuimg.dim_indices_);
     cuimg.associated_images_.swap(associated_images_);
+    std::swap(buffer_owner_, cuimg.buffer_owner_);
 }
 
 CuImage::CuImage(const CuImage* cuimg,
@@ -495,6 +570,8 @@ CuImage CuImage::read_region(std::vector<int64_t> location,
     (void)buf;
     (void)shm_name;
 
+    profiler::ScopedStage read_region_stage(profiler::Stage::kReadRegion);
+
     // If location is not specified, location would be (0, 0) if Z=0. Otherwise, location would be (0, 0, 0)
     if (location.empty())
     {
@@ -563,6 +640,15 @@ CuImage CuImage::read_region(std::vector<int64_t> location,
     const uint16_t ndim = image_container.ndim;
     auto& resource = out_metadata.get_resource();
 
+    {
+        uint64_t nbytes = (image_container.dtype.bits * image_container.dtype.lanes + 7) / 8;
+        for (int i = 0; i < ndim; ++i)
+        {
+            nbytes *= image_container.shape[i];
+        }
+        read_region_stage.add_bytes(nbytes);
+    }
+
     std::string_view dims{ "YXC" };
 
     // Information from image_data
@@ -576,7 +662,12 @@ CuImage CuImage::read_region(std::vector<int64_t> location,
     uint8_t n_ch = image_container.shape[2];
     std::pmr::vector<std::string_view> channel_names(&resource);
     channel_names.reserve(n_ch);
-    if (n_ch == 3)
+    if (n_ch <= 2)
+    {
+        // Grayscale (with alpha)
+        channel_names.emplace_back(std::string_view{ "I" });
+    }
+    else
     {
         // std::pmr::vector<std::string_view> channel_names(
         //     { std::string_view{ "R" }, std::string_view{ "G" }, std::string_view{ "B" } }, &resource);
@@ -584,11 +675,8 @@ CuImage CuImage::read_region(std::vector<int64_t> location,
         channel_names.emplace_back(std::string_view{ "G" });
         channel_names.emplace_back(std::string_view{ "B" });
     }
-    else
+    if (n_ch == 2 || n_ch == 4)
     {
-        channel_names.emplace_back(std::string_view{ "R" });
-        channel_names.emplace_back(std::string_view{ "G" });
-        channel_names.emplace_back(std::string_view{ "B" });
         channel_names.emplace_back(std::string_view{ "A" });
     }
 
@@ -715,9 +803,66 @@ CuImage CuImage::associated_image(const std::string& name) const
     return CuImage{};
 }
 
-void CuImage::save(std::string file_path) const
+void CuImage::save(std::string file_path,
+                   std::string format,
+                   std::string compression,
+                   uint32_t tile_size,
+                   int32_t quality,
+                   uint16_t level_count,
+                   uint32_t num_workers) const
+{
+    if (format.empty())
+    {
+        const std::string_view ppm_ext{ ".ppm" };
+        format = (file_path.size() >= ppm_ext.size() &&
+                  file_path.compare(file_path.size() - ppm_ext.size(), ppm_ext.size(), ppm_ext) == 0) ?
+                     "ppm" :
+                     "tiff";
+    }
+    if (format == "ppm")
+    {
+        save_ppm(file_path);
+        return;
+    }
+    if (format != "tiff" && format != "tif")
+    {
+        throw std::invalid_argument(fmt::format("Unsupported format '{}' (should be 'tiff' or 'ppm')!", format));
+    }
+    if (!image_metadata_)
+    {
+        throw std::runtime_error("The image is not loaded!");
+    }
+
+    const int64_t width = image_metadata_->shape[dim_indices_.index('X')];
+    const int64_t height = image_metadata_->shape[dim_indices_.index('Y')];
+    const int64_t channels = image_metadata_->shape[dim_indices_.index('C')];
+
+    ImageWriter writer(file_path, { height, width, channels }, image_metadata_->dtype, compression, tile_size,
+                       quality, level_count, num_workers);
+    if (image_data_)
+    {
+        if (image_data_->container.ctx.device_type != kDLCPU)
+        {
+            throw std::runtime_error("Only images on CPU memory can be saved!");
+        }
+        writer.write_region({ 0, 0 }, image_data_->container);
+    }
+    else
+    {
+        // Read and write the image by bands of tiles to bound the memory usage.
+        const int64_t band_height = tile_size ? tile_size : 256;
+        auto image = const_cast<CuImage*>(this);
+        for (int64_t y = 0; y < height; y += band_height)
+        {
+            CuImage band = image->read_region({ 0, y }, { width, std::min(band_height, height - y) }, 0);
+            writer.write_region({ 0, y }, band.image_data_->container);
+        }
+    }
+    writer.close();
+}
+
+void CuImage::save_ppm(const std::string& file_path) const
 {
-    // Save ppm file for now.
     if (image_data_)
     {
         std::fstream fs(file_path, std::fstream::out | std::fstream::binary);
@@ -750,33 +895,9 @@ void CuImage::ensure_init()
 {
     ScopedLock g(mutex_);
 
-    if (!framework_)
-    {
-        CUCIM_ERROR("Framework is not initialized!");
-    }
     if (!image_formats_)
     {
-        auto plugin_root = framework_->get_plugin_root();
-        // TODO: Here 'LINUX' path separator is used. Need to make it generalize once filesystem library is
-        // available.
-        std::string plugin_file_path = (plugin_root && *plugin_root != 0) ?
-                                           fmt::format("{}/cucim.kit.cuslide@{}.{}.{}.so", plugin_root,
-                                                       CUCIM_VERSION_MAJOR, CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH) :
-                                           fmt::format("cucim.kit.cuslide@{}.{}.{}.so", CUCIM_VERSION_MAJOR,
-                                                       CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH);
-        struct stat st_buff;
-        if (stat(plugin_file_path.c_str(), &st_buff) != 0)
-        {
-            plugin_file_path = fmt::format(
-                "cucim.kit.cuslide@{}.{}.{}.so", CUCIM_VERSION_MAJOR, CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH);
-        }
-        image_formats_ =
-            framework_->acquire_interface_from_library<cucim::io::format::IImageFormat>(plugin_file_path.c_str());
-        if (image_formats_ == nullptr)
-        {
-            throw std::runtime_error(fmt::format("Dependent library 'cucim.kit.cuslide@{}.{}.{}.so' cannot be loaded!",
-                                                 CUCIM_VERSION_MAJOR, CUCIM_VERSION_MINOR, CUCIM_VERSION_PATCH));
-        }
+        image_formats_ = load_image_formats(framework_);
     }
 }
 
@@ -798,6 +919,7 @@ bool CuImage::crop_image(io::format::ImageMetadataDesc* metadata,
     // TODO: consider other cases where samples_per_pixel is not same with # of channels
     //       (we cannot use `ifd->samples_per_pixel()` here)
     uint32_t samples_per_pixel = static_cast<uint32_t>(image_metadata_->shape[dim_indices_.index('C')]);
+    uint32_t pixel_nbytes = samples_per_pixel * ((image_metadata_->dtype.bits + 7) / 8);
 
     for (int32_t i = 0; i < ndims; ++i)
     {
@@ -833,20 +955,27 @@ bool CuImage::crop_image(io::format::ImageMetadataDesc* metadata,
 
     uint8_t* src_ptr = static_cast<uint8_t*>(image_data_->container.data);
 
-    void* raster = cucim_malloc(w * h * samples_per_pixel); // RGB image
+    void* raster = nullptr;
+    {
+        profiler::ScopedStage alloc_stage(profiler::Stage::kAllocation, w * h * pixel_nbytes);
+        raster = cucim_malloc(w * h * pixel_nbytes);
+    }
     auto dest_ptr = static_cast<uint8_t*>(raster);
-    int64_t dest_stride_x_bytes = w * samples_per_pixel;
+    int64_t dest_stride_x_bytes = w * pixel_nbytes;
 
     int64_t src_stride_x = original_img_width;
-    int64_t src_stride_x_bytes = original_img_width * samples_per_pixel;
+    int64_t src_stride_x_bytes = original_img_width * pixel_nbytes;
 
-    int64_t start_offset = (sx + (sy * src_stride_x)) * samples_per_pixel;
-    int64_t end_offset = (ex + (ey * src_stride_x)) * samples_per_pixel;
+    int64_t start_offset = (sx + (sy * src_stride_x)) * pixel_nbytes;
+    int64_t end_offset = (ex + (ey * src_stride_x)) * pixel_nbytes;
 
-    for (int64_t src_offset = start_offset; src_offset <= end_offset; src_offset += src_stride_x_bytes)
     {
-        memcpy(dest_ptr, src_ptr + src_offset, dest_stride_x_bytes);
-        dest_ptr += dest_stride_x_bytes;
+        profiler::ScopedStage copy_stage(profiler::Stage::kCopy, dest_stride_x_bytes * h);
+        for (int64_t src_offset = start_offset; src_offset <= end_offset; src_offset += src_stride_x_bytes)
+        {
+            memcpy(dest_ptr, src_ptr + src_offset, dest_stride_x_bytes);
+            dest_ptr += dest_stride_x_bytes;
+        }
     }
 
     out_image_data->container.data = raster;
@@ -864,4 +993,77 @@ bool CuImage::crop_image(io::format::ImageMetadataDesc* metadata,
     return true;
 }
 
+ImageWriter::ImageWriter(const filesystem::Path& file_path,
+                         const Shape& shape,
+                         const DLDataType& dtype,
+                         const std::string& compression,
+                         uint32_t tile_size,
+                         int32_t quality,
+                         uint16_t level_count,
+                         uint32_t num_workers)
+{
+    if (shape.size() != 3)
+    {
+        throw std::invalid_argument(
+            fmt::format("Invalid shape (ndim: {}). It should be {{height, width, channels}}!", shape.size()));
+    }
+    image_formats_ = load_image_formats(CuImage::get_framework());
+
+    auto& image_writer = image_formats_->formats[0].image_writer;
+    if (!image_writer.create)
+    {
+        throw std::runtime_error("The image format plugin doesn't support writing an image!");
+    }
+
+    io::format::ImageMetadata metadata{};
+    std::pmr::vector<int64_t> metadata_shape(shape.begin(), shape.end(), &metadata.get_resource());
+    metadata.ndim(3).dims("YXC").shape(metadata_shape).dtype(dtype);
+
+    io::format::ImageWriterOptionsDesc options{
+        compression.c_str(), tile_size, tile_size, quality, level_count, num_workers
+    };
+    file_handle_ = image_writer.create(file_path.c_str(), &metadata.desc(), &options);
+}
+
+ImageWriter::~ImageWriter()
+{
+    try
+    {
+        close();
+    }
+    catch (const std::exception& e)
+    {
+        fmt::print(stderr, "[Error] Failed to close the image writer: {}\n", e.what());
+    }
+}
+
+void ImageWriter::write_region(const std::vector<int64_t>& location, const DLTensor& data)
+{
+    if (is_closed())
+    {
+        throw std::runtime_error("The image writer is closed!");
+    }
+    if (location.size() != 2)
+    {
+        throw std::invalid_argument(
+            fmt::format("Invalid location (ndim: {}). It should be {{x, y}}!", location.size()));
+    }
+    io::format::ImageDataDesc image_data{ data };
+    image_formats_->formats[0].image_writer.write(&file_handle_, location.data(), &image_data);
+}
+
+void ImageWriter::close()
+{
+    if (!is_closed())
+    {
+        image_formats_->formats[0].image_writer.close(&file_handle_);
+        file_handle_.client_data = nullptr;
+    }
+}
+
+bool ImageWriter::is_closed() const
+{
+    return file_handle_.client_data == nullptr;
+}
+
 } // namespace cucim
\ No newline at end of file
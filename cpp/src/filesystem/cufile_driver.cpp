@@ -27,7 +27,13 @@
 #include <sys/mman.h>
 #include <sys/statvfs.h>
 #include <sys/stat.h>
+#include <atomic>
 #include <chrono>
+#include <condition_variable>
+#include <deque>
+#include <functional>
+#include <mutex>
+#include <thread>
 
 
 #define ALIGN_UP(x, align_to) (((uint64_t)(x) + ((uint64_t)(align_to)-1)) & ~((uint64_t)(align_to)-1))
@@ -51,6 +57,102 @@ static CuFileDriverInitializer s_cufile_initializer;
 thread_local static CuFileDriverCache s_cufile_cache;
 Mutex CuFileDriver::driver_mutex_;
 
+/**
+ * Threads serving the requests of CuFileDriver::preadv().
+ *
+ * Each thread allocates its bounce buffers (s_cufile_cache) on first use, so the threads are created lazily and kept
+ * until the process exits instead of being created for each call.
+ */
+class PreadWorkerPool
+{
+public:
+    static PreadWorkerPool& instance()
+    {
+        static PreadWorkerPool pool;
+        return pool;
+    }
+
+    ~PreadWorkerPool()
+    {
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            stop_ = true;
+        }
+        queue_cv_.notify_all();
+        for (auto& worker : workers_)
+        {
+            worker.join();
+        }
+    }
+
+    /**
+     * Runs `work` on `count` threads of the pool and in the calling thread, and waits until all of them return.
+     */
+    void run(size_t count, const std::function<void()>& work)
+    {
+        auto batch = std::make_shared<Batch>();
+        batch->work = &work;
+        batch->remaining = count;
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            while (workers_.size() < count)
+            {
+                workers_.emplace_back([this]() { worker_loop(); });
+            }
+            for (size_t i = 0; i < count; ++i)
+            {
+                queue_.push_back(batch);
+            }
+        }
+        queue_cv_.notify_all();
+
+        work();
+
+        std::unique_lock<std::mutex> lock(mutex_);
+        done_cv_.wait(lock, [&batch]() { return batch->remaining == 0; });
+    }
+
+private:
+    struct Batch
+    {
+        const std::function<void()>* work = nullptr;
+        size_t remaining = 0;
+    };
+
+    PreadWorkerPool() = default;
+
+    void worker_loop()
+    {
+        std::unique_lock<std::mutex> lock(mutex_);
+        while (true)
+        {
+            queue_cv_.wait(lock, [this]() { return stop_ || !queue_.empty(); });
+            if (queue_.empty())
+            {
+                return;
+            }
+            std::shared_ptr<Batch> batch = std::move(queue_.front());
+            queue_.pop_front();
+
+            lock.unlock();
+            (*batch->work)();
+            lock.lock();
+
+            if (--batch->remaining == 0)
+            {
+                done_cv_.notify_all();
+            }
+        }
+    }
+
+    std::mutex mutex_;
+    std::condition_variable queue_cv_;
+    std::condition_variable done_cv_;
+    std::deque<std::shared_ptr<Batch>> queue_;
+    std::vector<std::thread> workers_;
+    bool stop_ = false;
+};
+
 
 static std::string get_fd_path(int fd)
 {
@@ -260,6 +362,20 @@ ssize_t pread(const std::shared_ptr<CuFileDriver>& fd, void* buf, size_t count,
         return -1;
     }
 }
+std::vector<ssize_t> preadv(const std::shared_ptr<CuFileDriver>& fd,
+                            const std::vector<ReadRequest>& requests,
+                            uint32_t num_workers)
+{
+    if (fd != nullptr)
+    {
+        return fd->preadv(requests, num_workers);
+    }
+    else
+    {
+        fmt::print(stderr, "fd (CuFileDriver) is null!");
+        return std::vector<ssize_t>(requests.size(), -1);
+    }
+}
 ssize_t pwrite(const std::shared_ptr<CuFileDriver>& fd, const void* buf, size_t count, off_t file_offset, off_t buf_offset)
 {
     if (fd != nullptr)
@@ -754,6 +870,37 @@ ssize_t CuFileDriver::pread(void* buf, size_t count, off_t file_offset, off_t bu
 
     return total_read_cnt;
 }
+std::vector<ssize_t> CuFileDriver::preadv(const std::vector<ReadRequest>& requests, uint32_t num_workers) const
+{
+    const size_t request_count = requests.size();
+    std::vector<ssize_t> read_counts(request_count, -1);
+
+    size_t thread_count = std::min(static_cast<size_t>(num_workers), request_count);
+    if (thread_count <= 1)
+    {
+        for (size_t i = 0; i < request_count; ++i)
+        {
+            const ReadRequest& request = requests[i];
+            read_counts[i] = pread(request.buf, request.count, request.file_offset, request.buf_offset);
+        }
+        return read_counts;
+    }
+
+    // Note: pread() is safe to be called concurrently as the bounce buffers (s_cufile_cache) are thread-local.
+    std::atomic<size_t> next_index{ 0 };
+    std::function<void()> worker = [&]() {
+        size_t i;
+        while ((i = next_index.fetch_add(1, std::memory_order_relaxed)) < request_count)
+        {
+            const ReadRequest& request = requests[i];
+            read_counts[i] = pread(request.buf, request.count, request.file_offset, request.buf_offset);
+        }
+    };
+
+    PreadWorkerPool::instance().run(thread_count - 1, worker);
+    return read_counts;
+}
+
 ssize_t CuFileDriver::pwrite(const void* buf, size_t count, off_t file_offset, off_t buf_offset)
 {
     if (file_flags_ == -1)
@@ -15,6 +15,7 @@
  */
 
 #include "cucim/memory/memory_manager.h"
+#include "cucim/memory/memory_pool.h"
 
 #include <fmt/format.h>
 #include <cuda_runtime.h>
@@ -33,12 +34,12 @@
 
 CUCIM_API void* cucim_malloc(size_t size)
 {
-    return malloc(size);
+    return cucim::memory::HostMemoryPool::instance().allocate(size);
 }
 
 CUCIM_API void cucim_free(void* ptr)
 {
-    free(ptr);
+    cucim::memory::HostMemoryPool::instance().deallocate(ptr);
 }
 
 namespace cucim::memory
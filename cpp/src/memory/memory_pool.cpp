@@ -0,0 +1,403 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "cucim/memory/memory_pool.h"
+
+#include <fmt/format.h>
+
+#include <cstdlib>
+
+namespace cucim::memory
+{
+
+static constexpr uint64_t kBlockMagic = 0x4C4F4F504D494355; // "UCIMPOOL"
+
+// Blocks larger than this are never kept in thread caches (they go to the shared free lists instead).
+static constexpr size_t kThreadCacheMaxBlockSize = static_cast<size_t>(4) << 20; // 4 MiB
+static constexpr size_t kThreadCacheMaxBytes = static_cast<size_t>(32) << 20; // 32 MiB
+
+struct alignas(kHostPoolAlignment) BlockHeader
+{
+    uint64_t magic;
+    uint64_t class_index; /// kHostPoolClassCount if the block is not pooled
+    uint64_t block_size; /// Number of bytes after the header
+};
+static_assert(sizeof(BlockHeader) == kHostPoolAlignment, "BlockHeader must keep the user memory aligned");
+
+static inline BlockHeader* header_of(void* ptr)
+{
+    return reinterpret_cast<BlockHeader*>(static_cast<uint8_t*>(ptr) - sizeof(BlockHeader));
+}
+
+static inline void* user_ptr_of(BlockHeader* header)
+{
+    return reinterpret_cast<uint8_t*>(header) + sizeof(BlockHeader);
+}
+
+static inline size_t align_up(size_t size, size_t alignment)
+{
+    return (size + alignment - 1) / alignment * alignment;
+}
+
+static BlockHeader* system_allocate(size_t class_index, size_t block_size)
+{
+    void* mem = std::aligned_alloc(kHostPoolAlignment, sizeof(BlockHeader) + align_up(block_size, kHostPoolAlignment));
+    if (mem == nullptr)
+    {
+        return nullptr;
+    }
+    auto header = static_cast<BlockHeader*>(mem);
+    header->magic = kBlockMagic;
+    header->class_index = class_index;
+    header->block_size = block_size;
+    return header;
+}
+
+static void system_free(BlockHeader* header)
+{
+    header->magic = 0;
+    std::free(header);
+}
+
+struct HostMemoryPool::ThreadCache
+{
+    explicit ThreadCache(HostMemoryPool& pool) : pool(pool), epoch(pool.trim_epoch_.load(std::memory_order_acquire))
+    {
+    }
+    ~ThreadCache();
+
+    // Releases all cached blocks if `trim()` was called since the last access.
+    void sync_epoch()
+    {
+        uint64_t current_epoch = pool.trim_epoch_.load(std::memory_order_acquire);
+        if (epoch != current_epoch)
+        {
+            release_all();
+            epoch = current_epoch;
+        }
+    }
+
+    void release_all()
+    {
+        for (auto& blocks : free_lists)
+        {
+            for (auto block : blocks)
+            {
+                pool.release_block(block);
+            }
+            blocks.clear();
+        }
+        cached_bytes = 0;
+    }
+
+    HostMemoryPool& pool;
+    uint64_t epoch = 0;
+    size_t cached_bytes = 0;
+    std::array<std::vector<void*>, kHostPoolClassCount> free_lists;
+};
+
+// Set when the thread cache of the current thread is destroyed (on thread exit) so that blocks freed afterwards
+// (e.g., by other thread-local destructors) go to the shared free lists.
+static thread_local bool t_thread_cache_destroyed = false;
+
+HostMemoryPool::ThreadCache::~ThreadCache()
+{
+    for (size_t class_index = 0; class_index < kHostPoolClassCount; ++class_index)
+    {
+        for (auto block : free_lists[class_index])
+        {
+            if (!pool.push_global(class_index, block, true))
+            {
+                pool.release_block(block);
+            }
+        }
+    }
+    t_thread_cache_destroyed = true;
+}
+
+HostMemoryPool& HostMemoryPool::instance()
+{
+    // Intentionally leaked: memory may be freed by static/thread-local destructors during shutdown.
+    static HostMemoryPool* pool = new HostMemoryPool();
+    return *pool;
+}
+
+size_t HostMemoryPool::size_class(size_t size)
+{
+    constexpr size_t min_block_size = static_cast<size_t>(1) << kHostPoolMinBlockShift;
+    constexpr size_t max_block_size = static_cast<size_t>(1) << kHostPoolMaxBlockShift;
+    if (size < min_block_size || size > max_block_size)
+    {
+        return kHostPoolClassCount;
+    }
+    if (size == min_block_size)
+    {
+        return 0;
+    }
+    // 2^exponent < size <= 2^(exponent + 1)
+    size_t exponent = 63 - __builtin_clzll(static_cast<unsigned long long>(size - 1));
+    size_t base = static_cast<size_t>(1) << exponent;
+    size_t step = base / kHostPoolSubClasses;
+    size_t sub_class = (size - base + step - 1) / step; // 1 ~ kHostPoolSubClasses
+    return (exponent - kHostPoolMinBlockShift) * kHostPoolSubClasses + sub_class;
+}
+
+size_t HostMemoryPool::class_block_size(size_t class_index)
+{
+    size_t exponent = kHostPoolMinBlockShift + class_index / kHostPoolSubClasses;
+    size_t base = static_cast<size_t>(1) << exponent;
+    return base + (class_index % kHostPoolSubClasses) * (base / kHostPoolSubClasses);
+}
+
+HostMemoryPool::ThreadCache* HostMemoryPool::thread_cache()
+{
+    if (t_thread_cache_destroyed)
+    {
+        return nullptr;
+    }
+    static thread_local ThreadCache cache(*this);
+    return &cache;
+}
+
+void* HostMemoryPool::allocate(size_t size)
+{
+    allocations_.fetch_add(1, std::memory_order_relaxed);
+
+    size_t class_index = is_enabled() ? size_class(size) : kHostPoolClassCount;
+    if (class_index == kHostPoolClassCount)
+    {
+        bypassed_.fetch_add(1, std::memory_order_relaxed);
+        BlockHeader* header = system_allocate(kHostPoolClassCount, size);
+        return header ? user_ptr_of(header) : nullptr;
+    }
+
+    size_t block_size = class_block_size(class_index);
+    ThreadCache* cache = thread_cache();
+    if (cache)
+    {
+        cache->sync_epoch();
+        auto& blocks = cache->free_lists[class_index];
+        if (!blocks.empty())
+        {
+            void* block = blocks.back();
+            blocks.pop_back();
+            cache->cached_bytes -= block_size;
+            cached_bytes_.fetch_sub(block_size, std::memory_order_relaxed);
+            cached_blocks_.fetch_sub(1, std::memory_order_relaxed);
+            thread_cache_hits_.fetch_add(1, std::memory_order_relaxed);
+            return block;
+        }
+    }
+
+    if (void* block = pop_global(class_index))
+    {
+        global_hits_.fetch_add(1, std::memory_order_relaxed);
+        return block;
+    }
+
+    misses_.fetch_add(1, std::memory_order_relaxed);
+    return allocate_block(class_index, block_size);
+}
+
+void HostMemoryPool::deallocate(void* ptr)
+{
+    if (ptr == nullptr)
+    {
+        return;
+    }
+    BlockHeader* header = header_of(ptr);
+    if (header->magic != kBlockMagic)
+    {
+        fmt::print(stderr, "[Error] The memory ({}) was not allocated by cucim_malloc()!\n", ptr);
+        return;
+    }
+
+    size_t class_index = header->class_index;
+    if (class_index >= kHostPoolClassCount || !is_enabled())
+    {
+        system_free(header);
+        return;
+    }
+
+    size_t block_size = header->block_size;
+    ThreadCache* cache = thread_cache();
+    if (cache && block_size <= kThreadCacheMaxBlockSize)
+    {
+        cache->sync_epoch();
+        auto& blocks = cache->free_lists[class_index];
+        if (blocks.size() < thread_cache_blocks_.load(std::memory_order_relaxed) &&
+            cache->cached_bytes + block_size <= kThreadCacheMaxBytes)
+        {
+            blocks.push_back(ptr);
+            cache->cached_bytes += block_size;
+            cached_bytes_.fetch_add(block_size, std::memory_order_relaxed);
+            cached_blocks_.fetch_add(1, std::memory_order_relaxed);
+            return;
+        }
+    }
+
+    if (!push_global(class_index, ptr, false))
+    {
+        system_free(header);
+        released_bytes_.fetch_add(block_size, std::memory_order_relaxed);
+    }
+}
+
+void* HostMemoryPool::allocate_block(size_t class_index, size_t size)
+{
+    BlockHeader* header = system_allocate(class_index, size);
+    if (header == nullptr)
+    {
+        // Give cached memory back to the system and try again
+        trim();
+        header = system_allocate(class_index, size);
+    }
+    return header ? user_ptr_of(header) : nullptr;
+}
+
+void HostMemoryPool::release_block(void* block)
+{
+    BlockHeader* header = header_of(block);
+    size_t block_size = header->block_size;
+    system_free(header);
+    cached_bytes_.fetch_sub(block_size, std::memory_order_relaxed);
+    cached_blocks_.fetch_sub(1, std::memory_order_relaxed);
+    released_bytes_.fetch_add(block_size, std::memory_order_relaxed);
+}
+
+bool HostMemoryPool::push_global(size_t class_index, void* block, bool is_cached)
+{
+    size_t block_size = class_block_size(class_index);
+    {
+        std::scoped_lock<std::mutex> lock(mutex_);
+        if (global_cached_bytes_ + block_size > max_cached_bytes_.load(std::memory_order_relaxed))
+        {
+            return false;
+        }
+        free_lists_[class_index].push_back(block);
+        global_cached_bytes_ += block_size;
+    }
+    if (!is_cached)
+    {
+        cached_bytes_.fetch_add(block_size, std::memory_order_relaxed);
+        cached_blocks_.fetch_add(1, std::memory_order_relaxed);
+    }
+    return true;
+}
+
+void* HostMemoryPool::pop_global(size_t class_index)
+{
+    size_t block_size = class_block_size(class_index);
+    void* block = nullptr;
+    {
+        std::scoped_lock<std::mutex> lock(mutex_);
+        auto& blocks = free_lists_[class_index];
+        if (blocks.empty())
+        {
+            return nullptr;
+        }
+        block = blocks.back();
+        blocks.pop_back();
+        global_cached_bytes_ -= block_size;
+    }
+    cached_bytes_.fetch_sub(block_size, std::memory_order_relaxed);
+    cached_blocks_.fetch_sub(1, std::memory_order_relaxed);
+    return block;
+}
+
+void HostMemoryPool::release_global()
+{
+    std::array<std::vector<void*>, kHostPoolClassCount> free_lists;
+    {
+        std::scoped_lock<std::mutex> lock(mutex_);
+        free_lists.swap(free_lists_);
+        global_cached_bytes_ = 0;
+    }
+    for (auto& blocks : free_lists)
+    {
+        for (auto block : blocks)
+        {
+            release_block(block);
+        }
+    }
+}
+
+void HostMemoryPool::enable(bool value)
+{
+    enabled_.store(value, std::memory_order_relaxed);
+    if (!value)
+    {
+        trim();
+    }
+}
+
+size_t HostMemoryPool::max_cached_bytes() const
+{
+    return max_cached_bytes_.load(std::memory_order_relaxed);
+}
+
+void HostMemoryPool::max_cached_bytes(size_t nbytes)
+{
+    max_cached_bytes_.store(nbytes, std::memory_order_relaxed);
+    release_global();
+}
+
+size_t HostMemoryPool::thread_cache_blocks() const
+{
+    return thread_cache_blocks_.load(std::memory_order_relaxed);
+}
+
+void HostMemoryPool::thread_cache_blocks(size_t count)
+{
+    thread_cache_blocks_.store(count, std::memory_order_relaxed);
+    trim_epoch_.fetch_add(1, std::memory_order_acq_rel);
+}
+
+void HostMemoryPool::trim()
+{
+    trim_epoch_.fetch_add(1, std::memory_order_acq_rel);
+    if (ThreadCache* cache = thread_cache())
+    {
+        cache->sync_epoch();
+    }
+    release_global();
+}
+
+HostMemoryPoolStats HostMemoryPool::stats() const
+{
+    HostMemoryPoolStats result;
+    result.allocations = allocations_.load(std::memory_order_relaxed);
+    result.thread_cache_hits = thread_cache_hits_.load(std::memory_order_relaxed);
+    result.global_hits = global_hits_.load(std::memory_order_relaxed);
+    result.misses = misses_.load(std::memory_order_relaxed);
+    result.bypassed = bypassed_.load(std::memory_order_relaxed);
+    result.cached_bytes = cached_bytes_.load(std::memory_order_relaxed);
+    result.cached_blocks = cached_blocks_.load(std::memory_order_relaxed);
+    result.released_bytes = released_bytes_.load(std::memory_order_relaxed);
+    return result;
+}
+
+void HostMemoryPool::reset_stats()
+{
+    allocations_.store(0, std::memory_order_relaxed);
+    thread_cache_hits_.store(0, std::memory_order_relaxed);
+    global_hits_.store(0, std::memory_order_relaxed);
+    misses_.store(0, std::memory_order_relaxed);
+    bypassed_.store(0, std::memory_order_relaxed);
+    released_bytes_.store(0, std::memory_order_relaxed);
+}
+
+} // namespace cucim::memory
@@ -0,0 +1,184 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "cucim/profiler/profiler.h"
+
+#include <functional>
+#include <thread>
+
+namespace cucim::profiler
+{
+
+static constexpr const char* g_stage_names[kStageCount] = {
+    "read_region", "file_read", "decode_jpeg", "decode_deflate", "decode_libtiff", "copy", "allocation",
+};
+
+const char* stage_name(Stage stage)
+{
+    auto index = static_cast<size_t>(stage);
+    if (index >= kStageCount)
+    {
+        return "unknown";
+    }
+    return g_stage_names[index];
+}
+
+static inline size_t histogram_bin(uint64_t duration_ns)
+{
+    size_t bin = 0;
+    while (duration_ns && bin < kHistogramBins - 1)
+    {
+        duration_ns >>= 1;
+        ++bin;
+    }
+    return bin;
+}
+
+static inline uint64_t current_thread_id()
+{
+    static thread_local uint64_t thread_id = std::hash<std::thread::id>{}(std::this_thread::get_id());
+    return thread_id;
+}
+
+Profiler::Profiler()
+{
+    origin_ns_ = now_ns();
+}
+
+Profiler& Profiler::instance()
+{
+    static Profiler profiler;
+    return profiler;
+}
+
+void Profiler::enable(bool trace)
+{
+    tracing_.store(trace, std::memory_order_relaxed);
+    enabled_.store(true, std::memory_order_release);
+}
+
+void Profiler::disable()
+{
+    enabled_.store(false, std::memory_order_release);
+    tracing_.store(false, std::memory_order_relaxed);
+}
+
+void Profiler::reset()
+{
+    for (auto& stats : stage_stats_)
+    {
+        stats.count.store(0, std::memory_order_relaxed);
+        stats.total_ns.store(0, std::memory_order_relaxed);
+        stats.min_ns.store(UINT64_MAX, std::memory_order_relaxed);
+        stats.max_ns.store(0, std::memory_order_relaxed);
+        stats.bytes.store(0, std::memory_order_relaxed);
+        for (auto& bin : stats.histogram)
+        {
+            bin.store(0, std::memory_order_relaxed);
+        }
+    }
+    {
+        std::scoped_lock<std::mutex> lock(trace_mutex_);
+        trace_events_.clear();
+        trace_events_.shrink_to_fit();
+    }
+    dropped_trace_events_.store(0, std::memory_order_relaxed);
+    origin_ns_.store(now_ns(), std::memory_order_relaxed);
+}
+
+void Profiler::record(Stage stage, uint64_t start_ns, uint64_t duration_ns, uint64_t bytes)
+{
+    auto index = static_cast<size_t>(stage);
+    if (index >= kStageCount)
+    {
+        return;
+    }
+    auto& stats = stage_stats_[index];
+    stats.count.fetch_add(1, std::memory_order_relaxed);
+    stats.total_ns.fetch_add(duration_ns, std::memory_order_relaxed);
+    stats.bytes.fetch_add(bytes, std::memory_order_relaxed);
+    stats.histogram[histogram_bin(duration_ns)].fetch_add(1, std::memory_order_relaxed);
+
+    uint64_t prev_min = stats.min_ns.load(std::memory_order_relaxed);
+    while (duration_ns < prev_min &&
+           !stats.min_ns.compare_exchange_weak(prev_min, duration_ns, std::memory_order_relaxed))
+    {
+    }
+    uint64_t prev_max = stats.max_ns.load(std::memory_order_relaxed);
+    while (duration_ns > prev_max &&
+           !stats.max_ns.compare_exchange_weak(prev_max, duration_ns, std::memory_order_relaxed))
+    {
+    }
+
+    if (is_tracing())
+    {
+        uint64_t origin_ns = origin_ns_.load(std::memory_order_relaxed);
+        TraceEvent event{ stage, start_ns > origin_ns ? start_ns - origin_ns : 0, duration_ns, bytes,
+                          current_thread_id() };
+
+        std::scoped_lock<std::mutex> lock(trace_mutex_);
+        if (trace_events_.size() < kMaxTraceEvents)
+        {
+            trace_events_.emplace_back(event);
+        }
+        else
+        {
+            dropped_trace_events_.fetch_add(1, std::memory_order_relaxed);
+        }
+    }
+}
+
+std::vector<StageStats> Profiler::stats() const
+{
+    std::vector<StageStats> result;
+    result.reserve(kStageCount);
+    for (size_t index = 0; index < kStageCount; ++index)
+    {
+        const auto& stats = stage_stats_[index];
+        StageStats item;
+        item.stage = static_cast<Stage>(index);
+        item.count = stats.count.load(std::memory_order_relaxed);
+        item.total_ns = stats.total_ns.load(std::memory_order_relaxed);
+        item.min_ns = item.count ? stats.min_ns.load(std::memory_order_relaxed) : 0;
+        item.max_ns = stats.max_ns.load(std::memory_order_relaxed);
+        item.bytes = stats.bytes.load(std::memory_order_relaxed);
+        for (size_t bin = 0; bin < kHistogramBins; ++bin)
+        {
+            item.histogram[bin] = stats.histogram[bin].load(std::memory_order_relaxed);
+        }
+        result.emplace_back(item);
+    }
+    return result;
+}
+
+std::vector<TraceEvent> Profiler::trace_events() const
+{
+    std::scoped_lock<std::mutex> lock(trace_mutex_);
+    return trace_events_;
+}
+
+uint64_t Profiler::dropped_trace_events() const
+{
+    return dropped_trace_events_.load(std::memory_order_relaxed);
+}
+
+uint64_t Profiler::now_ns()
+{
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now().time_since_epoch())
+        .count();
+}
+
+} // namespace cucim::profiler
@@ -629,3 +629,59 @@ TEST_CASE("Verify libcufile usage", "[test_cufile.cpp]")
         free(unaligned_host);
     }
 }
+
+TEST_CASE("Verify batched reads with preadv()", "[test_cufile.cpp]")
+{
+    constexpr int FILE_SIZE = 4096 * 4;
+    std::string input_file = fmt::format("{}/test_cufile_preadv.raw", g_config.temp_folder);
+    create_test_file(input_file.c_str(), FILE_SIZE);
+
+    std::vector<uint8_t> expected(FILE_SIZE);
+    {
+        std::ifstream ifs(input_file, std::ios::binary);
+        ifs.read(reinterpret_cast<char*>(expected.data()), FILE_SIZE);
+    }
+
+    // clang-format off
+    constexpr int test_file_offsets[] = { 0, 500, 4095, 8192, 12000, FILE_SIZE - 100 };
+    constexpr int test_counts[] =       { 10, 4097, 1, 4096, 300, 200 };
+    // clang-format on
+    constexpr int REQUEST_LEN = sizeof(test_counts) / sizeof(test_counts[0]);
+
+    for (uint32_t num_workers : { 0, 1, 4 })
+    {
+        DYNAMIC_SECTION(fmt::format("num_workers: {}", num_workers))
+        {
+            auto fd = cucim::filesystem::open(input_file.c_str(), "rpn");
+
+            size_t total_count = 0;
+            for (int i = 0; i < REQUEST_LEN; ++i)
+            {
+                total_count += test_counts[i];
+            }
+            std::vector<uint8_t> buf(total_count, 0);
+
+            std::vector<cucim::filesystem::ReadRequest> requests;
+            off_t buf_offset = 0;
+            for (int i = 0; i < REQUEST_LEN; ++i)
+            {
+                requests.push_back({ buf.data(), static_cast<size_t>(test_counts[i]), test_file_offsets[i], buf_offset });
+                buf_offset += test_counts[i];
+            }
+
+            auto read_counts = cucim::filesystem::preadv(fd, requests, num_workers);
+            REQUIRE(read_counts.size() == REQUEST_LEN);
+
+            buf_offset = 0;
+            for (int i = 0; i < REQUEST_LEN; ++i)
+            {
+                // The last request reads beyond the end of the file
+                ssize_t expected_count = std::min(test_counts[i], FILE_SIZE - test_file_offsets[i]);
+                REQUIRE(read_counts[i] == expected_count);
+                REQUIRE(memcmp(buf.data() + buf_offset, expected.data() + test_file_offsets[i], expected_count) == 0);
+                buf_offset += test_counts[i];
+            }
+            fd->close();
+        }
+    }
+}
@@ -0,0 +1,111 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <catch2/catch.hpp>
+
+#include "config.h"
+#include "cucim/core/framework.h"
+#include "cucim/io/format/image_format.h"
+#include "cucim/memory/memory_manager.h"
+
+#include <algorithm>
+#include <cstdio>
+#include <vector>
+
+static std::vector<uint8_t> read_region(cucim::io::format::IImageFormat* image_format,
+                                        CuCIMFileHandle& handle,
+                                        int64_t sx,
+                                        int64_t sy,
+                                        int64_t width,
+                                        int64_t height,
+                                        uint16_t level = 0)
+{
+    cucim::io::format::ImageMetadata metadata{};
+    image_format->formats[0].image_parser.parse(&handle, &metadata.desc());
+
+    cucim::io::format::ImageReaderRegionRequestDesc request{};
+    int64_t request_location[2] = { sx, sy };
+    request.location = request_location;
+    request.level = level;
+    int64_t request_size[2] = { width, height };
+    request.size = request_size;
+    request.device = const_cast<char*>("cpu");
+
+    cucim::io::format::ImageDataDesc image_data{};
+    image_format->formats[0].image_reader.read(&handle, &metadata.desc(), &request, &image_data, nullptr);
+
+    auto data = static_cast<uint8_t*>(image_data.container.data);
+    std::vector<uint8_t> result(data, data + width * height * 3);
+    cucim_free(image_data.container.data);
+    return result;
+}
+
+TEST_CASE("Verify writing a pyramidal TIFF image", "[test_image_writer.cpp]")
+{
+    cucim::Framework* framework = cucim::acquire_framework("sample.app");
+    cucim::io::format::IImageFormat* image_format =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(g_config.get_plugin_path().c_str());
+    REQUIRE(image_format);
+    auto& image_writer = image_format->formats[0].image_writer;
+    REQUIRE(image_writer.create);
+
+    constexpr int64_t width = 300;
+    constexpr int64_t height = 200;
+    auto input_handle = image_format->formats[0].image_parser.open(g_config.get_input_path().c_str());
+    auto expected = read_region(image_format, input_handle, 100, 100, width, height);
+    image_format->formats[0].image_parser.close(&input_handle);
+
+    std::string output_path = "/tmp/test_image_writer.tif";
+    {
+        cucim::io::format::ImageMetadata metadata{};
+        std::pmr::vector<int64_t> shape({ height, width, 3 }, &metadata.get_resource());
+        metadata.ndim(3).dims("YXC").shape(shape).dtype(DLDataType{ kDLUInt, 8, 1 });
+        cucim::io::format::ImageWriterOptionsDesc options{ "deflate", 128, 128, -1, 0, 2 };
+        auto handle = image_writer.create(output_path.c_str(), &metadata.desc(), &options);
+
+        // Write the tiles of the bottom row first (any order is allowed)
+        for (int64_t y : { 128, 0 })
+        {
+            int64_t region_shape[3] = { std::min<int64_t>(128, height - y), width, 3 };
+            int64_t region_strides[3] = { width * 3, 3, 1 };
+            DLTensor region{};
+            region.data = expected.data() + y * width * 3;
+            region.ctx = DLContext{ kDLCPU, 0 };
+            region.ndim = 3;
+            region.dtype = DLDataType{ kDLUInt, 8, 1 };
+            region.shape = region_shape;
+            region.strides = region_strides;
+            cucim::io::format::ImageDataDesc image_data{ region };
+            int64_t location[2] = { 0, y };
+            REQUIRE(image_writer.write(&handle, location, &image_data));
+        }
+        REQUIRE(image_writer.close(&handle));
+    }
+
+    auto output_handle = image_format->formats[0].image_parser.open(output_path.c_str());
+    cucim::io::format::ImageMetadata metadata{};
+    image_format->formats[0].image_parser.parse(&output_handle, &metadata.desc());
+    REQUIRE(metadata.desc().resolution_info.level_count == 3);
+    REQUIRE(metadata.desc().resolution_info.level_dimensions[2] == 150);
+    REQUIRE(metadata.desc().resolution_info.level_dimensions[3] == 100);
+
+    // Deflate compression is lossless
+    auto actual = read_region(image_format, output_handle, 0, 0, width, height);
+    image_format->formats[0].image_parser.close(&output_handle);
+    std::remove(output_path.c_str());
+
+    REQUIRE(actual == expected);
+}
@@ -0,0 +1,128 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "cucim/memory/memory_pool.h"
+
+#include <catch2/catch.hpp>
+
+#include <cstring>
+#include <thread>
+
+using cucim::memory::HostMemoryPool;
+
+TEST_CASE("Verify host memory pool size classes", "[test_memory_pool.cpp]")
+{
+    REQUIRE(HostMemoryPool::size_class(1) == cucim::memory::kHostPoolClassCount);
+    REQUIRE(HostMemoryPool::size_class(4095) == cucim::memory::kHostPoolClassCount);
+    REQUIRE(HostMemoryPool::size_class((static_cast<size_t>(1) << cucim::memory::kHostPoolMaxBlockShift) + 1) ==
+            cucim::memory::kHostPoolClassCount);
+
+    REQUIRE(HostMemoryPool::class_block_size(HostMemoryPool::size_class(4096)) == 4096);
+    REQUIRE(HostMemoryPool::class_block_size(HostMemoryPool::size_class(4097)) == 5120);
+    REQUIRE(HostMemoryPool::class_block_size(HostMemoryPool::size_class(8192)) == 8192);
+    REQUIRE(HostMemoryPool::size_class(static_cast<size_t>(1) << cucim::memory::kHostPoolMaxBlockShift) ==
+            cucim::memory::kHostPoolClassCount - 1);
+
+    // Every size is served by a block that is large enough but wastes at most 25%
+    for (size_t size = 4096; size < (1 << 22); size = size * 5 / 4 + 7)
+    {
+        size_t block_size = HostMemoryPool::class_block_size(HostMemoryPool::size_class(size));
+        REQUIRE(block_size >= size);
+        REQUIRE(block_size <= size + size / 4 + 1);
+    }
+}
+
+TEST_CASE("Verify host memory pool reuse", "[test_memory_pool.cpp]")
+{
+    auto& pool = HostMemoryPool::instance();
+    pool.enable(true);
+    pool.trim();
+    pool.reset_stats();
+
+    SECTION("Freed blocks are reused by the same thread")
+    {
+        void* ptr = pool.allocate(224 * 224 * 3);
+        REQUIRE(ptr != nullptr);
+        REQUIRE(reinterpret_cast<uintptr_t>(ptr) % cucim::memory::kHostPoolAlignment == 0);
+        memset(ptr, 0xff, 224 * 224 * 3);
+        pool.deallocate(ptr);
+
+        void* ptr2 = pool.allocate(224 * 224 * 3 - 100);
+        REQUIRE(ptr2 == ptr);
+        pool.deallocate(ptr2);
+
+        auto stats = pool.stats();
+        REQUIRE(stats.allocations == 2);
+        REQUIRE(stats.misses == 1);
+        REQUIRE(stats.thread_cache_hits == 1);
+        REQUIRE(stats.cached_blocks == 1);
+    }
+
+    SECTION("Blocks cached by a finished thread are reused through the shared free lists")
+    {
+        void* ptr = nullptr;
+        std::thread worker([&]() {
+            ptr = pool.allocate(256 * 256 * 3);
+            pool.deallocate(ptr);
+        });
+        worker.join();
+
+        void* ptr2 = pool.allocate(256 * 256 * 3);
+        REQUIRE(ptr2 == ptr);
+        pool.deallocate(ptr2);
+        REQUIRE(pool.stats().global_hits == 1);
+    }
+
+    SECTION("Small blocks bypass the pool")
+    {
+        void* ptr = pool.allocate(24);
+        REQUIRE(ptr != nullptr);
+        pool.deallocate(ptr);
+        auto stats = pool.stats();
+        REQUIRE(stats.bypassed == 1);
+        REQUIRE(stats.cached_blocks == 0);
+    }
+
+    SECTION("Retention limits and trim() release cached blocks")
+    {
+        pool.thread_cache_blocks(0);
+        pool.max_cached_bytes(0);
+        void* ptr = pool.allocate(1 << 20);
+        pool.deallocate(ptr);
+        REQUIRE(pool.stats().cached_bytes == 0);
+        REQUIRE(pool.stats().released_bytes == (1 << 20));
+
+        pool.thread_cache_blocks(4);
+        pool.max_cached_bytes(static_cast<size_t>(1) << 30);
+        ptr = pool.allocate(1 << 20);
+        pool.deallocate(ptr);
+        REQUIRE(pool.stats().cached_bytes == (1 << 20));
+        pool.trim();
+        REQUIRE(pool.stats().cached_bytes == 0);
+        REQUIRE(pool.stats().cached_blocks == 0);
+    }
+
+    SECTION("Disabled pool releases memory directly")
+    {
+        pool.enable(false);
+        void* ptr = pool.allocate(1 << 20);
+        pool.deallocate(ptr);
+        auto stats = pool.stats();
+        REQUIRE(stats.bypassed == 1);
+        REQUIRE(stats.cached_blocks == 0);
+        pool.enable(true);
+    }
+}
@@ -0,0 +1,80 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <catch2/catch.hpp>
+
+#include "config.h"
+#include "cucim/core/framework.h"
+#include "cucim/io/format/image_format.h"
+#include "cucim/memory/memory_manager.h"
+
+#include <cstring>
+#include <fstream>
+#include <iterator>
+#include <vector>
+
+static std::vector<uint8_t> read_region(cucim::io::format::IImageFormat* image_format,
+                                        CuCIMFileHandle& handle,
+                                        int64_t sx,
+                                        int64_t sy,
+                                        int64_t width,
+                                        int64_t height)
+{
+    cucim::io::format::ImageMetadata metadata{};
+    image_format->formats[0].image_parser.parse(&handle, &metadata.desc());
+
+    cucim::io::format::ImageReaderRegionRequestDesc request{};
+    int64_t request_location[2] = { sx, sy };
+    request.location = request_location;
+    request.level = 0;
+    int64_t request_size[2] = { width, height };
+    request.size = request_size;
+    request.device = const_cast<char*>("cpu");
+
+    cucim::io::format::ImageDataDesc image_data{};
+    image_format->formats[0].image_reader.read(&handle, &metadata.desc(), &request, &image_data, nullptr);
+
+    auto data = static_cast<uint8_t*>(image_data.container.data);
+    std::vector<uint8_t> result(data, data + width * height * 3);
+    cucim_free(image_data.container.data);
+    return result;
+}
+
+TEST_CASE("Verify opening an image from memory", "[test_open_buffer.cpp]")
+{
+    cucim::Framework* framework = cucim::acquire_framework("sample.app");
+    cucim::io::format::IImageFormat* image_format =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(g_config.get_plugin_path().c_str());
+    REQUIRE(image_format);
+    REQUIRE(image_format->formats[0].image_parser.open_buffer);
+
+    std::string input_path = g_config.get_input_path();
+    std::ifstream input_file(input_path, std::ios::binary);
+    std::vector<char> buffer((std::istreambuf_iterator<char>(input_file)), std::istreambuf_iterator<char>());
+    REQUIRE(!buffer.empty());
+
+    auto file_handle = image_format->formats[0].image_parser.open(input_path.c_str());
+    auto expected = read_region(image_format, file_handle, 200, 300, 300, 200);
+    image_format->formats[0].image_parser.close(&file_handle);
+
+    auto memory_handle = image_format->formats[0].image_parser.open_buffer(buffer.data(), buffer.size(), "memory.tif");
+    REQUIRE(memory_handle.fd == -1);
+    REQUIRE(std::strcmp(memory_handle.path, "memory.tif") == 0);
+    auto actual = read_region(image_format, memory_handle, 200, 300, 300, 200);
+    image_format->formats[0].image_parser.close(&memory_handle);
+
+    REQUIRE(actual == expected);
+}
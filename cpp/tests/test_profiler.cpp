@@ -0,0 +1,91 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "cucim/profiler/profiler.h"
+
+#include <catch2/catch.hpp>
+
+using cucim::profiler::Profiler;
+using cucim::profiler::ScopedStage;
+using cucim::profiler::Stage;
+
+TEST_CASE("Verify profiler counters", "[test_profiler.cpp]")
+{
+    auto& profiler = Profiler::instance();
+    profiler.reset();
+
+    SECTION("Nothing is recorded while disabled")
+    {
+        profiler.disable();
+        {
+            ScopedStage stage(Stage::kDecodeJpeg, 100);
+        }
+        auto stats = profiler.stats();
+        REQUIRE(stats[static_cast<size_t>(Stage::kDecodeJpeg)].count == 0);
+        REQUIRE(profiler.trace_events().empty());
+    }
+
+    SECTION("Counters, bytes and histogram are accumulated per stage")
+    {
+        profiler.enable(false);
+        profiler.record(Stage::kFileRead, Profiler::now_ns(), 1000, 4096);
+        profiler.record(Stage::kFileRead, Profiler::now_ns(), 3000, 1024);
+        {
+            ScopedStage stage(Stage::kCopy);
+            stage.add_bytes(10);
+        }
+        profiler.disable();
+
+        auto stats = profiler.stats();
+        const auto& file_read = stats[static_cast<size_t>(Stage::kFileRead)];
+        REQUIRE(file_read.count == 2);
+        REQUIRE(file_read.total_ns == 4000);
+        REQUIRE(file_read.min_ns == 1000);
+        REQUIRE(file_read.max_ns == 3000);
+        REQUIRE(file_read.bytes == 5120);
+
+        uint64_t histogram_total = 0;
+        for (auto bin : file_read.histogram)
+        {
+            histogram_total += bin;
+        }
+        REQUIRE(histogram_total == 2);
+
+        const auto& copy = stats[static_cast<size_t>(Stage::kCopy)];
+        REQUIRE(copy.count == 1);
+        REQUIRE(copy.bytes == 10);
+
+        // Tracing was not requested
+        REQUIRE(profiler.trace_events().empty());
+    }
+
+    SECTION("Trace events are recorded only when tracing is enabled")
+    {
+        profiler.enable(true);
+        profiler.record(Stage::kDecodeDeflate, Profiler::now_ns(), 500, 64);
+        profiler.disable();
+
+        auto events = profiler.trace_events();
+        REQUIRE(events.size() == 1);
+        REQUIRE(events[0].stage == Stage::kDecodeDeflate);
+        REQUIRE(events[0].duration_ns == 500);
+        REQUIRE(events[0].bytes == 64);
+
+        profiler.reset();
+        REQUIRE(profiler.trace_events().empty());
+        REQUIRE(profiler.stats()[static_cast<size_t>(Stage::kDecodeDeflate)].count == 0);
+    }
+}
@@ -0,0 +1,286 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <catch2/catch.hpp>
+
+#include "config.h"
+#include "cucim/core/framework.h"
+#include "cucim/io/format/image_format.h"
+#include "cucim/memory/memory_manager.h"
+
+#include <cstdio>
+#include <vector>
+
+TEST_CASE("Verify out-of-boundary reads of an uncompressed 16-bit grayscale image", "[test_read_region_pieces.cpp]")
+{
+    cucim::Framework* framework = cucim::acquire_framework("sample.app");
+    cucim::io::format::IImageFormat* image_format =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(g_config.get_plugin_path().c_str());
+    REQUIRE(image_format);
+
+    constexpr int64_t width = 300;
+    constexpr int64_t height = 200;
+    std::vector<uint16_t> pixels(width * height);
+    for (int64_t i = 0; i < width * height; ++i)
+    {
+        pixels[i] = static_cast<uint16_t>((i * 37) % 65521);
+    }
+
+    // Write an uncompressed image (neither JPEG nor deflate-compressed)
+    std::string path = "/tmp/test_read_region_pieces.tif";
+    {
+        auto& image_writer = image_format->formats[0].image_writer;
+        cucim::io::format::ImageMetadata metadata{};
+        std::pmr::vector<int64_t> shape({ height, width, 1 }, &metadata.get_resource());
+        metadata.ndim(3).dims("YXC").shape(shape).dtype(DLDataType{ kDLUInt, 16, 1 });
+        cucim::io::format::ImageWriterOptionsDesc options{ "raw", 128, 128, -1, 1, 0 };
+        auto handle = image_writer.create(path.c_str(), &metadata.desc(), &options);
+        int64_t region_shape[3] = { height, width, 1 };
+        DLTensor region{};
+        region.data = pixels.data();
+        region.ctx = DLContext{ kDLCPU, 0 };
+        region.ndim = 3;
+        region.dtype = DLDataType{ kDLUInt, 16, 1 };
+        region.shape = region_shape;
+        cucim::io::format::ImageDataDesc image_data{ region };
+        int64_t location[2] = { 0, 0 };
+        REQUIRE(image_writer.write(&handle, location, &image_data));
+        REQUIRE(image_writer.close(&handle));
+    }
+
+    auto handle = image_format->formats[0].image_parser.open(path.c_str());
+    cucim::io::format::ImageMetadata metadata{};
+    image_format->formats[0].image_parser.parse(&handle, &metadata.desc());
+    REQUIRE(metadata.desc().dtype.bits == 16);
+    REQUIRE(metadata.desc().shape[2] == 1);
+
+    // The region covers the top-left corner of the image and the area out of its boundary
+    constexpr int64_t sx = -20;
+    constexpr int64_t sy = -10;
+    constexpr int64_t w = 180;
+    constexpr int64_t h = 150;
+    int64_t request_location[2] = { sx, sy };
+    int64_t request_size[2] = { w, h };
+    cucim::io::format::ImageReaderRegionRequestDesc request{};
+    request.location = request_location;
+    request.size = request_size;
+    request.level = 0;
+    request.device = const_cast<char*>("cpu");
+    cucim::io::format::ImageDataDesc image_data{};
+    REQUIRE(image_format->formats[0].image_reader.read(&handle, &metadata.desc(), &request, &image_data, nullptr));
+    REQUIRE(image_data.container.dtype.bits == 16);
+    REQUIRE(image_data.container.shape[0] == h);
+    REQUIRE(image_data.container.shape[1] == w);
+    REQUIRE(image_data.container.shape[2] == 1);
+
+    auto data = static_cast<uint16_t*>(image_data.container.data);
+    bool is_equal = true;
+    for (int64_t y = 0; y < h; ++y)
+    {
+        for (int64_t x = 0; x < w; ++x)
+        {
+            const int64_t ix = sx + x;
+            const int64_t iy = sy + y;
+            const bool is_inside = ix >= 0 && iy >= 0 && ix < width && iy < height;
+            // Out-of-boundary pixels are filled with the background value (0 for generic TIFF files)
+            is_equal &= data[y * w + x] == (is_inside ? pixels[iy * width + ix] : 0);
+        }
+    }
+    cucim_free(image_data.container.data);
+    cucim_free(image_data.container.shape);
+    image_format->formats[0].image_parser.close(&handle);
+
+    REQUIRE(is_equal);
+
+    std::remove((path + ".cucim-levels").c_str());
+    std::remove(path.c_str());
+}
+
+TEST_CASE("Verify reading a region of an uncompressed single-strip image", "[test_read_region_pieces.cpp]")
+{
+    cucim::Framework* framework = cucim::acquire_framework("sample.app");
+    cucim::io::format::IImageFormat* image_format =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(g_config.get_plugin_path().c_str());
+    REQUIRE(image_format);
+
+    constexpr uint32_t width = 300;
+    constexpr uint32_t height = 200;
+    std::vector<uint8_t> pixels(width * height);
+    for (uint32_t i = 0; i < width * height; ++i)
+    {
+        pixels[i] = static_cast<uint8_t>(((i % width) * 3 + (i / width) * 5) % 256);
+    }
+
+    // Write a little-endian 8-bit MinIsWhite image stored in a single (uncompressed) strip
+    std::string path = "/tmp/test_read_region_pieces_strip.tif";
+    {
+        constexpr uint16_t kShort = 3;
+        constexpr uint16_t kLong = 4;
+        const uint16_t tags[][2] = { { 256, kLong }, { 257, kLong }, { 258, kShort }, { 259, kShort },
+                                     { 262, kShort }, { 273, kLong }, { 277, kShort }, { 278, kLong },
+                                     { 279, kLong } };
+        constexpr uint16_t entry_count = sizeof(tags) / sizeof(tags[0]);
+        constexpr uint32_t data_offset = 8 + 2 + entry_count * 12 + 4;
+        const uint32_t values[entry_count] = { width, height, 8, 1, 0, data_offset, 1, height, width * height };
+
+        FILE* file = std::fopen(path.c_str(), "wb");
+        REQUIRE(file);
+        const uint8_t header[8] = { 'I', 'I', 42, 0, 8, 0, 0, 0 };
+        std::fwrite(header, 1, sizeof(header), file);
+        std::fwrite(&entry_count, 2, 1, file);
+        for (uint16_t i = 0; i < entry_count; ++i)
+        {
+            const uint32_t count = 1;
+            std::fwrite(tags[i], 2, 2, file);
+            std::fwrite(&count, 4, 1, file);
+            std::fwrite(&values[i], 4, 1, file);
+        }
+        const uint32_t next_ifd_offset = 0;
+        std::fwrite(&next_ifd_offset, 4, 1, file);
+        std::fwrite(pixels.data(), 1, pixels.size(), file);
+        std::fclose(file);
+    }
+
+    auto handle = image_format->formats[0].image_parser.open(path.c_str());
+    cucim::io::format::ImageMetadata metadata{};
+    image_format->formats[0].image_parser.parse(&handle, &metadata.desc());
+    REQUIRE(metadata.desc().shape[2] == 1);
+
+    // A few rows in the middle of the strip
+    constexpr int64_t sx = 50;
+    constexpr int64_t sy = 120;
+    constexpr int64_t w = 100;
+    constexpr int64_t h = 40;
+    int64_t request_location[2] = { sx, sy };
+    int64_t request_size[2] = { w, h };
+    cucim::io::format::ImageReaderRegionRequestDesc request{};
+    request.location = request_location;
+    request.size = request_size;
+    request.level = 0;
+    request.device = const_cast<char*>("cpu");
+    cucim::io::format::ImageDataDesc image_data{};
+    REQUIRE(image_format->formats[0].image_reader.read(&handle, &metadata.desc(), &request, &image_data, nullptr));
+    REQUIRE(image_data.container.shape[0] == h);
+    REQUIRE(image_data.container.shape[1] == w);
+
+    auto data = static_cast<uint8_t*>(image_data.container.data);
+    bool is_equal = true;
+    for (int64_t y = 0; y < h; ++y)
+    {
+        for (int64_t x = 0; x < w; ++x)
+        {
+            // MinIsWhite values are inverted
+            is_equal &= data[y * w + x] == static_cast<uint8_t>(~pixels[(sy + y) * width + sx + x]);
+        }
+    }
+    cucim_free(image_data.container.data);
+    cucim_free(image_data.container.shape);
+    image_format->formats[0].image_parser.close(&handle);
+
+    REQUIRE(is_equal);
+
+    std::remove((path + ".cucim-levels").c_str());
+    std::remove(path.c_str());
+}
+
+TEST_CASE("Verify reading a region of a truncated uncompressed strip", "[test_read_region_pieces.cpp]")
+{
+    cucim::Framework* framework = cucim::acquire_framework("sample.app");
+    cucim::io::format::IImageFormat* image_format =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(g_config.get_plugin_path().c_str());
+    REQUIRE(image_format);
+
+    constexpr uint32_t width = 300;
+    constexpr uint32_t height = 200;
+    // The strip only holds the first rows of the image (and a part of the next one)
+    constexpr uint32_t strip_nbytes = width * 140 + 100;
+    std::vector<uint8_t> pixels(strip_nbytes);
+    for (uint32_t i = 0; i < strip_nbytes; ++i)
+    {
+        pixels[i] = static_cast<uint8_t>(1 + i % 255);
+    }
+
+    // Write a little-endian 8-bit MinIsBlack image stored in a single (uncompressed) strip
+    std::string path = "/tmp/test_read_region_pieces_truncated.tif";
+    {
+        constexpr uint16_t kShort = 3;
+        constexpr uint16_t kLong = 4;
+        const uint16_t tags[][2] = { { 256, kLong }, { 257, kLong }, { 258, kShort }, { 259, kShort },
+                                     { 262, kShort }, { 273, kLong }, { 277, kShort }, { 278, kLong },
+                                     { 279, kLong } };
+        constexpr uint16_t entry_count = sizeof(tags) / sizeof(tags[0]);
+        constexpr uint32_t data_offset = 8 + 2 + entry_count * 12 + 4;
+        const uint32_t values[entry_count] = { width, height, 8, 1, 1, data_offset, 1, height, strip_nbytes };
+
+        FILE* file = std::fopen(path.c_str(), "wb");
+        REQUIRE(file);
+        const uint8_t header[8] = { 'I', 'I', 42, 0, 8, 0, 0, 0 };
+        std::fwrite(header, 1, sizeof(header), file);
+        std::fwrite(&entry_count, 2, 1, file);
+        for (uint16_t i = 0; i < entry_count; ++i)
+        {
+            const uint32_t count = 1;
+            std::fwrite(tags[i], 2, 2, file);
+            std::fwrite(&count, 4, 1, file);
+            std::fwrite(&values[i], 4, 1, file);
+        }
+        const uint32_t next_ifd_offset = 0;
+        std::fwrite(&next_ifd_offset, 4, 1, file);
+        std::fwrite(pixels.data(), 1, pixels.size(), file);
+        std::fclose(file);
+    }
+
+    auto handle = image_format->formats[0].image_parser.open(path.c_str());
+    cucim::io::format::ImageMetadata metadata{};
+    image_format->formats[0].image_parser.parse(&handle, &metadata.desc());
+
+    // The region covers the end of the strip data
+    constexpr int64_t sx = 50;
+    constexpr int64_t sy = 120;
+    constexpr int64_t w = 100;
+    constexpr int64_t h = 40;
+    int64_t request_location[2] = { sx, sy };
+    int64_t request_size[2] = { w, h };
+    cucim::io::format::ImageReaderRegionRequestDesc request{};
+    request.location = request_location;
+    request.size = request_size;
+    request.level = 0;
+    request.device = const_cast<char*>("cpu");
+    cucim::io::format::ImageDataDesc image_data{};
+    REQUIRE(image_format->formats[0].image_reader.read(&handle, &metadata.desc(), &request, &image_data, nullptr));
+    REQUIRE(image_data.container.shape[0] == h);
+    REQUIRE(image_data.container.shape[1] == w);
+
+    auto data = static_cast<uint8_t*>(image_data.container.data);
+    bool is_equal = true;
+    for (int64_t y = 0; y < h; ++y)
+    {
+        for (int64_t x = 0; x < w; ++x)
+        {
+            // Pixels beyond the strip data are filled with the background value (0 for generic TIFF files)
+            const uint64_t i = (sy + y) * width + sx + x;
+            is_equal &= data[y * w + x] == (i < strip_nbytes ? pixels[i] : 0);
+        }
+    }
+    cucim_free(image_data.container.data);
+    cucim_free(image_data.container.shape);
+    image_format->formats[0].image_parser.close(&handle);
+
+    REQUIRE(is_equal);
+
+    std::remove((path + ".cucim-levels").c_str());
+    std::remove(path.c_str());
+}
@@ -0,0 +1,184 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <catch2/catch.hpp>
+
+#include "config.h"
+#include "cucim/core/framework.h"
+#include "cucim/io/format/image_format.h"
+#include "cucim/memory/memory_manager.h"
+
+#include <cstdio>
+#include <string>
+#include <sys/stat.h>
+#include <vector>
+
+constexpr int64_t kWidth = 600;
+constexpr int64_t kHeight = 400;
+
+static std::vector<uint8_t> make_pixels()
+{
+    std::vector<uint8_t> pixels(kWidth * kHeight * 3);
+    for (int64_t i = 0; i < kWidth * kHeight * 3; ++i)
+    {
+        pixels[i] = static_cast<uint8_t>((i * 7) % 251);
+    }
+    return pixels;
+}
+
+// Writes a (deflate-compressed) image with only one level
+static void write_single_level_image(cucim::io::format::IImageFormat* image_format,
+                                     const std::string& path,
+                                     std::vector<uint8_t>& pixels)
+{
+    auto& image_writer = image_format->formats[0].image_writer;
+    cucim::io::format::ImageMetadata metadata{};
+    std::pmr::vector<int64_t> shape({ kHeight, kWidth, 3 }, &metadata.get_resource());
+    metadata.ndim(3).dims("YXC").shape(shape).dtype(DLDataType{ kDLUInt, 8, 1 });
+    cucim::io::format::ImageWriterOptionsDesc options{ "deflate", 256, 256, -1, 1, 0 };
+    auto handle = image_writer.create(path.c_str(), &metadata.desc(), &options);
+    int64_t region_shape[3] = { kHeight, kWidth, 3 };
+    DLTensor region{};
+    region.data = pixels.data();
+    region.ctx = DLContext{ kDLCPU, 0 };
+    region.ndim = 3;
+    region.dtype = DLDataType{ kDLUInt, 8, 1 };
+    region.shape = region_shape;
+    cucim::io::format::ImageDataDesc image_data{ region };
+    int64_t location[2] = { 0, 0 };
+    REQUIRE(image_writer.write(&handle, location, &image_data));
+    REQUIRE(image_writer.close(&handle));
+}
+
+// Reads level 1 and checks that it is the 2x2 area average of level 0
+static bool is_level1_averaged(cucim::io::format::IImageFormat* image_format,
+                               CuCIMFileHandle& handle,
+                               const cucim::io::format::ImageMetadataDesc* metadata,
+                               const std::vector<uint8_t>& pixels)
+{
+    int64_t request_location[2] = { 0, 0 };
+    int64_t request_size[2] = { 300, 200 };
+    cucim::io::format::ImageReaderRegionRequestDesc request{};
+    request.location = request_location;
+    request.size = request_size;
+    request.level = 1;
+    request.device = const_cast<char*>("cpu");
+    cucim::io::format::ImageDataDesc image_data{};
+    REQUIRE(image_format->formats[0].image_reader.read(&handle, metadata, &request, &image_data, nullptr));
+    REQUIRE(image_data.container.shape[0] == 200);
+    REQUIRE(image_data.container.shape[1] == 300);
+
+    auto data = static_cast<uint8_t*>(image_data.container.data);
+    bool is_equal = true;
+    for (int64_t y = 0; y < 200; ++y)
+    {
+        for (int64_t x = 0; x < 300; ++x)
+        {
+            for (int64_t c = 0; c < 3; ++c)
+            {
+                const int64_t index = ((2 * y) * kWidth + 2 * x) * 3 + c;
+                const int64_t stride = kWidth * 3;
+                uint32_t sum = pixels[index] + pixels[index + 3] + pixels[index + stride] + pixels[index + stride + 3];
+                is_equal &= data[(y * 300 + x) * 3 + c] == (sum + 2) / 4;
+            }
+        }
+    }
+    cucim_free(image_data.container.data);
+    cucim_free(image_data.container.shape);
+    return is_equal;
+}
+
+TEST_CASE("Verify reading virtual levels of a single-level image", "[test_virtual_levels.cpp]")
+{
+    cucim::Framework* framework = cucim::acquire_framework("sample.app");
+    cucim::io::format::IImageFormat* image_format =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(g_config.get_plugin_path().c_str());
+    REQUIRE(image_format);
+
+    std::vector<uint8_t> pixels = make_pixels();
+    std::string path = "/tmp/test_virtual_levels.tif";
+    std::string cache_path = path + ".cucim-levels";
+    write_single_level_image(image_format, path, pixels);
+    std::remove(cache_path.c_str());
+
+    auto handle = image_format->formats[0].image_parser.open(path.c_str());
+    cucim::io::format::ImageMetadata metadata{};
+    image_format->formats[0].image_parser.parse(&handle, &metadata.desc());
+    const auto& resolution_info = metadata.desc().resolution_info;
+    REQUIRE(resolution_info.level_count == 3);
+    REQUIRE(resolution_info.level_dimensions[2] == 300);
+    REQUIRE(resolution_info.level_dimensions[3] == 200);
+    REQUIRE(resolution_info.level_dimensions[4] == 150);
+    REQUIRE(resolution_info.level_dimensions[5] == 100);
+    REQUIRE(resolution_info.level_downsamples[1] == 2.0f);
+
+    bool is_equal = is_level1_averaged(image_format, handle, &metadata.desc(), pixels);
+    image_format->formats[0].image_parser.close(&handle);
+
+    REQUIRE(is_equal);
+    // Generated tiles are stored next to the image
+    struct stat st_buff;
+    REQUIRE(stat(cache_path.c_str(), &st_buff) == 0);
+
+    std::remove(cache_path.c_str());
+    std::remove(path.c_str());
+}
+
+TEST_CASE("Verify replacing an invalid virtual level cache used by another reader", "[test_virtual_levels.cpp]")
+{
+    cucim::Framework* framework = cucim::acquire_framework("sample.app");
+    cucim::io::format::IImageFormat* image_format =
+        framework->acquire_interface_from_library<cucim::io::format::IImageFormat>(g_config.get_plugin_path().c_str());
+    REQUIRE(image_format);
+
+    std::vector<uint8_t> pixels = make_pixels();
+    std::string path = "/tmp/test_virtual_levels_shared.tif";
+    std::string cache_path = path + ".cucim-levels";
+    write_single_level_image(image_format, path, pixels);
+    std::remove(cache_path.c_str());
+
+    // The first reader fills the cache
+    auto& image_parser = image_format->formats[0].image_parser;
+    auto handle = image_parser.open(path.c_str());
+    cucim::io::format::ImageMetadata metadata{};
+    image_parser.parse(&handle, &metadata.desc());
+    REQUIRE(is_level1_averaged(image_format, handle, &metadata.desc(), pixels));
+    struct stat first_stat;
+    REQUIRE(stat(cache_path.c_str(), &first_stat) == 0);
+
+    // Invalidate the header of the cache file
+    FILE* cache_file = std::fopen(cache_path.c_str(), "r+b");
+    REQUIRE(cache_file);
+    std::fputc('X', cache_file);
+    std::fclose(cache_file);
+
+    // A second reader replaces the cache file with a new one instead of truncating it
+    auto other_handle = image_parser.open(path.c_str());
+    cucim::io::format::ImageMetadata other_metadata{};
+    image_parser.parse(&other_handle, &other_metadata.desc());
+    REQUIRE(is_level1_averaged(image_format, other_handle, &other_metadata.desc(), pixels));
+    struct stat second_stat;
+    REQUIRE(stat(cache_path.c_str(), &second_stat) == 0);
+    REQUIRE(second_stat.st_ino != first_stat.st_ino);
+
+    // The tiles cached by the first reader are still valid
+    REQUIRE(is_level1_averaged(image_format, handle, &metadata.desc(), pixels));
+
+    image_parser.close(&other_handle);
+    image_parser.close(&handle);
+    std::remove(cache_path.c_str());
+    std::remove(path.c_str());
+}
@@ -17,13 +17,24 @@ import os
 
 from . import cli
 from . import converter
+from . import profiler
+from . import remote
 # import hidden methods
 from ._cucim import CuImage
+from ._cucim import ImageWriter
 from ._cucim import __version__
 from ._cucim import filesystem
 from ._cucim import io
+from ._cucim import memory
+from ._dask import to_dask
+from ._sampler import PatchSampler
+from ._tissue import TissueMask
+from ._tissue import tissue_mask
+from ._zarr import zarr_store
 
-__all__ = ['cli', 'CuImage', 'filesystem', 'io', 'converter', '__version__']
+__all__ = ['cli', 'CuImage', 'ImageWriter', 'filesystem', 'io', 'memory', 'profiler',
+           'remote', 'converter', 'to_dask', 'zarr_store', 'TissueMask',
+           'tissue_mask', 'PatchSampler', '__version__']
 
 
 from ._cucim import _get_plugin_root  # isort:skip
@@ -0,0 +1,394 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Benchmarks of the slide-reading path (``cucim bench read``)."""
+
+import json
+import os
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ._cucim import CuImage
+from ._cucim import ImageWriter
+from ._cucim import __version__
+from ._cucim import filesystem
+
+__all__ = ['SCENARIOS', 'BACKENDS', 'generate_image', 'open_backend',
+           'run_read_benchmarks', 'write_results']
+
+SCENARIOS = ('open', 'random', 'grid', 'batch')
+BACKENDS = ('cucim', 'openslide', 'tifffile')
+
+# Version of the JSON schema of the results
+RESULTS_VERSION = 1
+
+
+def generate_image(path, size=16384, tile_size=256, compression='jpeg',
+                   seed=0):
+    """Write a synthetic, tiled and pyramidal RGB TIFF file.
+
+    The content (smooth gradients with noise) is compressed like a typical
+    slide, so decoding costs are realistic.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        Path of the image to write.
+    size : int or tuple of int, optional
+        Size of the image (``(width, height)`` if a tuple).
+    tile_size : int, optional
+        Size of the tiles.
+    compression : {'jpeg', 'deflate', 'raw'}, optional
+        Compression of the tiles.
+    seed : int, optional
+        Seed of the noise.
+    """
+    if np.isscalar(size):
+        size = (int(size), int(size))
+    width, height = size
+    rng = np.random.default_rng(seed)
+    x = np.arange(width, dtype=np.float32)
+    with ImageWriter(os.fspath(path), (height, width, 3), 'uint8',
+                     compression=compression, tile_size=tile_size) as writer:
+        for y in range(0, height, tile_size):
+            rows = min(tile_size, height - y)
+            yy = np.arange(y, y + rows, dtype=np.float32)[:, np.newaxis]
+            band = np.empty((rows, width, 3), np.uint8)
+            band[..., 0] = 128 + 96 * np.sin(x / 97.0) * np.cos(yy / 131.0)
+            band[..., 1] = 128 + 96 * np.sin((x + yy) / 211.0)
+            band[..., 2] = 128 + 96 * np.cos(x / 53.0 - yy / 71.0)
+            band += rng.integers(0, 16, band.shape, dtype=np.uint8)
+            writer.write_region((0, y), band)
+
+
+class _CuImageReader:
+    def __init__(self, path):
+        self.img = CuImage(path)
+        self.width, self.height = self.img.size('XY')
+
+    def read(self, x, y, width, height):
+        return np.asarray(self.img.read_region((x, y), (width, height)))
+
+    def close(self):
+        # The file is closed when the image is released
+        self.img = None
+
+
+class _OpenSlideReader:
+    def __init__(self, path):
+        import openslide
+        self.slide = openslide.OpenSlide(path)
+        self.width, self.height = self.slide.dimensions
+
+    def read(self, x, y, width, height):
+        return np.asarray(self.slide.read_region((x, y), 0, (width, height)))
+
+    def close(self):
+        self.slide.close()
+
+
+class _TiffFileReader:
+    def __init__(self, path):
+        import tifffile
+        import zarr
+        self.store = tifffile.imread(path, aszarr=True)
+        group = zarr.open(self.store, mode='r')
+        # Pyramidal files are opened as a group of levels
+        self.array = group[0] if isinstance(group, zarr.hierarchy.Group) \
+            else group
+        self.height, self.width = self.array.shape[:2]
+
+    def read(self, x, y, width, height):
+        return self.array[y:y + height, x:x + width]
+
+    def close(self):
+        self.store.close()
+
+
+_READERS = {
+    'cucim': _CuImageReader,
+    'openslide': _OpenSlideReader,
+    'tifffile': _TiffFileReader,
+}
+
+
+def open_backend(backend, path):
+    """Open an image with a backend.
+
+    Returns an object with ``width`` and ``height`` attributes, and
+    ``read(x, y, width, height)`` and ``close()`` methods. Raises
+    ``ImportError`` if the library of the backend is not installed.
+    """
+    try:
+        reader_class = _READERS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown backend '{backend}' "
+                         f"(available: {', '.join(BACKENDS)})") from None
+    return reader_class(os.fspath(path))
+
+
+def _summarize(times, nbytes=0, patch_count=0):
+    if not times:
+        return {'rounds': 0}
+    total = sum(times)
+    summary = {
+        'rounds': len(times),
+        'total': total,
+        'min': min(times),
+        'max': max(times),
+        'mean': statistics.mean(times),
+        'median': statistics.median(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+    if total > 0 and patch_count:
+        summary['patches_per_second'] = patch_count / total
+        summary['mib_per_second'] = nbytes / total / (1 << 20)
+    return summary
+
+
+def _locations(rng, width, height, patch_size, count):
+    xs = rng.integers(0, max(1, width - patch_size + 1), count)
+    ys = rng.integers(0, max(1, height - patch_size + 1), count)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def _bench_open(backend, path, cold, count):
+    times = []
+    for _ in range(count):
+        if cold:
+            filesystem.discard_page_cache(path)
+        start = time.perf_counter()
+        reader = open_backend(backend, path)
+        times.append(time.perf_counter() - start)
+        reader.close()
+    return _summarize(times)
+
+
+def _bench_random(reader, path, cold, patch_size, locations):
+    times = []
+    nbytes = 0
+    for x, y in locations:
+        if cold:
+            filesystem.discard_page_cache(path)
+        start = time.perf_counter()
+        patch = reader.read(x, y, patch_size, patch_size)
+        times.append(time.perf_counter() - start)
+        nbytes += patch.nbytes
+    return _summarize(times, nbytes, len(locations))
+
+
+def _bench_grid(reader, path, cold, patch_size):
+    # The whole level 0 is read in row-major order (the page cache is only
+    # discarded before the pass, so read-ahead is measured too)
+    if cold:
+        filesystem.discard_page_cache(path)
+    times = []
+    nbytes = 0
+    for y in range(0, reader.height - patch_size + 1, patch_size):
+        for x in range(0, reader.width - patch_size + 1, patch_size):
+            start = time.perf_counter()
+            patch = reader.read(x, y, patch_size, patch_size)
+            times.append(time.perf_counter() - start)
+            nbytes += patch.nbytes
+    return _summarize(times, nbytes, len(times))
+
+
+def _bench_batch(reader, path, cold, patch_size, locations, batch_size,
+                 num_workers):
+    def read(location):
+        return reader.read(location[0], location[1], patch_size,
+                           patch_size).nbytes
+
+    times = []
+    nbytes = 0
+    with ThreadPoolExecutor(max_workers=max(1, num_workers)) as executor:
+        for i in range(0, len(locations), batch_size):
+            batch = locations[i:i + batch_size]
+            if cold:
+                filesystem.discard_page_cache(path)
+            start = time.perf_counter()
+            nbytes += sum(executor.map(read, batch))
+            times.append(time.perf_counter() - start)
+    return _summarize(times, nbytes, len(locations))
+
+
+def _bench_image(path, backend, scenarios, cache_modes, num_workers,
+                 patch_size, count, batch_size, seed):
+    results = []
+    for cache in cache_modes:
+        cold = cache == 'cold'
+        base = {'backend': backend, 'cache': cache}
+        if 'open' in scenarios:
+            results.append(dict(base, scenario='open',
+                                stats=_bench_open(backend, path, cold,
+                                                  count)))
+
+        reader = open_backend(backend, path)
+        try:
+            rng = np.random.default_rng(seed)
+            locations = _locations(rng, reader.width, reader.height,
+                                   patch_size, count)
+            if not cold:
+                # Warm up the page cache and the caches of the library
+                for x, y in locations:
+                    reader.read(x, y, patch_size, patch_size)
+            if 'random' in scenarios:
+                stats = _bench_random(reader, path, cold, patch_size,
+                                      locations)
+                results.append(dict(base, scenario='random',
+                                    patch_size=patch_size, stats=stats))
+            if 'grid' in scenarios:
+                stats = _bench_grid(reader, path, cold, patch_size)
+                results.append(dict(base, scenario='grid',
+                                    patch_size=patch_size, stats=stats))
+            if 'batch' in scenarios:
+                for workers in num_workers:
+                    stats = _bench_batch(reader, path, cold, patch_size,
+                                         locations, batch_size, workers)
+                    results.append(dict(base, scenario='batch',
+                                        patch_size=patch_size,
+                                        batch_size=batch_size,
+                                        num_workers=workers, stats=stats))
+        finally:
+            reader.close()
+    return results
+
+
+def run_read_benchmarks(input_file=None, work_dir='.', scenarios=SCENARIOS,
+                        backends=('cucim',), tile_sizes=(256,),
+                        num_workers=(1, os.cpu_count()),
+                        cache_modes=('warm', 'cold'), patch_size=256,
+                        count=100, batch_size=32, image_size=16384,
+                        compression='jpeg', seed=0, log=None):
+    """Benchmark reading images with cuCIM (and other libraries).
+
+    Parameters
+    ----------
+    input_file : str or os.PathLike, optional
+        Image to benchmark. If not given, synthetic images are generated in
+        `work_dir` for each tile size of `tile_sizes` (and reused by the
+        following runs).
+    work_dir : str or os.PathLike, optional
+        Folder of the synthetic images.
+    scenarios : sequence of str, optional
+        Scenarios to run, among:
+
+        - ``'open'``: opening the image.
+        - ``'random'``: reading patches at random locations of level 0.
+        - ``'grid'``: reading all the patches of level 0 in row-major order.
+        - ``'batch'``: reading batches of patches at random locations with
+          threads (for each value of `num_workers`).
+    backends : sequence of str, optional
+        Libraries to compare (``'cucim'``, ``'openslide'`` and
+        ``'tifffile'``). Libraries that are not installed are skipped.
+    tile_sizes : sequence of int, optional
+        Tile sizes of the synthetic images.
+    num_workers : sequence of int, optional
+        Numbers of threads of the ``'batch'`` scenario.
+    cache_modes : sequence of str, optional
+        ``'warm'`` (data already read once) and/or ``'cold'`` (page cache of
+        the image discarded before each operation).
+    patch_size : int, optional
+        Size of the patches.
+    count : int, optional
+        Number of patches (or openings) per scenario.
+    batch_size : int, optional
+        Number of patches per batch.
+    image_size : int, optional
+        Size of the synthetic images.
+    compression : {'jpeg', 'deflate', 'raw'}, optional
+        Compression of the synthetic images.
+    seed : int, optional
+        Seed of the random locations (and of the noise of synthetic images).
+    log : callable, optional
+        Function called with a progress message.
+
+    Returns
+    -------
+    results : dict
+        Configuration, environment and timings (in seconds) of each
+        benchmark.
+    """
+    log = log or (lambda message: None)
+    if input_file is not None:
+        images = [(None, os.fspath(input_file))]
+    else:
+        images = []
+        for tile_size in tile_sizes:
+            path = os.path.join(
+                os.fspath(work_dir),
+                f'bench-{image_size}-{tile_size}-{compression}.tif')
+            if not os.path.exists(path):
+                log(f'Generating {path}')
+                generate_image(path, image_size, tile_size, compression,
+                               seed)
+            images.append((tile_size, path))
+
+    results = []
+    skipped = {}
+    for tile_size, path in images:
+        for backend in backends:
+            if backend in skipped:
+                continue
+            log(f'Benchmarking {backend} on {path}')
+            try:
+                image_results = _bench_image(
+                    path, backend, scenarios, cache_modes, num_workers,
+                    patch_size, count, batch_size, seed)
+            except ImportError as e:
+                skipped[backend] = str(e)
+                log(f'Skipping {backend}: {e}')
+                continue
+            for result in image_results:
+                result.update(image=path, tile_size=tile_size)
+            results.extend(image_results)
+
+    return {
+        'version': RESULTS_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'cucim_version': __version__,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'input_file': None if input_file is None else os.fspath(
+                input_file),
+            'scenarios': list(scenarios),
+            'backends': list(backends),
+            'tile_sizes': list(tile_sizes),
+            'num_workers': list(num_workers),
+            'cache_modes': list(cache_modes),
+            'patch_size': patch_size,
+            'count': count,
+            'batch_size': batch_size,
+            'image_size': image_size,
+            'compression': compression,
+            'seed': seed,
+        },
+        'skipped_backends': skipped,
+        'results': results,
+    }
+
+
+def write_results(results, path):
+    """Write benchmark results as JSON."""
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,145 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Lazy (dask) arrays backed by CuImage pyramid levels."""
+
+import os
+
+import numpy as np
+
+from ._cucim import CuImage
+from ._tile_cache import get_image
+from ._tile_cache import level0_location
+
+__all__ = ['to_dask']
+
+# Default number of pixels (per side) of a chunk when the chunk size is not
+# given. The chunk size is rounded up to a multiple of the tile size.
+DEFAULT_CHUNK_SIZE = 2048
+
+
+def _read_chunk(path, level, location, size):
+    img = get_image(path)
+    region = img.read_region(location, size, level)
+    return np.asarray(region)
+
+
+def _normalize_chunks(chunks, tile_size):
+    if chunks is None:
+        chunks = (DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_SIZE)
+    elif np.isscalar(chunks):
+        chunks = (int(chunks), int(chunks))
+    else:
+        chunks = tuple(int(c) for c in chunks)
+        if len(chunks) == 3:
+            chunks = chunks[:2]
+        if len(chunks) != 2:
+            raise ValueError(
+                "chunks should be an int or a (height, width) tuple")
+    if min(chunks) <= 0:
+        raise ValueError("chunks should be positive")
+
+    tile_w, tile_h = tile_size
+    chunk_h, chunk_w = chunks
+    if tile_h > 0:
+        chunk_h = -(-chunk_h // tile_h) * tile_h
+    if tile_w > 0:
+        chunk_w = -(-chunk_w // tile_w) * tile_w
+    return chunk_h, chunk_w
+
+
+def _axis_chunks(length, chunk):
+    return (chunk,) * (length // chunk) + (
+        (length % chunk,) if length % chunk else ())
+
+
+def to_dask(img, level=0, chunks=None):
+    """Create a lazy dask array for a resolution level of the image.
+
+    Each chunk is read with `CuImage.read_region()` when it is computed, using
+    a CuImage object cached per worker (thread or process), so the whole
+    level is never loaded at once. Chunk sizes are rounded up to multiples of
+    the level's tile size so that each tile is decoded by a single task.
+
+    Parameters
+    ----------
+    img : CuImage or str or os.PathLike
+        The image (or the path of the image) to read. The path is what is
+        sent to the workers.
+    level : int, optional
+        The resolution level.
+    chunks : int or tuple of int, optional
+        The chunk size in pixels, as an int or a ``(height, width)`` tuple. It
+        is rounded up to a multiple of the tile size. By default, chunks are
+        about 2048 x 2048 pixels.
+
+    Returns
+    -------
+    array : dask.array.Array
+        A lazy array with the shape ``(height, width, channels)`` of the
+        level.
+
+    Examples
+    --------
+    >>> from cucim.clara import to_dask
+    >>> arr = to_dask("image.tif", level=1)  # doctest: +SKIP
+    >>> arr.mean(axis=(0, 1)).compute()  # doctest: +SKIP
+    """
+    import dask.array as da
+    from dask.base import tokenize
+
+    if isinstance(img, CuImage):
+        # Regions read from an image have no path (and images opened from
+        # memory have no file), so they can't be reopened by the workers.
+        path = str(img.path)
+        if not os.path.isfile(path):
+            raise ValueError(
+                "to_dask() needs a CuImage object opened from a file")
+    else:
+        path = os.fspath(img)
+        img = get_image(path)
+
+    resolutions = img.resolutions
+    level_count = resolutions['level_count']
+    if not 0 <= level < level_count:
+        raise ValueError(f"level should be in the range [0, {level_count})")
+    width, height = resolutions['level_dimensions'][level]
+    downsample = resolutions['level_downsamples'][level]
+    tile_size = resolutions['level_tile_sizes'][level]
+
+    # The number of channels depends on the decoding path (e.g., RGBA for
+    # non-JPEG images), so it is taken from a small region of the level.
+    probe = np.asarray(img.read_region((0, 0), (1, 1), level))
+    channels = probe.shape[-1]
+
+    chunk_h, chunk_w = _normalize_chunks(chunks, tile_size)
+    row_chunks = _axis_chunks(height, chunk_h)
+    col_chunks = _axis_chunks(width, chunk_w)
+
+    name = 'cucim-read-region-' + tokenize(path, level, chunk_h, chunk_w)
+    graph = {}
+    y = 0
+    for i, h in enumerate(row_chunks):
+        sy = level0_location(y, downsample)
+        x = 0
+        for j, w in enumerate(col_chunks):
+            sx = level0_location(x, downsample)
+            graph[(name, i, j, 0)] = (
+                _read_chunk, path, level, (sx, sy), (w, h))
+            x += w
+        y += h
+
+    return da.Array(graph, name, (row_chunks, col_chunks, (channels,)),
+                    dtype=probe.dtype)
@@ -0,0 +1,219 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Random-access patch sampler with locality-aware scheduling."""
+
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ._tile_cache import get_image
+
+__all__ = ['PatchSampler']
+
+# Default number of requests reordered together.
+DEFAULT_WINDOW = 256
+
+
+class PatchSampler:
+    """Reads patches at random locations of slides, in a cache-friendly order.
+
+    Random patch locations defeat the decoded-tile cache and the read-ahead of
+    the page cache. The sampler takes the requests by windows of `window`
+    requests, groups the requests of a window by slide and by row of tiles
+    (sorted by column), and reads each group on a worker thread, so that
+    patches sharing tiles or neighboring file ranges are read together.
+
+    The randomness of the sampling is preserved within the bound of a
+    window: the set of patches of each window is the same as with the given
+    order, and (if `shuffle` is True) they are yielded in a random order.
+
+    Parameters
+    ----------
+    requests : iterable or callable
+        Patch requests, as ``(path, (x, y))`` tuples where ``(x, y)`` is the
+        level-0 location of the top-left corner of the patch. If callable, it
+        is a sampling distribution called with a ``numpy.random.Generator``
+        that returns a request.
+    size : int or tuple of int
+        Size ``(width, height)`` of the patches.
+    level : int, optional
+        Resolution level of the patches.
+    window : int, optional
+        Number of requests reordered together. Larger windows increase the
+        locality of the reads, at the cost of memory (when `shuffle` is True)
+        and of the latency of the first patch.
+    num_workers : int, optional
+        Number of threads reading patches (default: the number of CPU cores).
+    num_samples : int, optional
+        Number of requests drawn when `requests` is callable (default:
+        unlimited).
+    shuffle : bool, optional
+        If True, the patches of each window are yielded in a random order.
+        Otherwise, they are yielded in the read order.
+    seed : int, optional
+        Seed of the sampling distribution and of the shuffling.
+
+    Examples
+    --------
+    >>> from cucim.clara import PatchSampler
+    >>> locations = [(0, 0), (256, 0), (0, 256), (256, 256)]
+    >>> requests = [("image.tif", (x, y)) for x, y in locations]
+    >>> sampler = PatchSampler(requests, 256, num_workers=8)
+    >>> for path, location, patch in sampler:  # doctest: +SKIP
+    ...     train(patch)
+    >>> sampler.stats()["patches_per_second"]  # doctest: +SKIP
+    """
+
+    def __init__(self, requests, size, level=0, window=DEFAULT_WINDOW,
+                 num_workers=None, num_samples=None, shuffle=True, seed=None):
+        if np.isscalar(size):
+            size = (int(size), int(size))
+        if window < 1:
+            raise ValueError("window should be positive")
+        self.requests = requests
+        self.size = tuple(int(s) for s in size)
+        self.level = level
+        self.window = window
+        self.num_workers = num_workers or os.cpu_count()
+        self.num_samples = num_samples
+        self.shuffle = shuffle
+        self.seed = seed
+        self._level_infos = {}
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._patch_count = 0
+        self._request_count = 0
+        self._group_count = 0
+        self._window_count = 0
+        self._start_time = None
+        self._elapsed = 0.0
+
+    def stats(self):
+        """Returns statistics of the last (or current) iteration.
+
+        The dict has the number of patches, windows and groups (patches read
+        together by a worker), the mean number of patches per group, the
+        elapsed time (in seconds) and the achieved number of patches per
+        second.
+        """
+        elapsed = self._elapsed
+        if self._start_time is not None:
+            elapsed = time.perf_counter() - self._start_time
+        return {
+            'patches': self._patch_count,
+            'windows': self._window_count,
+            'groups': self._group_count,
+            'patches_per_group': (self._request_count / self._group_count
+                                  if self._group_count else 0.0),
+            'seconds': elapsed,
+            'patches_per_second': (self._patch_count / elapsed
+                                   if elapsed > 0 else 0.0),
+        }
+
+    def _iter_requests(self, rng):
+        if callable(self.requests):
+            counter = itertools.count() if self.num_samples is None \
+                else range(self.num_samples)
+            return (self.requests(rng) for _ in counter)
+        return iter(self.requests)
+
+    def _level_info(self, path):
+        """Returns the downsample and the tile height of the level."""
+        info = self._level_infos.get(path)
+        if info is None:
+            resolutions = get_image(path).resolutions
+            downsample = resolutions['level_downsamples'][self.level]
+            tile_height = resolutions['level_tile_sizes'][self.level][1]
+            # Untiled (or stripped) levels are grouped by patch rows
+            info = self._level_infos[path] = (downsample,
+                                              tile_height or self.size[1])
+        return info
+
+    def _schedule(self, requests):
+        """Groups the requests of a window by slide and row of tiles.
+
+        Returns a list of groups (lists of requests). Groups are ordered by
+        slide (in order of first appearance) and row, and requests of a group
+        are sorted by location. Large groups are split so that the window is
+        shared by all the workers.
+        """
+        rows = {}
+        slide_order = {}
+        for path, location in requests:
+            path = os.fspath(path)
+            downsample, tile_height = self._level_info(path)
+            row = int(location[1] / downsample) // tile_height
+            slide_order.setdefault(path, len(slide_order))
+            rows.setdefault((slide_order[path], row), []).append(
+                (path, (int(location[0]), int(location[1]))))
+
+        max_group_size = -(-len(requests) // self.num_workers)
+        groups = []
+        for key in sorted(rows):
+            row = sorted(rows[key], key=lambda request: request[1])
+            for i in range(0, len(row), max_group_size):
+                groups.append(row[i:i + max_group_size])
+        return groups
+
+    def _read_group(self, group):
+        patches = []
+        for path, location in group:
+            img = get_image(path)
+            patch = np.asarray(img.read_region(location, self.size,
+                                               self.level))
+            patches.append((path, location, patch))
+        return patches
+
+    def _submit_window(self, executor, request_iter):
+        requests = list(itertools.islice(request_iter, self.window))
+        if not requests:
+            return None
+        groups = self._schedule(requests)
+        self._window_count += 1
+        self._request_count += len(requests)
+        self._group_count += len(groups)
+        return [executor.submit(self._read_group, group) for group in groups]
+
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed)
+        request_iter = self._iter_requests(rng)
+        self._reset_stats()
+        self._start_time = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                futures = self._submit_window(executor, request_iter)
+                while futures is not None:
+                    # Read the next window while the current one is consumed
+                    next_futures = self._submit_window(executor, request_iter)
+                    if self.shuffle:
+                        patches = [patch for future in futures
+                                   for patch in future.result()]
+                        for i in rng.permutation(len(patches)):
+                            self._patch_count += 1
+                            yield patches[i]
+                    else:
+                        for future in futures:
+                            for patch in future.result():
+                                self._patch_count += 1
+                                yield patch
+                    futures = next_futures
+        finally:
+            self._elapsed = time.perf_counter() - self._start_time
+            self._start_time = None
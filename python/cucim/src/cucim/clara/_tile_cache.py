@@ -0,0 +1,213 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Helpers for reading regions by level coordinates, with a decoded-tile cache.
+
+These are shared by the lazy array adapters (`to_dask`, `zarr_store`) and the
+tile server.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ._cucim import CuImage
+
+# Default capacity (in bytes) of the shared decoded-tile cache.
+DEFAULT_CACHE_CAPACITY = 256 << 20
+# Size of the cached tiles of levels that are not tiled (e.g., strips).
+DEFAULT_TILE_SIZE = 256
+
+_local = threading.local()
+
+
+def get_image(path):
+    """Returns a CuImage object for the path, cached per process and thread.
+
+    CuImage objects are not shared between threads (the TIFF reader keeps
+    per-object state), so each worker thread (or process) opens the file once
+    and reuses it for all the regions it reads. The file is opened again if
+    its modification time or size changed.
+    """
+    cache = getattr(_local, 'images', None)
+    if cache is None or _local.pid != os.getpid():
+        cache = _local.images = {}
+        _local.pid = os.getpid()
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    entry = cache.get(path)
+    if entry is None or entry[1] != version:
+        entry = cache[path] = (CuImage(path), version)
+    return entry[0]
+
+
+def level0_location(pos, downsample):
+    """Returns the level-0 coordinate that maps to `pos` at the level.
+
+    The TIFF reader converts level-0 coordinates to the level's coordinates
+    with a float32 division (truncated), so the candidates near
+    `pos * downsample` are checked with the same arithmetic.
+    """
+    if pos == 0:
+        return 0
+    ds = np.float32(downsample)
+    base = int(round(pos * float(ds)))
+    for loc in (base, base + 1, base - 1, base + 2, base - 2):
+        if loc >= 0 and int(np.float32(loc) / ds) == pos:
+            return loc
+    return base
+
+
+class TileCache:
+    """A thread-safe LRU cache of decoded regions, bounded by size in bytes.
+
+    Parameters
+    ----------
+    capacity : int, optional
+        The maximum number of bytes of the cached arrays. 0 disables caching.
+    """
+
+    def __init__(self, capacity=DEFAULT_CACHE_CAPACITY):
+        self._capacity = capacity
+        self._items = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, value):
+        with self._lock:
+            self._capacity = value
+            self._evict()
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if value.nbytes > self._capacity:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._items[key] = value
+            self._nbytes += value.nbytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+
+    def discard(self, predicate):
+        """Removes the items whose key satisfies `predicate`."""
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self._nbytes -= self._items.pop(key).nbytes
+
+    def stats(self):
+        """Returns a dict with the number of hits/misses and cached items."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'items': len(self._items), 'nbytes': self._nbytes,
+                    'capacity': self._capacity}
+
+    def _evict(self):
+        while self._nbytes > self._capacity and self._items:
+            _, value = self._items.popitem(last=False)
+            self._nbytes -= value.nbytes
+
+
+tile_cache = TileCache()
+
+
+def read_level_region(path, level, x, y, width, height, cache=tile_cache):
+    """Reads a region given in the coordinates of the level.
+
+    The decoded region is kept in `cache` (if not None). The returned array
+    must not be modified.
+    """
+    key = (path, level, x, y, width, height)
+    if cache is not None:
+        arr = cache.get(key)
+        if arr is not None:
+            return arr
+
+    img = get_image(path)
+    downsample = img.resolutions['level_downsamples'][level]
+    location = (level0_location(x, downsample),
+                level0_location(y, downsample))
+    arr = np.asarray(img.read_region(location, (width, height), level))
+    arr.setflags(write=False)
+
+    if cache is not None:
+        cache.put(key, arr)
+    return arr
+
+
+def read_level_tiles(path, level, x, y, width, height, cache=tile_cache):
+    """Reads a region given in the coordinates of the level, tile by tile.
+
+    The region is assembled from the tiles of the level (each read with
+    `read_level_region`), so that regions that overlap or are not aligned
+    with the tiles share the decoded tiles in `cache`. The region must be
+    within the level.
+    """
+    if cache is None:
+        return read_level_region(path, level, x, y, width, height, None)
+
+    resolutions = get_image(path).resolutions
+    level_w, level_h = resolutions['level_dimensions'][level]
+    tile_w, tile_h = resolutions['level_tile_sizes'][level]
+    if tile_w <= 0 or tile_h <= 0:
+        tile_w = tile_h = DEFAULT_TILE_SIZE
+
+    arr = None
+    for ty in range(y // tile_h, (y + height - 1) // tile_h + 1):
+        for tx in range(x // tile_w, (x + width - 1) // tile_w + 1):
+            tile_x, tile_y = tx * tile_w, ty * tile_h
+            tile = read_level_region(
+                path, level, tile_x, tile_y, min(tile_w, level_w - tile_x),
+                min(tile_h, level_h - tile_y), cache)
+            x0, y0 = max(x, tile_x), max(y, tile_y)
+            x1 = min(x + width, tile_x + tile.shape[1])
+            y1 = min(y + height, tile_y + tile.shape[0])
+            if (x0, y0, x1, y1) == (x, y, x + width, y + height):
+                # The region is within a single tile
+                return tile[y0 - tile_y:y1 - tile_y, x0 - tile_x:x1 - tile_x]
+            if arr is None:
+                arr = np.empty((height, width) + tile.shape[2:], tile.dtype)
+            arr[y0 - y:y1 - y, x0 - x:x1 - x] = \
+                tile[y0 - tile_y:y1 - tile_y, x0 - tile_x:x1 - tile_x]
+    arr.setflags(write=False)
+    return arr
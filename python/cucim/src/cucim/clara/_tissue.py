@@ -0,0 +1,387 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Low-resolution tissue masks of slides, cached in sidecar files."""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from ._cucim import CuImage
+
+__all__ = ['TissueMask', 'tissue_mask']
+
+# Incremented when the computation of masks changes (invalidates the cache).
+_CACHE_VERSION = 1
+# Number (and size) of the blocks of a file hashed to identify its content.
+_FINGERPRINT_BLOCKS = 16
+_FINGERPRINT_BLOCK_SIZE = 64 << 10
+
+_METHODS = ('otsu', 'saturation')
+
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def default_cache_dir():
+    """Returns the folder of the tissue mask cache.
+
+    It is ``$CUCIM_CACHE_DIR/tissue`` if the environment variable is set, and
+    ``~/.cache/cucim/tissue`` otherwise.
+    """
+    root = os.environ.get('CUCIM_CACHE_DIR')
+    if not root:
+        root = os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                            os.path.join(os.path.expanduser('~'), '.cache'),
+                            'cucim')
+    return os.path.join(root, 'tissue')
+
+
+def file_fingerprint(path):
+    """Returns a hash identifying the content of a file.
+
+    Hashing whole slides (gigabytes) would take longer than computing a mask,
+    so the size and evenly spaced blocks of the file (including the first and
+    the last bytes, where TIFF files keep their directories) are hashed. The
+    result is memoized per (path, modification time, size).
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _fingerprints_lock:
+        fingerprint = _fingerprints.get(key)
+    if fingerprint is not None:
+        return fingerprint
+
+    size = stat.st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    block_size = _FINGERPRINT_BLOCK_SIZE
+    if size <= _FINGERPRINT_BLOCKS * block_size:
+        offsets = range(0, size, block_size)
+    else:
+        last = size - block_size
+        offsets = [last * i // (_FINGERPRINT_BLOCKS - 1)
+                   for i in range(_FINGERPRINT_BLOCKS)]
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        for offset in offsets:
+            digest.update(os.pread(fd, block_size, offset))
+    finally:
+        os.close(fd)
+    fingerprint = digest.hexdigest()
+    with _fingerprints_lock:
+        _fingerprints[key] = fingerprint
+    return fingerprint
+
+
+class TissueMask:
+    """A low-resolution tissue mask of a slide.
+
+    Parameters
+    ----------
+    mask : numpy.ndarray
+        The boolean mask, with the shape ``(height, width)``.
+    dimensions : tuple of int
+        The ``(width, height)`` of the level 0 of the slide.
+    level_downsamples : tuple of float, optional
+        The downsample factors of the levels of the slide, used to convert
+        patch sizes given at a level. Defaults to ``(1.0,)``.
+    threshold : float, optional
+        The threshold used to compute the mask (for information).
+
+    Attributes
+    ----------
+    downsample : tuple of float
+        The ``(x, y)`` number of level-0 pixels per mask pixel.
+    """
+
+    def __init__(self, mask, dimensions, level_downsamples=(1.0,),
+                 threshold=None):
+        self.mask = np.ascontiguousarray(mask, dtype=bool)
+        if self.mask.ndim != 2:
+            raise ValueError("mask should be a 2D array")
+        self.dimensions = tuple(int(d) for d in dimensions)
+        self.level_downsamples = tuple(float(d) for d in level_downsamples)
+        self.threshold = threshold
+        height, width = self.mask.shape
+        self.downsample = (self.dimensions[0] / width,
+                           self.dimensions[1] / height)
+        self._integral = None
+
+    @property
+    def shape(self):
+        return self.mask.shape
+
+    def __array__(self, dtype=None):
+        return self.mask if dtype is None else self.mask.astype(dtype)
+
+    @property
+    def tissue_fraction(self):
+        """The fraction of the slide covered by tissue."""
+        return float(self.mask.mean()) if self.mask.size else 0.0
+
+    def _summed_area_table(self):
+        if self._integral is None:
+            integral = np.zeros((self.mask.shape[0] + 1,
+                                 self.mask.shape[1] + 1), np.int64)
+            np.cumsum(np.cumsum(self.mask, axis=0, dtype=np.int64), axis=1,
+                      out=integral[1:, 1:])
+            self._integral = integral
+        return self._integral
+
+    def _mask_bounds(self, x, y, width, height):
+        # Mask pixels overlapped by level-0 boxes (clipped to the mask)
+        sx, sy = self.downsample
+        mask_h, mask_w = self.mask.shape
+        x0 = np.clip(np.floor(x / sx), 0, mask_w).astype(np.int64)
+        y0 = np.clip(np.floor(y / sy), 0, mask_h).astype(np.int64)
+        x1 = np.clip(np.ceil((x + width) / sx), 0, mask_w).astype(np.int64)
+        y1 = np.clip(np.ceil((y + height) / sy), 0, mask_h).astype(np.int64)
+        return x0, y0, x1, y1
+
+    def _coverage(self, x, y, width, height):
+        integral = self._summed_area_table()
+        x0, y0, x1, y1 = self._mask_bounds(x, y, width, height)
+        total = (integral[y1, x1] - integral[y0, x1] - integral[y1, x0] +
+                 integral[y0, x0])
+        area = (x1 - x0) * (y1 - y0)
+        return np.where(area > 0, total / np.maximum(area, 1), 0.0)
+
+    def coverage(self, location, size, level=0):
+        """Returns the fraction of tissue in a region.
+
+        Parameters
+        ----------
+        location : tuple of int
+            The ``(x, y)`` level-0 location of the region (as for
+            `CuImage.read_region()`).
+        size : tuple of int
+            The ``(width, height)`` of the region at `level`.
+        level : int, optional
+            The level of the region's size.
+        """
+        downsample = self.level_downsamples[level]
+        return float(self._coverage(np.float64(location[0]),
+                                    np.float64(location[1]),
+                                    size[0] * downsample,
+                                    size[1] * downsample))
+
+    def regions(self, size, level=0, step=None, min_coverage=0.5):
+        """Returns the locations of the patches of a grid that hold tissue.
+
+        The coverage of all the patches is computed at once from a
+        summed-area table of the mask, so background patches are skipped
+        without reading them.
+
+        Parameters
+        ----------
+        size : int or tuple of int
+            The ``(width, height)`` of the patches at `level`.
+        level : int, optional
+            The level of the patches.
+        step : int or tuple of int, optional
+            The ``(x, y)`` distance between patches at `level`. Defaults to
+            `size` (non-overlapping patches).
+        min_coverage : float, optional
+            The minimum fraction of tissue of the patches returned. 0 returns
+            all the patches with some tissue.
+
+        Returns
+        -------
+        locations : numpy.ndarray
+            The ``(x, y)`` level-0 locations (to pass to
+            `CuImage.read_region()`), with the shape ``(N, 2)``, in row-major
+            order.
+        """
+        if np.isscalar(size):
+            size = (size, size)
+        if step is None:
+            step = size
+        elif np.isscalar(step):
+            step = (step, step)
+        if min(size) <= 0 or min(step) <= 0:
+            raise ValueError("size and step should be positive")
+        downsample = self.level_downsamples[level]
+        width, height = (s * downsample for s in size)
+        step_x, step_y = (s * downsample for s in step)
+        xs = np.arange(0, self.dimensions[0] - width + 1, step_x)
+        ys = np.arange(0, self.dimensions[1] - height + 1, step_y)
+        y, x = np.meshgrid(ys, xs, indexing='ij')
+        coverage = self._coverage(x.ravel(), y.ravel(), width, height)
+        if min_coverage > 0:
+            keep = coverage >= min_coverage
+        else:
+            keep = coverage > 0
+        return np.stack([x.ravel()[keep], y.ravel()[keep]],
+                        axis=1).astype(np.int64)
+
+    def save(self, path):
+        """Saves the mask to a ``.npz`` file (see `TissueMask.load()`)."""
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f, mask=np.packbits(self.mask, axis=-1),
+                shape=np.array(self.mask.shape),
+                dimensions=np.array(self.dimensions),
+                level_downsamples=np.array(self.level_downsamples),
+                threshold=np.array(np.nan if self.threshold is None
+                                   else self.threshold))
+
+    @classmethod
+    def load(cls, path):
+        """Loads a mask saved with `TissueMask.save()`."""
+        with np.load(path) as data:
+            height, width = (int(s) for s in data['shape'])
+            mask = np.unpackbits(data['mask'], axis=-1, count=width)
+            threshold = float(data['threshold'])
+            return cls(mask.astype(bool), data['dimensions'],
+                       data['level_downsamples'],
+                       None if np.isnan(threshold) else threshold)
+
+
+def _compute_mask(image, method, min_size, closing):
+    import cupy as cp
+
+    from ..skimage import color
+    from ..skimage import filters
+    from ..skimage import morphology
+    from ..skimage import util
+
+    image = cp.asarray(image)
+    if image.ndim == 2:
+        image = image[..., np.newaxis]
+    if image.shape[-1] < 3:
+        # Grayscale (and alpha): tissue is darker than the background, for
+        # both methods as there is no saturation
+        values = util.img_as_float(image[..., 0])
+        invert = True
+    elif method == 'otsu':
+        # Tissue is darker than the (bright) background
+        values = color.rgb2gray(image[..., :3])
+        invert = True
+    else:
+        # Tissue is more saturated than the (gray/white) background
+        values = color.rgb2hsv(image[..., :3])[..., 1]
+        invert = False
+    if float(values.min()) == float(values.max()):
+        return np.zeros(values.shape, bool), None
+
+    threshold = float(filters.threshold_otsu(values))
+    mask = values <= threshold if invert else values > threshold
+    if closing > 0:
+        mask = morphology.binary_closing(mask, morphology.disk(closing))
+    if min_size > 0:
+        mask = morphology.remove_small_objects(mask, min_size)
+        mask = morphology.remove_small_holes(mask, min_size)
+    return cp.asnumpy(mask), threshold
+
+
+def tissue_mask(img, level=None, method='otsu', min_size=64, closing=2,
+                cache=True, cache_dir=None):
+    """Computes (or loads from the cache) the tissue mask of a slide.
+
+    A resolution level is read as a whole (a thumbnail), converted to a
+    single channel and thresholded with Otsu's method. The mask is then
+    cleaned with a binary closing and by removing small objects and holes.
+    These steps run on the GPU with `cucim.skimage`.
+
+    The result is saved in a sidecar file of the cache folder, named after a
+    hash of the file content and of the parameters, so repeated jobs on the
+    same slide (even moved or copied) load it instead of recomputing it.
+
+    Parameters
+    ----------
+    img : CuImage or str or os.PathLike
+        The image (or the path of the image).
+    level : int, optional
+        The resolution level read. Defaults to the smallest level.
+    method : {'otsu', 'saturation'}, optional
+        'otsu' thresholds the grayscale image (tissue is darker than the
+        background); 'saturation' thresholds the HSV saturation (tissue is
+        more colorful than the background), which is more robust to dark
+        background areas (e.g., pen marks and slide borders). Grayscale
+        images are always thresholded with 'otsu'.
+    min_size : int, optional
+        Objects and holes smaller than this number of mask pixels are
+        removed. 0 disables it.
+    closing : int, optional
+        The radius (in mask pixels) of the disk used by the binary closing.
+        0 disables it.
+    cache : bool, optional
+        Whether to load/save the mask from/to the cache. Images not opened
+        from a file are never cached.
+    cache_dir : str, optional
+        The folder of the cache. See `default_cache_dir()`.
+
+    Returns
+    -------
+    mask : TissueMask
+
+    Examples
+    --------
+    >>> from cucim import CuImage
+    >>> img = CuImage("image.tif")  # doctest: +SKIP
+    >>> mask = img.tissue_mask()  # doctest: +SKIP
+    >>> for x, y in mask.regions(256, min_coverage=0.5):  # doctest: +SKIP
+    ...     patch = img.read_region((x, y), (256, 256))
+    """
+    if method not in _METHODS:
+        raise ValueError(f"method should be one of {_METHODS}")
+    if not isinstance(img, CuImage):
+        img = CuImage(os.fspath(img))
+
+    resolutions = img.resolutions
+    level_count = resolutions['level_count']
+    if level is None:
+        level = level_count - 1
+    if not 0 <= level < level_count:
+        raise ValueError(f"level should be in the range [0, {level_count})")
+    dimensions = resolutions['level_dimensions'][0]
+    level_downsamples = resolutions['level_downsamples']
+
+    cache_path = None
+    path = str(img.path)
+    if cache and os.path.isfile(path):
+        params = {'version': _CACHE_VERSION, 'file': file_fingerprint(path),
+                  'level': level, 'method': method, 'min_size': min_size,
+                  'closing': closing}
+        key = hashlib.blake2b(json.dumps(params, sort_keys=True).encode(),
+                              digest_size=16).hexdigest()
+        cache_path = os.path.join(cache_dir or default_cache_dir(),
+                                  f'tissue-{key}.npz')
+        if os.path.exists(cache_path):
+            try:
+                return TissueMask.load(cache_path)
+            except (OSError, ValueError, KeyError):
+                pass
+
+    width, height = resolutions['level_dimensions'][level]
+    region = np.asarray(img.read_region((0, 0), (width, height), level))
+    mask, threshold = _compute_mask(region, method, min_size, closing)
+    result = TissueMask(mask, dimensions, level_downsamples, threshold)
+
+    if cache_path is not None:
+        # Written atomically; a read-only cache folder only disables caching.
+        tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}'
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            result.save(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return result
@@ -0,0 +1,252 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Read-only zarr (v2) store view over CuImage pyramid levels."""
+
+import json
+import os
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from ._cucim import CuImage
+from ._tile_cache import get_image
+from ._tile_cache import read_level_region
+from ._tile_cache import tile_cache
+
+__all__ = ['zarr_store', 'CuImageStore']
+
+# Chunk size (per side) used for levels that are not tiled.
+DEFAULT_CHUNK_SIZE = 512
+
+
+class CuImageStore(MutableMapping):
+    """A read-only zarr (v2) store exposing the levels of an image.
+
+    The store is a multiscale group (OME-NGFF ``multiscales`` attribute)
+    where the array ``"<level>"`` holds the level as a
+    ``(channels, height, width)`` array, as OME-NGFF requires the channel
+    axis before the spatial axes. Chunks hold all the channels of a region
+    aligned to the level's tiles and each chunk key is served by
+    `read_region()` through the decoded-tile cache.
+
+    Use `zarr_store()` to create the store.
+    """
+
+    def __init__(self, path, chunk_size=None, cache=tile_cache,
+                 background=255):
+        self._path = path
+        self._cache = cache
+        self._background = background
+
+        img = get_image(path)
+        resolutions = img.resolutions
+        self._levels = []
+        for level in range(resolutions['level_count']):
+            width, height = resolutions['level_dimensions'][level]
+            tile_w, tile_h = resolutions['level_tile_sizes'][level]
+            if chunk_size is not None:
+                tile_w = tile_h = chunk_size
+            elif tile_w <= 0 or tile_h <= 0:
+                tile_w = tile_h = DEFAULT_CHUNK_SIZE
+            self._levels.append({
+                'shape': (height, width),
+                'chunks': (tile_h, tile_w),
+                'downsample': resolutions['level_downsamples'][level],
+            })
+
+        # The number of channels/data type depend on the decoding path so
+        # they are taken from a small region of the image.
+        probe = read_level_region(path, 0, 0, 0, 1, 1, cache=None)
+        self._channels = probe.shape[-1]
+        self._dtype = probe.dtype
+
+        self._meta = {'.zgroup': self._json({'zarr_format': 2}),
+                      '.zattrs': self._json(self._multiscales())}
+        for level, info in enumerate(self._levels):
+            self._meta[f'{level}/.zarray'] = self._json(self._zarray(info))
+            self._meta[f'{level}/.zattrs'] = self._json({})
+
+    @staticmethod
+    def _json(obj):
+        return json.dumps(obj, indent=2).encode()
+
+    def _multiscales(self):
+        datasets = []
+        for level, info in enumerate(self._levels):
+            downsample = info['downsample']
+            datasets.append({
+                'path': str(level),
+                'coordinateTransformations': [
+                    {'type': 'scale', 'scale': [1.0, downsample, downsample]}
+                ],
+            })
+        return {
+            'multiscales': [{
+                'version': '0.4',
+                'name': os.path.basename(self._path),
+                'axes': [
+                    {'name': 'c', 'type': 'channel'},
+                    {'name': 'y', 'type': 'space'},
+                    {'name': 'x', 'type': 'space'},
+                ],
+                'datasets': datasets,
+            }]
+        }
+
+    def _zarray(self, info):
+        return {
+            'zarr_format': 2,
+            'shape': [self._channels, *info['shape']],
+            'chunks': [self._channels, *info['chunks']],
+            'dtype': self._dtype.str,
+            'compressor': None,
+            'fill_value': self._background,
+            'order': 'C',
+            'filters': None,
+            'dimension_separator': '.',
+        }
+
+    def _parse_chunk_key(self, key):
+        level, _, chunk = key.partition('/')
+        if not level.isdigit() or int(level) >= len(self._levels):
+            return None
+        try:
+            indices = tuple(int(index) for index in chunk.split('.'))
+        except ValueError:
+            return None
+        if len(indices) != 3 or indices[0] != 0:
+            return None
+        info = self._levels[int(level)]
+        height, width = info['shape']
+        chunk_h, chunk_w = info['chunks']
+        i, j = indices[1:]
+        if not (0 <= i * chunk_h < height and 0 <= j * chunk_w < width):
+            return None
+        return int(level), i, j
+
+    def _read_chunk(self, level, i, j):
+        info = self._levels[level]
+        height, width = info['shape']
+        chunk_h, chunk_w = info['chunks']
+        y = i * chunk_h
+        x = j * chunk_w
+        h = min(chunk_h, height - y)
+        w = min(chunk_w, width - x)
+        region = read_level_region(self._path, level, x, y, w, h,
+                                   cache=self._cache)
+        region = region.transpose(2, 0, 1)
+        if (h, w) != (chunk_h, chunk_w):
+            # zarr (v2) expects edge chunks to be padded to the chunk shape
+            chunk = np.full((self._channels, chunk_h, chunk_w),
+                            self._background, dtype=self._dtype)
+            chunk[:, :h, :w] = region
+            region = chunk
+        return np.ascontiguousarray(region).tobytes()
+
+    def __getitem__(self, key):
+        value = self._meta.get(key)
+        if value is not None:
+            return value
+        parsed = self._parse_chunk_key(key)
+        if parsed is None:
+            raise KeyError(key)
+        return self._read_chunk(*parsed)
+
+    def __contains__(self, key):
+        return key in self._meta or self._parse_chunk_key(key) is not None
+
+    def __iter__(self):
+        yield from self._meta
+        for level, info in enumerate(self._levels):
+            height, width = info['shape']
+            chunk_h, chunk_w = info['chunks']
+            for i in range(-(-height // chunk_h)):
+                for j in range(-(-width // chunk_w)):
+                    yield f'{level}/0.{i}.{j}'
+
+    def __len__(self):
+        count = len(self._meta)
+        for info in self._levels:
+            height, width = info['shape']
+            chunk_h, chunk_w = info['chunks']
+            count += -(-height // chunk_h) * -(-width // chunk_w)
+        return count
+
+    def __setitem__(self, key, value):
+        raise PermissionError("CuImageStore is read-only")
+
+    def __delitem__(self, key):
+        raise PermissionError("CuImageStore is read-only")
+
+    def listdir(self, path=''):
+        path = path.strip('/')
+        if not path:
+            return ['.zattrs', '.zgroup'] + [
+                str(level) for level in range(len(self._levels))]
+        if path.isdigit() and int(path) < len(self._levels):
+            prefix = path + '/'
+            return [key[len(prefix):] for key in self if
+                    key.startswith(prefix)]
+        return []
+
+    def close(self):
+        pass
+
+
+def zarr_store(img, chunk_size=None, cache=tile_cache, background=255):
+    """Create a read-only zarr (v2) store for the pyramid levels of the image.
+
+    The store can be opened by zarr (``zarr.open(store, mode='r')``) or by
+    tools that read multiscale (OME-NGFF) zarr groups, such as napari,
+    without converting the image. Each level is the array ``"<level>"`` with
+    the shape ``(channels, height, width)``, chunked by the level's tiles.
+
+    Parameters
+    ----------
+    img : CuImage or str or os.PathLike
+        The image (or the path of the image).
+    chunk_size : int, optional
+        The chunk size (per side). By default, the tile size of each level (or
+        512 for levels that are not tiled).
+    cache : TileCache or None, optional
+        The cache of decoded chunks. By default, the shared decoded-tile cache
+        is used. If None, chunks are not cached.
+    background : int, optional
+        The value used for padding edge chunks.
+
+    Returns
+    -------
+    store : CuImageStore
+        A mapping from zarr keys to bytes.
+
+    Examples
+    --------
+    >>> import zarr
+    >>> from cucim.clara import zarr_store
+    >>> group = zarr.open(zarr_store("image.tif"), mode="r")  # doctest: +SKIP
+    >>> group["1"][:, :256, :256]  # doctest: +SKIP
+    """
+    if isinstance(img, CuImage):
+        # Regions read from an image have no path (and images opened from
+        # memory have no file), so they can't be reopened by the workers.
+        path = str(img.path)
+        if not os.path.isfile(path):
+            raise ValueError(
+                "zarr_store() needs a CuImage object opened from a file")
+    else:
+        path = os.fspath(img)
+    return CuImageStore(path, chunk_size=chunk_size, cache=cache,
+                        background=background)
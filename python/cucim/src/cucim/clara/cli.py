@@ -58,3 +58,100 @@ def convert(src_file, dest_folder, tile_size, overlap, num_workers,
 
     tiff.svs2tif(src_file, Path(dest_folder), tile_size, overlap, num_workers,
                  output_filename)
+
+
+@main.command()
+@click.argument('slide_dir', type=click.Path(
+    exists=True, dir_okay=True, file_okay=False))
+@click.option('--host', type=str, default='127.0.0.1')
+@click.option('--port', type=int, default=8000)
+@click.option('--tile-size', type=int, default=254)
+@click.option('--overlap', type=int, default=1)
+@click.option('--quality', type=int, default=75)
+@click.option('--num-workers', type=int, default=os.cpu_count())
+@click.option('--cache-size', type=int, default=256,
+              help='Capacity of the decoded-tile cache in MiB')
+def serve(slide_dir, host, port, tile_size, overlap, quality, num_workers,
+          cache_size):
+    """Serve DeepZoom/IIIF tiles of the images in a folder over HTTP"""
+    from ._tile_cache import tile_cache
+    from .server import TileServer
+    logging.basicConfig(level=logging.INFO)
+
+    tile_cache.capacity = cache_size << 20
+    TileServer(slide_dir, tile_size=tile_size, overlap=overlap,
+               quality=quality, num_workers=num_workers).run(host, port)
+
+
+@main.group()
+def bench():
+    """Run benchmarks"""
+    pass
+
+
+@bench.command('read')
+@click.argument('input_file', required=False, type=click.Path(
+    exists=True, dir_okay=False))
+@click.option('--output', '-o', type=click.Path(dir_okay=False),
+              default='bench-read.json', show_default=True,
+              help='JSON file of the results')
+@click.option('--work-dir', type=click.Path(file_okay=False),
+              default=Path('.'),
+              help='Folder of the generated synthetic images')
+@click.option('--scenario', 'scenarios', multiple=True,
+              type=click.Choice(['open', 'random', 'grid', 'batch']),
+              help='Scenario to run (default: all)')
+@click.option('--backend', 'backends', multiple=True,
+              type=click.Choice(['cucim', 'openslide', 'tifffile']),
+              help='Library to benchmark (default: cucim)')
+@click.option('--tile-size', 'tile_sizes', multiple=True, type=int,
+              help='Tile size of the synthetic images (default: 256)')
+@click.option('--num-workers', 'num_workers', multiple=True, type=int,
+              help='Number of threads of batch reads '
+                   '(default: 1 and the number of CPU cores)')
+@click.option('--cache', 'cache_modes', multiple=True,
+              type=click.Choice(['warm', 'cold']),
+              help='Page cache state (default: warm and cold)')
+@click.option('--patch-size', type=int, default=256, show_default=True)
+@click.option('--count', type=int, default=100, show_default=True,
+              help='Number of patches (or openings) per scenario')
+@click.option('--batch-size', type=int, default=32, show_default=True)
+@click.option('--image-size', type=int, default=16384, show_default=True,
+              help='Size of the synthetic images')
+@click.option('--compression', type=click.Choice(['jpeg', 'deflate', 'raw']),
+              default='jpeg', show_default=True,
+              help='Compression of the synthetic images')
+@click.option('--seed', type=int, default=0, show_default=True)
+def bench_read(input_file, output, work_dir, scenarios, backends, tile_sizes,
+               num_workers, cache_modes, patch_size, count, batch_size,
+               image_size, compression, seed):
+    """Benchmark reading an image (or synthetic images)"""
+    from . import _bench
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+
+    os.makedirs(work_dir, exist_ok=True)
+    results = _bench.run_read_benchmarks(
+        input_file, work_dir,
+        scenarios=scenarios or _bench.SCENARIOS,
+        backends=backends or ('cucim',),
+        tile_sizes=tile_sizes or (256,),
+        num_workers=num_workers or (1, os.cpu_count()),
+        cache_modes=cache_modes or ('warm', 'cold'),
+        patch_size=patch_size, count=count, batch_size=batch_size,
+        image_size=image_size, compression=compression, seed=seed,
+        log=logger.info)
+
+    for result in results['results']:
+        stats = result['stats']
+        if not stats['rounds']:
+            continue
+        options = ''.join(f' {key}={result[key]}'
+                          for key in ('tile_size', 'num_workers')
+                          if result.get(key) is not None)
+        logger.info(f"{result['backend']:>9} {result['scenario']:>6} "
+                    f"{result['cache']:>4}{options}: "
+                    f"median {stats['median'] * 1e3:.3f} ms, "
+                    f"mean {stats['mean'] * 1e3:.3f} ms")
+    _bench.write_results(results, output)
+    logger.info(f'Results are written to {output}')
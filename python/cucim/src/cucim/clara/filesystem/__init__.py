@@ -15,4 +15,5 @@
 
 from cucim.clara._cucim.filesystem import *
 
-__all__ = ['open', 'pread', 'pwrite', 'close', 'discard_page_cache', 'CuFileDriver']
\ No newline at end of file
+__all__ = ['open', 'pread', 'preadv', 'pwrite', 'close', 'discard_page_cache',
+           'CuFileDriver']
\ No newline at end of file
@@ -0,0 +1,103 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import contextlib
+import json
+import os
+
+from cucim.clara._cucim.profiler import *
+
+__all__ = ['enable', 'disable', 'is_enabled', 'is_tracing', 'reset', 'stats',
+           'trace_events', 'dropped_trace_events', 'profile', 'chrome_trace']
+
+
+@contextlib.contextmanager
+def profile(trace=False, reset_stats=True):
+    """Enable the profiler within the context.
+
+    The previous state of the profiler (e.g., enabled by the caller) is
+    restored when exiting the context.
+
+    Parameters
+    ----------
+    trace : bool, optional
+        If True, trace events are recorded as well.
+    reset_stats : bool, optional
+        If True, accumulated statistics and trace events are cleared when
+        entering the context.
+
+    Examples
+    --------
+    >>> from cucim import CuImage
+    >>> from cucim.clara import profiler
+    >>> img = CuImage("image.tif")
+    >>> with profiler.profile():
+    ...     region = img.read_region((0, 0), (256, 256))
+    >>> profiler.stats()["decode_jpeg"]["count"]  # doctest: +SKIP
+    """
+    was_enabled = is_enabled()
+    was_tracing = is_tracing()
+    if reset_stats:
+        reset()
+    enable(trace)
+    try:
+        yield
+    finally:
+        if was_enabled:
+            enable(was_tracing)
+        else:
+            disable()
+
+
+def chrome_trace(path=None):
+    """Export recorded trace events in the Chrome Trace Event format.
+
+    The output can be loaded with ``chrome://tracing`` or Perfetto. Counters
+    accumulated per stage are stored under the ``"cucim"`` key.
+
+    Parameters
+    ----------
+    path : str or os.PathLike, optional
+        If given, the trace is written to the file as JSON.
+
+    Returns
+    -------
+    trace : dict
+        The trace object.
+    """
+    events = []
+    for stage, start_ns, duration_ns, nbytes, thread_id in trace_events():
+        events.append({
+            "name": stage,
+            "cat": "cucim",
+            "ph": "X",
+            "ts": start_ns / 1000.0,
+            "dur": duration_ns / 1000.0,
+            "pid": os.getpid(),
+            "tid": thread_id,
+            "args": {"bytes": nbytes},
+        })
+    trace = {
+        "traceEvents": events,
+        "displayTimeUnit": "ns",
+        "cucim": {
+            "stats": stats(),
+            "dropped_trace_events": dropped_trace_events(),
+        },
+    }
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(trace, f)
+    return trace
@@ -0,0 +1,277 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Block cache of a byte source, kept in a sparse local file and in memory."""
+
+import concurrent.futures
+import json
+import os
+import threading
+from collections import OrderedDict
+
+__all__ = ['BlockCache']
+
+DEFAULT_BLOCK_SIZE = 64 << 10
+DEFAULT_MEMORY_CAPACITY = 64 << 20
+# Blocks are fetched by requests of at most this size.
+MAX_REQUEST_SIZE = 16 << 20
+
+
+class BlockCache:
+    """Caches the blocks of a `ByteSource` in a local file and in memory.
+
+    The local file has the size of the source and holds the fetched blocks at
+    their offsets (other blocks are holes in a sparse file), so it can be
+    opened by the image readers as if it were the source. The blocks present
+    are tracked in a bitmap saved next to the file (``<path>.blocks``), so
+    the cache persists across sessions while the source doesn't change.
+
+    Blocks read with `read()` are also kept in an in-memory LRU cache.
+
+    Parameters
+    ----------
+    source : ByteSource
+        The source of the bytes.
+    path : str
+        The path of the local file.
+    block_size : int, optional
+        The size (in bytes) of the blocks.
+    memory_capacity : int, optional
+        The capacity (in bytes) of the in-memory cache.
+    num_workers : int, optional
+        The number of requests sent to the source in parallel.
+    max_gap : int, optional
+        Missing ranges separated by at most this number of bytes are fetched
+        by a single request. Defaults to the block size.
+    """
+
+    def __init__(self, source, path, block_size=DEFAULT_BLOCK_SIZE,
+                 memory_capacity=DEFAULT_MEMORY_CAPACITY, num_workers=8,
+                 max_gap=None):
+        self.source = source
+        self.path = path
+        self.block_size = block_size
+        self.size = source.size
+        self.block_count = -(-self.size // block_size)
+        self.memory_capacity = memory_capacity
+        self._max_gap_blocks = -(-(block_size if max_gap is None else max_gap)
+                                 // block_size)
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._memory = OrderedDict()
+        self._memory_nbytes = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix='cucim-fetch')
+        self.requests = 0
+        self.fetched_bytes = 0
+        self.memory_hits = 0
+        self.memory_misses = 0
+
+        self._bitmap_path = path + '.blocks'
+        info = {'name': source.name, 'version': source.version,
+                'size': self.size, 'block_size': block_size}
+        self._bitmap = self._load(info)
+        if self._bitmap is None:
+            self._bitmap = bytearray(-(-self.block_count // 8))
+            with open(path + '.json', 'w') as f:
+                json.dump(info, f)
+            if os.path.exists(self._bitmap_path):
+                os.remove(self._bitmap_path)
+            mode = os.O_RDWR | os.O_CREAT | os.O_TRUNC
+        else:
+            mode = os.O_RDWR
+        self._fd = os.open(path, mode, 0o644)
+        os.ftruncate(self._fd, self.size)
+
+    def _load(self, info):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path + '.json') as f:
+                if json.load(f) != info:
+                    return None
+            with open(self._bitmap_path, 'rb') as f:
+                bitmap = bytearray(f.read())
+        except (OSError, ValueError):
+            return None
+        if len(bitmap) != -(-self.block_count // 8):
+            return None
+        return bitmap
+
+    def _has_block(self, block):
+        return self._bitmap[block >> 3] >> (block & 7) & 1
+
+    def _blocks(self, ranges):
+        blocks = set()
+        for offset, length in ranges:
+            end = min(offset + length, self.size)
+            if length <= 0 or offset >= end:
+                continue
+            blocks.update(range(offset // self.block_size,
+                                (end - 1) // self.block_size + 1))
+        return sorted(blocks)
+
+    @property
+    def cached_bytes(self):
+        """The number of bytes of the blocks stored in the local file."""
+        count = sum(bin(byte).count('1') for byte in self._bitmap)
+        return min(count * self.block_size, self.size)
+
+    def stats(self):
+        """Returns a dict with the number of requests and bytes fetched."""
+        return {'requests': self.requests,
+                'fetched_bytes': self.fetched_bytes,
+                'cached_bytes': self.cached_bytes,
+                'memory_hits': self.memory_hits,
+                'memory_misses': self.memory_misses}
+
+    def ensure(self, ranges):
+        """Makes sure that the byte ranges are stored in the local file.
+
+        Parameters
+        ----------
+        ranges : list of tuple of int
+            ``(offset, length)`` pairs.
+        """
+        blocks = self._blocks(ranges)
+        while blocks:
+            event = threading.Event()
+            waits = []
+            todo = []
+            with self._lock:
+                for block in blocks:
+                    if self._has_block(block):
+                        continue
+                    pending = self._pending.get(block)
+                    if pending is not None:
+                        waits.append(pending)
+                    else:
+                        self._pending[block] = event
+                        todo.append(block)
+            try:
+                if todo:
+                    self._fetch(todo)
+            finally:
+                with self._lock:
+                    for block in todo:
+                        del self._pending[block]
+                event.set()
+            if not waits:
+                return
+            # Blocks fetched by other threads: wait and check again (in case
+            # the other fetches failed).
+            for pending in waits:
+                pending.wait()
+            with self._lock:
+                blocks = [block for block in blocks
+                          if not self._has_block(block)]
+
+    def _runs(self, blocks):
+        max_blocks = max(1, MAX_REQUEST_SIZE // self.block_size)
+        runs = []
+        start = end = blocks[0]
+        for block in blocks[1:]:
+            if (block - end - 1 <= self._max_gap_blocks and
+                    block - start < max_blocks):
+                end = block
+            else:
+                runs.append((start, end + 1))
+                start = end = block
+        runs.append((start, end + 1))
+        return runs
+
+    def _fetch_run(self, run):
+        offset = run[0] * self.block_size
+        length = min(run[1] * self.block_size, self.size) - offset
+        data = self.source.read(offset, length)
+        if len(data) != length:
+            raise IOError(f"Expected {length} bytes at {offset} from "
+                          f"'{self.source.name}' but got {len(data)} bytes")
+        os.pwrite(self._fd, data, offset)
+        return run
+
+    def _fetch(self, blocks):
+        runs = self._runs(blocks)
+        if len(runs) == 1:
+            done = [self._fetch_run(runs[0])]
+        else:
+            done = list(self._executor.map(self._fetch_run, runs))
+        with self._lock:
+            for start, end in done:
+                self.requests += 1
+                self.fetched_bytes += (min(end * self.block_size, self.size)
+                                       - start * self.block_size)
+                for block in range(start, end):
+                    self._bitmap[block >> 3] |= 1 << (block & 7)
+            bitmap = bytes(self._bitmap)
+        tmp_path = f'{self._bitmap_path}.{os.getpid()}.{threading.get_ident()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(bitmap)
+        os.replace(tmp_path, self._bitmap_path)
+
+    def _read_block(self, block):
+        with self._lock:
+            data = self._memory.get(block)
+            if data is not None:
+                self._memory.move_to_end(block)
+                self.memory_hits += 1
+                return data
+            self.memory_misses += 1
+        offset = block * self.block_size
+        data = os.pread(self._fd, min(self.block_size, self.size - offset),
+                        offset)
+        with self._lock:
+            if block not in self._memory:
+                self._memory[block] = data
+                self._memory_nbytes += len(data)
+                while (self._memory_nbytes > self.memory_capacity and
+                       self._memory):
+                    _, old = self._memory.popitem(last=False)
+                    self._memory_nbytes -= len(old)
+        return data
+
+    def read(self, offset, length, readahead=0):
+        """Reads bytes through the cache.
+
+        Parameters
+        ----------
+        offset : int
+            The offset of the bytes.
+        length : int
+            The number of bytes.
+        readahead : int, optional
+            The number of bytes (starting at `offset`) made available in the
+            local file, if larger than `length`. This avoids small requests
+            when parsing file structures.
+        """
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b''
+        self.ensure([(offset, max(length, readahead))])
+        first = offset // self.block_size
+        last = (end - 1) // self.block_size
+        data = b''.join(self._read_block(block)
+                        for block in range(first, last + 1))
+        start = offset - first * self.block_size
+        return data[start:start + end - offset]
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._executor.shutdown(wait=True)
+        self._memory.clear()
+        self._memory_nbytes = 0
@@ -0,0 +1,176 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""CuImage reading a remote TIFF file through a block cache."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from .._cucim import CuImage
+from .block_cache import DEFAULT_BLOCK_SIZE
+from .block_cache import DEFAULT_MEMORY_CAPACITY
+from .block_cache import BlockCache
+from .source import open_source
+from .tiff_index import read_directories
+
+__all__ = ['RemoteImage']
+
+
+class RemoteImage:
+    """An image read from a (remote) byte source, fetching only needed bytes.
+
+    When opened, the file structure (header, directories and tile index
+    tables) is fetched into a local sparse file (see `BlockCache`), which is
+    opened with `CuImage`. Before each `read_region()` call, the bytes of the
+    tiles covering the region are fetched (in parallel, coalescing adjacent
+    tiles), so only the bytes of the needed tiles are transferred.
+
+    Other attributes and methods are those of the underlying `CuImage`.
+
+    Parameters
+    ----------
+    uri : str or ByteSource
+        The URL (e.g., ``https://host/slide.svs``), path or byte source of a
+        TIFF file. See `open_source()`.
+    cache_dir : str, optional
+        The folder of the local (block) cache. The cache persists across
+        sessions while the file doesn't change. By default, a temporary folder
+        removed by `close()` is used.
+    block_size : int, optional
+        The size (in bytes) of the blocks of the cache.
+    memory_cache_size : int, optional
+        The capacity (in bytes) of the in-memory block cache.
+    num_workers : int, optional
+        The maximum number of parallel requests.
+    **source_kwargs
+        Arguments of the byte source (e.g., ``headers`` for HTTP sources).
+
+    Examples
+    --------
+    >>> from cucim.clara.remote import RemoteImage
+    >>> img = RemoteImage("https://host/slide.svs", cache_dir="/tmp/slides")
+    ... # doctest: +SKIP
+    >>> region = img.read_region((10000, 10000), (512, 512))  # doctest: +SKIP
+    """
+
+    def __init__(self, uri, cache_dir=None, block_size=DEFAULT_BLOCK_SIZE,
+                 memory_cache_size=DEFAULT_MEMORY_CAPACITY, num_workers=8,
+                 **source_kwargs):
+        self.source = open_source(uri, **source_kwargs)
+        self._tmp_dir = None
+        if cache_dir is None:
+            cache_dir = self._tmp_dir = tempfile.mkdtemp(prefix='cucim-')
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+        ext = os.path.splitext(urlsplit(self.source.name).path)[1] or '.tif'
+        digest = hashlib.sha256(self.source.name.encode()).hexdigest()[:32]
+        self.cache = BlockCache(self.source,
+                                os.path.join(cache_dir, digest + ext),
+                                block_size=block_size,
+                                memory_capacity=memory_cache_size,
+                                num_workers=num_workers)
+        self.directories = read_directories(self.cache)
+        self._image = CuImage(self.cache.path)
+        self._level_directories = self._map_levels()
+
+    def _map_levels(self):
+        # Same order as the levels of the TIFF reader (by size, descending)
+        tiled = sorted((d for d in self.directories if d.is_tiled),
+                       key=lambda d: (d.width, d.height), reverse=True)
+        candidates = tiled or self.directories
+        resolutions = self._image.resolutions
+        level_dirs = []
+        for level, dims in enumerate(resolutions['level_dimensions']):
+            width, height = dims
+            for directory in candidates:
+                if (directory.width, directory.height) == (width, height):
+                    break
+            else:
+                directory = candidates[min(level, len(candidates) - 1)]
+            level_dirs.append(directory)
+        return level_dirs
+
+    def fetch_region(self, location, size, level=0):
+        """Fetches the bytes of the tiles covering a region.
+
+        `location` is given in level-0 coordinates (as for `read_region()`).
+        """
+        directory = self._level_directories[level]
+        resolutions = self._image.resolutions
+        downsample = np.float32(resolutions['level_downsamples'][level])
+        # Same conversion as the TIFF reader
+        x = int(np.float32(location[0]) / downsample)
+        y = int(np.float32(location[1]) / downsample)
+        # The size of the directory's image may differ from the level's
+        # (e.g., Philips TIFF)
+        level_width, level_height = resolutions['level_dimensions'][level]
+        scale_x = directory.width / level_width
+        scale_y = directory.height / level_height
+        self.cache.ensure(directory.region_ranges(
+            int(x * scale_x), int(y * scale_y),
+            int(np.ceil(size[0] * scale_x)) + 1,
+            int(np.ceil(size[1] * scale_y)) + 1))
+
+    def read_region(self, location=None, size=None, level=0, **kwargs):
+        """Reads a region, fetching the needed tiles first.
+
+        See `CuImage.read_region()`.
+        """
+        if location is None or len(location) == 0:
+            location = (0, 0)
+        if size is None or len(size) == 0:
+            size = self._image.resolutions['level_dimensions'][level]
+            self.cache.ensure(self._level_directories[level].data_ranges())
+        else:
+            self.fetch_region(location, size, level)
+        return self._image.read_region(location, size, level, **kwargs)
+
+    def associated_image(self, name, *args, **kwargs):
+        """Returns an associated image, fetching the untiled images first.
+
+        See `CuImage.associated_image()`.
+        """
+        ranges = []
+        for directory in self.directories:
+            if not directory.is_tiled:
+                ranges.extend(directory.data_ranges())
+        self.cache.ensure(ranges)
+        return self._image.associated_image(name, *args, **kwargs)
+
+    def __getattr__(self, name):
+        image = self.__dict__.get('_image')
+        if image is None:
+            raise AttributeError(name)
+        return getattr(image, name)
+
+    def close(self):
+        """Closes the file and removes the temporary cache (if any)."""
+        self._image = None
+        self.cache.close()
+        self.source.close()
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
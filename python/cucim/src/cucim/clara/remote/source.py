@@ -0,0 +1,248 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Byte sources: random access to the bytes of a (possibly remote) file."""
+
+import http.client
+import os
+import threading
+from urllib.parse import urlsplit
+
+__all__ = ['ByteSource', 'FileSource', 'HTTPSource', 'open_source',
+           'register_source']
+
+
+class ByteSource:
+    """Base class of the sources of bytes read by `RemoteImage`.
+
+    Subclasses implement `size` and `read()`. `read()` can be called from
+    multiple threads at the same time.
+    """
+
+    #: The name used for caching (e.g., a URL)
+    name = ''
+
+    @property
+    def size(self):
+        """The size of the file in bytes."""
+        raise NotImplementedError
+
+    @property
+    def version(self):
+        """A string that changes when the content of the file changes."""
+        return str(self.size)
+
+    def read(self, offset, length):
+        """Reads `length` bytes at `offset` (fewer at the end of the file)."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class FileSource(ByteSource):
+    """A local file."""
+
+    def __init__(self, path):
+        self.name = os.path.abspath(os.fspath(path))
+        self._fd = os.open(self.name, os.O_RDONLY)
+        stat = os.fstat(self._fd)
+        self._size = stat.st_size
+        self._version = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def version(self):
+        return self._version
+
+    def read(self, offset, length):
+        return os.pread(self._fd, length, offset)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class HTTPSource(ByteSource):
+    """A file served over HTTP(S), read with range requests.
+
+    Connections are kept alive and reused (one per thread). `close()` closes
+    the connections of all the threads.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the file. The server must support range requests: an
+        IOError is raised if it announces that it doesn't, or if it answers
+        a range request with the whole file.
+    headers : dict, optional
+        Extra request headers (e.g., ``Authorization``).
+    timeout : float, optional
+        The timeout (in seconds) of each request.
+    retries : int, optional
+        The number of times a failed request is retried.
+    """
+
+    def __init__(self, url, headers=None, timeout=60, retries=2):
+        self.name = url
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Not an HTTP(S) URL: '{url}'")
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._target = parts.path or '/'
+        if parts.query:
+            self._target += '?' + parts.query
+        self._headers = dict(headers or {})
+        self._timeout = timeout
+        self._retries = retries
+        self._local = threading.local()
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+
+        response_headers, _ = self._request('HEAD')
+        length = response_headers.get('content-length')
+        if length is None:
+            raise IOError(f"Cannot get the size of '{url}'")
+        if response_headers.get('accept-ranges', '').lower() == 'none':
+            raise IOError(f"Range requests are not supported by '{url}'")
+        self._size = int(length)
+        self._version = (response_headers.get('etag') or
+                         response_headers.get('last-modified') or
+                         str(self._size))
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def version(self):
+        return self._version
+
+    def _connection(self, reset=False):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and reset:
+            conn.close()
+            with self._connections_lock:
+                self._connections.discard(conn)
+            conn = None
+        if conn is None:
+            if self._scheme == 'https':
+                conn = http.client.HTTPSConnection(
+                    self._netloc, timeout=self._timeout)
+            else:
+                conn = http.client.HTTPConnection(
+                    self._netloc, timeout=self._timeout)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.add(conn)
+        return conn
+
+    def _request(self, method, headers=None, partial=False):
+        """Sends a request and returns the response headers and body.
+
+        If `partial` is True, the response must be partial content (206):
+        the body of any other successful response (e.g., the whole file if
+        the server ignored the range) is not downloaded and an IOError is
+        raised.
+        """
+        request_headers = dict(self._headers)
+        request_headers.update(headers or {})
+        for attempt in range(self._retries + 1):
+            conn = self._connection(reset=attempt > 0)
+            try:
+                conn.request(method, self._target, headers=request_headers)
+                response = conn.getresponse()
+                is_complete = (partial and response.status < 300
+                               and response.status != 206)
+                if is_complete:
+                    # Closing the connection stops the download
+                    conn.close()
+                else:
+                    body = response.read()
+            except (http.client.HTTPException, OSError):
+                if attempt == self._retries:
+                    raise
+                continue
+            if is_complete:
+                raise IOError("Range requests are not supported by "
+                              f"'{self.name}'")
+            if response.status >= 500 and attempt < self._retries:
+                continue
+            if response.status >= 400:
+                raise IOError(f"{method} '{self.name}' failed: "
+                              f"{response.status} {response.reason}")
+            headers = {k.lower(): v for k, v in response.getheaders()}
+            return headers, body
+
+    def read(self, offset, length):
+        if length <= 0 or offset >= self._size:
+            return b''
+        end = min(offset + length, self._size) - 1
+        # The whole file may be sent (200) if the range covers it
+        _, body = self._request('GET', {'Range': f'bytes={offset}-{end}'},
+                                partial=offset > 0 or end < self._size - 1)
+        return body
+
+    def close(self):
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+            # Later requests open new (tracked) connections in every thread
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+
+_sources = {
+    '': FileSource,
+    'file': lambda uri, **kwargs: FileSource(urlsplit(uri).path, **kwargs),
+    'http': HTTPSource,
+    'https': HTTPSource,
+}
+
+
+def register_source(scheme, factory):
+    """Registers a factory of `ByteSource` objects for a URI scheme.
+
+    `factory(uri, **kwargs)` is called by `open_source()` for the URIs with
+    the scheme (e.g., ``'s3'``).
+    """
+    _sources[scheme.lower()] = factory
+
+
+def open_source(uri, **kwargs):
+    """Returns the `ByteSource` for a URI (or a local path)."""
+    if isinstance(uri, ByteSource):
+        return uri
+    uri = os.fspath(uri)
+    scheme = urlsplit(uri).scheme.lower()
+    if len(scheme) == 1:
+        # A drive letter
+        scheme = ''
+    factory = _sources.get(scheme)
+    if factory is None:
+        raise ValueError(f"No byte source is registered for '{scheme}://'")
+    return factory(uri, **kwargs)
@@ -0,0 +1,197 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Minimal TIFF/BigTIFF directory parser locating the bytes of tiles/strips."""
+
+import numpy as np
+
+__all__ = ['TiffDirectory', 'read_directories']
+
+# Bytes fetched when reading a directory. Directories are usually followed by
+# their (large) tile offset/byte count tables, so they are fetched together.
+INDEX_READAHEAD = 256 << 10
+
+# TIFF data type -> (numpy data type, size in bytes)
+_TYPES = {
+    1: ('u1', 1), 2: ('u1', 1), 3: ('u2', 2), 4: ('u4', 4), 5: ('u4', 8),
+    6: ('i1', 1), 7: ('u1', 1), 8: ('i2', 2), 9: ('i4', 4), 10: ('i4', 8),
+    11: ('f4', 4), 12: ('f8', 8), 13: ('u4', 4), 16: ('u8', 8), 17: ('i8', 8),
+    18: ('u8', 8),
+}
+
+TAG_IMAGE_WIDTH = 256
+TAG_IMAGE_LENGTH = 257
+TAG_STRIP_OFFSETS = 273
+TAG_SAMPLES_PER_PIXEL = 277
+TAG_ROWS_PER_STRIP = 278
+TAG_STRIP_BYTE_COUNTS = 279
+TAG_PLANAR_CONFIG = 284
+TAG_TILE_WIDTH = 322
+TAG_TILE_LENGTH = 323
+TAG_TILE_OFFSETS = 324
+TAG_TILE_BYTE_COUNTS = 325
+
+_VALUE_TAGS = (TAG_IMAGE_WIDTH, TAG_IMAGE_LENGTH, TAG_STRIP_OFFSETS,
+               TAG_SAMPLES_PER_PIXEL, TAG_ROWS_PER_STRIP,
+               TAG_STRIP_BYTE_COUNTS, TAG_PLANAR_CONFIG, TAG_TILE_WIDTH,
+               TAG_TILE_LENGTH, TAG_TILE_OFFSETS, TAG_TILE_BYTE_COUNTS)
+
+
+class TiffDirectory:
+    """The layout of the image data of a TIFF directory (IFD)."""
+
+    def __init__(self, offset, values):
+        self.offset = offset
+        self.width = int(values[TAG_IMAGE_WIDTH][0])
+        self.height = int(values[TAG_IMAGE_LENGTH][0])
+        self.samples_per_pixel = int(
+            values.get(TAG_SAMPLES_PER_PIXEL, [1])[0])
+        self.planes = (self.samples_per_pixel if
+                       int(values.get(TAG_PLANAR_CONFIG, [1])[0]) == 2 else 1)
+        self.tile_width = int(values.get(TAG_TILE_WIDTH, [0])[0])
+        self.tile_height = int(values.get(TAG_TILE_LENGTH, [0])[0])
+        if self.is_tiled:
+            self.offsets = values.get(TAG_TILE_OFFSETS)
+            self.byte_counts = values.get(TAG_TILE_BYTE_COUNTS)
+            self.columns = -(-self.width // self.tile_width)
+            self.rows = -(-self.height // self.tile_height)
+            self.chunk_height = self.tile_height
+        else:
+            self.offsets = values.get(TAG_STRIP_OFFSETS)
+            self.byte_counts = values.get(TAG_STRIP_BYTE_COUNTS)
+            rows_per_strip = int(
+                values.get(TAG_ROWS_PER_STRIP, [self.height])[0])
+            self.chunk_height = max(1, min(rows_per_strip, self.height))
+            self.columns = 1
+            self.rows = -(-self.height // self.chunk_height)
+        if self.offsets is None:
+            self.offsets = self.byte_counts = np.zeros(0, np.uint64)
+
+    @property
+    def is_tiled(self):
+        return self.tile_width > 0 and self.tile_height > 0
+
+    def _ranges(self, indices):
+        ranges = []
+        for index in indices:
+            if index < len(self.offsets) and index < len(self.byte_counts):
+                length = int(self.byte_counts[index])
+                if length > 0:
+                    ranges.append((int(self.offsets[index]), length))
+        return ranges
+
+    def data_ranges(self):
+        """Returns the ``(offset, length)`` ranges of all tiles/strips."""
+        return self._ranges(range(len(self.offsets)))
+
+    def region_ranges(self, x, y, width, height):
+        """Returns the ranges of the tiles/strips covering a region.
+
+        The region is given in the coordinates of the directory's image.
+        """
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + width), min(self.height, y + height)
+        if x0 >= x1 or y0 >= y1:
+            return []
+        chunk_width = self.tile_width if self.is_tiled else self.width
+        cols = range(x0 // chunk_width, (x1 - 1) // chunk_width + 1)
+        rows = range(y0 // self.chunk_height,
+                     (y1 - 1) // self.chunk_height + 1)
+        per_plane = self.columns * self.rows
+        indices = [plane * per_plane + row * self.columns + col
+                   for plane in range(self.planes)
+                   for row in rows for col in cols]
+        return self._ranges(indices)
+
+
+def read_directories(cache):
+    """Reads the directories of a TIFF file through a `BlockCache`.
+
+    All the bytes describing the file structure (header, directories and tag
+    values) are fetched into the cache's local file so that a TIFF reader can
+    open it. Image data is not fetched.
+
+    Returns
+    -------
+    directories : list of TiffDirectory
+    """
+    header = cache.read(0, 16, INDEX_READAHEAD)
+    if header[:2] == b'II':
+        order = '<'
+    elif header[:2] == b'MM':
+        order = '>'
+    else:
+        raise ValueError(f"'{cache.source.name}' is not a TIFF file")
+    magic = int(np.frombuffer(header, order + 'u2', 1, 2)[0])
+    if magic == 42:
+        count_type, entry_size, offset_type = 'u2', 12, 'u4'
+        next_offset = int(np.frombuffer(header, order + 'u4', 1, 4)[0])
+    elif magic == 43:
+        count_type, entry_size, offset_type = 'u8', 20, 'u8'
+        next_offset = int(np.frombuffer(header, order + 'u8', 1, 8)[0])
+    else:
+        raise ValueError(f"'{cache.source.name}' is not a TIFF file")
+    count_size = np.dtype(count_type).itemsize
+    inline_size = np.dtype(offset_type).itemsize
+
+    directories = []
+    visited = set()
+    while next_offset and next_offset not in visited:
+        visited.add(next_offset)
+        ifd_offset = next_offset
+        count = int(np.frombuffer(
+            cache.read(ifd_offset, count_size, INDEX_READAHEAD),
+            order + count_type)[0])
+        nbytes = count_size + count * entry_size + inline_size
+        data = cache.read(ifd_offset, nbytes)
+        next_offset = int(np.frombuffer(
+            data, order + offset_type, 1, nbytes - inline_size)[0])
+
+        # Fetch all the tag values stored out of the directory (not only the
+        # ones used here) as the TIFF reader reads them when opening the file.
+        entries = []
+        out_of_line = []
+        for i in range(count):
+            pos = count_size + i * entry_size
+            tag, type_ = np.frombuffer(data, order + 'u2', 2, pos)
+            # The value count has the size of an offset (4 or 8 bytes)
+            value_count = int(np.frombuffer(
+                data, order + offset_type, 1, pos + 4)[0])
+            dtype, item_size = _TYPES.get(int(type_), ('u1', 1))
+            value_size = value_count * item_size
+            value_pos = pos + 4 + inline_size
+            if value_size > inline_size:
+                value_offset = int(np.frombuffer(
+                    data, order + offset_type, 1, value_pos)[0])
+                out_of_line.append((value_offset, value_size))
+            else:
+                value_offset = None
+            entries.append((int(tag), dtype, value_count, value_size,
+                            value_offset, value_pos))
+        cache.ensure(out_of_line)
+
+        values = {}
+        for tag, dtype, value_count, value_size, value_offset, value_pos in \
+                entries:
+            if tag not in _VALUE_TAGS:
+                continue
+            if value_offset is None:
+                raw = data[value_pos:value_pos + value_size]
+            else:
+                raw = cache.read(value_offset, value_size)
+            values[tag] = np.frombuffer(raw, order + dtype, value_count)
+        if TAG_IMAGE_WIDTH in values and TAG_IMAGE_LENGTH in values:
+            directories.append(TiffDirectory(ifd_offset, values))
+    return directories
@@ -0,0 +1,172 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Tile geometry (DeepZoom/IIIF) and rendering for the tile server."""
+
+import math
+import os
+
+import cv2
+import numpy as np
+
+from .._tile_cache import get_image
+from .._tile_cache import read_level_tiles
+
+# Formats supported for encoded tiles: extension -> (cv2 extension, type)
+FORMATS = {
+    'jpg': ('.jpg', 'image/jpeg'),
+    'jpeg': ('.jpg', 'image/jpeg'),
+    'png': ('.png', 'image/png'),
+}
+
+
+def file_version(path):
+    """Returns a string that changes when the file is modified.
+
+    It is made of the modification time and the size of the file.
+    """
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+class Slide:
+    """Metadata of a slide and the mapping of tiles to `read_region` calls.
+
+    Parameters
+    ----------
+    path : str
+        The path of the image.
+    tile_size : int
+        The DeepZoom tile size (excluding the overlap).
+    overlap : int
+        The number of extra pixels on each side of interior DeepZoom tiles.
+    """
+
+    def __init__(self, path, tile_size=254, overlap=1):
+        self.path = path
+        self.tile_size = tile_size
+        self.overlap = overlap
+
+        # Part of every ETag so that tiles are invalidated when the file
+        # changes.
+        self.version = file_version(path)
+
+        resolutions = get_image(path).resolutions
+        self.level_dimensions = [
+            tuple(dims) for dims in resolutions['level_dimensions']]
+        self.level_downsamples = list(resolutions['level_downsamples'])
+        self.dimensions = self.level_dimensions[0]
+
+        # DeepZoom levels: from 1x1 pixel to the full resolution, halving the
+        # size (rounding up) at each level.
+        width, height = self.dimensions
+        dz_dimensions = [(width, height)]
+        while width > 1 or height > 1:
+            width = max(1, -(-width // 2))
+            height = max(1, -(-height // 2))
+            dz_dimensions.append((width, height))
+        self.dz_dimensions = dz_dimensions[::-1]
+
+    @property
+    def dz_level_count(self):
+        return len(self.dz_dimensions)
+
+    def dzi(self, fmt):
+        """Returns the DeepZoom descriptor (XML)."""
+        width, height = self.dimensions
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+            f'Format="{fmt}" Overlap="{self.overlap}" '
+            f'TileSize="{self.tile_size}">'
+            f'<Size Width="{width}" Height="{height}"/></Image>\n')
+
+    def dz_tile_region(self, dz_level, col, row):
+        """Returns the level-0 region and output size of a DeepZoom tile.
+
+        Returns None if the tile doesn't exist.
+        """
+        if not 0 <= dz_level < self.dz_level_count:
+            return None
+        width, height = self.dz_dimensions[dz_level]
+        tile_size = self.tile_size
+        overlap = self.overlap
+        if not (0 <= col * tile_size < width and 0 <= row * tile_size < height):
+            return None
+
+        x0 = col * tile_size - (overlap if col else 0)
+        y0 = row * tile_size - (overlap if row else 0)
+        x1 = min(width, (col + 1) * tile_size + overlap)
+        y1 = min(height, (row + 1) * tile_size + overlap)
+
+        scale = 2 ** (self.dz_level_count - 1 - dz_level)
+        full_width, full_height = self.dimensions
+        region = (x0 * scale, y0 * scale,
+                  min(full_width, x1 * scale) - x0 * scale,
+                  min(full_height, y1 * scale) - y0 * scale)
+        return region, (x1 - x0, y1 - y0)
+
+    def best_level(self, scale):
+        """Returns the lowest resolution level with a downsample <= scale."""
+        best = 0
+        for level, downsample in enumerate(self.level_downsamples):
+            if downsample <= scale * (1 + 1e-3):
+                best = level
+        return best
+
+    def read(self, region, size, cache):
+        """Reads a level-0 region resized to `size` as an RGB(A) array.
+
+        The tiles of the level are read through `cache`, so that tiles
+        overlapping several requests are decoded once.
+        """
+        x, y, width, height = region
+        out_w, out_h = size
+        level = self.best_level(min(width / out_w, height / out_h))
+        downsample = self.level_downsamples[level]
+        level_w, level_h = self.level_dimensions[level]
+
+        lx = min(int(x / downsample), level_w - 1)
+        ly = min(int(y / downsample), level_h - 1)
+        lx1 = max(lx + 1, min(level_w, math.ceil((x + width) / downsample)))
+        ly1 = max(ly + 1, min(level_h, math.ceil((y + height) / downsample)))
+        arr = read_level_tiles(self.path, level, lx, ly, lx1 - lx, ly1 - ly,
+                               cache=cache)
+        if arr.shape[:2] != (out_h, out_w):
+            arr = cv2.resize(arr, (out_w, out_h), interpolation=cv2.INTER_AREA)
+        return arr
+
+
+def encode(arr, fmt, quality=75, gray=False):
+    """Encodes an RGB(A) array as JPEG/PNG bytes."""
+    ext = FORMATS[fmt][0]
+    channels = arr.shape[2] if arr.ndim == 3 else 1
+    if channels == 4 and (ext == '.jpg' or gray):
+        # JPEG has no alpha channel
+        arr = arr[..., :3]
+        channels = 3
+    if channels == 3:
+        code = cv2.COLOR_RGB2GRAY if gray else cv2.COLOR_RGB2BGR
+        arr = cv2.cvtColor(np.ascontiguousarray(arr), code)
+    elif channels == 4:
+        arr = cv2.cvtColor(np.ascontiguousarray(arr), cv2.COLOR_RGBA2BGRA)
+    if ext == '.jpg':
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    else:
+        params = []
+    success, buf = cv2.imencode(ext, arr, params)
+    if not success:
+        raise RuntimeError(f"Cannot encode the image as '{fmt}'")
+    return buf.tobytes()
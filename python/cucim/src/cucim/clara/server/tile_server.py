@@ -0,0 +1,528 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""An asyncio HTTP server for DeepZoom/IIIF tiles and thumbnails.
+
+Requests are parsed and answered (including conditional requests, using
+ETags) on the event loop. Reading, resizing and encoding tiles run in a
+bounded pool of worker threads (`read_region()` and the encoders release the
+GIL). The decoded tiles of the image are kept in the shared decoded-tile cache
+and encoded (DeepZoom/IIIF) tiles in a smaller cache of their own.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs
+from urllib.parse import quote
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+from .._tile_cache import TileCache
+from .._tile_cache import tile_cache
+from .slide import FORMATS
+from .slide import Slide
+from .slide import encode
+from .slide import file_version
+
+logger = logging.getLogger(__name__)
+
+# File extensions of the images served.
+SLIDE_EXTENSIONS = ('.tif', '.tiff', '.svs')
+
+# Default capacity (in bytes) of the cache of encoded tiles.
+DEFAULT_ENCODED_CACHE_CAPACITY = 64 << 20
+
+# Seconds an idle keep-alive connection is kept open.
+KEEP_ALIVE_TIMEOUT = 15
+
+# Minimum number of seconds between two scans of the folder looking for an
+# unknown image.
+RESCAN_INTERVAL = 5
+
+_DZI_RE = re.compile(r'^/deepzoom/(?P<slide>.+)\.dzi$')
+_DZ_TILE_RE = re.compile(
+    r'^/deepzoom/(?P<slide>.+)_files/(?P<level>\d+)/(?P<col>\d+)_(?P<row>\d+)'
+    r'\.(?P<format>jpe?g|png)$')
+_THUMBNAIL_RE = re.compile(r'^/thumbnail/(?P<slide>.+)\.(?P<format>jpe?g|png)$')
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+def _etag_matches(etag, if_none_match):
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate in ('*', etag):
+            return True
+    return False
+
+
+def _parse_int(value):
+    if not value.isdigit():
+        raise HTTPError(400, f"Invalid number: '{value}'")
+    return int(value)
+
+
+class TileServer:
+    """Serves the images of a folder as DeepZoom/IIIF tiles over HTTP.
+
+    The following endpoints are available (``<slide>`` is the path of the
+    image relative to the folder):
+
+    - ``/``: the list of images (JSON).
+    - ``/deepzoom/<slide>.dzi``: the DeepZoom descriptor.
+    - ``/deepzoom/<slide>_files/<level>/<col>_<row>.<jpeg|png>``: a DeepZoom
+      tile.
+    - ``/iiif/<slide>/info.json``: the IIIF (Image API 3.0) image
+      information. ``<slide>`` is URL-encoded (``/`` as ``%2F``).
+    - ``/iiif/<slide>/<region>/<size>/0/<default|color|gray>.<jpg|png>``: an
+      IIIF image request (level 1 and ``sizeByConfinedWh``, no rotation).
+    - ``/thumbnail/<slide>.<jpg|png>?size=<max side>``: a thumbnail.
+
+    Parameters
+    ----------
+    root : str or os.PathLike
+        The folder containing the images.
+    tile_size : int, optional
+        The DeepZoom tile size.
+    overlap : int, optional
+        The DeepZoom tile overlap.
+    quality : int, optional
+        The JPEG quality.
+    num_workers : int, optional
+        The number of worker threads reading and encoding tiles.
+    max_pending : int, optional
+        The maximum number of tiles queued for the workers. Further requests
+        wait on the event loop. Defaults to four times `num_workers`.
+    cache : TileCache or None, optional
+        The cache of decoded tiles (the shared decoded-tile cache by
+        default).
+    encoded_cache_capacity : int, optional
+        The capacity (in bytes) of the cache of encoded tiles.
+    max_size : int, optional
+        The maximum width/height of IIIF images and thumbnails.
+    """
+
+    def __init__(self, root, tile_size=254, overlap=1, quality=75,
+                 num_workers=None, max_pending=None, cache=tile_cache,
+                 encoded_cache_capacity=DEFAULT_ENCODED_CACHE_CAPACITY,
+                 max_size=4096):
+        self.root = os.fspath(root)
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.quality = quality
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.num_workers * 4
+        self.cache = cache
+        self.encoded_cache = TileCache(encoded_cache_capacity)
+        self.max_size = max_size
+
+        self._paths = {}
+        self._slides = {}
+        self._executor = None
+        self._semaphore = None
+        self._scan_task = None
+        self._scan_time = None
+        self.scan()
+
+    def scan(self):
+        """Updates the list of images in the folder."""
+        paths = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(SLIDE_EXTENSIONS):
+                    path = os.path.join(dirpath, filename)
+                    name = os.path.relpath(path, self.root)
+                    paths[name.replace(os.sep, '/')] = path
+        self._paths = paths
+        return sorted(paths)
+
+    def run(self, host='127.0.0.1', port=8000):
+        """Runs the server until interrupted."""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.num_workers,
+            thread_name_prefix='cucim-serve')
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+        server = loop.run_until_complete(
+            asyncio.start_server(self.handle_connection, host, port))
+        logger.info("Serving %d images from '%s' on http://%s:%d/",
+                    len(self._paths), self.root, host, port)
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            self._executor.shutdown(wait=True)
+            loop.close()
+
+    async def _run_in_worker(self, func, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(
+                        reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                keep_alive = await self._handle_request(
+                    request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader, writer):
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            self._write_response(writer, 'GET', 400, {}, b'Bad Request\n',
+                                 False)
+            return False
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._write_response(writer, method, 400, {}, b'Bad Request\n',
+                                 False)
+            return False
+        if length or 'transfer-encoding' in headers:
+            # Only GET/HEAD requests (without a body) are served: the body is
+            # not read and the connection is closed.
+            if method in ('GET', 'HEAD'):
+                self._write_response(writer, method, 400, {},
+                                     b'Bad Request\n', False)
+            else:
+                self._write_response(writer, method, 405,
+                                     {'Allow': 'GET, HEAD'},
+                                     b'Method Not Allowed\n', False)
+            return False
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+
+        try:
+            if method not in ('GET', 'HEAD'):
+                raise HTTPError(405)
+            status, response_headers, body = await self.handle(
+                target, headers)
+        except HTTPError as e:
+            status = e.status
+            response_headers = {'Content-Type': 'text/plain; charset=utf-8'}
+            body = f'{e}\n'.encode()
+            if status == 405:
+                response_headers['Allow'] = 'GET, HEAD'
+        except Exception:
+            logger.exception("Error while handling '%s'", target)
+            status = 500
+            response_headers = {'Content-Type': 'text/plain; charset=utf-8'}
+            body = b'Internal Server Error\n'
+        logger.debug('%s %s %d', method, target, status)
+
+        self._write_response(writer, method, status, response_headers, body,
+                             keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def _write_response(writer, method, status, headers, body, keep_alive):
+        lines = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+                 'Server: cucim',
+                 f'Content-Length: {len(body)}',
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD' and body:
+            writer.write(body)
+
+    async def handle(self, target, headers):
+        """Returns the status, headers and body of the response to a GET."""
+        url = urlsplit(target)
+        raw_path = url.path
+        path = unquote(raw_path)
+        query = parse_qs(url.query)
+
+        if path == '/':
+            return self._json_response(await self._index())
+
+        match = _DZI_RE.match(path)
+        if match:
+            slide = await self._get_slide(match.group('slide'))
+            body = slide.dzi('jpeg').encode()
+            return 200, {'Content-Type': 'application/xml'}, body
+
+        match = _DZ_TILE_RE.match(path)
+        if match:
+            slide = await self._get_slide(match.group('slide'))
+            dz_level = int(match.group('level'))
+            col, row = int(match.group('col')), int(match.group('row'))
+            tile = slide.dz_tile_region(dz_level, col, row)
+            if tile is None:
+                raise HTTPError(404, "No such tile")
+            return await self._image_response(
+                slide, tile[0], tile[1], match.group('format'), False,
+                headers)
+
+        match = _THUMBNAIL_RE.match(path)
+        if match:
+            slide = await self._get_slide(match.group('slide'))
+            max_size = _parse_int(query.get('size', ['512'])[0])
+            if not 0 < max_size <= self.max_size:
+                raise HTTPError(400, "Invalid thumbnail size")
+            width, height = slide.dimensions
+            scale = max(width, height) / max_size
+            size = (max(1, round(width / scale)), max(1, round(height / scale)))
+            return await self._image_response(
+                slide, (0, 0, width, height), size, match.group('format'),
+                False, headers)
+
+        segments = raw_path.split('/')
+        if len(segments) >= 3 and segments[1] == 'iiif':
+            return await self._iiif(
+                [unquote(segment) for segment in segments[2:]], headers)
+
+        raise HTTPError(404)
+
+    async def _index(self):
+        slides = []
+        for name in await self._run_in_worker(self.scan):
+            slides.append({
+                'name': name,
+                'dzi': f"/deepzoom/{quote(name)}.dzi",
+                'iiif': f"/iiif/{quote(name, safe='')}/info.json",
+                'thumbnail': f"/thumbnail/{quote(name)}.jpg",
+            })
+        return {'slides': slides}
+
+    @staticmethod
+    def _json_response(obj, content_type='application/json'):
+        body = json.dumps(obj, indent=2).encode()
+        return 200, {'Content-Type': content_type}, body
+
+    async def _rescan(self):
+        """Scans the folder again (in a worker thread) for an unknown image.
+
+        Concurrent requests wait for the same scan, and the folder is scanned
+        at most once every `RESCAN_INTERVAL` seconds.
+        """
+        if self._scan_task is None:
+            if (self._scan_time is not None
+                    and time.monotonic() - self._scan_time < RESCAN_INTERVAL):
+                return
+            self._scan_time = time.monotonic()
+            self._scan_task = asyncio.ensure_future(
+                self._run_in_worker(self.scan))
+            self._scan_task.add_done_callback(self._scan_done)
+        await asyncio.shield(self._scan_task)
+
+    def _scan_done(self, task):
+        self._scan_task = None
+        self._scan_time = time.monotonic()
+
+    async def _get_slide(self, name):
+        path = self._paths.get(name)
+        if path is None:
+            await self._rescan()
+            path = self._paths.get(name)
+            if path is None:
+                raise HTTPError(404, f"No such image: '{name}'")
+        slide = self._slides.get(name)
+        if slide is not None:
+            try:
+                version = file_version(path)
+            except OSError:
+                version = None
+            if version == slide.version:
+                return slide
+            # The file changed: drop its decoded regions and open it again so
+            # that the tiles (and their ETags) reflect the new content.
+            del self._slides[name]
+            if self.cache is not None:
+                self.cache.discard(lambda key: key[0] == slide.path)
+        try:
+            slide = await self._run_in_worker(
+                Slide, path, self.tile_size, self.overlap)
+        except Exception as e:
+            raise HTTPError(404, f"Cannot open '{name}': {e}")
+        self._slides[name] = slide
+        return slide
+
+    def _render(self, slide, region, size, fmt, gray):
+        arr = slide.read(region, size, self.cache)
+        return encode(arr, fmt, self.quality, gray)
+
+    async def _image_response(self, slide, region, size, fmt, gray,
+                              headers):
+        key = (slide.path, slide.version, region, size, FORMATS[fmt][0],
+               gray, self.quality)
+        etag = '"{}"'.format(
+            hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest())
+        response_headers = {'ETag': etag,
+                            'Cache-Control': 'public, max-age=86400',
+                            'Access-Control-Allow-Origin': '*'}
+
+        if_none_match = headers.get('if-none-match')
+        if if_none_match and _etag_matches(etag, if_none_match):
+            return 304, response_headers, b''
+
+        data = self.encoded_cache.get(key)
+        if data is None:
+            data = memoryview(await self._run_in_worker(
+                self._render, slide, region, size, fmt, gray))
+            self.encoded_cache.put(key, data)
+        response_headers['Content-Type'] = FORMATS[fmt][1]
+        return 200, response_headers, data
+
+    async def _iiif(self, segments, headers):
+        slide = await self._get_slide(segments[0])
+        if segments[1:] == ['info.json']:
+            return self._iiif_info(slide, segments[0], headers)
+        if len(segments) != 5:
+            raise HTTPError(404)
+
+        region_spec, size_spec, rotation, quality_format = segments[1:]
+        quality, _, fmt = quality_format.rpartition('.')
+        if rotation != '0':
+            raise HTTPError(501, "Rotation is not supported")
+        if quality not in ('default', 'color', 'gray'):
+            raise HTTPError(501, f"Quality '{quality}' is not supported")
+        if fmt not in ('jpg', 'png'):
+            raise HTTPError(400, f"Format '{fmt}' is not supported")
+
+        region = self._iiif_region(slide, region_spec)
+        size = self._iiif_size(region, size_spec)
+        return await self._image_response(slide, region, size, fmt,
+                                          quality == 'gray', headers)
+
+    def _iiif_info(self, slide, name, headers):
+        width, height = slide.dimensions
+        scale_factors = [1]
+        while max(width, height) > self.tile_size * scale_factors[-1]:
+            scale_factors.append(scale_factors[-1] * 2)
+        host = headers.get('host', 'localhost')
+        info = {
+            '@context': 'http://iiif.io/api/image/3/context.json',
+            'id': f"http://{host}/iiif/{quote(name, safe='')}",
+            'type': 'ImageService3',
+            'protocol': 'http://iiif.io/api/image',
+            'profile': 'level1',
+            'width': width,
+            'height': height,
+            'maxWidth': self.max_size,
+            'maxHeight': self.max_size,
+            'tiles': [{'width': self.tile_size,
+                       'scaleFactors': scale_factors}],
+            'extraQualities': ['gray'],
+            'extraFormats': ['png'],
+            'extraFeatures': ['sizeByConfinedWh', 'regionByPct'],
+        }
+        status, response_headers, body = self._json_response(
+            info, 'application/ld+json;'
+            'profile="http://iiif.io/api/image/3/context.json"')
+        response_headers['Access-Control-Allow-Origin'] = '*'
+        return status, response_headers, body
+
+    @staticmethod
+    def _iiif_region(slide, spec):
+        width, height = slide.dimensions
+        if spec == 'full':
+            return 0, 0, width, height
+        if spec == 'square':
+            side = min(width, height)
+            return (width - side) // 2, (height - side) // 2, side, side
+        try:
+            if spec.startswith('pct:'):
+                px, py, pw, ph = (float(v) for v in spec[4:].split(','))
+                x, y = round(px * width / 100), round(py * height / 100)
+                w, h = round(pw * width / 100), round(ph * height / 100)
+            else:
+                x, y, w, h = (int(v) for v in spec.split(','))
+        except ValueError:
+            raise HTTPError(400, f"Invalid region: '{spec}'")
+        if x < 0 or y < 0 or x >= width or y >= height or w <= 0 or h <= 0:
+            raise HTTPError(400, f"Invalid region: '{spec}'")
+        return x, y, min(w, width - x), min(h, height - y)
+
+    def _iiif_size(self, region, spec):
+        region_w, region_h = region[2:]
+        if spec.startswith('^'):
+            raise HTTPError(501, "Upscaling is not supported")
+        try:
+            if spec == 'max':
+                scale = max(1, max(region_w, region_h) / self.max_size)
+                w = max(1, round(region_w / scale))
+                h = max(1, round(region_h / scale))
+            elif spec.startswith('!'):
+                max_w, max_h = (int(v) for v in spec[1:].split(','))
+                scale = max(region_w / max_w, region_h / max_h)
+                w = max(1, round(region_w / scale))
+                h = max(1, round(region_h / scale))
+            elif spec.startswith('pct:'):
+                pct = float(spec[4:])
+                w = max(1, round(region_w * pct / 100))
+                h = max(1, round(region_h * pct / 100))
+            else:
+                w, h = spec.split(',')
+                if w and h:
+                    w, h = int(w), int(h)
+                elif w:
+                    w = int(w)
+                    h = max(1, round(region_h * w / region_w))
+                else:
+                    h = int(h)
+                    w = max(1, round(region_w * h / region_h))
+        except (ValueError, ZeroDivisionError):
+            raise HTTPError(400, f"Invalid size: '{spec}'")
+        if w <= 0 or h <= 0 or w > region_w or h > region_h:
+            raise HTTPError(400, f"Invalid size: '{spec}'")
+        if max(w, h) > self.max_size:
+            raise HTTPError(400, f"Size is larger than {self.max_size}")
+        return w, h
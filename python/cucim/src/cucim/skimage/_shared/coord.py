@@ -1,9 +1,114 @@
+import itertools
+
 import cupy as cp
 import numpy as np
-from scipy.spatial import cKDTree, distance
 
 
-# TODO: avoid host/device transfers (currently needed for cKDTree)
+def _close_pairs(coord, spacing, p_norm, inclusive=False):
+    """Returns the pairs of points closer than `spacing` to each other.
+
+    The points are bucketed in a grid of cells of size `spacing`: as any
+    Minkowski distance is at least the largest coordinate difference, the
+    neighbors of a point are in the adjacent cells.
+
+    Returns the indices ``(src, dst)`` of the pairs, with ``src < dst``.
+    """
+    n, ndim = coord.shape
+    cells = cp.floor(coord / spacing).astype(cp.int64)
+    # Shift the cells so that the cells adjacent to the points are positive
+    cells -= cells.min(axis=0) - 1
+    shape = cells.max(axis=0) + 2
+    strides = cp.concatenate(
+        [cp.cumprod(shape[::-1])[-2::-1], cp.ones(1, dtype=cp.int64)])
+    keys = (cells * strides).sum(axis=1)
+    order = cp.argsort(keys)
+    sorted_keys = keys[order]
+    strides = strides.get()
+
+    coord = coord.astype(cp.float64, copy=False)
+    all_src = []
+    all_dst = []
+    for offset in itertools.product((-1, 0, 1), repeat=ndim):
+        neighbor_keys = keys + int(np.dot(offset, strides))
+        lo = cp.searchsorted(sorted_keys, neighbor_keys, side='left')
+        counts = cp.searchsorted(sorted_keys, neighbor_keys,
+                                 side='right') - lo
+        ends = cp.cumsum(counts)
+        total = int(ends[-1])
+        if total == 0:
+            continue
+        # Expand the (point, neighbor) pairs
+        pair = cp.arange(total)
+        src = cp.searchsorted(ends, pair, side='right')
+        dst = order[pair - (ends[src] - counts[src]) + lo[src]]
+        is_forward = src < dst
+        src = src[is_forward]
+        dst = dst[is_forward]
+
+        diff = cp.abs(coord[dst] - coord[src])
+        if p_norm == np.inf:
+            dist = diff.max(axis=1)
+        elif p_norm == 1:
+            dist = diff.sum(axis=1)
+        elif p_norm == 2:
+            dist = cp.sqrt((diff * diff).sum(axis=1))
+        else:
+            dist = (diff ** p_norm).sum(axis=1) ** (1 / p_norm)
+        is_close = dist <= spacing if inclusive else dist < spacing
+        all_src.append(src[is_close])
+        all_dst.append(dst[is_close])
+
+    if not all_src:
+        empty = cp.empty(0, dtype=cp.int64)
+        return empty, empty
+    return cp.concatenate(all_src), cp.concatenate(all_dst)
+
+
+def _suppress_close_points(coord, spacing, p_norm=np.inf, inclusive=False):
+    """Greedy suppression of the points too close to a previous point.
+
+    Points are considered in order: a point is kept if no kept point before
+    it is closer than `spacing` (or at `spacing`, if `inclusive`).
+
+    The result is the same as visiting the points sequentially, but it is
+    computed in rounds over all the points: in each round, the points with a
+    kept neighbor before them are rejected, and the points whose neighbors
+    before them are all rejected are kept.
+
+    Returns a boolean mask of the kept points.
+    """
+    n = len(coord)
+    undecided, kept, rejected = 0, 1, 2
+    if n == 0 or not spacing > 0:
+        return cp.ones(n, dtype=bool)
+    src, dst = _close_pairs(coord, spacing, p_norm, inclusive)
+
+    state = cp.zeros(n, dtype=cp.int8)
+    while True:
+        if len(src):
+            src_state = state[src]
+            # Points close to a kept point are rejected
+            is_rejected = cp.zeros(n, dtype=bool)
+            is_rejected[dst[src_state == kept]] = True
+            state[is_rejected] = rejected
+            # Pairs from a rejected point don't constrain anything anymore
+            is_active = state[src] != rejected
+            src = src[is_active]
+            dst = dst[is_active]
+        is_blocked = cp.zeros(n, dtype=bool)
+        is_blocked[dst] = True
+        is_kept = (state == undecided) & ~is_blocked
+        state[is_kept] = kept
+        if not (state == undecided).any():
+            break
+        # Pairs to a decided point don't constrain anything anymore
+        is_active = state[dst] == undecided
+        src = src[is_active]
+        dst = dst[is_active]
+
+    return state == kept
+
+
 def ensure_spacing(coord, spacing=1, p_norm=np.inf):
     """Returns a subset of coord where a minimum spacing is guaranteed.
 
@@ -28,28 +133,7 @@ def ensure_spacing(coord, spacing=1, p_norm=np.inf):
 
     output = coord
     if len(coord):
-        coord = cp.asnumpy(coord)
-        # Use KDtree to find the peaks that are too close to each other
-        tree = cKDTree(coord)
-
-        indices = tree.query_ball_point(coord, r=spacing, p=p_norm)
-        rejected_peaks_indices = set()
-        for idx, candidates in enumerate(indices):
-            if idx not in rejected_peaks_indices:
-                # keep current point and the points at exactly spacing from it
-                candidates.remove(idx)
-                dist = distance.cdist([coord[idx]],
-                                      coord[candidates],
-                                      distance.minkowski,
-                                      p=p_norm).reshape(-1)
-                candidates = [c for c, d in zip(candidates, dist)
-                              if d < spacing]
-
-                # candidates.remove(keep)
-                rejected_peaks_indices.update(candidates)
-
-        # Remove the peaks that are too close to each other
-        output = np.delete(coord, tuple(rejected_peaks_indices), axis=0)
-        output = cp.asarray(output)
+        coord = cp.asarray(coord)
+        output = coord[_suppress_close_points(coord, spacing, p_norm)]
 
     return output
@@ -0,0 +1,59 @@
+import cupy as cp
+import numpy as np
+import pytest
+
+from cucim.skimage._shared.coord import _suppress_close_points
+from cucim.skimage._shared.coord import ensure_spacing
+
+
+def _greedy_reference(coord, spacing, p_norm, inclusive=False):
+    kept = []
+    for i, point in enumerate(coord):
+        for j in kept:
+            dist = np.linalg.norm(point - coord[j], ord=p_norm)
+            if dist <= spacing if inclusive else dist < spacing:
+                break
+        else:
+            kept.append(i)
+    return coord[kept]
+
+
+@pytest.mark.parametrize("p_norm", [1, 2, 3, np.inf])
+@pytest.mark.parametrize("spacing", [1, 2, 5, 10])
+@pytest.mark.parametrize("ndim", [1, 2, 3])
+def test_ensure_spacing_trivial(p_norm, spacing, ndim):
+    # --- Empty input
+    assert ensure_spacing(cp.asarray([]), p_norm=p_norm).size == 0
+
+    # --- A unique point
+    coord = cp.random.randn(1, ndim)
+    cp.testing.assert_array_equal(
+        coord, ensure_spacing(coord, p_norm=p_norm))
+
+    # --- 0 spacing
+    coord = cp.random.randn(100, ndim)
+    cp.testing.assert_array_equal(
+        coord, ensure_spacing(coord, spacing=0, p_norm=p_norm))
+
+    # --- Verified spacing (points of a grid of step 3 * spacing)
+    grid = cp.meshgrid(*[cp.arange(4)] * ndim, indexing='ij')
+    coord = cp.stack([g.ravel() for g in grid], axis=1) * spacing * 3
+    cp.testing.assert_array_equal(
+        coord, ensure_spacing(coord, spacing=spacing, p_norm=p_norm))
+
+
+@pytest.mark.parametrize("p_norm", [1, 2, 3, np.inf])
+@pytest.mark.parametrize("spacing", [1, 2.5, 7])
+@pytest.mark.parametrize("ndim", [1, 2, 3])
+@pytest.mark.parametrize("inclusive", [False, True])
+def test_suppress_close_points(p_norm, spacing, ndim, inclusive):
+    rng = np.random.default_rng(ndim)
+    coord = np.unique(rng.integers(0, 40, (300, ndim)), axis=0)
+    rng.shuffle(coord)
+    expected = _greedy_reference(coord, spacing, p_norm, inclusive)
+    coord = cp.asarray(coord)
+    keep = _suppress_close_points(coord, spacing, p_norm, inclusive)
+    cp.testing.assert_array_equal(coord[keep], expected)
+    if not inclusive:
+        cp.testing.assert_array_equal(
+            ensure_spacing(coord, spacing, p_norm), expected)
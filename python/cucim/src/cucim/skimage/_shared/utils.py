@@ -325,6 +325,33 @@ def check_nD(array, ndim, arg_name="image"):
         )
 
 
+def _sample_axes(ndim, batch_axis):
+    """Validate the batch axis of a stack of images.
+
+    Parameters
+    ----------
+    ndim : int
+        Number of dimensions of the stack.
+    batch_axis : int
+        Axis indexing the images of the stack. Negative values count from
+        the last axis.
+
+    Returns
+    -------
+    batch_axis : int
+        The (non-negative) batch axis.
+    sample_axes : tuple of int
+        The other axes, over which per-image statistics are reduced.
+    """
+    if not -ndim <= batch_axis < ndim:
+        raise ValueError(
+            f"batch_axis {batch_axis} is out of bounds for an array of "
+            f"dimension {ndim}"
+        )
+    batch_axis %= ndim
+    return batch_axis, tuple(ax for ax in range(ndim) if ax != batch_axis)
+
+
 def check_random_state(seed):
     """Turn seed into a `cupy.random.RandomState` instance.
 
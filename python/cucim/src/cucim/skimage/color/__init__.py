@@ -14,6 +14,7 @@ from .colorconv import (ahx_from_rgb, bex_from_rgb, bpx_from_rgb, bro_from_rgb,
                         yiq2rgb, ypbpr2rgb, yuv2rgb)
 from .colorlabel import color_dict, label2rgb
 from .delta_e import deltaE_cie76, deltaE_ciede94, deltaE_ciede2000, deltaE_cmc
+from .stain_normalization import fit_stain_reference, normalize_stains
 
 __all__ = ['convert_colorspace',
            'rgba2rgb',
@@ -52,6 +53,8 @@ __all__ = ['convert_colorspace',
            'ydbdr2rgb',
            'separate_stains',
            'combine_stains',
+           'fit_stain_reference',
+           'normalize_stains',
            'rgb_from_hed',
            'hed_from_rgb',
            'rgb_from_hdx',
@@ -118,14 +118,25 @@ def convert_colorspace(arr, fromspace, tospace):
     return todict[tospace](fromdict[fromspace](arr))
 
 
-def _prepare_colorarray(arr, force_copy=False, force_c_contiguous=True):
+def _prepare_colorarray(arr, force_copy=False, force_c_contiguous=True,
+                        float_dtype=None):
     """Check the shape of the array and convert it to floating point
     representation.
+
+    If `float_dtype` is given, the array is converted to this floating point
+    type rather than following the conventions of `img_as_float`.
     """
     if arr.shape[-1] != 3:
         raise ValueError("Input array must have a shape == (..., 3)), "
                          f"got {arr.shape}")
-    out = dtype.img_as_float(arr, force_copy=force_copy)
+    if float_dtype is None:
+        out = dtype.img_as_float(arr, force_copy=force_copy)
+    else:
+        float_dtype = np.dtype(float_dtype)
+        if float_dtype not in (np.float32, np.float64):
+            raise ValueError(
+                f"dtype must be float32 or float64, got {float_dtype}")
+        out = dtype._convert(arr, float_dtype, force_copy=force_copy)
     if force_c_contiguous and not out.flags.c_contiguous:
         out = cp.ascontiguousarray(out)
     return out
@@ -687,13 +698,220 @@ def _get_core_colorconv_operation(m):
     """  # noqa
 
 
-def xyz2rgb(xyz):
+# Fused color conversions
+# -----------------------
+# The conversions between RGB, XYZ, Lab and Luv are written as steps
+# transforming the 3 channels of a pixel, held in a local array ``v`` of the
+# floating point type ``X``. A conversion through intermediate color spaces
+# (e.g. RGB -> XYZ -> Lab) concatenates the steps in a single kernel, without
+# storing the intermediate images.
+
+
+def _matmul_step(m):
+    """Multiply the pixel by the 3x3 matrix m."""
+    m = tuple(np.asarray(m).ravel())
+    return f"""
+        {{
+            X t0 = v[0] * {m[0]} + v[1] * {m[1]} + v[2] * {m[2]};
+            X t1 = v[0] * {m[3]} + v[1] * {m[4]} + v[2] * {m[5]};
+            X t2 = v[0] * {m[6]} + v[1] * {m[7]} + v[2] * {m[8]};
+            v[0] = t0;
+            v[1] = t1;
+            v[2] = t2;
+        }}
+    """
+
+
+# inverse sRGB companding (c indexes over color channels here)
+_srgb_to_linear_step = """
+        for (int c=0; c < 3; c++) {
+            if (v[c] > 0.04045) {
+                v[c] = pow((v[c] + (X)0.055) / (X)1.055, (X)2.4);
+            } else {
+                v[c] /= 12.92;
+            }
+        }
+"""
+
+# sRGB companding, clipped to [0, 1]
+_linear_to_srgb_step = """
+        for (int c=0; c < 3; c++) {
+            if (v[c] > 0.0031308) {
+                v[c] = 1.055 * pow(v[c], (X)(1 / 2.4)) - 0.055;
+            } else {
+                v[c] *= 12.92;
+            }
+            v[c] = min(max(v[c], (X)0.0), (X)1.0);
+        }
+"""
+
+
+def _xyz_to_lab_step(xyz_ref_white):
+    return f"""
+        v[0] /= {xyz_ref_white[0]};
+        v[1] /= {xyz_ref_white[1]};
+        v[2] /= {xyz_ref_white[2]};
+        for (int ch=0; ch < 3; ch++)
+        {{
+            if (v[ch] > 0.008856)
+            {{
+                v[ch] = cbrt(v[ch]);
+            }} else {{
+                v[ch] = 7.787 * v[ch] + 16.0 / 116.0;
+            }}
+        }}
+        {{
+            X l = (116. * v[1]) - 16.0;
+            X a = 500.0 * (v[0] - v[1]);
+            X b = 200.0 * (v[1] - v[2]);
+            v[0] = l;
+            v[1] = a;
+            v[2] = b;
+        }}
+    """
+
+
+def _lab_to_xyz_step(xyz_ref_white):
+    # counts the invalid pixels (Z < 0) in nwarn
+    return f"""
+        {{
+            X y = (v[0] + 16.) / 116.;
+            X x = (v[1] / 500.0) + y;
+            X z = y - (v[2] / 200.0);
+            if (z < 0.0)
+            {{
+                z = 0.0;
+                atomicAdd(&nwarn[0], 1);
+            }}
+            v[0] = x;
+            v[1] = y;
+            v[2] = z;
+        }}
+        for (int ch=0; ch < 3; ch++)
+        {{
+            if (v[ch] > 0.2068966)
+            {{
+                v[ch] *= v[ch] * v[ch];
+            }} else {{
+                v[ch] = (v[ch] - 16.0 / 116.0) / 7.787;
+            }}
+        }}
+        v[0] *= {xyz_ref_white[0]};
+        v[1] *= {xyz_ref_white[1]};
+        v[2] *= {xyz_ref_white[2]};
+    """
+
+
+def _luv_white_point(xyz_ref_white):
+    denom = np.asarray([1, 15, 3]) @ np.asarray(xyz_ref_white, dtype=float)
+    denom = float(denom)
+    u0 = 4 * xyz_ref_white[0] / denom
+    v0 = 9 * xyz_ref_white[1] / denom
+    return u0, v0
+
+
+def _xyz_to_luv_step(xyz_ref_white, eps):
+    u0, v0 = _luv_white_point(xyz_ref_white)
+    # u' and v' are computed inline (denom is shared)
+    return f"""
+        {{
+            X l = v[1] / {xyz_ref_white[1]};
+            if (l > 0.008856)
+            {{
+                l = 116.0 * cbrt(l) - 16.0;
+            }} else {{
+                l *= 903.3;
+            }}
+            X denom = v[0] + 15.0 * v[1] + 3.0 * v[2] + {eps};
+            X u = 13.0 * l * ((4.0 * v[0]) / denom - {u0});
+            X w = 13.0 * l * ((9.0 * v[1]) / denom - {v0});
+            v[0] = l;
+            v[1] = u;
+            v[2] = w;
+        }}
+    """
+
+
+def _luv_to_xyz_step(xyz_ref_white, eps):
+    u0, v0 = _luv_white_point(xyz_ref_white)
+    return f"""
+        {{
+            X y;
+            if (v[0] > 7.999625)
+            {{
+                y = (v[0] + 16.0) / 116.0;
+                y *= y * y;
+            }} else {{
+                y = v[0] / 903.3;
+            }}
+            y *= {xyz_ref_white[1]};
+
+            X a = {u0} + v[1] / (13.0 * v[0] + {eps});
+            X b = {v0} + v[2] / (13.0 * v[0] + {eps});
+            X c = 3.0 * y * (5.0 * b - 3.0);
+
+            X z = ((a - 4.0) * c - 15.0 * a * b * y) / (12.0 * b);
+            v[0] = -(c / b + 3.0 * z);
+            v[1] = y;
+            v[2] = z;
+        }}
+    """
+
+
+@cp.memoize(for_each_device=True)
+def _get_pipeline_kernel(steps, count_warnings, name):
+    code = """
+        X v[3];
+        v[0] = src[3*i];
+        v[1] = src[3*i + 1];
+        v[2] = src[3*i + 2];
+    """ + ''.join(steps) + """
+        dst[3*i] = v[0];
+        dst[3*i + 1] = v[1];
+        dst[3*i + 2] = v[2];
+    """
+    out_params = 'raw X dst'
+    if count_warnings:
+        out_params += ', raw int32 nwarn'
+    return cp.ElementwiseKernel('raw X src', out_params, code, name=name)
+
+
+def _convert_pipeline(arr, steps, name):
+    """Apply the conversion steps to a float C-contiguous (..., 3) array.
+
+    Returns the converted array, and the number of pixels with a Z < 0 in
+    the Lab to XYZ step (0 if there is no such step).
+    """
+    steps = tuple(steps)
+    count_warnings = any('nwarn' in step for step in steps)
+    kern = _get_pipeline_kernel(steps, count_warnings,
+                                f'{name}_{arr.dtype.char}')
+    out = cp.empty_like(arr)
+    if count_warnings:
+        nwarn = cp.zeros(1, dtype=np.int32)
+        kern(arr, out, nwarn, size=arr.size // 3)
+        return out, int(nwarn[0])  # synchronize!
+    kern(arr, out, size=arr.size // 3)
+    return out, 0
+
+
+def _warn_invalid_lab(nwarn):
+    if nwarn > 0:
+        warn('Color data out of range: Z < 0 in %s pixels' % nwarn,
+             stacklevel=3)
+
+
+def xyz2rgb(xyz, *, dtype=None):
     """XYZ to RGB color space conversion.
 
     Parameters
     ----------
     xyz : (..., 3) array_like
         The image in XYZ format. Final dimension denotes channels.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -724,30 +942,22 @@ def xyz2rgb(xyz):
     """
     # Follow the algorithm from http://www.easyrgb.com/index.php
     # except we don't multiply/divide by 100 in the conversion
-    arr = _prepare_colorarray(xyz, force_c_contiguous=True)
-
-    # scaling applied after the 3x3 conversion matrix multiplication
-    # (c indexes over color channels here)
-    _post_colorconv = """
-        for (int c=0; c < 3; c++) {
-            if (y[3*i + c] > 0.0031308) {
-                y[3*i + c] = 1.055 * pow(y[3*i + c], (X)(1 / 2.4)) - 0.055;
-            } else {
-                y[3*i + c] *= 12.92;
-            }
-            y[3*i + c] = min(max(y[3*i + c], (X)0.0), (X)1.0);
-        }
-    """
-    return _convert(rgb_from_xyz, arr, post=_post_colorconv, name='xyz2rgb')
+    arr = _prepare_colorarray(xyz, force_c_contiguous=True, float_dtype=dtype)
+    steps = (_matmul_step(rgb_from_xyz), _linear_to_srgb_step)
+    return _convert_pipeline(arr, steps, 'xyz2rgb')[0]
 
 
-def rgb2xyz(rgb):
+def rgb2xyz(rgb, *, dtype=None):
     """RGB to XYZ color space conversion.
 
     Parameters
     ----------
     rgb : (..., 3) array_like
         The image in RGB format. Final dimension denotes channels.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -777,20 +987,9 @@ def rgb2xyz(rgb):
     """
     # Follow the algorithm from http://www.easyrgb.com/index.php
     # except we don't multiply/divide by 100 in the conversion
-    rgb = _prepare_colorarray(rgb, force_copy=True, force_c_contiguous=True)
-
-    # scaling applied to the input before 3x3 conversion matrix multiplication
-    # (c indexes over color channels here)
-    _pre_colorconv = """
-        for (int c=0; c < 3; c++) {
-            if (x[3*i + c] > 0.04045) {
-                x[3*i + c] = pow((x[3*i + c] + (X)0.055) / (X)1.055, (X)2.4);
-            } else {
-                x[3*i + c] /= 12.92;
-            }
-        }
-    """
-    return _convert(xyz_from_rgb, rgb, pre=_pre_colorconv, name='rgb2xyz')
+    arr = _prepare_colorarray(rgb, force_c_contiguous=True, float_dtype=dtype)
+    steps = (_srgb_to_linear_step, _matmul_step(xyz_from_rgb))
+    return _convert_pipeline(arr, steps, 'rgb2xyz')[0]
 
 
 def rgb2rgbcie(rgb):
@@ -1047,35 +1246,8 @@ def grey2rgb(image):
     return gray2rgb(image)
 
 
-@cp.memoize(for_each_device=True)
-def _get_xyz_to_lab_kernel(xyz_ref_white, name='xyz2lab'):
-    _xyz_to_lab = f"""
-        arr[3*i] /= {xyz_ref_white[0]};
-        arr[3*i + 1] /= {xyz_ref_white[1]};
-        arr[3*i + 2] /= {xyz_ref_white[2]};
-        for (int ch=0; ch < 3; ch++)
-        {{
-            if (arr[3*i + ch] > 0.008856)
-            {{
-                arr[3*i + ch] = cbrt(arr[3*i + ch]);
-            }} else {{
-                arr[3*i + ch] = 7.787 * arr[3*i + ch] + 16.0 / 116.0;
-            }}
-        }}
-        lab[3*i] = (116. * arr[3*i + 1]) - 16.0;
-        lab[3*i + 1] = 500.0 * (arr[3*i] - arr[3*i + 1]);
-        lab[3*i + 2] = 200.0 * (arr[3*i + 1] - arr[3*i + 2]);
-    """
-
-    # array will be modified in-place
-    return cp.ElementwiseKernel(
-        '',
-        'raw X arr, raw X lab',
-        _xyz_to_lab,
-        name=name)
-
-
-def xyz2lab(xyz, illuminant="D65", observer="2"):
+def xyz2lab(xyz, illuminant="D65", observer="2", *,
+            dtype=None):
     """XYZ to CIE-LAB color space conversion.
 
     Parameters
@@ -1086,6 +1258,10 @@ def xyz2lab(xyz, illuminant="D65", observer="2"):
         The name of the illuminant (the function is NOT case sensitive).
     observer : {"2", "10"}, optional
         The aperture angle of the observer.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1120,58 +1296,14 @@ def xyz2lab(xyz, illuminant="D65", observer="2"):
     >>> img_xyz = rgb2xyz(img)
     >>> img_lab = xyz2lab(img_xyz)
     """
-    xyz = _prepare_colorarray(xyz, force_copy=True, force_c_contiguous=True)
-
+    arr = _prepare_colorarray(xyz, force_c_contiguous=True, float_dtype=dtype)
     xyz_ref_white = get_xyz_coords(illuminant, observer)
+    steps = (_xyz_to_lab_step(xyz_ref_white),)
+    return _convert_pipeline(arr, steps, 'xyz2lab')[0]
 
-    name = f'xyz2lab_{xyz.dtype.char}'
-    kern = _get_xyz_to_lab_kernel(xyz_ref_white, name=name)
-    lab = cp.empty_like(xyz)
-    kern(xyz, lab, size=lab.size // 3)
-    return lab
-
-
-@cp.memoize(for_each_device=True)
-def _get_lab_to_xyz_kernel(xyz_ref_white, name='lab2xyz'):
-    _lab_to_xyz = f"""
 
-        xyz[3*i + 1] = (lab[3*i] + 16.) / 116.;
-        xyz[3*i] = (lab[3*i + 1] / 500.0) + xyz[3*i + 1];
-        xyz[3*i + 2] = xyz[3*i + 1] - (lab[3*i + 2] /200.0);
-        if (xyz[3*i + 2] < 0.0)
-        {{
-            xyz[3*i + 2] = 0.0;
-            warn[i] = 1;
-        }}
-
-        for (int ch=0; ch < 3; ch++)
-        {{
-            if (xyz[3*i + ch] > 0.2068966)
-            {{
-                xyz[3*i + ch] *= xyz[3*i + ch] * xyz[3*i + ch];
-            }} else {{
-                xyz[3*i + ch] = (xyz[3*i + ch] - 16.0 / 116.0) / 7.787;
-            }}
-        }}
-
-        xyz[3*i] *= {xyz_ref_white[0]};
-        xyz[3*i + 1] *= {xyz_ref_white[1]};
-        xyz[3*i + 2] *= {xyz_ref_white[2]};
-
-        // xyz[3*i] = min(max(xyz[3*i], 0.0), 1.0);
-        // xyz[3*i + 1] = min(max(xyz[3*i + 1], 0.0), 1.0);
-        // xyz[3*i + 2] = min(max(xyz[3*i + 2], 0.0), 1.0);
-    """
-
-    # array will be modified in-place
-    return cp.ElementwiseKernel(
-        '',
-        'raw X lab, raw X xyz, raw int32 warn',
-        _lab_to_xyz,
-        name=name)
-
-
-def lab2xyz(lab, illuminant="D65", observer="2"):
+def lab2xyz(lab, illuminant="D65", observer="2", *,
+            dtype=None):
     """CIE-LAB to XYZcolor space conversion.
 
     Parameters
@@ -1182,6 +1314,10 @@ def lab2xyz(lab, illuminant="D65", observer="2"):
         The name of the illuminant (the function is NOT case sensitive).
     observer : {"2", "10"}, optional
         The aperture angle of the observer.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1209,27 +1345,16 @@ def lab2xyz(lab, illuminant="D65", observer="2"):
     .. [1] http://www.easyrgb.com/index.php?X=MATH&H=07
     .. [2] https://en.wikipedia.org/wiki/Lab_color_space
     """
-    lab = _prepare_colorarray(lab, force_c_contiguous=True)
-
+    arr = _prepare_colorarray(lab, force_c_contiguous=True, float_dtype=dtype)
     xyz_ref_white = get_xyz_coords(illuminant, observer)
-
-    name = f'lab2xyz_{lab.dtype.char}'
-    kern = _get_lab_to_xyz_kernel(xyz_ref_white, name=name)
-    xyz = cp.empty_like(lab)
-
-    # TODO: better to use array for warn or a single element with atomic
-    #       operations?
-    warnings = cp.zeros(lab.shape[:-1], dtype=np.int32)
-    kern(lab, xyz, warnings, size=lab.size // 3)
-
-    nwarn = int(cp.count_nonzero(warnings))
-    if nwarn > 0:  # synchronize!
-        warn('Color data out of range: Z < 0 in %s pixels' % nwarn,
-             stacklevel=2)
+    steps = (_lab_to_xyz_step(xyz_ref_white),)
+    xyz, nwarn = _convert_pipeline(arr, steps, 'lab2xyz')
+    _warn_invalid_lab(nwarn)
     return xyz
 
 
-def rgb2lab(rgb, illuminant="D65", observer="2"):
+def rgb2lab(rgb, illuminant="D65", observer="2", *,
+            dtype=None):
     """Conversion from the sRGB color space (IEC 61966-2-1:1999)
     to the CIE Lab colorspace under the given illuminant and observer.
 
@@ -1241,6 +1366,10 @@ def rgb2lab(rgb, illuminant="D65", observer="2"):
         The name of the illuminant (the function is NOT case sensitive).
     observer : {"2", "10"}, optional
         The aperture angle of the observer.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1258,7 +1387,8 @@ def rgb2lab(rgb, illuminant="D65", observer="2"):
     sure that the image you are analyzing has been mapped to the sRGB color
     space.
 
-    This function uses rgb2xyz and xyz2lab.
+    This function applies the rgb2xyz and xyz2lab conversions in a single
+    pass over the image.
     By default Observer= 2A, Illuminant= D65. CIE XYZ tristimulus values
     x_ref=95.047, y_ref=100., z_ref=108.883. See function `get_xyz_coords` for
     a list of supported illuminants.
@@ -1267,10 +1397,15 @@ def rgb2lab(rgb, illuminant="D65", observer="2"):
     ----------
     .. [1] https://en.wikipedia.org/wiki/Standard_illuminant
     """
-    return xyz2lab(rgb2xyz(rgb), illuminant, observer)
+    arr = _prepare_colorarray(rgb, force_c_contiguous=True, float_dtype=dtype)
+    xyz_ref_white = get_xyz_coords(illuminant, observer)
+    steps = (_srgb_to_linear_step, _matmul_step(xyz_from_rgb),
+             _xyz_to_lab_step(xyz_ref_white))
+    return _convert_pipeline(arr, steps, 'rgb2lab')[0]
 
 
-def lab2rgb(lab, illuminant="D65", observer="2"):
+def lab2rgb(lab, illuminant="D65", observer="2", *,
+            dtype=None):
     """Lab to RGB color space conversion.
 
     Parameters
@@ -1281,6 +1416,10 @@ def lab2rgb(lab, illuminant="D65", observer="2"):
         The name of the illuminant (the function is NOT case sensitive).
     observer : {"2", "10"}, optional
         The aperture angle of the observer.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1294,7 +1433,8 @@ def lab2rgb(lab, illuminant="D65", observer="2"):
 
     Notes
     -----
-    This function uses lab2xyz and xyz2rgb.
+    This function applies the lab2xyz and xyz2rgb conversions in a single
+    pass over the image.
     By default Observer= 2A, Illuminant= D65. CIE XYZ tristimulus values
     x_ref=95.047, y_ref=100., z_ref=108.883. See function `get_xyz_coords` for
     a list of supported illuminants.
@@ -1303,61 +1443,17 @@ def lab2rgb(lab, illuminant="D65", observer="2"):
     ----------
     .. [1] https://en.wikipedia.org/wiki/Standard_illuminant
     """
-    return xyz2rgb(lab2xyz(lab, illuminant, observer))
-
-
-@cp.memoize(for_each_device=True)
-def _get_xyz_to_luv_kernel(xyz_ref_white, dtype):
-
-    eps = np.finfo(dtype).eps
-
-    preamble = f"""
-    // u' and v' helper functions
-
-    static __device__ __inline__ X fu(X v0, X v1, X v2)
-    {{
-        return (4.0 * v0) / (v0 + 15.0 * v1 + 3.0 * v2 + {eps});
-    }}
-
-    static __device__ __inline__ X fv(X v0, X v1, X v2)
-    {{
-        return (9.0 * v1) / (v0 + 15.0 * v1 + 3.0 * v2 + {eps});
-    }}
-    """
-
-    denom = np.asarray([1, 15, 3]) @ np.asarray(xyz_ref_white, dtype=float)
-    denom = float(denom)
-    u0 = 4 * xyz_ref_white[0] / denom
-    v0 = 9 * xyz_ref_white[1] / denom
-
-    _xyz_to_luv = f"""
-        luv[3*i] = xyz[3*i + 1] / {xyz_ref_white[1]};
-        if (luv[3*i] > 0.008856)
-        {{
-            luv[3*i] = 116.0 * cbrt(luv[3*i]) - 16.0;
-        }} else {{
-            luv[3*i] *= 903.3;
-        }}
-
-        luv[3*i + 1] = (
-            13.0 * luv[3*i] * (fu(xyz[3*i], xyz[3*i + 1], xyz[3*i + 2]) - {u0})
-        );
-        luv[3*i + 2] = (
-            13.0 * luv[3*i] * (fv(xyz[3*i], xyz[3*i + 1], xyz[3*i + 2]) - {v0})
-        );
-
-    """
-
-    # array will be modified in-place
-    return cp.ElementwiseKernel(
-        '',
-        'raw X xyz, raw X luv',
-        _xyz_to_luv,
-        preamble=preamble,
-        name=f'xyz2luv_{np.dtype(dtype).char}')
+    arr = _prepare_colorarray(lab, force_c_contiguous=True, float_dtype=dtype)
+    xyz_ref_white = get_xyz_coords(illuminant, observer)
+    steps = (_lab_to_xyz_step(xyz_ref_white), _matmul_step(rgb_from_xyz),
+             _linear_to_srgb_step)
+    rgb, nwarn = _convert_pipeline(arr, steps, 'lab2rgb')
+    _warn_invalid_lab(nwarn)
+    return rgb
 
 
-def xyz2luv(xyz, illuminant="D65", observer="2"):
+def xyz2luv(xyz, illuminant="D65", observer="2", *,
+            dtype=None):
     """XYZ to CIE-Luv color space conversion.
 
     Parameters
@@ -1368,6 +1464,10 @@ def xyz2luv(xyz, illuminant="D65", observer="2"):
         The name of the illuminant (the function is NOT case sensitive).
     observer : {"2", "10"}, optional
         The aperture angle of the observer.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1407,12 +1507,11 @@ def xyz2luv(xyz, illuminant="D65", observer="2"):
     if input_is_one_pixel:
         xyz = xyz[np.newaxis, ...]
 
-    xyz = _prepare_colorarray(xyz, force_c_contiguous=True)
-
+    arr = _prepare_colorarray(xyz, force_c_contiguous=True, float_dtype=dtype)
     xyz_ref_white = get_xyz_coords(illuminant, observer)
-    kern = _get_xyz_to_luv_kernel(xyz_ref_white, xyz.dtype)
-    luv = cp.empty_like(xyz)
-    kern(xyz, luv, size=xyz.size // 3)
+    eps = np.finfo(arr.dtype).eps
+    steps = (_xyz_to_luv_step(xyz_ref_white, eps),)
+    luv = _convert_pipeline(arr, steps, 'xyz2luv')[0]
 
     if input_is_one_pixel:
         luv = cp.squeeze(luv, axis=0)
@@ -1420,42 +1519,8 @@ def xyz2luv(xyz, illuminant="D65", observer="2"):
     return luv
 
 
-@cp.memoize(for_each_device=True)
-def _get_luv_to_xyz_kernel(xyz_ref_white, dtype):
-
-    eps = np.finfo(dtype).eps
-
-    denom = np.asarray([1, 15, 3]) @ np.asarray(xyz_ref_white, dtype=float)
-    denom = float(denom)
-    u0 = 4 * xyz_ref_white[0] / denom
-    v0 = 9 * xyz_ref_white[1] / denom
-
-    _luv_to_xyz = f"""
-        if (luv[3*i] > 7.999625)
-        {{
-            xyz[3*i + 1] = (luv[3 * i] + 16.0) / 116.0;
-            xyz[3*i + 1] *= xyz[3*i + 1] * xyz[3*i + 1];
-        }} else {{
-            xyz[3*i + 1] = luv[3*i] / 903.3;
-        }}
-        xyz[3*i + 1] *= {xyz_ref_white[1]};
-
-        X a = {u0} + luv[3*i + 1] / (13.0 * luv[3*i] + {eps});
-        X b = {v0} + luv[3*i + 2] / (13.0 * luv[3*i] + {eps});
-        X c = 3.0 * xyz[3*i + 1] * (5.0 * b - 3.0);
-
-        xyz[3*i + 2] = ((a - 4.0) * c - 15.0 * a * b * xyz[3*i + 1]) / (12.0 * b);
-        xyz[3*i] = -(c / b + 3.0 * xyz[3*i + 2]);
-
-    """  # noqa
-    return cp.ElementwiseKernel(
-        '',
-        'raw X luv, raw X xyz',
-        _luv_to_xyz,
-        name=f'luv2xyz_{np.dtype(dtype).char}')
-
-
-def luv2xyz(luv, illuminant="D65", observer="2"):
+def luv2xyz(luv, illuminant="D65", observer="2", *,
+            dtype=None):
     """CIE-Luv to XYZ color space conversion.
 
     Parameters
@@ -1466,6 +1531,10 @@ def luv2xyz(luv, illuminant="D65", observer="2"):
         The name of the illuminant (the function is NOT case sensitive).
     observer : {"2", "10"}, optional
         The aperture angle of the observer.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1491,21 +1560,24 @@ def luv2xyz(luv, illuminant="D65", observer="2"):
     .. [1] http://www.easyrgb.com/index.php?X=MATH&H=16#text16
     .. [2] https://en.wikipedia.org/wiki/CIELUV
     """
-    luv = _prepare_colorarray(luv, force_c_contiguous=True)
+    arr = _prepare_colorarray(luv, force_c_contiguous=True, float_dtype=dtype)
     xyz_ref_white = get_xyz_coords(illuminant, observer)
-    kern = _get_luv_to_xyz_kernel(xyz_ref_white, luv.dtype)
-    xyz = cp.empty_like(luv)
-    kern(luv, xyz, size=luv.size // 3)
-    return xyz
+    eps = np.finfo(arr.dtype).eps
+    steps = (_luv_to_xyz_step(xyz_ref_white, eps),)
+    return _convert_pipeline(arr, steps, 'luv2xyz')[0]
 
 
-def rgb2luv(rgb):
+def rgb2luv(rgb, *, dtype=None):
     """RGB to CIE-Luv color space conversion.
 
     Parameters
     ----------
     rgb : (..., 3) array_like
         The image in RGB format. Final dimension denotes channels.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1519,7 +1591,8 @@ def rgb2luv(rgb):
 
     Notes
     -----
-    This function uses rgb2xyz and xyz2luv.
+    This function applies the rgb2xyz and xyz2luv conversions in a single
+    pass over the image.
 
     References
     ----------
@@ -1527,16 +1600,25 @@ def rgb2luv(rgb):
     .. [2] http://www.easyrgb.com/index.php?X=MATH&H=02#text2
     .. [3] https://en.wikipedia.org/wiki/CIELUV
     """
-    return xyz2luv(rgb2xyz(rgb))
+    arr = _prepare_colorarray(rgb, force_c_contiguous=True, float_dtype=dtype)
+    xyz_ref_white = get_xyz_coords("D65", "2")
+    eps = np.finfo(arr.dtype).eps
+    steps = (_srgb_to_linear_step, _matmul_step(xyz_from_rgb),
+             _xyz_to_luv_step(xyz_ref_white, eps))
+    return _convert_pipeline(arr, steps, 'rgb2luv')[0]
 
 
-def luv2rgb(luv):
+def luv2rgb(luv, *, dtype=None):
     """Luv to RGB color space conversion.
 
     Parameters
     ----------
     luv : (..., 3) array_like
         The image in CIE Luv format. Final dimension denotes channels.
+    dtype : {cupy.float32, cupy.float64}, optional
+        The floating point type of the computation and of the output. By
+        default, the input is converted according to the conventions of
+        `img_as_float` (integer images are converted to float64).
 
     Returns
     -------
@@ -1550,9 +1632,15 @@ def luv2rgb(luv):
 
     Notes
     -----
-    This function uses luv2xyz and xyz2rgb.
+    This function applies the luv2xyz and xyz2rgb conversions in a single
+    pass over the image.
     """
-    return xyz2rgb(luv2xyz(luv))
+    arr = _prepare_colorarray(luv, force_c_contiguous=True, float_dtype=dtype)
+    xyz_ref_white = get_xyz_coords("D65", "2")
+    eps = np.finfo(arr.dtype).eps
+    steps = (_luv_to_xyz_step(xyz_ref_white, eps), _matmul_step(rgb_from_xyz),
+             _linear_to_srgb_step)
+    return _convert_pipeline(arr, steps, 'luv2rgb')[0]
 
 
 def rgb2hed(rgb):
@@ -0,0 +1,309 @@
+"""Stain normalization of brightfield (e.g. H&E) images.
+
+Both methods fit a few parameters on the reference and on the image to
+normalize, and then apply the normalization in a single elementwise kernel.
+
+* Macenko [1]_ : the two stain vectors are estimated in optical density (OD)
+  space, from the extreme angles (percentiles) of the OD of the tissue pixels
+  projected on their plane of largest variance. The stain concentrations are
+  rescaled to the ones of the reference.
+* Reinhard [2]_ : the mean and standard deviation of each channel of the
+  l-alpha-beta color space [3]_ are matched to the ones of the reference.
+
+References
+----------
+.. [1] M. Macenko et al., "A method for normalizing histology slides for
+       quantitative analysis," 2009 IEEE International Symposium on
+       Biomedical Imaging, pp. 1107-1110.
+       :DOI:`10.1109/ISBI.2009.5193250`
+.. [2] E. Reinhard, M. Adhikhmin, B. Gooch and P. Shirley, "Color transfer
+       between images," IEEE Computer Graphics and Applications, vol. 21,
+       no. 5, pp. 34-41, 2001. :DOI:`10.1109/38.946629`
+.. [3] D. L. Ruderman, T. W. Cronin and C.-C. Chiao, "Statistics of cone
+       responses to natural images: implications for visual coding," J. Opt.
+       Soc. Am. A, vol. 15, no. 8, pp. 2036-2045, 1998.
+"""
+
+import cupy as cp
+import numpy as np
+
+from .colorconv import _prepare_colorarray
+
+__all__ = ['fit_stain_reference', 'normalize_stains']
+
+
+# RGB to LMS cone space conversion of the Reinhard paper
+lms_from_rgb = np.array([[0.3811, 0.5783, 0.0402],
+                         [0.1967, 0.7244, 0.0782],
+                         [0.0241, 0.1288, 0.8444]])
+rgb_from_lms = np.linalg.inv(lms_from_rgb)
+
+# log10(LMS) to l-alpha-beta conversion
+lab_from_loglms = (np.diag([1 / np.sqrt(3), 1 / np.sqrt(6), 1 / np.sqrt(2)])
+                   @ np.array([[1, 1, 1],
+                               [1, 1, -2],
+                               [1, -1, 0]]))
+loglms_from_lab = np.linalg.inv(lab_from_loglms)
+
+_METHODS = ('macenko', 'reinhard')
+
+
+@cp.memoize(for_each_device=True)
+def _macenko_kernel():
+    # The normalization is linear in optical density space: od' = T od
+    code = """
+    double od[3];
+    for (int ch = 0; ch < 3; ch++) {
+        od[ch] = -log(max(rgb[3*i + ch] * 255.0, 1.0) / io);
+    }
+    for (int ch = 0; ch < 3; ch++) {
+        double v = T[3*ch] * od[0] + T[3*ch + 1] * od[1] + T[3*ch + 2] * od[2];
+        out[3*i + ch] = min(max(io * exp(-v) / 255.0, 0.0), 1.0);
+    }
+    """
+    return cp.ElementwiseKernel(
+        'raw X rgb, raw float64 T, float64 io',
+        'raw X out',
+        code,
+        name='cucim_skimage_normalize_stains_macenko')
+
+
+@cp.memoize(for_each_device=True)
+def _reinhard_kernel():
+    m = lms_from_rgb.ravel()
+    minv = rgb_from_lms.ravel()
+    # The normalization is affine in log10(LMS) space: y' = P y + q
+    code = f"""
+    double rgb_in[3], y[3];
+    for (int ch = 0; ch < 3; ch++) {{
+        rgb_in[ch] = rgb[3*i + ch];
+    }}
+    y[0] = {m[0]} * rgb_in[0] + {m[1]} * rgb_in[1] + {m[2]} * rgb_in[2];
+    y[1] = {m[3]} * rgb_in[0] + {m[4]} * rgb_in[1] + {m[5]} * rgb_in[2];
+    y[2] = {m[6]} * rgb_in[0] + {m[7]} * rgb_in[1] + {m[8]} * rgb_in[2];
+    for (int ch = 0; ch < 3; ch++) {{
+        y[ch] = log10(max(y[ch], 1e-6));
+    }}
+    double lms[3];
+    for (int ch = 0; ch < 3; ch++) {{
+        lms[ch] = pow(10.0, P[3*ch] * y[0] + P[3*ch + 1] * y[1]
+                            + P[3*ch + 2] * y[2] + q[ch]);
+    }}
+    out[3*i] = {minv[0]} * lms[0] + {minv[1]} * lms[1] + {minv[2]} * lms[2];
+    out[3*i + 1] = {minv[3]} * lms[0] + {minv[4]} * lms[1] + {minv[5]} * lms[2];
+    out[3*i + 2] = {minv[6]} * lms[0] + {minv[7]} * lms[1] + {minv[8]} * lms[2];
+    for (int ch = 0; ch < 3; ch++) {{
+        out[3*i + ch] = min(max(out[3*i + ch], (X)0.0), (X)1.0);
+    }}
+    """  # noqa
+    return cp.ElementwiseKernel(
+        'raw X rgb, raw float64 P, raw float64 q',
+        'raw X out',
+        code,
+        name='cucim_skimage_normalize_stains_reinhard')
+
+
+def _optical_density(rgb, source_intensity):
+    """Optical density of the pixels of a float RGB image, as (n, 3) array."""
+    rgb = rgb.reshape(-1, 3).astype(cp.float64, copy=False)
+    return -cp.log(cp.maximum(rgb * 255, 1) / source_intensity)
+
+
+def _fit_macenko(rgb, source_intensity, alpha, beta):
+    od = _optical_density(rgb, source_intensity)
+
+    # Tissue pixels: not transparent in any channel
+    tissue_od = od[cp.all(od > beta, axis=1)]
+    if tissue_od.shape[0] < 2:
+        raise ValueError(
+            "Too few stained pixels to estimate the stain vectors; try a "
+            "lower `beta`.")
+
+    # Plane of the two largest eigenvectors of the OD covariance
+    _, eigvecs = cp.linalg.eigh(cp.cov(tissue_od, rowvar=False))
+    eigvecs = eigvecs[:, 1:]
+    # Orient the eigenvectors along positive optical densities
+    eigvecs *= cp.where(eigvecs.sum(axis=0) < 0, -1, 1)
+
+    # Extreme angles of the tissue pixels projected on the plane
+    projected = tissue_od @ eigvecs
+    angles = cp.arctan2(projected[:, 0], projected[:, 1])
+    min_angle, max_angle = cp.percentile(angles, (alpha, 100 - alpha))
+    stains = eigvecs @ cp.stack([
+        cp.stack([cp.sin(min_angle), cp.cos(min_angle)]),
+        cp.stack([cp.sin(max_angle), cp.cos(max_angle)])], axis=1)
+    stains /= cp.linalg.norm(stains, axis=0)
+    # Hematoxylin (the stain absorbing more red) first
+    stains = cp.where(stains[0, 0] >= stains[0, 1], stains, stains[:, ::-1])
+
+    # Robust maximum of the concentration of each stain
+    concentrations = cp.linalg.pinv(stains) @ od.T
+    max_concentrations = cp.percentile(concentrations, 99, axis=1)
+    return {'method': 'macenko',
+            'stain_matrix': stains,
+            'max_concentrations': max_concentrations,
+            'source_intensity': source_intensity}
+
+
+def _fit_reinhard(rgb):
+    rgb = rgb.reshape(-1, 3).astype(cp.float64, copy=False)
+    lms = cp.maximum(rgb @ cp.asarray(lms_from_rgb.T), 1e-6)
+    lab = cp.log10(lms) @ cp.asarray(lab_from_loglms.T)
+    return {'method': 'reinhard',
+            'mean': lab.mean(axis=0),
+            'std': lab.std(axis=0)}
+
+
+def fit_stain_reference(reference, method='macenko', *, source_intensity=240,
+                        alpha=1, beta=0.15):
+    """Estimate the stain parameters of an image.
+
+    The parameters of a reference image can be computed once and passed to
+    `normalize_stains` to normalize many images (e.g. all the patches of a
+    slide) to the same reference.
+
+    Parameters
+    ----------
+    reference : (..., 3) array_like
+        The image in RGB format.
+    method : {'macenko', 'reinhard'}, optional
+        The normalization method.
+    source_intensity : float, optional
+        Transmitted light intensity of the background, in the ``[0, 255]``
+        range (Macenko only).
+    alpha : float, optional
+        Percentile of the angles of the stain vectors, in ``[0, 100]``
+        (Macenko only). The stain vectors are the ``alpha`` and
+        ``100 - alpha`` percentiles of the angles of the tissue pixels.
+    beta : float, optional
+        Optical density threshold of transparent pixels, which are ignored to
+        estimate the stain vectors (Macenko only).
+
+    Returns
+    -------
+    params : dict
+        The stain parameters: the ``'method'``, and ``'stain_matrix'``
+        (optical density of each stain as columns), ``'max_concentrations'``
+        and ``'source_intensity'`` for Macenko, or ``'mean'`` and ``'std'``
+        (of each l-alpha-beta channel) for Reinhard.
+
+    Raises
+    ------
+    ValueError
+        If `method` is not supported, or if there are too few stained pixels
+        to estimate the stain vectors.
+
+    See Also
+    --------
+    normalize_stains
+    """
+    if method not in _METHODS:
+        raise ValueError(f"`method` must be one of {_METHODS}, got {method}")
+    rgb = _prepare_colorarray(reference, force_c_contiguous=False)
+    if method == 'macenko':
+        return _fit_macenko(rgb, source_intensity, alpha, beta)
+    return _fit_reinhard(rgb)
+
+
+def normalize_stains(image, reference, method='macenko', *,
+                     source_intensity=240, alpha=1, beta=0.15):
+    """Normalize the stains of a brightfield image to those of a reference.
+
+    Parameters
+    ----------
+    image : (..., 3) array_like
+        The image in RGB format. Final dimension denotes channels.
+    reference : (..., 3) array_like or dict
+        The reference image in RGB format, or its parameters as returned by
+        `fit_stain_reference` (with the same `method`).
+    method : {'macenko', 'reinhard'}, optional
+        The normalization method. 'macenko' [1]_ matches the stain vectors
+        and concentrations estimated in optical density space. 'reinhard'
+        [2]_ matches the mean and standard deviation of the channels of the
+        l-alpha-beta color space.
+    source_intensity : float, optional
+        Transmitted light intensity of the background, in the ``[0, 255]``
+        range (Macenko only).
+    alpha : float, optional
+        Percentile of the angles of the stain vectors, in ``[0, 100]``
+        (Macenko only).
+    beta : float, optional
+        Optical density threshold of transparent pixels, which are ignored to
+        estimate the stain vectors (Macenko only).
+
+    Returns
+    -------
+    out : (..., 3) ndarray
+        The normalized image in RGB format, as floats in ``[0, 1]``.
+
+    Raises
+    ------
+    ValueError
+        If `method` is not supported, if it is not the method of the
+        `reference` parameters, or if there are too few stained pixels to
+        estimate the stain vectors.
+
+    See Also
+    --------
+    fit_stain_reference, separate_stains
+
+    Notes
+    -----
+    The parameters of `image` are estimated on the device, without any
+    transfer to the host, and the normalization is applied in one elementwise
+    pass. Fitting the parameters of the reference once with
+    `fit_stain_reference` avoids estimating them for each image.
+
+    References
+    ----------
+    .. [1] M. Macenko et al., "A method for normalizing histology slides for
+           quantitative analysis," 2009 IEEE International Symposium on
+           Biomedical Imaging, pp. 1107-1110.
+           :DOI:`10.1109/ISBI.2009.5193250`
+    .. [2] E. Reinhard, M. Adhikhmin, B. Gooch and P. Shirley, "Color
+           transfer between images," IEEE Computer Graphics and Applications,
+           vol. 21, no. 5, pp. 34-41, 2001. :DOI:`10.1109/38.946629`
+
+    Examples
+    --------
+    >>> import cupy as cp
+    >>> from skimage import data
+    >>> from cucim.skimage.color import fit_stain_reference, normalize_stains
+    >>> ihc = cp.array(data.immunohistochemistry())
+    >>> reference = fit_stain_reference(ihc[:256, :256])
+    >>> normalized = normalize_stains(ihc[256:, 256:], reference)
+    """
+    if not isinstance(reference, dict):
+        reference = fit_stain_reference(reference, method,
+                                        source_intensity=source_intensity,
+                                        alpha=alpha, beta=beta)
+    elif reference.get('method') != method:
+        raise ValueError(
+            f"The reference parameters were fitted with the "
+            f"{reference.get('method')!r} method, not {method!r}")
+    rgb = _prepare_colorarray(image, force_c_contiguous=True)
+    out = cp.empty_like(rgb)
+
+    if method == 'macenko':
+        params = _fit_macenko(rgb, source_intensity, alpha, beta)
+        scale = reference['max_concentrations'] / params['max_concentrations']
+        # Concentrations of the image, rescaled to those of the reference,
+        # mixed with the stain vectors of the reference
+        transform = (reference['stain_matrix'] * scale
+                     @ cp.linalg.pinv(params['stain_matrix']))
+        kern = _macenko_kernel()
+        kern(rgb, cp.ascontiguousarray(transform, dtype=cp.float64),
+             float(source_intensity), out, size=rgb.size // 3)
+    else:
+        params = _fit_reinhard(rgb)
+        scale = reference['std'] / params['std']
+        lab_to_loglms = cp.asarray(loglms_from_lab)
+        # Standardize the l-alpha-beta channels of the image, and rescale
+        # them to those of the reference
+        transform = lab_to_loglms * scale @ cp.asarray(lab_from_loglms)
+        offset = lab_to_loglms @ (reference['mean'] - scale * params['mean'])
+        kern = _reinhard_kernel()
+        kern(rgb, cp.ascontiguousarray(transform, dtype=cp.float64),
+             cp.ascontiguousarray(offset, dtype=cp.float64), out,
+             size=rgb.size // 3)
+    return out
@@ -812,3 +812,46 @@ def test_rgba2rgb_nD(shape):
     expected_shape = shape[:-1] + (3,)
 
     assert out.shape == expected_shape
+
+
+@pytest.mark.parametrize("func, steps", [
+    (rgb2lab, [rgb2xyz, xyz2lab]),
+    (lab2rgb, [lab2xyz, xyz2rgb]),
+    (rgb2luv, [rgb2xyz, xyz2luv]),
+    (luv2rgb, [luv2xyz, xyz2rgb]),
+])
+def test_fused_conversion(func, steps):
+    img = cp.random.rand(16, 16, 3)
+    if func in (lab2rgb, luv2rgb):
+        img = rgb2lab(img) if func is lab2rgb else rgb2luv(img)
+    expected = img
+    for step in steps:
+        expected = step(expected)
+    assert_array_almost_equal(func(img), expected)
+
+
+@pytest.mark.parametrize("func", [rgb2xyz, xyz2rgb, xyz2lab, lab2xyz,
+                                  rgb2lab, lab2rgb, xyz2luv, luv2xyz,
+                                  rgb2luv, luv2rgb])
+def test_float32_computation(func):
+    img = cp.asarray(data.astronaut()[:64, :64])
+    if func in (lab2xyz, lab2rgb):
+        img = rgb2lab(img)
+    elif func in (luv2xyz, luv2rgb):
+        img = rgb2luv(img)
+    out = func(img, dtype=cp.float32)
+    assert out.dtype == cp.float32
+    expected = func(img)
+    assert_array_almost_equal(out, expected,
+                              decimal=3 if func in (rgb2xyz, xyz2rgb) else 2)
+
+
+def test_float32_computation_invalid():
+    with pytest.raises(ValueError):
+        rgb2lab(cp.random.rand(4, 4, 3), dtype=cp.int32)
+
+
+def test_lab2rgb_fused_warning():
+    lab = cp.asarray([[[50., 0., 300.], [50., 0., 0.]]])
+    with expected_warnings(['Z < 0 in 1 pixels']):
+        lab2rgb(lab)
@@ -0,0 +1,97 @@
+import cupy as cp
+import numpy as np
+import pytest
+from cupy.testing import assert_array_almost_equal
+
+from cucim.skimage.color import fit_stain_reference
+from cucim.skimage.color import normalize_stains
+
+hematoxylin = np.array([0.65, 0.70, 0.29])
+eosin = np.array([0.27, 0.92, 0.29])
+
+
+def _unit(v):
+    return v / np.linalg.norm(v)
+
+
+def _concentrations(n=4096, seed=0):
+    rng = np.random.default_rng(seed)
+    concentrations = 0.3 + rng.random((2, n)) * np.array([[1.2], [0.8]])
+    concentrations[1, :800] = 0  # pure hematoxylin
+    concentrations[0, 800:1600] = 0  # pure eosin
+    concentrations[:, 1600:1900] = 0  # background
+    return concentrations
+
+
+def _synthetic_stained(stains, concentrations, shape=(64, 64)):
+    stains = np.stack([_unit(s) for s in stains], axis=1)
+    od = (stains @ concentrations).T
+    rgb = np.clip(240 * np.exp(-od) / 255, 0, 1)
+    return cp.asarray(rgb.reshape(shape + (3,)))
+
+
+def test_fit_macenko_stain_vectors():
+    image = _synthetic_stained([eosin, hematoxylin], _concentrations())
+    params = fit_stain_reference(image)
+    assert params['method'] == 'macenko'
+    # Hematoxylin first
+    assert_array_almost_equal(params['stain_matrix'][:, 0],
+                              _unit(hematoxylin))
+    assert_array_almost_equal(params['stain_matrix'][:, 1], _unit(eosin))
+
+
+def test_normalize_macenko():
+    concentrations = _concentrations()
+    reference = _synthetic_stained([hematoxylin, eosin], concentrations)
+    # Same tissue, with other stain vectors and staining intensities
+    image = _synthetic_stained([[0.55, 0.80, 0.25], [0.15, 0.95, 0.25]],
+                               concentrations * np.array([[0.7], [1.3]]))
+    normalized = normalize_stains(image, reference)
+    assert normalized.dtype == image.dtype
+    assert_array_almost_equal(normalized, reference)
+
+
+@pytest.mark.parametrize('method', ['macenko', 'reinhard'])
+def test_fitted_reference(method):
+    reference = _synthetic_stained([hematoxylin, eosin], _concentrations())
+    image = _synthetic_stained([[0.55, 0.80, 0.25], [0.15, 0.95, 0.25]],
+                               _concentrations(seed=1))
+    params = fit_stain_reference(reference, method)
+    assert_array_almost_equal(normalize_stains(image, params, method),
+                              normalize_stains(image, reference, method))
+
+    other_method = 'reinhard' if method == 'macenko' else 'macenko'
+    with pytest.raises(ValueError):
+        normalize_stains(image, params, other_method)
+
+
+def test_normalize_reinhard():
+    reference = _synthetic_stained([hematoxylin, eosin], _concentrations())
+    # Normalizing an image to itself does not change it
+    assert_array_almost_equal(
+        normalize_stains(reference, reference, 'reinhard'), reference)
+
+    image = _synthetic_stained([[0.55, 0.80, 0.25], [0.15, 0.95, 0.25]],
+                               _concentrations(seed=1))
+    normalized = normalize_stains(image, reference, 'reinhard')
+    params = fit_stain_reference(normalized, 'reinhard')
+    expected = fit_stain_reference(reference, 'reinhard')
+    assert_array_almost_equal(params['mean'], expected['mean'], decimal=2)
+    assert_array_almost_equal(params['std'], expected['std'], decimal=2)
+
+
+def test_normalize_uint8():
+    reference = _synthetic_stained([hematoxylin, eosin], _concentrations())
+    image = cp.asarray(cp.asnumpy(reference) * 255, dtype=np.uint8)
+    normalized = normalize_stains(image, reference)
+    assert normalized.dtype == np.float64
+    assert_array_almost_equal(normalized, reference, decimal=2)
+
+
+def test_invalid():
+    image = _synthetic_stained([hematoxylin, eosin], _concentrations())
+    with pytest.raises(ValueError):
+        normalize_stains(image, image, method='vahadane')
+    with pytest.raises(ValueError):
+        # no stained pixel
+        fit_stain_reference(cp.ones((16, 16, 3)))
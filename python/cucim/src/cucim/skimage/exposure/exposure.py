@@ -1,7 +1,7 @@
 import cupy as cp
 import numpy as np
 
-from .._shared.utils import warn
+from .._shared.utils import _sample_axes, warn
 from ..color import rgb2gray, rgba2rgb
 from ..util.dtype import dtype_limits, dtype_range
 
@@ -75,7 +75,68 @@ def _bincount_histogram(image, source_range):
     return hist, bin_centers
 
 
-def histogram(image, nbins=256, source_range='image', normalize=False):
+def _batch_histogram(image, nbins, source_range, batch_axis):
+    """Histograms of the images of a stack, computed at once.
+
+    The images are binned over their own range (as `histogram` does for a
+    single image) and counted by a single ``cupy.bincount`` call, using a
+    bin offset per image.
+
+    Returns
+    -------
+    hist : (N, nbins) array
+        The values of the histograms.
+    bin_centers : (N, nbins) array
+        The values at the center of the bins of each histogram.
+    """
+    batch_axis, _ = _sample_axes(image.ndim, batch_axis)
+    image = cp.moveaxis(image, batch_axis, 0)
+    n_images = image.shape[0]
+    image = image.reshape(n_images, -1)
+    if source_range == 'image':
+        image_min = image.min(axis=1, keepdims=True)
+        image_max = image.max(axis=1, keepdims=True)
+    elif source_range == 'dtype':
+        image_min, image_max = (
+            cp.full((n_images, 1), limit, dtype=image.dtype)
+            for limit in dtype_limits(image, clip_negative=False))
+    else:
+        raise ValueError('Incorrect value for `source_range` argument: '
+                         f'{source_range}')
+
+    if np.issubdtype(image.dtype, np.integer):
+        # One bin per integer value, as for single images
+        image_min = image_min.astype(np.int64)
+        nbins = int((image_max.astype(np.int64) - image_min).max()) + 1
+        bin_idx = image.astype(np.int64) - image_min
+        bin_centers = image_min + cp.arange(nbins)
+    else:
+        # Same bin edges as cupy.histogram
+        image_min = image_min.astype(float)
+        image_max = image_max.astype(float)
+        is_constant = image_min == image_max
+        image_min = cp.where(is_constant, image_min - 0.5, image_min)
+        image_max = cp.where(is_constant, image_max + 0.5, image_max)
+        bin_edges = (image_min + cp.arange(nbins + 1)
+                     * ((image_max - image_min) / nbins))
+        bin_edges[:, -1:] = image_max
+        bin_idx = cp.floor((image - image_min)
+                           * (nbins / (image_max - image_min)))
+        bin_idx = cp.clip(bin_idx, 0, nbins - 1).astype(np.int64)
+        # Fix the rounding of the values close to the edges of their bin
+        bin_idx -= image < cp.take_along_axis(bin_edges, bin_idx, axis=1)
+        bin_idx = cp.maximum(bin_idx, 0)
+        is_above = image >= cp.take_along_axis(bin_edges, bin_idx + 1, axis=1)
+        bin_idx += is_above & (bin_idx < nbins - 1)
+        bin_centers = (bin_edges[:, :-1] + bin_edges[:, 1:]) / 2.
+
+    bin_idx += cp.arange(n_images)[:, cp.newaxis] * nbins
+    hist = cp.bincount(bin_idx.ravel(), minlength=n_images * nbins)
+    return hist.reshape(n_images, nbins), bin_centers
+
+
+def histogram(image, nbins=256, source_range='image', normalize=False, *,
+              batch_axis=None):
     """Return histogram of image.
 
     Unlike `numpy.histogram`, this function returns the centers of bins and
@@ -99,13 +160,22 @@ def histogram(image, nbins=256, source_range='image', normalize=False):
         of that data type.
     normalize : bool, optional
         If True, normalize the histogram by the sum of its values.
+    batch_axis : int, optional
+        If given, `image` is a stack of images indexed along this axis, and
+        the histogram of each image is computed (in a single pass). The
+        histograms of integer images have one bin per value, starting from
+        the smallest value of each image; they all have as many bins as the
+        widest range of values of the images (the last bins of the others
+        are empty).
 
     Returns
     -------
     hist : array
-        The values of the histogram.
+        The values of the histogram, of shape ``(N, nbins)`` if `batch_axis`
+        is given.
     bin_centers : array
-        The values at the center of the bins.
+        The values at the center of the bins, of shape ``(N, nbins)`` if
+        `batch_axis` is given.
 
     See Also
     --------
@@ -122,6 +192,13 @@ def histogram(image, nbins=256, source_range='image', normalize=False):
     >>> exposure.histogram(image, nbins=2)
     (array([ 93585, 168559]), array([0.25, 0.75]))
     """
+    if batch_axis is not None:
+        hist, bin_centers = _batch_histogram(image, nbins, source_range,
+                                             batch_axis)
+        if normalize:
+            hist = hist / cp.sum(hist, axis=1, keepdims=True)
+        return hist, bin_centers
+
     sh = image.shape
     if len(sh) == 3 and sh[-1] < 4:
         warn("This might be a color image. The histogram will be "
@@ -321,7 +398,8 @@ def _output_dtype(dtype_or_range):
         )
 
 
-def rescale_intensity(image, in_range="image", out_range="dtype"):
+def rescale_intensity(image, in_range="image", out_range="dtype", *,
+                      batch_axis=None):
     """Return image after stretching or shrinking its intensity levels.
 
     The desired intensity range of the input and output, `in_range` and
@@ -346,6 +424,10 @@ def rescale_intensity(image, in_range="image", out_range="dtype"):
         2-tuple
             Use `range_values` as explicit min/max intensities.
 
+    batch_axis : int, optional
+        If given, `image` is a stack of images indexed along this axis, and
+        the 'image' ranges are the min/max intensities of each image.
+
     Returns
     -------
     out : array
@@ -418,6 +500,11 @@ def rescale_intensity(image, in_range="image", out_range="dtype"):
     else:
         out_dtype = _output_dtype(out_range)
 
+    if batch_axis is not None and 'image' in (in_range, out_range):
+        # Otherwise the intensity ranges are the same for all the images
+        return _batch_rescale_intensity(image, in_range, out_range, out_dtype,
+                                        batch_axis)
+
     imin, imax = map(float, intensity_range(image, in_range))
     omin, omax = map(float, intensity_range(image, out_range,
                                             clip_negative=(imin >= 0)))
@@ -439,6 +526,40 @@ def rescale_intensity(image, in_range="image", out_range="dtype"):
         return cp.clip(image, omin, omax).astype(out_dtype, copy=False)
 
 
+def _batch_rescale_intensity(image, in_range, out_range, out_dtype,
+                             batch_axis):
+    """`rescale_intensity` of each image of a stack, with per-image ranges.
+    """
+    _, sample_axes = _sample_axes(image.ndim, batch_axis)
+    float_dtype = image.dtype if image.dtype.kind == 'f' else np.float64
+    range_shape = tuple(1 if ax in sample_axes else size
+                        for ax, size in enumerate(image.shape))
+
+    def batch_range(range_values, clip_negative=False):
+        if range_values == 'image':
+            i_min = image.min(axis=sample_axes, keepdims=True)
+            i_max = image.max(axis=sample_axes, keepdims=True)
+            return i_min.astype(float_dtype), i_max.astype(float_dtype)
+        i_min, i_max = intensity_range(image, range_values)
+        i_min = cp.full(range_shape, i_min, dtype=float_dtype)
+        if clip_negative is not False:
+            clipped_min = intensity_range(image, range_values,
+                                          clip_negative=True)[0]
+            i_min = cp.where(clip_negative, clipped_min, i_min)
+        return i_min, cp.full(range_shape, i_max, dtype=float_dtype)
+
+    imin, imax = batch_range(in_range)
+    omin, omax = batch_range(out_range, clip_negative=(imin >= 0))
+
+    image = cp.clip(image, imin, imax)
+    # Constant images are clipped directly to the output range
+    is_constant = imin == imax
+    scale = cp.where(is_constant, 1, imax - imin)
+    rescaled = (image - imin) / scale * (omax - omin) + omin
+    rescaled = cp.where(is_constant, cp.clip(image, omin, omax), rescaled)
+    return rescaled.astype(out_dtype, copy=False)
+
+
 def _assert_non_negative(image):
 
     if cp.any(image < 0):  # synchronize!
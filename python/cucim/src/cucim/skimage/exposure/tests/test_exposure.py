@@ -341,6 +341,44 @@ def test_rescale_float_output():
     assert output_image.dtype == float
 
 
+@pytest.mark.parametrize('dtype', [cp.uint8, cp.float32, cp.float64])
+@pytest.mark.parametrize('in_range, out_range', [('image', 'dtype'),
+                                                 ('image', (0, 1)),
+                                                 ((0, 50), 'image')])
+def test_rescale_batch(dtype, in_range, out_range):
+    rng = cp.random.default_rng(0)
+    images = (rng.random((5, 16, 16)) * 100
+              * cp.arange(1, 6)[:, None, None]).astype(dtype)
+    images[2] = 30  # constant image
+    out = exposure.rescale_intensity(images, in_range, out_range,
+                                     batch_axis=0)
+    for image, rescaled in zip(images, out):
+        expected = exposure.rescale_intensity(image, in_range, out_range)
+        assert rescaled.dtype == expected.dtype
+        assert_array_almost_equal(rescaled, expected, decimal=5)
+
+
+@pytest.mark.parametrize('dtype', [cp.uint8, cp.int16, cp.float32])
+def test_histogram_batch(dtype):
+    rng = cp.random.default_rng(0)
+    images = (rng.random((4, 20, 30)) * 100
+              * cp.arange(1, 5)[:, None, None]).astype(dtype)
+    images[1] = 3  # constant image
+    hist, bin_centers = exposure.histogram(images, nbins=64, batch_axis=0)
+    assert hist.shape == bin_centers.shape
+    assert hist.shape[0] == 4
+    for i, image in enumerate(images):
+        expected_hist, expected_centers = exposure.histogram(image, nbins=64)
+        nbins = expected_hist.size
+        assert_array_equal(hist[i, :nbins], expected_hist)
+        assert_array_almost_equal(bin_centers[i, :nbins], expected_centers)
+        assert not hist[i, nbins:].any()
+
+    hist, _ = exposure.histogram(images, nbins=64, normalize=True,
+                                 batch_axis=0)
+    assert_array_almost_equal(hist.sum(axis=1), 1)
+
+
 def test_rescale_raises_on_incorrect_out_range():
     image = cp.array([-128, 0, 127], dtype=np.int8)
     with pytest.raises(ValueError):
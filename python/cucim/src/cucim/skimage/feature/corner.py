@@ -4,10 +4,10 @@ from warnings import warn
 import cupy as cp
 import numpy as np
 from cupyx.scipy import ndimage as ndi
-from scipy import spatial  # TODO: use RAPIDS cuSpatial?
 
 # from ..transform import integral_image
 from .. import img_as_float
+from .._shared.coord import _suppress_close_points
 from .peak import peak_local_max
 from .util import _prepare_grayscale_input_nD
 
@@ -279,6 +279,50 @@ def _image_orthogonal_matrix22_eigvals(M00, M01, M11):
     return l1, l2
 
 
+_image_symmetric_real33_eigvals = cp.ElementwiseKernel(
+    'F M00, F M01, F M02, F M11, F M12, F M22',
+    'F l1, F l2, F l3',
+    """
+    // Closed-form eigenvalues of a symmetric 3x3 matrix, see:
+    // Oliver K. Smith. 1961. Eigenvalues of a symmetric 3 x 3 matrix.
+    // Commun. ACM 4, 4 (April 1961), 168.
+    const double pi = 3.14159265358979323846;
+    double a00 = M00, a01 = M01, a02 = M02;
+    double a11 = M11, a12 = M12, a22 = M22;
+    double e1, e2, e3;
+    double p1 = a01 * a01 + a02 * a02 + a12 * a12;
+    if (p1 == 0) {
+        // diagonal matrix
+        e1 = max(max(a00, a11), a22);
+        e3 = min(min(a00, a11), a22);
+        e2 = a00 + a11 + a22 - e1 - e3;
+    } else {
+        double q = (a00 + a11 + a22) / 3.0;
+        double b00 = a00 - q, b11 = a11 - q, b22 = a22 - q;
+        double p = sqrt((b00 * b00 + b11 * b11 + b22 * b22 + 2.0 * p1) / 6.0);
+        // r = det((A - q I) / p) / 2
+        double r = (b00 * (b11 * b22 - a12 * a12)
+                    - a01 * (a01 * b22 - a12 * a02)
+                    + a02 * (a01 * a12 - b11 * a02)) / (2.0 * p * p * p);
+        double phi;
+        if (r <= -1) {
+            phi = pi / 3.0;
+        } else if (r >= 1) {
+            phi = 0;
+        } else {
+            phi = acos(r) / 3.0;
+        }
+        e1 = q + 2.0 * p * cos(phi);
+        e3 = q + 2.0 * p * cos(phi + (2.0 * pi / 3.0));
+        e2 = min(max(3.0 * q - e1 - e3, e3), e1);
+    }
+    l1 = e1;
+    l2 = e2;
+    l3 = e3;
+    """,
+    name='cucim_skimage_symmetric_real33_eigvals')
+
+
 def _symmetric_compute_eigenvalues(S_elems):
     """Compute eigenvalues from the upperdiagonal entries of a symmetric matrix
 
@@ -298,6 +342,13 @@ def _symmetric_compute_eigenvalues(S_elems):
 
     if len(S_elems) == 3:  # Use fast Cython code for 2D
         eigs = cp.stack(_image_orthogonal_matrix22_eigvals(*S_elems))
+    elif len(S_elems) == 6:
+        # Closed-form eigenvalues for 3D, computed elementwise on the device
+        # instead of storing the full matrices
+        dtype = cp.result_type(*S_elems, cp.float32)
+        S_elems = [e.astype(dtype, copy=False) for e in S_elems]
+        eigs = cp.empty((3,) + S_elems[0].shape, dtype=dtype)
+        _image_symmetric_real33_eigvals(*S_elems, eigs[0], eigs[1], eigs[2])
     else:
         matrices = _symmetric_image(S_elems)
         # eigvalsh returns eigenvalues in increasing order. We want decreasing
@@ -368,18 +419,6 @@ def structure_tensor_eigenvalues(A_elems):
     return _symmetric_compute_eigenvalues(A_elems)
 
 
-"""
-TODO: add an _image_symmetric_real33_eigvals() based on:
-Oliver K. Smith. 1961.
-Eigenvalues of a symmetric 3 × 3 matrix.
-Commun. ACM 4, 4 (April 1961), 168.
-DOI:https://doi.org/10.1145/355578.366316
-
-def _image_symmetric_real33_eigvals(M00, M01, M02, M11, M12, M22):
-
-"""
-
-
 def structure_tensor_eigvals(Axx, Axy, Ayy):
     """Compute eigenvalues of structure tensor.
 
@@ -925,26 +964,11 @@ def corner_peaks(
     )
 
     if len(coords):
-        # TODO: modify to do KDTree on the GPU (cuSpatial?)
-        coords = cp.asnumpy(coords)
-
-        # Use KDtree to find the peaks that are too close to each other
-        tree = spatial.cKDTree(coords)
-
-        rejected_peaks_indices = set()
-        for idx, point in enumerate(coords):
-            if idx not in rejected_peaks_indices:
-                candidates = tree.query_ball_point(
-                    point, r=min_distance, p=p_norm
-                )
-                candidates.remove(idx)
-                rejected_peaks_indices.update(candidates)
-
-        # Remove the peaks that are too close to each other
-        coords = np.delete(coords, tuple(rejected_peaks_indices), axis=0)[
-            :num_peaks
-        ]
-        coords = cp.asarray(coords)
+        # Remove the peaks that are too close to each other (at most
+        # `min_distance` from a higher peak)
+        keep = _suppress_close_points(coords, min_distance, p_norm,
+                                      inclusive=True)
+        coords = coords[keep][:num_peaks]
 
     if indices:
         return coords
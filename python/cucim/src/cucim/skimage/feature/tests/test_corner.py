@@ -1,3 +1,5 @@
+from itertools import combinations_with_replacement
+
 import cupy as cp
 import numpy as np
 import pytest
@@ -593,3 +595,18 @@ def test_blank_image_nans():
 #     expected_orientations_degree = cp.asarray([45, 135, -45, -135])
 #     assert_array_equal(actual_orientations_degrees,
 #                        expected_orientations_degree)
+
+
+def test_hessian_matrix_eigvals_3d_eigvalsh():
+    rng = cp.random.default_rng(0)
+    image = rng.random((12, 14, 16))
+    H = hessian_matrix(image, sigma=1.5)
+    E = hessian_matrix_eigvals(H)
+
+    matrices = cp.zeros(image.shape + (3, 3))
+    pairs = combinations_with_replacement(range(3), 2)
+    for idx, (row, col) in enumerate(pairs):
+        matrices[..., row, col] = H[idx]
+        matrices[..., col, row] = H[idx]
+    expected = cp.moveaxis(cp.linalg.eigvalsh(matrices)[..., ::-1], -1, 0)
+    assert_array_almost_equal(E, expected)
@@ -4,14 +4,15 @@ import cupy as cp
 import numpy as np
 from cupyx.scipy import ndimage as ndi
 
-from .._shared.utils import convert_to_float, warn
+from .._shared.utils import _sample_axes, convert_to_float, warn
 from ..util import img_as_float
 
 __all__ = ['gaussian', 'difference_of_gaussians']
 
 
 def gaussian(image, sigma=1, output=None, mode='nearest', cval=0,
-             multichannel=None, preserve_range=False, truncate=4.0):
+             multichannel=None, preserve_range=False, truncate=4.0, *,
+             batch_axis=None):
     """Multi-dimensional Gaussian filter.
 
     Parameters
@@ -46,6 +47,10 @@ def gaussian(image, sigma=1, output=None, mode='nearest', cval=0,
         https://scikit-image.org/docs/dev/user_guide/data_types.html
     truncate : float, optional
         Truncate the filter at this many standard deviations.
+    batch_axis : int, optional
+        If given, `image` is a stack of images indexed along this axis. The
+        images are filtered independently (in a single call), and `sigma`
+        and `multichannel` refer to the axes of each image.
 
     Returns
     -------
@@ -96,14 +101,22 @@ def gaussian(image, sigma=1, output=None, mode='nearest', cval=0,
     >>> from skimage.data import astronaut
     >>> image = cp.array(astronaut())
     >>> filtered_img = gaussian(image, sigma=1, multichannel=True)
+    >>> # Stacks of patches are filtered at once, one patch at a time
+    >>> patches = cp.random.random((16, 64, 64))
+    >>> filtered_patches = gaussian(patches, sigma=1, batch_axis=0)
 
     """
 
+    # The first image of the stack, to interpret the sigmas and channels
+    sample = image
+    if batch_axis is not None:
+        batch_axis, _ = _sample_axes(image.ndim, batch_axis)
+        sample = image[(slice(None),) * batch_axis + (0,)]
     spatial_dims = None
     try:
-        spatial_dims = _guess_spatial_dimensions(image)
+        spatial_dims = _guess_spatial_dimensions(sample)
     except ValueError:
-        spatial_dims = image.ndim
+        spatial_dims = sample.ndim
     if spatial_dims is None and multichannel is None:
         msg = ("Images with dimensions (M, N, 3) are interpreted as 2D+RGB "
                "by default. Use `multichannel=False` to interpret as "
@@ -120,10 +133,17 @@ def gaussian(image, sigma=1, output=None, mode='nearest', cval=0,
     if multichannel:
         # do not filter across channels
         if not isinstance(sigma, Iterable):
-            sigma = [sigma] * (image.ndim - 1)
-        if len(sigma) != image.ndim:
+            sigma = [sigma] * (sample.ndim - 1)
+        if len(sigma) != sample.ndim:
             sigma = tuple(sigma) + (0,)  # zero on channels axis
         sigma = tuple(sigma)
+    if batch_axis is not None:
+        # do not filter across images
+        if not isinstance(sigma, Iterable):
+            sigma = [sigma] * sample.ndim
+        sigma = list(sigma)
+        sigma.insert(batch_axis, 0)
+        sigma = tuple(sigma)
     image = convert_to_float(image, preserve_range)
     if output is None:
         output = cp.empty_like(image)
@@ -3,9 +3,13 @@ from warnings import warn
 import numpy as np
 from cupyx.scipy import ndimage as ndi
 
+from ._median_hist import _HISTOGRAM_MIN_WINDOW_SIZE
+from ._median_hist import _can_use_histogram
+from ._median_hist import _rank_filter_hist
+
 
 def median(image, selem=None, out=None, mode='nearest', cval=0.0,
-           behavior='ndimage'):
+           behavior='ndimage', *, algorithm='auto'):
     """Return local median of an image.
 
     Parameters
@@ -42,6 +46,15 @@ def median(image, selem=None, out=None, mode='nearest', cval=0.0,
            ``behavior`` is introduced in 0.15
         .. versionchanged:: 0.16
            Default ``behavior`` has been changed from 'rank' to 'ndimage'
+    algorithm : {'auto', 'histogram', 'sorting'}, optional
+        Algorithm used when ``behavior=='ndimage'``. 'sorting' sorts the
+        values of each window, while 'histogram' slides a histogram of the
+        window over the image, at a cost per pixel that grows with the width
+        of the window instead of its area. 'histogram' is only available for
+        2D uint8 and uint16 images with a rectangular ``selem``. For uint16
+        images, part of the histogram is rebuilt from the whole window when
+        the median changes a lot, so 'auto' only uses it for uint8 images
+        with windows of at least 81 pixels.
 
     Returns
     -------
@@ -54,6 +67,20 @@ def median(image, selem=None, out=None, mode='nearest', cval=0.0,
         filtering offering more flexibility with additional parameters but
         dedicated for unsigned integer images.
 
+    Notes
+    -----
+    The histogram algorithm follows [1]_ and [2]_.
+
+    References
+    ----------
+    .. [1] T. Huang, G. Yang and G. Tang, "A fast two-dimensional median
+           filtering algorithm," IEEE Transactions on Acoustics, Speech, and
+           Signal Processing, vol. 27, no. 1, pp. 13-18, 1979.
+           :DOI:`10.1109/TASSP.1979.1163188`
+    .. [2] S. Perreault and P. Hebert, "Median Filtering in Constant Time,"
+           IEEE Transactions on Image Processing, vol. 16, no. 9,
+           pp. 2389-2394, 2007. :DOI:`10.1109/TIP.2007.902329`
+
     Examples
     --------
     >>> import cupy as cp
@@ -75,5 +102,15 @@ def median(image, selem=None, out=None, mode='nearest', cval=0.0,
 
     if selem is None:
         selem = ndi.generate_binary_structure(image.ndim, image.ndim)
+    if algorithm == 'auto':
+        use_histogram = (image.dtype == np.uint8
+                         and selem.size >= _HISTOGRAM_MIN_WINDOW_SIZE
+                         and _can_use_histogram(image, selem, mode))
+    elif algorithm in ('histogram', 'sorting'):
+        use_histogram = algorithm == 'histogram'
+    else:
+        raise ValueError(f"unknown algorithm: {algorithm}")
+    if use_histogram:
+        return _rank_filter_hist(image, selem, out=out, mode=mode, cval=cval)
     return ndi.median_filter(image, footprint=selem, output=out, mode=mode,
                              cval=cval)
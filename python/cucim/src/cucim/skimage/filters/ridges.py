@@ -235,35 +235,28 @@ def meijering(image, sigmas=range(1, 10, 2), alpha=None,
     if black_ridges:
         image = invert(image)
 
-    # Generate empty (n+1)D arrays for storing auxiliary images filtered at
-    # different (sigma) scales
+    # Keep, for every pixel, the maximum over the (sigma) scales computed so
+    # far rather than the images filtered at all scales
     float_dtype = _float_dtype(image)
-    filtered_array = cp.empty(sigmas.shape + image.shape, dtype=float_dtype)
+    filtered_max = cp.zeros(image.shape, dtype=float_dtype)
+
+    # Set coefficients for scaling eigenvalues
+    coefficients = [alpha] * ndim
+    coefficients[0] = 1
 
     # Filtering for all (sigma) scales
-    for i, sigma in enumerate(sigmas):
+    for sigma in sigmas:
 
         # Calculate (sorted) eigenvalues
         eigenvalues = compute_hessian_eigenvalues(image, sigma, sorting='abs',
                                                   mode=mode, cval=cval)
-        # CuPy Backend: do intermediate computations with tiny arrays on the
-        #               CPU
-        # TODO: refactor to avoid host-device transfer
-        eigenvalues = cp.asnumpy(eigenvalues)
 
         if ndim > 1:
 
-            # Set coefficients for scaling eigenvalues
-            coefficients = [alpha] * ndim
-            coefficients[0] = 1
-
             # Compute normalized eigenvalues l_i = e_i + sum_{j!=i} alpha * e_j
-            auxiliary = [np.sum([eigenvalues[i] * np.roll(coefficients, j)[i]
-                         for j in range(ndim)], axis=0) for i in range(ndim)]
-
-            # Get maximum eigenvalues by magnitude
-            auxiliary = auxiliary[-1]
-            auxiliary = cp.asarray(auxiliary)
+            # and get maximum eigenvalues by magnitude
+            auxiliary = sum(eigenvalues[-1] * np.roll(coefficients, j)[-1]
+                            for j in range(ndim))
 
             # Rescale image intensity and avoid ZeroDivisionError
             filtered = _divide_nonzero(auxiliary, cp.min(auxiliary))
@@ -271,11 +264,10 @@ def meijering(image, sigmas=range(1, 10, 2), alpha=None,
             # Remove background
             filtered = cp.where(auxiliary < 0, filtered, 0)
 
-            # Store results in (n+1)D matrices
-            filtered_array[i] = filtered
+            cp.maximum(filtered_max, filtered, out=filtered_max)
 
     # Return for every pixel the maximum value over all (sigma) scales
-    return cp.max(filtered_array, axis=0)
+    return filtered_max
 
 
 def sato(image, sigmas=range(1, 10, 2), black_ridges=True,
@@ -344,13 +336,13 @@ def sato(image, sigmas=range(1, 10, 2), black_ridges=True,
     if not black_ridges:
         image = invert(image)
 
-    # Generate empty (n+1)D arrays for storing auxiliary images filtered
-    # at different (sigma) scales
+    # Keep, for every pixel, the maximum over the (sigma) scales computed so
+    # far rather than the images filtered at all scales
     float_dtype = _float_dtype(image)
-    filtered_array = cp.empty(sigmas.shape + image.shape, dtype=float_dtype)
+    filtered_max = cp.zeros(image.shape, dtype=float_dtype)
 
     # Filtering for all (sigma) scales
-    for i, sigma in enumerate(sigmas):
+    for sigma in sigmas:
 
         # Calculate (sorted) eigenvalues
         lamba1, *lambdas = compute_hessian_eigenvalues(image, sigma,
@@ -364,11 +356,13 @@ def sato(image, sigmas=range(1, 10, 2), black_ridges=True,
         # filtered = cp.abs(cp.multiply.reduce(lambdas)) ** (1 / len(lambdas))
         filtered = cp.abs(reduce(cp.multiply, lambdas)) ** (1 / len(lambdas))
 
-        # Remove background and store results in (n+1)D matrices
-        filtered_array[i] = cp.where(lambdas[-1] > 0, filtered, 0)
+        # Remove background
+        filtered = cp.where(lambdas[-1] > 0, filtered, 0)
+
+        cp.maximum(filtered_max, filtered, out=filtered_max)
 
     # Return for every pixel the maximum value over all (sigma) scales
-    return cp.max(filtered_array, axis=0)
+    return filtered_max
 
 
 def frangi(image, sigmas=range(1, 10, 2), scale_range=None,
@@ -465,14 +459,13 @@ def frangi(image, sigmas=range(1, 10, 2), scale_range=None,
     if black_ridges:
         image = invert(image)
 
-    # Generate empty (n+1)D arrays for storing auxiliary images filtered
-    # at different (sigma) scales
+    # Keep, for every pixel, the maximum over the (sigma) scales computed so
+    # far rather than the images filtered at all scales
     float_dtype = _float_dtype(image)
-    filtered_array = cp.empty(sigmas.shape + image.shape, dtype=float_dtype)
-    lambdas_array = cp.empty_like(filtered_array)
+    filtered_max = cp.zeros(image.shape, dtype=float_dtype)
 
     # Filtering for all (sigma) scales
-    for i, sigma in enumerate(sigmas):
+    for sigma in sigmas:
 
         # Calculate (abs sorted) eigenvalues
         lambda1, *lambdas = compute_hessian_eigenvalues(image, sigma,
@@ -499,19 +492,19 @@ def frangi(image, sigmas=range(1, 10, 2), scale_range=None,
         r_g = sum([lambda1 * lambda1] +
                   [lambdai * lambdai for lambdai in lambdas])
 
-        # Compute output image for given (sigma) scale and store results in
-        # (n+1)D matrices, see equations (13) and (15) in reference [1]_
-        filtered_array[i] = ((1 - cp.exp(-r_a / alpha_sq))
-                             * cp.exp(-r_b / beta_sq)
-                             * (1 - cp.exp(-r_g / gamma_sq)))
+        # Compute output image for given (sigma) scale, see equations (13)
+        # and (15) in reference [1]_
+        filtered = ((1 - cp.exp(-r_a / alpha_sq))
+                    * cp.exp(-r_b / beta_sq)
+                    * (1 - cp.exp(-r_g / gamma_sq)))
 
-        lambdas_array[i] = cp.max(cp.asarray(lambdas), axis=0)
+        # Remove background
+        filtered[reduce(cp.maximum, lambdas) > 0] = 0
 
-    # Remove background
-    filtered_array[lambdas_array > 0] = 0
+        cp.maximum(filtered_max, filtered, out=filtered_max)
 
     # Return for every pixel the maximum value over all (sigma) scales
-    return cp.max(filtered_array, axis=0)
+    return filtered_max
 
 
 def hessian(image, sigmas=range(1, 10, 2), scale_range=None, scale_step=None,
@@ -126,6 +126,27 @@ def test_auto_sigma2(s):
     assert cp.allclose(dog, dog2)
 
 
+@pytest.mark.parametrize('batch_axis', [0, -1])
+def test_batch(batch_axis):
+    rng = cp.random.default_rng(0)
+    images = rng.random((5, 24, 32))
+    images = cp.moveaxis(images, 0, batch_axis)
+    filtered = gaussian(images, sigma=(1, 2), batch_axis=batch_axis)
+    for i in range(5):
+        image = cp.take(images, i, axis=batch_axis)
+        cp.testing.assert_allclose(cp.take(filtered, i, axis=batch_axis),
+                                   gaussian(image, sigma=(1, 2)))
+
+
+def test_batch_multichannel():
+    rng = cp.random.default_rng(0)
+    images = rng.random((4, 24, 32, 3))
+    filtered = gaussian(images, sigma=1, multichannel=True, batch_axis=0)
+    for image, expected in zip(images, filtered):
+        cp.testing.assert_allclose(
+            expected, gaussian(image, sigma=1, multichannel=True))
+
+
 def test_dog_invalid_sigma_dims():
     image = cp.ones((5, 5, 3))
     with pytest.raises(ValueError):
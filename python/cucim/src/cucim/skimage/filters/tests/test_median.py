@@ -4,6 +4,7 @@ import pytest
 from cupy.testing import assert_allclose
 from cupyx.scipy import ndimage
 
+from cucim.skimage.filters import _median
 from cucim.skimage.filters import median
 
 # from cucim.skimage.filters import rank
@@ -72,3 +73,48 @@ def test_median_preserve_dtype(image, dtype):
 )
 def test_median(img, behavior):
     median(img, behavior=behavior)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+@pytest.mark.parametrize("mode",
+                         ['reflect', 'constant', 'nearest', 'mirror', 'wrap'])
+@pytest.mark.parametrize("shape", [(9, 9), (15, 6)])
+def test_median_histogram(dtype, mode, shape):
+    rng = cp.random.RandomState(0)
+    img = rng.randint(0, np.iinfo(dtype).max, size=(73, 65)).astype(dtype)
+    selem = cp.ones(shape, dtype=bool)
+    expected = median(img, selem, mode=mode, cval=5, algorithm='sorting')
+    result = median(img, selem, mode=mode, cval=5, algorithm='histogram')
+    assert result.dtype == dtype
+    assert_allclose(result, expected)
+
+
+def test_median_histogram_auto(image):
+    img = cp.tile(image, (8, 8))
+    selem = cp.ones((11, 11), dtype=bool)
+    assert_allclose(median(img, selem),
+                    ndimage.median_filter(img, footprint=selem,
+                                          mode='nearest'))
+
+
+def test_median_histogram_auto_uint16(monkeypatch):
+    # uint16 images are sorted unless the histogram algorithm is requested
+    def rank_filter_hist(*args, **kwargs):
+        raise AssertionError('unexpected histogram algorithm')
+
+    monkeypatch.setattr(_median, '_rank_filter_hist', rank_filter_hist)
+    img = cp.arange(40 * 30, dtype=np.uint16).reshape(40, 30) * 50
+    selem = cp.ones((11, 11), dtype=bool)
+    assert_allclose(median(img, selem),
+                    ndimage.median_filter(img, footprint=selem,
+                                          mode='nearest'))
+
+
+def test_median_histogram_unsupported(image):
+    with pytest.raises(ValueError):
+        median(image.astype(np.float32), algorithm='histogram')
+    with pytest.raises(ValueError):
+        median(image, cp.asarray([[0, 1, 0], [1, 1, 1], [0, 1, 0]]),
+               algorithm='histogram')
+    with pytest.raises(ValueError):
+        median(image, algorithm='unknown')
@@ -261,3 +261,16 @@ def test_output_dtype(func, dtype):
 
     out = func(img, sigmas=[1], mode='reflect')
     assert out.dtype == dtype
+
+
+@pytest.mark.parametrize('func', [sato, meijering, frangi])
+@pytest.mark.parametrize('ndim', [2, 3])
+def test_multiscale_maximum(func, ndim):
+    rng = cp.random.default_rng(0)
+    img = rng.random((24,) * ndim)
+    sigmas = [1, 2, 3]
+
+    out = func(img, sigmas=sigmas, mode='reflect')
+    expected = cp.stack([func(img, sigmas=[sigma], mode='reflect')
+                         for sigma in sigmas]).max(axis=0)
+    assert_allclose(out, expected)
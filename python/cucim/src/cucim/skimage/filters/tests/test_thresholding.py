@@ -13,6 +13,7 @@ from cucim.skimage._shared import testing
 from cucim.skimage._shared._warnings import expected_warnings
 from cucim.skimage.color import rgb2gray
 from cucim.skimage.exposure import histogram
+from cucim.skimage.filters import thresholding
 from cucim.skimage.filters.thresholding import _cross_entropy  # _mean_std,
 from cucim.skimage.filters.thresholding import (threshold_isodata,
                                                 threshold_li, threshold_local,
@@ -291,6 +292,26 @@ def test_otsu_one_color_image_3d():
     assert threshold_otsu(img) == 1
 
 
+@pytest.mark.parametrize('dtype', [cp.uint8, cp.uint16, cp.float32])
+def test_otsu_batch(dtype):
+    rng = cp.random.default_rng(0)
+    images = rng.random((6, 32, 32)) ** cp.arange(1, 7)[:, None, None]
+    images[1, :16] += 0.5
+    if dtype != cp.float32:
+        images *= 100
+    images = images.astype(dtype)
+    images[3] = 7  # constant image
+    thresholds = threshold_otsu(images, batch_axis=0)
+    assert thresholds.shape == (6,)
+    for image, threshold in zip(images, thresholds):
+        assert_array_almost_equal(threshold, threshold_otsu(image))
+
+    # batch along the last axis
+    thresholds_last = threshold_otsu(cp.moveaxis(images, 0, -1),
+                                     batch_axis=-1)
+    assert_array_equal(thresholds_last, thresholds)
+
+
 @cp.testing.with_requires("scikit-image>=0.18")
 def test_li_camera_image():
     image = util.img_as_ubyte(camerad)
@@ -366,6 +387,14 @@ def test_li_negative_inital_guess():
         threshold_li(coinsd, initial_guess=-5)
 
 
+@pytest.mark.parametrize('image', [coinsd, util.img_as_float(coinsd)])
+def test_li_device_histogram(image, monkeypatch):
+    # Same result when the iteration runs on the device
+    expected = threshold_li(image)
+    monkeypatch.setattr(thresholding, '_LI_MAX_HOST_VALUES', 0)
+    assert threshold_li(image) == pytest.approx(expected)
+
+
 def test_li_pathological_arrays():
     # See https://github.com/scikit-image/scikit-image/issues/4140
     a = cp.array([0, 0, 1, 0, 0, 1, 0, 1])
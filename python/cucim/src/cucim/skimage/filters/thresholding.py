@@ -9,7 +9,7 @@ from cupyx.scipy import ndimage as ndi
 
 from cucim import _misc
 
-from .._shared.utils import check_nD, warn
+from .._shared.utils import _sample_axes, check_nD, warn
 from ..exposure import histogram
 from ..transform import integral_image
 from ..util import dtype_limits
@@ -296,7 +296,35 @@ def _validate_image_histogram(image, hist, nbins=None):
     return counts.astype(float), bin_centers
 
 
-def threshold_otsu(image=None, nbins=256, *, hist=None):
+def _batch_threshold_otsu(image, nbins, batch_axis):
+    """Otsu thresholds of the images of a stack, computed at once."""
+    counts, bin_centers = histogram(image, nbins, source_range='image',
+                                    batch_axis=batch_axis)
+    counts = counts.astype(float)
+
+    # class probabilities for all possible thresholds
+    weight1 = _cumsum(counts, axis=1)
+    weight2 = _cumsum(counts[:, ::-1], axis=1)[:, ::-1]
+    # class means for all possible thresholds (the bins before the first
+    # value or after the last value of an image are empty)
+    mean1 = _cumsum(counts * bin_centers, axis=1) / cp.maximum(weight1, 1)
+    mean2 = (_cumsum((counts * bin_centers)[:, ::-1], axis=1)
+             / cp.maximum(weight2[:, ::-1], 1))[:, ::-1]
+
+    variance12 = (weight1[:, :-1] * weight2[:, 1:]
+                  * (mean1[:, :-1] - mean2[:, 1:]) ** 2)
+
+    idx = cp.argmax(variance12, axis=1)
+    threshold = cp.take_along_axis(bin_centers, idx[:, cp.newaxis], axis=1)
+
+    # Constant images have a single nonzero bin: return their value
+    first_pixels = cp.moveaxis(image, batch_axis, 0).reshape(
+        image.shape[batch_axis], -1)[:, 0]
+    is_constant = cp.count_nonzero(counts, axis=1) == 1
+    return cp.where(is_constant, first_pixels, threshold[:, 0])
+
+
+def threshold_otsu(image=None, nbins=256, *, hist=None, batch_axis=None):
     """Return threshold value based on Otsu's method.
 
     Either image or hist must be provided. If hist is provided, the actual
@@ -313,12 +341,17 @@ def threshold_otsu(image=None, nbins=256, *, hist=None):
         Histogram from which to determine the threshold, and optionally a
         corresponding array of bin center intensities.
         An alternative use of this function is to pass it only hist.
+    batch_axis : int, optional
+        If given, `image` is a stack of images indexed along this axis, and
+        the threshold of each image is computed. The histograms and the
+        thresholds of all the images are computed at once.
 
     Returns
     -------
-    threshold : float
+    threshold : float or array
         Upper threshold value. All pixels with an intensity higher than
-        this value are assumed to be foreground.
+        this value are assumed to be foreground. If `batch_axis` is given,
+        an array with the threshold of each image.
 
     References
     ----------
@@ -331,10 +364,22 @@ def threshold_otsu(image=None, nbins=256, *, hist=None):
     >>> thresh = threshold_otsu(image)
     >>> binary = image <= thresh
 
+    Per-patch thresholds of a stack of patches:
+
+    >>> patches = cp.random.random((16, 64, 64))
+    >>> thresh = threshold_otsu(patches, batch_axis=0)
+    >>> binary = patches <= thresh[:, cp.newaxis, cp.newaxis]
+
     Notes
     -----
     The input image must be grayscale.
     """
+    if batch_axis is not None:
+        if image is None:
+            raise ValueError("batch_axis requires an image")
+        batch_axis, _ = _sample_axes(image.ndim, batch_axis)
+        return _batch_threshold_otsu(image, nbins, batch_axis)
+
     if image is not None and image.ndim > 2 and image.shape[-1] in (3, 4):
         msg = "threshold_otsu is expected to work correctly only for " \
               "grayscale images; image shape {0} looks like an RGB image"
@@ -602,6 +647,24 @@ def _cross_entropy(image, threshold, bins=_DEFAULT_ENTROPY_BINS):
     return nu
 
 
+# Images with at most this many distinct values have their Li iteration run on
+# the host, after a single copy of the histogram.
+_LI_MAX_HOST_VALUES = 65536
+
+
+def _li_histogram(image):
+    """Distinct values of a non-negative image, and their counts."""
+    if image.dtype.kind == 'u' and image.dtype.itemsize <= 2:
+        counts = cp.bincount(image.ravel())
+        values = cp.flatnonzero(counts)
+        counts = counts[values]
+    else:
+        values, counts = cp.unique(image, return_counts=True)
+    if values.size <= _LI_MAX_HOST_VALUES:
+        return np, cp.asnumpy(values), cp.asnumpy(counts)
+    return cp, values, counts
+
+
 def threshold_li(image, *, tolerance=None, initial_guess=None,
                  iter_callback=None):
     """Compute threshold value by Li's iterative Minimum Cross Entropy method.
@@ -680,17 +743,28 @@ def threshold_li(image, *, tolerance=None, initial_guess=None,
     # Li's algorithm requires positive image (because of log(mean))
     image_min = cp.min(image)
     image -= image_min
-    tolerance = tolerance or cp.min(cp.diff(cp.unique(image))) / 2
+    image_min = float(image_min)
+
+    # The iteration only needs the means of the values above and below the
+    # threshold: compute them from the cumulative sums of the histogram
+    # (on the host, unless the image has too many distinct values)
+    xp, values, counts = _li_histogram(image)
+    values = values.astype(np.float64)
+    cumulative_counts = xp.cumsum(counts)
+    cumulative_sums = xp.cumsum(counts * values)
+    total_count = cumulative_counts[-1]
+    total_sum = cumulative_sums[-1]
+    tolerance = tolerance or float(xp.min(xp.diff(values))) / 2
 
     # Initial estimate for iteration. See "initial_guess" in the parameter list
     if initial_guess is None:
-        t_next = cp.mean(image)
+        t_next = float(total_sum / total_count)
     elif callable(initial_guess):
-        t_next = initial_guess(image)
+        t_next = float(initial_guess(image))
     elif cp.isscalar(initial_guess):  # convert to new, positive image range
         t_next = initial_guess - image_min
-        image_max = cp.max(image) + image_min
-        if not 0 < t_next < cp.max(image):
+        image_max = float(values[-1]) + image_min
+        if not 0 < t_next < float(values[-1]):
             msg = ('The initial guess for threshold_li must be within the '
                    'range of the image. Got {} for image min {} and max {} '
                    .format(initial_guess, image_min, image_max))
@@ -713,12 +787,14 @@ def threshold_li(image, *, tolerance=None, initial_guess=None,
     # new and old threshold values is less than the tolerance
     while abs(t_next - t_curr) > tolerance:
         t_curr = t_next
-        foreground = image > t_curr
-        mean_fore = cp.mean(image[foreground])
-        mean_back = cp.mean(image[~foreground])
+        # the background is made of the values up to index k
+        k = int(xp.searchsorted(values, t_curr, side='right')) - 1
+        mean_back = cumulative_sums[k] / cumulative_counts[k]
+        mean_fore = ((total_sum - cumulative_sums[k])
+                     / (total_count - cumulative_counts[k]))
 
-        t_next = ((mean_back - mean_fore) /
-                  (cp.log(mean_back) - cp.log(mean_fore)))
+        t_next = float((mean_back - mean_fore) /
+                       (xp.log(mean_back) - xp.log(mean_fore)))
 
         if iter_callback is not None:
             iter_callback(t_next + image_min)
@@ -783,29 +859,28 @@ def threshold_minimum(image=None, nbins=256, max_iter=10000, *, hist=None):
     def find_local_maxima_idx(hist):
         # We can't use scipy.signal.argrelmax
         # as it fails on plateaus
-        maximum_idxs = list()
-        direction = 1
-
-        # TODO: better to transfer hist back to cpu?
-        hist = cp.asnumpy(hist)  # device synchronize
-
-        for i in range(hist.shape[0] - 1):
-            if direction > 0:
-                if hist[i + 1] < hist[i]:
-                    direction = -1
-                    maximum_idxs.append(i)
-            else:
-                if hist[i + 1] > hist[i]:
-                    direction = 1
-
-        return maximum_idxs
+        idx = np.flatnonzero(np.diff(hist))
+        direction = np.sign(hist[idx + 1] - hist[idx])
+        # a maximum is where the histogram decreases after having increased
+        # (or from the start), the last index of a plateau
+        previous_direction = np.concatenate(([1], direction[:-1]))
+        return idx[(direction < 0) & (previous_direction > 0)]
+
+    def smooth(hist):
+        # uniform filter of size 3, with reflected boundaries
+        padded = np.concatenate((hist[:1], hist, hist[-1:]))
+        weight = 1 / 3
+        return (padded[:-2] * weight + padded[1:-1] * weight
+                + padded[2:] * weight)
 
     counts, bin_centers = _validate_image_histogram(image, hist, nbins)
 
-    smooth_hist = counts.astype(cp.float64, copy=False)
+    # The histogram is small: smooth it on the host, rather than copying it
+    # back at each iteration to find its maxima
+    smooth_hist = cp.asnumpy(counts).astype(np.float64, copy=False)
 
     for counter in range(max_iter):
-        smooth_hist = ndi.uniform_filter1d(smooth_hist, 3)
+        smooth_hist = smooth(smooth_hist)
         maximum_idxs = find_local_maxima_idx(smooth_hist)
         if len(maximum_idxs) < 3:
             break
@@ -817,7 +892,7 @@ def threshold_minimum(image=None, nbins=256, max_iter=10000, *, hist=None):
                            'smoothing')
 
     # Find lowest point between the maxima
-    threshold_idx = cp.argmin(
+    threshold_idx = np.argmin(
         smooth_hist[maximum_idxs[0]:maximum_idxs[1] + 1]
     )
 
@@ -2,7 +2,8 @@ import functools
 
 import cupy as cp
 
-from cucim.skimage._shared.utils import check_shape_equality, warn
+from cucim.skimage._shared.utils import (_sample_axes, check_shape_equality,
+                                         warn)
 from cucim.skimage.util.dtype import dtype_range
 
 __all__ = ['mean_squared_error',
@@ -22,7 +23,15 @@ def _as_floats(image0, image1):
     return image0, image1
 
 
-def mean_squared_error(image0, image1):
+def _reduction_axes(image, batch_axis):
+    """Axes to reduce over: all of them, or those of each image of a stack.
+    """
+    if batch_axis is None:
+        return None
+    return _sample_axes(image.ndim, batch_axis)[1]
+
+
+def mean_squared_error(image0, image1, *, batch_axis=None):
     """
     Compute the mean-squared error between two images.
 
@@ -30,11 +39,15 @@ def mean_squared_error(image0, image1):
     ----------
     image0, image1 : ndarray
         Images.  Any dimensionality, must have same shape.
+    batch_axis : int, optional
+        If given, the images are stacks of images indexed along this axis,
+        and the metric of each pair of images is computed.
 
     Returns
     -------
-    mse : float
-        The mean-squared error (MSE) metric.
+    mse : float or ndarray
+        The mean-squared error (MSE) metric, for each image if `batch_axis`
+        is given.
 
     Notes
     -----
@@ -46,10 +59,12 @@ def mean_squared_error(image0, image1):
     check_shape_equality(image0, image1)
     image0, image1 = _as_floats(image0, image1)
     diff = image0 - image1
-    return cp.mean(diff * diff, dtype=cp.float64)
+    return cp.mean(diff * diff, axis=_reduction_axes(diff, batch_axis),
+                   dtype=cp.float64)
 
 
-def normalized_root_mse(image_true, image_test, *, normalization='euclidean'):
+def normalized_root_mse(image_true, image_test, *, normalization='euclidean',
+                        batch_axis=None):
     """
     Compute the normalized root mean-squared error (NRMSE) between two
     images.
@@ -77,11 +92,14 @@ def normalized_root_mse(image_true, image_test, *, normalization='euclidean'):
 
         - 'min-max'   : normalize by the intensity range of ``im_true``.
         - 'mean'      : normalize by the mean of ``im_true``
+    batch_axis : int, optional
+        If given, the images are stacks of images indexed along this axis,
+        and the metric of each pair of images is computed.
 
     Returns
     -------
-    nrmse : float
-        The NRMSE metric.
+    nrmse : float or ndarray
+        The NRMSE metric, for each image if `batch_axis` is given.
 
     Notes
     -----
@@ -99,18 +117,22 @@ def normalized_root_mse(image_true, image_test, *, normalization='euclidean'):
 
     # Ensure that both 'Euclidean' and 'euclidean' match
     normalization = normalization.lower()
+    axis = _reduction_axes(image_true, batch_axis)
     if normalization == 'euclidean':
-        denom = cp.sqrt(cp.mean((image_true * image_true), dtype=cp.float64))
+        denom = cp.sqrt(cp.mean((image_true * image_true), axis=axis,
+                                dtype=cp.float64))
     elif normalization == 'min-max':
-        denom = image_true.max() - image_true.min()
+        denom = image_true.max(axis=axis) - image_true.min(axis=axis)
     elif normalization == 'mean':
-        denom = image_true.mean()
+        denom = image_true.mean(axis=axis)
     else:
         raise ValueError("Unsupported norm_type")
-    return cp.sqrt(mean_squared_error(image_true, image_test)) / denom
+    mse = mean_squared_error(image_true, image_test, batch_axis=batch_axis)
+    return cp.sqrt(mse) / denom
 
 
-def peak_signal_noise_ratio(image_true, image_test, *, data_range=None):
+def peak_signal_noise_ratio(image_true, image_test, *, data_range=None,
+                            batch_axis=None):
     """
     Compute the peak signal to noise ratio (PSNR) for an image.
 
@@ -124,11 +146,14 @@ def peak_signal_noise_ratio(image_true, image_test, *, data_range=None):
         The data range of the input image (distance between minimum and
         maximum possible values).  By default, this is estimated from the image
         data-type.
+    batch_axis : int, optional
+        If given, the images are stacks of images indexed along this axis,
+        and the metric of each pair of images is computed.
 
     Returns
     -------
-    psnr : float
-        The PSNR metric.
+    psnr : float or ndarray
+        The PSNR metric, for each image if `batch_axis` is given.
 
     Notes
     -----
@@ -153,7 +178,11 @@ def peak_signal_noise_ratio(image_true, image_test, *, data_range=None):
             raise ValueError(
                 "im_true has intensity values outside the range expected for "
                 "its data type.  Please manually specify the data_range")
-        if true_min >= 0:
+        if batch_axis is not None:
+            true_min = cp.min(image_true,
+                              axis=_reduction_axes(image_true, batch_axis))
+            data_range = cp.where(true_min >= 0, dmax, dmax - dmin)
+        elif true_min >= 0:
             # most common case (255 for uint8, 1 for float)
             data_range = dmax
         else:
@@ -161,5 +190,5 @@ def peak_signal_noise_ratio(image_true, image_test, *, data_range=None):
 
     image_true, image_test = _as_floats(image_true, image_test)
 
-    err = mean_squared_error(image_true, image_test)
+    err = mean_squared_error(image_true, image_test, batch_axis=batch_axis)
     return 10 * cp.log10((data_range * data_range) / err)
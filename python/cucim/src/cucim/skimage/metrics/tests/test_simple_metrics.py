@@ -111,3 +111,17 @@ def test_NRMSE_errors():
     # invalid normalization name
     with pytest.raises(ValueError):
         normalized_root_mse(x, x, normalization="foo")
+
+
+@pytest.mark.parametrize('metric', [mean_squared_error, normalized_root_mse,
+                                    peak_signal_noise_ratio])
+def test_batch(metric):
+    images_true = cp.stack([cam[:256, :256], cam[256:, :256],
+                            cam[:256, 256:]])
+    images_test = cp.stack([cam_noisy[:256, :256], cam_noisy[256:, :256],
+                            cam_noisy[:256, 256:]])
+    values = metric(images_true, images_test, batch_axis=0)
+    assert values.shape == (3,)
+    for image_true, image_test, value in zip(images_true, images_test,
+                                             values):
+        assert_almost_equal(value, metric(image_true, image_test))
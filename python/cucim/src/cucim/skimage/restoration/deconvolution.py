@@ -1,26 +1,23 @@
 """Implementations restoration functions"""
 
-import math
+from collections import OrderedDict
 
 import cupy as cp
 import cupy.random as npr
 import numpy as np
 
-# TODO: use cupyx.scipy.signal once upstream fftconvolve and
-#       choose_conv_method for > 1d has been implemented.
-import cucim.skimage._vendored
-
+from .._shared.fft import fftmodule as fft
+from .._shared.fft import next_fast_len
+from .._shared.utils import _sample_axes
 from . import uft
 
-# from cupyx.scipy.signal import convolve
-# from cupyx.scipy import signal
-
-
-signal = cucim.skimage._vendored
-
-
 __keywords__ = "restoration, image, deconvolution"
 
+# Transforms of the PSFs of the last richardson_lucy calls: the tiles of an
+# image are usually deconvolved one at a time with the same PSF
+_PSF_CACHE_NBYTES = 256 * 1024 * 1024
+_psf_ft_cache = OrderedDict()
+
 
 def _float_dtype(image):
     if image.dtype.kind != 'f':
@@ -28,6 +25,46 @@ def _float_dtype(image):
     return cp.result_type(image.dtype, cp.float32)
 
 
+def _psf_transforms(psf, fft_shape, axes):
+    """Transforms of `psf` and of its mirror on `fft_shape`.
+
+    The transforms of the most recently used PSFs are cached, up to
+    ``_PSF_CACHE_NBYTES`` bytes.
+    """
+    key = (cp.cuda.Device().id, psf.dtype.str, psf.shape, fft_shape,
+           cp.asnumpy(psf).tobytes())
+    transforms = _psf_ft_cache.pop(key, None)
+    if transforms is None:
+        mirror = psf[(slice(None, None, -1),) * psf.ndim]
+        transforms = (fft.rfftn(psf, fft_shape, axes=axes),
+                      fft.rfftn(mirror, fft_shape, axes=axes))
+    nbytes = sum(ft.nbytes for ft in transforms)
+    if nbytes <= _PSF_CACHE_NBYTES:
+        _psf_ft_cache[key] = transforms
+        while (sum(ft.nbytes for value in _psf_ft_cache.values()
+                   for ft in value) > _PSF_CACHE_NBYTES):
+            _psf_ft_cache.popitem(last=False)
+    return transforms
+
+
+@cp.memoize(for_each_device=True)
+def _get_wiener_sample_kernel():
+    # Sample of Eq. 27 p(circX^k | gn^k-1, gx^k-1, y), in Fourier space:
+    # mean Eq. 30 (RLS for fixed gn, gamma0 and gamma1 ...) plus a complex
+    # gaussian excursion with the precision of Eq. 29
+    return cp.ElementwiseKernel(
+        'F atf2, F areg2, C trans_fct_conj, C data_spectrum, F noise_real, '
+        'F noise_imag, F gn, F gx',
+        'C x_sample',
+        """
+        F precision = gn * atf2 + gx * areg2;
+        F scale = sqrt((F)0.5) / sqrt(precision);
+        x_sample = (gn * trans_fct_conj / precision) * data_spectrum
+                   + C(scale * noise_real, scale * noise_imag);
+        """,
+        name='cucim_wiener_sample')
+
+
 def wiener(image, psf, balance, reg=None, is_real=True, clip=True):
     r"""Wiener-Hunt deconvolution
 
@@ -299,28 +336,24 @@ def unsupervised_wiener(image, psf, reg=None, user_params=None, is_real=True,
         data_spectrum = uft.urfft2(image)
     else:
         data_spectrum = uft.ufft2(image)
+    # computed once for all the iterations
+    trans_fct_conj = cp.conj(trans_fct).astype(data_spectrum.dtype,
+                                               copy=False)
+    sample_kernel = _get_wiener_sample_kernel()
+
     # Gibbs sampling
     for iteration in range(params["max_iter"]):
-        # Sample of Eq. 27 p(circX^k | gn^k-1, gx^k-1, y).
-
-        # weighting (correlation in direct space)
-        precision = gn_chain[-1] * atf2 + gx_chain[-1] * areg2  # Eq. 29
-        excursion = (
-            math.sqrt(0.5)
-            / cp.sqrt(precision)
-            * (
-                cp.random.standard_normal(
-                    data_spectrum.shape).astype(float_dtype, copy=False)
-                + 1j * cp.random.standard_normal(
-                    data_spectrum.shape).astype(float_dtype, copy=False)
-            )
-        )
-
-        # mean Eq. 30 (RLS for fixed gn, gamma0 and gamma1 ...)
-        wiener_filter = gn_chain[-1] * cp.conj(trans_fct) / precision
-
-        # sample of X in Fourier space
-        x_sample = wiener_filter * data_spectrum + excursion
+        # Sample of Eq. 27 p(circX^k | gn^k-1, gx^k-1, y), Eq. 29-30
+        noise_real = cp.random.standard_normal(
+            data_spectrum.shape).astype(float_dtype, copy=False)
+        noise_imag = cp.random.standard_normal(
+            data_spectrum.shape).astype(float_dtype, copy=False)
+        # sample of X in Fourier space (a new array at each iteration, as
+        # the callback may keep it)
+        x_sample = sample_kernel(
+            atf2, areg2, trans_fct_conj, data_spectrum, noise_real,
+            noise_imag, cp.asarray(gn_chain[-1], dtype=float_dtype),
+            cp.asarray(gx_chain[-1], dtype=float_dtype))
         if params["callback"]:
             params["callback"](x_sample)
 
@@ -373,7 +406,7 @@ def unsupervised_wiener(image, psf, reg=None, user_params=None, is_real=True,
 
 
 def richardson_lucy(image, psf, iterations=50, clip=True,
-                    filter_epsilon=None):
+                    filter_epsilon=None, *, batch_axis=None):
     """Richardson-Lucy deconvolution.
 
     Parameters
@@ -391,12 +424,22 @@ def richardson_lucy(image, psf, iterations=50, clip=True,
     filter_epsilon: float, optional
        Value below which intermediate results become 0 to avoid division
        by small numbers.
+    batch_axis : int, optional
+       If given, `image` is a stack of images indexed along this axis, all
+       deconvolved with the same `psf` at once.
 
     Returns
     -------
     im_deconv : ndarray
        The deconvolved image.
 
+    Notes
+    -----
+    The convolutions are computed with FFTs. The transforms of ``psf`` and
+    of its mirror are computed once, and reused at every iteration (and for
+    every image of a stack). They are also cached for the next calls with
+    the same PSF and image shape.
+
     Examples
     --------
     >>> import cupy as cp
@@ -416,19 +459,47 @@ def richardson_lucy(image, psf, iterations=50, clip=True,
     float_type = _float_dtype(image)
     image = image.astype(float_type, copy=False)
     psf = psf.astype(float_type, copy=False)
-    im_deconv = cp.full(image.shape, 0.5, dtype=float_type)
-    psf_mirror = cp.ascontiguousarray(psf[::-1, ::-1])
+    if batch_axis is not None:
+        batch_axis, _ = _sample_axes(image.ndim, batch_axis)
+        image = cp.moveaxis(image, batch_axis, 0)
+    ndim = image.ndim - (batch_axis is not None)
+    if psf.ndim != ndim:
+        raise ValueError("psf must have the same number of dimensions as the "
+                         "images")
+    shape = image.shape[image.ndim - ndim:]
+
+    # The circular convolutions on fft_shape are linear convolutions, of
+    # which we keep the center ('same' mode)
+    fft_shape = tuple(next_fast_len(s + k - 1, real=True)
+                      for s, k in zip(shape, psf.shape))
+    axes = tuple(range(-ndim, 0))
+    center = (Ellipsis,) + tuple(slice((k - 1) // 2, (k - 1) // 2 + s)
+                                 for s, k in zip(shape, psf.shape))
+    psf_ft, psf_mirror_ft = _psf_transforms(psf, fft_shape, axes)
+    # zero-padded input of the transforms: only its corner is overwritten
+    padded = cp.zeros(image.shape[:image.ndim - ndim] + fft_shape,
+                      dtype=float_type)
+    corner = (Ellipsis,) + tuple(slice(0, s) for s in shape)
+
+    def convolve(x, kernel_ft):
+        padded[corner] = x
+        x_ft = fft.rfftn(padded, axes=axes)
+        x_ft *= kernel_ft
+        return fft.irfftn(x_ft, fft_shape, axes=axes, overwrite_x=True)[center]
 
+    im_deconv = cp.full(image.shape, 0.5, dtype=float_type)
     for _ in range(iterations):
-        conv = signal.convolve(im_deconv, psf, mode='same')
+        conv = convolve(im_deconv, psf_ft)
         if filter_epsilon:
             relative_blur = cp.where(conv < filter_epsilon, 0, image / conv)
         else:
             relative_blur = image / conv
-        im_deconv *= signal.convolve(relative_blur, psf_mirror, mode='same')
+        im_deconv *= convolve(relative_blur, psf_mirror_ft)
 
     if clip:
         im_deconv[im_deconv > 1] = 1
         im_deconv[im_deconv < -1] = -1
 
+    if batch_axis is not None:
+        im_deconv = cp.moveaxis(im_deconv, 0, batch_axis)
     return im_deconv
@@ -8,6 +8,7 @@ from scipy import signal
 from cucim.skimage import restoration
 from cucim.skimage._shared.testing import fetch
 from cucim.skimage.color import rgb2gray
+from cucim.skimage.restoration import deconvolution
 from cucim.skimage.restoration import uft
 
 
@@ -135,6 +136,62 @@ def test_richardson_lucy():
     cp.testing.assert_allclose(deconvolved, np.load(path), rtol=1e-5)
 
 
+@pytest.mark.parametrize('batch_axis', [0, -1])
+def test_richardson_lucy_batch(batch_axis):
+    rstate = cp.random.RandomState(0)
+    psf = cp.ones((5, 5)) / 25
+    tiles = rstate.standard_normal((3, 48, 40)) * 0.1 + 0.5
+    expected = cp.stack([restoration.richardson_lucy(tile, psf, 5)
+                         for tile in tiles], axis=batch_axis)
+    deconvolved = restoration.richardson_lucy(
+        cp.moveaxis(tiles, 0, batch_axis), psf, 5, batch_axis=batch_axis)
+    cp.testing.assert_allclose(deconvolved, expected, rtol=1e-10)
+
+
+def test_richardson_lucy_psf_cache(monkeypatch):
+    rstate = cp.random.RandomState(0)
+    psf = cp.ones((5, 5)) / 25
+    tile = rstate.standard_normal((48, 40)) * 0.1 + 0.5
+    monkeypatch.setattr(deconvolution, '_psf_ft_cache',
+                        deconvolution.OrderedDict())
+    expected = restoration.richardson_lucy(tile, psf, 5)
+    assert len(deconvolution._psf_ft_cache) == 1
+
+    # The transforms of the PSF are reused
+    cached = next(iter(deconvolution._psf_ft_cache.values()))
+    cp.testing.assert_array_equal(
+        restoration.richardson_lucy(tile, psf, 5), expected)
+    assert next(iter(deconvolution._psf_ft_cache.values())) is cached
+
+    # ... but not for another PSF, or another image shape
+    restoration.richardson_lucy(tile, psf * 0.5, 5)
+    restoration.richardson_lucy(tile[:40], psf, 5)
+    assert len(deconvolution._psf_ft_cache) == 3
+
+    # The least recently used transforms are discarded
+    monkeypatch.setattr(deconvolution, '_PSF_CACHE_NBYTES',
+                        sum(ft.nbytes for ft in cached))
+    restoration.richardson_lucy(tile, psf, 5)
+    assert len(deconvolution._psf_ft_cache) == 1
+    assert next(iter(deconvolution._psf_ft_cache.values())) is cached
+
+
+def test_richardson_lucy_direct_convolution():
+    rstate = np.random.RandomState(0)
+    psf = rstate.uniform(size=(3, 6))
+    psf /= psf.sum()
+    data = rstate.uniform(0.1, 1, size=(41, 37))
+    # reference with direct convolutions
+    im_deconv = np.full(data.shape, 0.5)
+    for _ in range(3):
+        conv = signal.convolve(im_deconv, psf, mode='same', method='direct')
+        im_deconv *= signal.convolve(data / conv, psf[::-1, ::-1],
+                                     mode='same', method='direct')
+    deconvolved = restoration.richardson_lucy(cp.asarray(data),
+                                              cp.asarray(psf), 3, clip=False)
+    cp.testing.assert_allclose(deconvolved, im_deconv, rtol=1e-10)
+
+
 @pytest.mark.parametrize('dtype_image', [np.float32, np.float64])
 @pytest.mark.parametrize('dtype_psf', [np.float32, np.float64])
 @testing.with_requires("scikit-image>=0.18")
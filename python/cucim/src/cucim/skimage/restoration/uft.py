@@ -409,14 +409,18 @@ def ir2tf(imp_resp, shape, dim=None, is_real=True):
     # Zero padding and fill
     irpadded_dtype = imp_resp.dtype if imp_resp.dtype.kind == 'f' else float
     irpadded = cp.zeros(shape, dtype=irpadded_dtype)
-    irpadded[tuple([slice(0, s) for s in imp_resp.shape])] = imp_resp
     # Roll for zero convention of the fft to avoid the phase
     # problem. Work with odd and even size.
-    for axis, axis_size in enumerate(imp_resp.shape):
+    # CuPy Backend: the IR is scattered to its rolled position at once,
+    #               rather than rolling the padded array along each axis
+    indices = []
+    for axis, (axis_size, padded_size) in enumerate(zip(imp_resp.shape,
+                                                        shape)):
+        index = np.arange(axis_size)
         if axis >= imp_resp.ndim - dim:
-            irpadded = cp.roll(irpadded,
-                               shift=-math.floor(axis_size / 2),
-                               axis=axis)
+            index = (index - math.floor(axis_size / 2)) % padded_size
+        indices.append(cp.asarray(index))
+    irpadded[cp.ix_(*indices)] = imp_resp
     if is_real:
         return fft.rfftn(irpadded, axes=range(-dim, 0))
     else:
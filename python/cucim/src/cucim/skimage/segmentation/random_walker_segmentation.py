@@ -4,26 +4,19 @@ from *Random walks for image segmentation*, Leo Grady, IEEE Trans
 Pattern Anal Mach Intell. 2006 Nov;28(11):1768-83.
 """
 
-import functools
 import math
 
 import cupy as cp
 import numpy as np
 from cupyx.scipy import ndimage as ndi
 from cupyx.scipy import sparse
-from cupyx.scipy.sparse.linalg import cg, spsolve
+from cupyx.scipy.sparse.linalg import spsolve
 
 from .._shared.utils import warn
 from ..util import img_as_float
 
-# TODO: Implemented multigrid solver option, 'cg_mg'
-#    NVIDIA's AMGX library has a Ruge-Stüben algebraic multigrid solver
-#    The following package has python wrappers for it:
-#        https://github.com/shwina/pyamgx
-
-amg_loaded = False
-
-cg = functools.partial(cg, atol=0)
+# Levels with at most this number of unknowns are solved directly.
+_MG_COARSEST_SIZE = 1000
 
 
 def _make_graph_edges_3d(n_x, n_y, n_z):
@@ -123,11 +116,16 @@ def _build_linear_system(data, spacing, labels, nlabels, mask,
     """
     Build the matrix A and rhs B of the linear system to solve.
     A and B are two block of the laplacian of the image graph.
+
+    Also returns the (flat) indices in the image grid of the unknowns (rows
+    of A), used by the multigrid preconditioner.
     """
     if mask is None:
         labels = labels.ravel()
+        grid_indices = None
     else:
         labels = labels[mask]
+        grid_indices = cp.flatnonzero(mask)
 
     indices = cp.arange(labels.size)
     seeds_mask = labels > 0
@@ -150,17 +148,129 @@ def _build_linear_system(data, spacing, labels, nlabels, mask,
     )
     rhs = B.dot(seeds_mask)
 
-    return lap_sparse, rhs
+    if grid_indices is None:
+        grid_indices = unlabeled_indices
+    else:
+        grid_indices = grid_indices[unlabeled_indices]
 
+    return lap_sparse, rhs, grid_indices
 
-def _solve_linear_system(lap_sparse, B, tol, mode):
 
-    if mode is None:
-        mode = 'cg_j'
+def _cg(A, B, tol, M=None, maxiter=None):
+    """Solves ``A X = B`` for all the columns of `B` with conjugate gradients.
 
-    if mode == 'cg_mg' and not amg_loaded:
-        warn('"cg_mg" not available. The "cg_j" mode will be used instead.',
-             stacklevel=2)
+    The systems of the columns are solved together, so each iteration does a
+    single sparse matrix-matrix product. A column stops being updated once its
+    residual is at most ``tol * norm(b)``.
+
+    Returns the solution and the number of columns that did not converge.
+    """
+    n = B.shape[0]
+    if maxiter is None:
+        maxiter = n * 10
+    X = cp.zeros_like(B)
+    R = B.copy()
+    threshold = tol * cp.linalg.norm(B, axis=0)
+    active = cp.linalg.norm(R, axis=0) > threshold
+    Z = R if M is None else M(R)
+    P = Z.copy()
+    rz = (R * Z).sum(axis=0)
+    for _ in range(maxiter):
+        if not active.any():  # synchronize!
+            break
+        Q = A @ P
+        pq = (P * Q).sum(axis=0)
+        # Converged columns are not updated anymore
+        alpha = cp.where(active, rz / cp.where(active, pq, 1), 0)
+        X += alpha * P
+        R -= alpha * Q
+        active &= cp.linalg.norm(R, axis=0) > threshold
+        Z = R if M is None else M(R)
+        rz_next = (R * Z).sum(axis=0)
+        beta = cp.where(active, rz_next / cp.where(active, rz, 1), 0)
+        P = Z + beta * P
+        rz = rz_next
+    return X, int(active.sum())
+
+
+def _jacobi_weight(A, inv_diag, iterations=20):
+    """Returns the weight of the damped Jacobi iteration of a multigrid level.
+
+    The weight is ``4 / (3 * rho)``, where ``rho`` is the spectral radius of
+    ``D^-1 A`` (estimated by power iteration), as usual in smoothed
+    aggregation.
+    """
+    x = cp.random.RandomState(0).random_sample(A.shape[0]).astype(A.dtype)
+    rho = 1.0
+    for _ in range(iterations):
+        y = inv_diag * (A @ x)
+        y_norm = cp.linalg.norm(y)
+        rho = y_norm / cp.linalg.norm(x)
+        x = y / y_norm
+    return 4 / (3 * float(rho))
+
+
+class _MultigridPreconditioner:
+    """Smoothed aggregation multigrid V-cycle.
+
+    The unknowns are aggregated by blocks of 2x2x2 pixels of the image grid
+    to build the coarser levels (with piecewise constant interpolation
+    smoothed by a damped Jacobi iteration). The V-cycle uses a damped Jacobi
+    smoother (one pre- and one post-smoothing step, so the preconditioner is
+    symmetric) and a direct solve on the coarsest level.
+
+    Parameters
+    ----------
+    A : cupyx.scipy.sparse.csr_matrix
+        Symmetric positive definite matrix.
+    grid_indices : cupy.ndarray
+        Flat index in the image grid of each unknown.
+    grid_shape : tuple of int
+        Shape of the image grid.
+    """
+
+    def __init__(self, A, grid_indices, grid_shape):
+        coords = cp.stack(cp.unravel_index(grid_indices, grid_shape), axis=1)
+        self.levels = []
+        while A.shape[0] > _MG_COARSEST_SIZE:
+            grid_shape = tuple(-(-s // 2) for s in grid_shape)
+            keys = cp.ravel_multi_index(tuple((coords // 2).T), grid_shape)
+            keys, aggregates = cp.unique(keys, return_inverse=True)
+            coords = cp.stack(cp.unravel_index(keys, grid_shape), axis=1)
+            n, n_coarse = A.shape[0], keys.size
+            if n_coarse == n:
+                # No unknowns are neighbors at this scale (sparse mask)
+                continue
+            inv_diag = 1 / A.diagonal()
+            inv_diag *= _jacobi_weight(A, inv_diag)
+            tentative = sparse.coo_matrix(
+                (cp.ones(n, dtype=A.dtype), (cp.arange(n), aggregates)),
+                shape=(n, n_coarse)).tocsr()
+            smoother = sparse.diags(inv_diag).tocsr() @ A
+            P = (tentative - smoother @ tentative).tocsr()
+            R = P.T.tocsr()
+            self.levels.append((A, inv_diag[:, cp.newaxis], P, R))
+            A = (R @ A @ P).tocsr()
+        self.coarse_inverse = cp.linalg.inv(A.toarray())
+
+    def _vcycle(self, level, b):
+        if level == len(self.levels):
+            return self.coarse_inverse @ b
+        # inv_diag is scaled by the Jacobi weight
+        A, inv_diag, P, R = self.levels[level]
+        x = inv_diag * b
+        x += P @ self._vcycle(level + 1, R @ (b - A @ x))
+        x += inv_diag * (b - A @ x)
+        return x
+
+    def __call__(self, B):
+        return self._vcycle(0, B)
+
+
+def _solve_linear_system(lap_sparse, B, tol, mode, grid_indices=None,
+                         grid_shape=None):
+
+    if mode is None:
         mode = 'cg_j'
 
     if mode == 'bf':
@@ -170,26 +280,25 @@ def _solve_linear_system(lap_sparse, B, tol, mode):
         for n, b in enumerate(B):
             X[n, :] = spsolve(lap_sparse, b)
     else:
-        maxiter = None
+        # All the labels are solved together (one column of B per label)
+        B = B.toarray()
         if mode == 'cg':
             M = None
         elif mode == 'cg_j':
-            M = sparse.diags(1.0 / lap_sparse.diagonal())
+            inv_diag = 1.0 / lap_sparse.diagonal()[:, cp.newaxis]
+
+            def M(R):
+                return inv_diag * R
         else:
-            raise NotImplementedError("cg_mg not implemented")
-            # # mode == 'cg_mg'
-            # lap_sparse = lap_sparse.tocsr()
-            # ml = ruge_stuben_solver(lap_sparse)
-            # M = ml.aspreconditioner(cycle='V')
-            # maxiter = 30
-        cg_out = [
-            cg(lap_sparse, B[:, i].toarray(), tol=tol, M=M, maxiter=maxiter)
-            for i in range(B.shape[1])]
-        if any([info > 0 for _, info in cg_out]):
+            # mode == 'cg_mg'
+            M = _MultigridPreconditioner(lap_sparse.tocsr(), grid_indices,
+                                         grid_shape)
+        X, not_converged = _cg(lap_sparse, B, tol=tol, M=M)
+        if not_converged:
             warn("Conjugate gradient convergence to tolerance not achieved. "
                  "Consider decreasing beta to improve system conditionning.",
                  stacklevel=2)
-        X = cp.stack([x for x, _ in cg_out], axis=0)
+        X = cp.ascontiguousarray(X.T)
 
     return X
 
@@ -292,9 +401,13 @@ def random_walker(data, labels, beta=130, mode='cg_j', tol=1.e-3, copy=True,
           gradient method iterations. This may accelerate the
           convergence of the 'cg' method.
         - 'cg_mg' (conjugate gradient with multigrid preconditioner): a
-          preconditioner is computed using a multigrid solver, then the
-          solution is computed with the Conjugate Gradient method. This mode
-          requires that the pyamg module is installed.
+          smoothed aggregation multigrid V-cycle (aggregating blocks of
+          2x2(x2) pixels) is used as preconditioner of the Conjugate gradient
+          method. This needs much fewer iterations than the other modes on
+          large images, at the cost of building the coarser levels.
+
+        The systems of all the labels are solved together by the conjugate
+        gradient based modes.
     tol : float, optional
         Tolerance to achieve when solving the linear system using
         the conjugate gradient based modes ('cg', 'cg_j' and 'cg_mg').
@@ -474,13 +587,14 @@ def random_walker(data, labels, beta=130, mode='cg_j', tol=1.e-3, copy=True,
         return labels
 
     # Build the linear system (lap_sparse, B)
-    lap_sparse, B = _build_linear_system(data, spacing, labels, nlabels, mask,
-                                         beta, multichannel)
+    lap_sparse, B, grid_indices = _build_linear_system(
+        data, spacing, labels, nlabels, mask, beta, multichannel)
 
     # Solve the linear system lap_sparse X = B
     # where X[i, j] is the probability that a marker of label i arrives
     # first at pixel j by anisotropic diffusion.
-    X = _solve_linear_system(lap_sparse, B, tol, mode)
+    X = _solve_linear_system(lap_sparse, B, tol, mode, grid_indices,
+                             data.shape[:3])
 
     if X.min() < -prob_tol or X.max() > 1 + prob_tol:
         warn('The probability range is outside [0, 1] given the tolerance '
@@ -93,16 +93,17 @@ def test_2d_cg_mg():
     lx = 70
     ly = 100
     data, labels = make_2d_syntheticdata(lx, ly)
-    with expected_warnings(['"cg_mg" not available']):
-        labels_cg_mg = random_walker(data, labels, beta=90, mode='cg_mg')
+    labels_cg_mg = random_walker(data, labels, beta=90, mode='cg_mg')
     assert (labels_cg_mg[25:45, 40:60] == 2).all()
     assert data.shape == labels.shape
-    with expected_warnings(['"cg_mg" not available']):
-        full_prob = random_walker(data, labels, beta=90, mode='cg_mg',
-                                  return_full_prob=True)
+    full_prob = random_walker(data, labels, beta=90, mode='cg_mg',
+                              return_full_prob=True)
     assert (full_prob[1, 25:45, 40:60] >=
             full_prob[0, 25:45, 40:60]).all()
     assert data.shape == labels.shape
+    full_prob_bf = random_walker(data, labels, beta=90, mode='bf',
+                                 return_full_prob=True)
+    testing.assert_allclose(full_prob, full_prob_bf, atol=1e-2)
     return data, labels_cg_mg
 
 
@@ -126,8 +127,7 @@ def test_types():
     data, labels = make_2d_syntheticdata(lx, ly)
     data = 255 * (data - data.min()) // (data.max() - data.min())
     data = data.astype(np.uint8)
-    with expected_warnings(['"cg_mg" not available']):
-        labels_cg_mg = random_walker(data, labels, beta=90, mode='cg_mg')
+    labels_cg_mg = random_walker(data, labels, beta=90, mode='cg_mg')
     assert (labels_cg_mg[25:45, 40:60] == 2).all()
     assert data.shape == labels.shape
     return data, labels_cg_mg
@@ -190,6 +190,18 @@ def test_3d_inactive():
     return data, labels, old_labels, after_labels
 
 
+def test_3d_inactive_cg_mg():
+    n = 30
+    lx, ly, lz = n, n, n
+    data, labels = make_3d_syntheticdata(lx, ly, lz)
+    labels[5:25, 26:29, 26:29] = -1
+    labels_cg_mg = random_walker(data, labels, mode='cg_mg')
+    labels_cg_j = random_walker(data, labels, mode='cg_j')
+    assert (labels_cg_mg.reshape(data.shape)[13:17, 13:17, 13:17] == 2).all()
+    assert (labels_cg_mg[5:25, 26:29, 26:29] == -1).all()
+    assert (labels_cg_mg == labels_cg_j).mean() > 0.99
+
+
 def test_multispectral_2d():
     lx, ly = 70, 100
     data, labels = make_2d_syntheticdata(lx, ly)
@@ -1,9 +1,10 @@
 import cupy as cp
 
-# TODO: scikit-image Cython code uses unordered_map, but here we use a simple
-#       for loop over in_vals. On my hardware, for large arrays, when
-#       nvals < 2900 or so, the GPU implementation is faster. For small nvals
-#       (e.g. 10-100) it is much faster.
+# Maximum number of values mapped with a linear scan over `in_vals` (for each
+# element). Beyond it, a binary search over the sorted `in_vals` is used, so
+# the cost grows as log(nvals) rather than nvals.
+_LINEAR_SCAN_MAX_VALS = 64
+
 _map_array = cp.ElementwiseKernel(
     in_params="raw X x, raw X in_vals, raw Y out_vals, int32 nvals",
     out_params="Y y",
@@ -23,6 +24,33 @@ _map_array = cp.ElementwiseKernel(
     name="cucim_skimage_map_array",
 )
 
+# `in_vals` is sorted: the first of the equal values (lower bound) is found
+# with a binary search.
+_map_array_sorted = cp.ElementwiseKernel(
+    in_params="raw X x, raw X in_vals, raw Y out_vals, int64 nvals",
+    out_params="Y y",
+    operation="""
+    const X value = x[i];
+    long long lo = 0;
+    long long hi = nvals;
+    while (lo < hi)
+    {
+        long long mid = lo + (hi - lo) / 2;
+        if (in_vals[mid] < value)
+        {
+            lo = mid + 1;
+        }
+        else
+        {
+            hi = mid;
+        }
+    }
+    // missing values default to zero
+    y = (lo < nvals && in_vals[lo] == value) ? out_vals[lo] : (Y)0;
+    """,
+    name="cucim_skimage_map_array_sorted",
+)
+
 
 def map_array(input_arr, input_vals, output_vals, out=None):
     """Map values from input array from input_vals to output_vals.
@@ -76,7 +104,15 @@ def map_array(input_arr, input_vals, output_vals, out=None):
     # ensure all arrays have matching types before sending to Cython
     input_vals = input_vals.astype(input_arr.dtype, copy=False)
     output_vals = output_vals.astype(out.dtype, copy=False)
-    _map_array(input_arr, input_vals, output_vals, input_vals.size, out_view)
+    if input_vals.size <= _LINEAR_SCAN_MAX_VALS:
+        _map_array(input_arr, input_vals, output_vals, input_vals.size,
+                   out_view)
+    else:
+        # argsort is stable: as with the linear scan, the first of duplicated
+        # input values is used
+        order = cp.argsort(input_vals)
+        _map_array_sorted(input_arr, input_vals[order], output_vals[order],
+                          input_vals.size, out_view)
     return out
 
 
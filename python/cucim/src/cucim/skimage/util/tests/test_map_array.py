@@ -50,3 +50,28 @@ def test_arraymap_bool_index():
     positive[0] = False
     m[positive] += 1
     assert cp.all(m[image] >= 1)
+
+
+@pytest.mark.parametrize('n_values', [10, 1000, 100000])
+@pytest.mark.parametrize('dtype', [cp.int32, cp.uint32, cp.int64])
+def test_map_array_many_values(n_values, dtype):
+    rng = cp.random.RandomState(0)
+    in_values = rng.permutation(4 * n_values)[:n_values].astype(dtype)
+    out_values = rng.random_sample(n_values)
+    # Half of the labels are not in `in_values` (mapped to zero)
+    labels = rng.randint(0, 4 * n_values, size=(256, 200)).astype(dtype)
+    out = map_array(labels, in_values, out_values)
+
+    lut = cp.zeros(4 * n_values, dtype=out_values.dtype)
+    lut[in_values] = out_values
+    cp.testing.assert_array_equal(out, lut[labels])
+
+
+def test_map_array_duplicated_values():
+    # The first of duplicated input values is used (like with a linear scan)
+    in_values = cp.concatenate([cp.arange(100), cp.arange(100)])
+    out_values = cp.concatenate([cp.arange(100), cp.arange(100) + 100])
+    labels = cp.arange(120).reshape(10, 12)
+    expected = cp.where(labels < 100, labels, 0)
+    cp.testing.assert_array_equal(
+        map_array(labels, in_values, out_values), expected)
@@ -0,0 +1,109 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import struct
+
+import numpy as np
+import pytest
+
+# Size (width, height) of the synthetic slide: not a multiple of the tile size
+# so that the edge tiles are partial.
+SLIDE_SIZE = (700, 600)
+TILE_SIZE = 256
+LEVEL_COUNT = 3
+
+# TIFF field types
+SHORT = 3
+LONG = 4
+
+
+def _ifd_entry(tag, field_type, values, data):
+    """Packs an IFD entry, appending the values that don't fit in it to data.
+    """
+    value_format = 'H' if field_type == SHORT else 'I'
+    payload = struct.pack(f'<{len(values)}{value_format}', *values)
+    if len(payload) <= 4:
+        value = payload.ljust(4, b'\0')
+    else:
+        data += b'\0' * (len(data) % 2)
+        value = struct.pack('<I', len(data))
+        data += payload
+    return struct.pack('<HHI', tag, field_type, len(values)) + value
+
+
+def write_tiff(path, levels, tile_size):
+    """Writes RGB levels to a tiled, uncompressed (little-endian) TIFF file.
+
+    This doesn't depend on the writer of cuCIM, so that the readers are tested
+    against files that it didn't produce.
+    """
+    data = bytearray(b'II*\0\0\0\0\0')
+    next_ifd_pos = 4
+    for index, level in enumerate(levels):
+        height, width, channels = level.shape
+        offsets = []
+        for y in range(0, height, tile_size):
+            for x in range(0, width, tile_size):
+                tile = np.zeros((tile_size, tile_size, channels), np.uint8)
+                part = level[y:y + tile_size, x:x + tile_size]
+                tile[:part.shape[0], :part.shape[1]] = part
+                offsets.append(len(data))
+                data += tile.tobytes()
+        entries = [
+            (254, LONG, [0 if index == 0 else 1]),  # NewSubfileType
+            (256, LONG, [width]),  # ImageWidth
+            (257, LONG, [height]),  # ImageLength
+            (258, SHORT, [8] * channels),  # BitsPerSample
+            (259, SHORT, [1]),  # Compression (none)
+            (262, SHORT, [2]),  # PhotometricInterpretation (RGB)
+            (277, SHORT, [channels]),  # SamplesPerPixel
+            (284, SHORT, [1]),  # PlanarConfiguration (contiguous)
+            (322, LONG, [tile_size]),  # TileWidth
+            (323, LONG, [tile_size]),  # TileLength
+            (324, LONG, offsets),  # TileOffsets
+            (325, LONG, [tile_size * tile_size * channels] * len(offsets)),
+        ]
+        ifd = struct.pack('<H', len(entries))
+        for tag, field_type, values in entries:
+            ifd += _ifd_entry(tag, field_type, values, data)
+        data += b'\0' * (len(data) % 2)
+        struct.pack_into('<I', data, next_ifd_pos, len(data))
+        data += ifd
+        next_ifd_pos = len(data)
+        data += b'\0' * 4
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+@pytest.fixture(scope='session')
+def slide_data():
+    """Pixels (level 0) of the synthetic slide."""
+    width, height = SLIDE_SIZE
+    rng = np.random.RandomState(0)
+    return rng.randint(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+@pytest.fixture(scope='session')
+def slide_path(tmp_path_factory, slide_data):
+    """Path of a tiled, pyramidal (3 levels) TIFF file without compression."""
+    levels = [slide_data]
+    for _ in range(LEVEL_COUNT - 1):
+        # 2x2 area average
+        height, width, channels = levels[-1].shape
+        blocks = levels[-1].reshape(height // 2, 2, width // 2, 2, channels)
+        levels.append(blocks.mean(axis=(1, 3)).round().astype(np.uint8))
+    path = str(tmp_path_factory.mktemp('slide') / 'slide.tif')
+    write_tiff(path, levels, TILE_SIZE)
+    return path
@@ -0,0 +1,95 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import gc
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import CuImage
+
+
+@pytest.fixture
+def region(slide_path):
+    # (height, width, channels) = (200, 300, 3) at (x, y) = (100, 50)
+    return CuImage(slide_path).read_region((100, 50), (300, 200))
+
+
+def data_pointer(img):
+    return img.__array_interface__['data'][0]
+
+
+class ArrayStruct:
+    """Exposes only the `__array_struct__` attribute of an object."""
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.__array_struct__ = obj.__array_struct__
+
+
+def test_array_struct(region, slide_data):
+    arr = np.asarray(ArrayStruct(region))
+    assert arr.ctypes.data == data_pointer(region)
+    assert arr.dtype == np.uint8
+    assert arr.shape == (200, 300, 3)
+    assert arr.strides == (900, 3, 1)
+    assert_array_equal(arr, slide_data[50:250, 100:400])
+
+
+def test_buffer_protocol(region, slide_data):
+    view = memoryview(region)
+    assert view.format == 'B'
+    assert view.shape == (200, 300, 3)
+    assert view.strides == (900, 3, 1)
+    assert view.c_contiguous
+
+    arr = np.asarray(region)
+    assert arr.ctypes.data == data_pointer(region)
+    assert_array_equal(arr, slide_data[50:250, 100:400])
+
+
+def test_buffer_protocol_not_loaded(slide_path):
+    img = CuImage(slide_path)
+    with pytest.raises(BufferError):
+        memoryview(img)
+
+
+def test_dlpack(region, slide_data):
+    if not hasattr(np, 'from_dlpack'):
+        pytest.skip('numpy.from_dlpack() is not available')
+    assert region.__dlpack_device__() == (1, 0)  # kDLCPU
+    pointer = data_pointer(region)
+    arr = np.from_dlpack(region)
+    assert arr.ctypes.data == pointer
+    assert arr.shape == (200, 300, 3)
+
+    # The capsule keeps the image alive
+    del region
+    gc.collect()
+    assert_array_equal(arr, slide_data[50:250, 100:400])
+
+
+def test_dlpack_torch(region, slide_data):
+    torch = pytest.importorskip('torch')
+    pointer = data_pointer(region)
+    tensor = torch.from_dlpack(region)
+    assert tensor.data_ptr() == pointer
+    assert tensor.dtype == torch.uint8
+    assert tuple(tensor.shape) == (200, 300, 3)
+
+    del region
+    gc.collect()
+    assert_array_equal(tensor.numpy(), slide_data[50:250, 100:400])
@@ -0,0 +1,61 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+
+from click.testing import CliRunner
+
+from cucim.clara import CuImage
+from cucim.clara._bench import generate_image
+from cucim.clara._bench import run_read_benchmarks
+from cucim.clara.cli import main
+
+
+def test_generate_image(tmp_path):
+    path = str(tmp_path / 'image.tif')
+    generate_image(path, (640, 512), tile_size=256)
+    img = CuImage(path)
+    assert img.size('XY') == [640, 512]
+    assert img.resolutions['level_tile_sizes'][0] == (256, 256)
+
+
+def test_run_read_benchmarks(tmp_path):
+    results = run_read_benchmarks(
+        work_dir=tmp_path, tile_sizes=(256,), num_workers=(2,),
+        cache_modes=('warm',), patch_size=128, count=4, batch_size=2,
+        image_size=512)
+    scenarios = {result['scenario'] for result in results['results']}
+    assert scenarios == {'open', 'random', 'grid', 'batch'}
+    for result in results['results']:
+        assert result['backend'] == 'cucim'
+        assert result['tile_size'] == 256
+        assert result['stats']['rounds'] > 0
+    grid = next(result for result in results['results']
+                if result['scenario'] == 'grid')
+    assert grid['stats']['rounds'] == 16
+    # Synthetic images are reused
+    assert len(list(tmp_path.glob('*.tif'))) == 1
+
+
+def test_cli_bench_read(tmp_path):
+    output = tmp_path / 'results.json'
+    result = CliRunner().invoke(main, [
+        'bench', 'read', '--work-dir', str(tmp_path), '-o', str(output),
+        '--scenario', 'random', '--cache', 'warm', '--count', '3',
+        '--image-size', '512'])
+    assert result.exit_code == 0, result.output
+    results = json.loads(output.read_text())
+    assert results['config']['scenarios'] == ['random']
+    assert len(results['results']) == 1
@@ -0,0 +1,65 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import CuImage
+from cucim.clara import to_dask
+
+pytest.importorskip('dask')
+
+
+def test_to_dask(slide_path, slide_data):
+    arr = to_dask(slide_path, chunks=256)
+    assert arr.shape == (600, 700, 3)
+    assert arr.dtype == np.uint8
+    assert arr.chunks == ((256, 256, 88), (256, 256, 188), (3,))
+    assert_array_equal(arr.compute(), slide_data)
+
+
+def test_to_dask_chunks(slide_path):
+    # Chunk sizes are rounded up to a multiple of the tile size (256)
+    arr = to_dask(slide_path, chunks=(300, 100))
+    assert arr.chunks == ((512, 88), (256, 256, 188), (3,))
+
+
+def test_to_dask_graph(slide_path):
+    img = CuImage(slide_path)
+    for level in range(img.resolutions['level_count']):
+        arr = to_dask(img, level=level, chunks=256)
+        width, height = img.resolutions['level_dimensions'][level]
+        assert arr.shape[:2] == (height, width)
+        expected = np.asarray(img.read_region((0, 0), (width, height), level))
+        assert_array_equal(arr.compute(), expected)
+
+        # Each task reads a single chunk of the level
+        graph = dict(arr.__dask_graph__())
+        assert len(graph) == arr.numblocks[0] * arr.numblocks[1]
+        for i, chunk_h in enumerate(arr.chunks[0]):
+            for j, chunk_w in enumerate(arr.chunks[1]):
+                block = arr.blocks[i, j].compute()
+                assert block.shape == (chunk_h, chunk_w, 3)
+                assert_array_equal(
+                    block,
+                    expected[i * 256:i * 256 + chunk_h,
+                             j * 256:j * 256 + chunk_w])
+
+
+def test_to_dask_region(slide_path):
+    region = CuImage(slide_path).read_region((0, 0), (256, 256))
+    with pytest.raises(ValueError):
+        to_dask(region)
@@ -0,0 +1,138 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import gc
+import io
+import mmap
+import struct
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import CuImage
+
+
+@pytest.fixture(scope='module')
+def slide_bytes(slide_path):
+    with open(slide_path, 'rb') as f:
+        return f.read()
+
+
+def check_image(img, slide_data):
+    assert img.resolutions['level_dimensions'][0] == (700, 600)
+    assert img.resolutions['level_count'] == 3
+    region = img.read_region((100, 50), (64, 64))
+    assert_array_equal(np.asarray(region), slide_data[50:114, 100:164])
+
+
+def test_bytes(slide_bytes, slide_data):
+    img = CuImage.from_buffer(slide_bytes, name='slide.tif')
+    assert str(img.path) == 'slide.tif'
+    check_image(img, slide_data)
+
+
+def test_bytearray(slide_bytes, slide_data):
+    data = bytearray(slide_bytes)
+    img = CuImage.from_buffer(data)
+    check_image(img, slide_data)
+
+    # The image holds an export of the buffer, so it can't be resized
+    with pytest.raises(BufferError):
+        data.extend(b'\0')
+    del img
+    gc.collect()
+    data.extend(b'\0')
+
+
+def test_buffer_kept_alive(slide_bytes, slide_data):
+    # The image is the only owner of the buffer
+    img = CuImage.from_buffer(bytearray(slide_bytes))
+    gc.collect()
+    check_image(img, slide_data)
+
+
+def test_mmap(slide_path, slide_data):
+    with open(slide_path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    img = CuImage.from_buffer(data)
+    check_image(img, slide_data)
+
+    with pytest.raises(BufferError):
+        data.close()
+    del img
+    gc.collect()
+    data.close()
+
+
+def test_file(slide_path, slide_data):
+    # Regular files are memory-mapped (through their fileno())
+    with open(slide_path, 'rb') as f:
+        img = CuImage.from_buffer(f)
+    check_image(img, slide_data)
+
+
+class Reader:
+    """A file-like object with a readinto() method only."""
+
+    def __init__(self, data, chunk_size):
+        self.data = data
+        self.pos = 0
+        self.chunk_size = chunk_size
+
+    def readinto(self, buffer):
+        chunk = self.data[self.pos:self.pos + min(len(buffer),
+                                                  self.chunk_size)]
+        buffer[:len(chunk)] = chunk
+        self.pos += len(chunk)
+        return len(chunk)
+
+
+def test_readinto(slide_bytes, slide_data):
+    # io.BytesIO has a fileno() method that raises an exception
+    img = CuImage.from_buffer(io.BytesIO(slide_bytes))
+    check_image(img, slide_data)
+
+    # The content is larger than the initial capacity of the buffer
+    assert len(slide_bytes) > 1 << 20
+    img = CuImage.from_buffer(Reader(slide_bytes, 100_000))
+    check_image(img, slide_data)
+
+
+def test_invalid_source(slide_bytes):
+    with pytest.raises(ValueError):
+        CuImage.from_buffer(123)
+    data = np.frombuffer(slide_bytes, np.uint8)
+    with pytest.raises(ValueError):
+        CuImage.from_buffer(data[::2])
+
+
+def test_truncated_buffer(slide_bytes, slide_data):
+    # The first tile of level 0 is beyond the end of the buffer
+    data = bytearray(slide_bytes)
+    ifd_offset, = struct.unpack_from('<I', data, 4)
+    entry_count, = struct.unpack_from('<H', data, ifd_offset)
+    for i in range(entry_count):
+        tag, _, _, value = struct.unpack_from('<HHII', data,
+                                              ifd_offset + 2 + 12 * i)
+        if tag == 324:  # TileOffsets
+            struct.pack_into('<I', data, value, len(data) - 100)
+    img = CuImage.from_buffer(data)
+
+    # The tile is read as background, the next one isn't affected
+    region = np.asarray(img.read_region((200, 50), (100, 64)))
+    assert_array_equal(region[:, :56], 0)
+    assert_array_equal(region[:, 56:], slide_data[50:114, 256:300])
@@ -0,0 +1,93 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import gc
+
+import pytest
+
+from cucim.clara import CuImage
+from cucim.clara import memory
+
+
+@pytest.fixture(autouse=True)
+def pool_settings():
+    stats = memory.pool_stats()
+    yield
+    memory.set_pool_limits(stats['max_cached_bytes'],
+                           stats['thread_cache_blocks'])
+    memory.enable_pool(stats['enabled'])
+
+
+def read(img):
+    region = img.read_region((0, 0), (256, 256))
+    del region
+    gc.collect()
+
+
+def test_pool_stats(slide_path):
+    img = CuImage(slide_path)
+    memory.enable_pool()
+    assert memory.is_pool_enabled()
+    memory.reset_pool_stats()
+    stats = memory.pool_stats()
+    assert stats['enabled']
+    for key in ('allocations', 'thread_cache_hits', 'global_hits', 'misses',
+                'bypassed', 'released_bytes'):
+        assert stats[key] == 0
+
+    # Freed regions are reused by the next reads
+    read(img)
+    read(img)
+    stats = memory.pool_stats()
+    assert stats['allocations'] >= 2
+    assert stats['thread_cache_hits'] + stats['global_hits'] >= 1
+    assert stats['cached_bytes'] > 0
+    assert stats['cached_blocks'] > 0
+
+    memory.trim_pool()
+    assert memory.pool_stats()['cached_bytes'] < stats['cached_bytes']
+    assert memory.pool_stats()['released_bytes'] > 0
+
+
+def test_disable_pool(slide_path):
+    img = CuImage(slide_path)
+    memory.enable_pool(False)
+    assert not memory.is_pool_enabled()
+    memory.reset_pool_stats()
+    read(img)
+    stats = memory.pool_stats()
+    assert not stats['enabled']
+    assert stats['bypassed'] >= 1
+    assert stats['thread_cache_hits'] == stats['global_hits'] == 0
+    assert stats['misses'] == 0
+
+
+def test_set_pool_limits():
+    memory.set_pool_limits(max_cached_bytes=1 << 20, thread_cache_blocks=2)
+    stats = memory.pool_stats()
+    assert stats['max_cached_bytes'] == 1 << 20
+    assert stats['thread_cache_blocks'] == 2
+
+    # Limits left to None are not changed
+    memory.set_pool_limits(thread_cache_blocks=0)
+    stats = memory.pool_stats()
+    assert stats['max_cached_bytes'] == 1 << 20
+    assert stats['thread_cache_blocks'] == 0
+    memory.set_pool_limits(max_cached_bytes=4 << 20)
+    stats = memory.pool_stats()
+    assert stats['max_cached_bytes'] == 4 << 20
+    assert stats['thread_cache_blocks'] == 0
+    memory.set_pool_limits()
+    assert memory.pool_stats() == stats
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import json
+
+import pytest
+
+from cucim.clara import CuImage
+from cucim.clara import profiler
+
+
+@pytest.fixture(autouse=True)
+def disabled_profiler():
+    profiler.disable()
+    profiler.reset()
+    yield
+    profiler.disable()
+    profiler.reset()
+
+
+def test_profile(slide_path):
+    img = CuImage(slide_path)
+    with profiler.profile():
+        assert profiler.is_enabled()
+        assert not profiler.is_tracing()
+        img.read_region((0, 0), (256, 256))
+    assert not profiler.is_enabled()
+
+    stats = profiler.stats()
+    assert stats['read_region']['count'] == 1
+    assert stats['read_region']['total_ns'] > 0
+    assert profiler.trace_events() == []
+
+    # Statistics are kept after the context and reset when entering it
+    img.read_region((0, 0), (256, 256))
+    assert profiler.stats()['read_region']['count'] == 1
+    with profiler.profile():
+        img.read_region((0, 0), (256, 256))
+        img.read_region((256, 0), (256, 256))
+    assert profiler.stats()['read_region']['count'] == 2
+    with profiler.profile(reset_stats=False):
+        img.read_region((0, 0), (256, 256))
+    assert profiler.stats()['read_region']['count'] == 3
+
+
+def test_profile_restores_state():
+    profiler.enable(trace=True)
+    with profiler.profile():
+        assert not profiler.is_tracing()
+    assert profiler.is_enabled()
+    assert profiler.is_tracing()
+
+    profiler.enable()
+    with profiler.profile(trace=True):
+        assert profiler.is_tracing()
+    assert profiler.is_enabled()
+    assert not profiler.is_tracing()
+
+
+def test_chrome_trace(slide_path, tmp_path):
+    img = CuImage(slide_path)
+    with profiler.profile(trace=True):
+        img.read_region((0, 0), (256, 256))
+    path = tmp_path / 'trace.json'
+    trace = profiler.chrome_trace(str(path))
+    with open(path) as f:
+        assert json.load(f) == trace
+
+    events = trace['traceEvents']
+    assert len(events) == len(profiler.trace_events())
+    assert [event['name'] for event in events].count('read_region') == 1
+    for event in events:
+        assert event['ph'] == 'X'
+        assert event['dur'] >= 0
+        assert event['args']['bytes'] >= 0
+    assert trace['cucim']['stats'] == profiler.stats()
+    assert trace['cucim']['dropped_trace_events'] == 0
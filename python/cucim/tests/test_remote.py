@@ -0,0 +1,210 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import CuImage
+from cucim.clara.remote import BlockCache
+from cucim.clara.remote import HTTPSource
+from cucim.clara.remote import RemoteImage
+from cucim.clara.remote import open_source
+from cucim.clara.remote.tiff_index import read_directories
+
+DATA = os.urandom(300_000)
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    accept_ranges = 'bytes'
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(self.server.data)))
+        self.send_header('Accept-Ranges', self.accept_ranges)
+        self.send_header('ETag', '"test"')
+        self.end_headers()
+
+    def do_GET(self):
+        start, end = map(int, re.match(
+            r'bytes=(\d+)-(\d+)', self.headers['Range']).groups())
+        self.requests.append((start, end))
+        data = self.server.data
+        body = data[start:end + 1]
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class IgnoreRangeRequestHandler(RangeRequestHandler):
+    """Sends the whole file, whatever the requested range."""
+
+    accept_ranges = 'none'
+
+    def do_GET(self):
+        self.requests.append(None)
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(self.server.data)))
+        self.end_headers()
+        try:
+            self.wfile.write(self.server.data)
+        except ConnectionError:
+            pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def serve(data, handler=RangeRequestHandler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.data = data
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    RangeRequestHandler.requests.clear()
+    yield f'http://127.0.0.1:{server.server_port}/image.tif'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url():
+    yield from serve(DATA)
+
+
+@pytest.fixture
+def ignore_range_url():
+    yield from serve(DATA, IgnoreRangeRequestHandler)
+
+
+@pytest.fixture
+def slide_url(slide_path):
+    with open(slide_path, 'rb') as f:
+        yield from serve(f.read())
+
+
+def test_http_source(url):
+    with open_source(url) as source:
+        assert source.size == len(DATA)
+        assert source.version == '"test"'
+        assert source.read(1000, 100) == DATA[1000:1100]
+        assert source.read(len(DATA) - 10, 100) == DATA[-10:]
+
+
+def test_http_source_ignored_range(ignore_range_url, monkeypatch):
+    # The server announces that it doesn't support range requests
+    with pytest.raises(IOError, match='Range requests are not supported'):
+        open_source(ignore_range_url)
+
+    # ... or doesn't announce it: whole-file responses are rejected
+    monkeypatch.setattr(IgnoreRangeRequestHandler, 'accept_ranges', 'bytes')
+    with open_source(ignore_range_url) as source:
+        with pytest.raises(IOError, match='Range requests are not supported'):
+            source.read(1000, 100)
+        # A range covering the file may be answered with the whole file
+        assert source.read(0, len(DATA)) == DATA
+    assert RangeRequestHandler.requests == [None, None]
+
+
+def test_block_cache(url, tmp_path):
+    path = str(tmp_path / 'image.tif')
+    source = open_source(url)
+    cache = BlockCache(source, path, block_size=4096)
+    assert cache.read(5000, 10) == DATA[5000:5010]
+    assert RangeRequestHandler.requests == [(4096, 8191)]
+
+    # Only missing blocks are fetched; nearby ranges are coalesced
+    cache.ensure([(4096, 100), (20000, 100), (28000, 100)])
+    assert RangeRequestHandler.requests[1:] == [(16384, 28671)]
+    cache.close()
+
+    # Fetched blocks persist in the local (sparse) file
+    cache = BlockCache(source, path, block_size=4096)
+    assert os.path.getsize(path) == len(DATA)
+    assert cache.read(17000, 11000) == DATA[17000:28000]
+    assert len(RangeRequestHandler.requests) == 2
+    cache.close()
+
+
+def test_http_source_close(url):
+    source = open_source(url)
+    threads = [threading.Thread(target=source.read, args=(0, 100))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One connection per thread (and the one of the HEAD request)
+    connections = list(source._connections)
+    assert len(connections) == 5
+    assert all(conn.sock is not None for conn in connections)
+
+    source.close()
+    assert all(conn.sock is None for conn in connections)
+    assert source.read(0, 100) == DATA[:100]
+    source.close()
+
+
+def test_remote_image(slide_url, slide_path, slide_data, tmp_path):
+    requests = RangeRequestHandler.requests
+    with RemoteImage(slide_url, cache_dir=str(tmp_path),
+                     block_size=4096) as img:
+        assert isinstance(img.source, HTTPSource)
+        directories = read_directories(img.cache)
+        assert [(d.width, d.height) for d in directories] == [
+            (700, 600), (350, 300), (175, 150)]
+        assert all(d.tile_width == 256 for d in directories)
+        assert img.resolutions['level_count'] == 3
+
+        # A region within the tile (1, 1) of level 0 only fetches the blocks
+        # of that tile
+        directory = directories[0]
+        offset = int(directory.offsets[4])
+        end = offset + int(directory.byte_counts[4])
+        first = len(requests)
+        region = img.read_region((300, 300), (100, 100))
+        assert_array_equal(np.asarray(region), slide_data[300:400, 300:400])
+        assert len(requests) > first
+        for start, stop in requests[first:]:
+            assert offset // 4096 * 4096 <= start
+            assert stop < -(-end // 4096) * 4096
+
+        # Same pixels as a local read, on every level
+        local = CuImage(slide_path)
+        for level in range(3):
+            width, height = local.resolutions['level_dimensions'][level]
+            assert_array_equal(
+                np.asarray(img.read_region((0, 0), (width, height), level)),
+                np.asarray(local.read_region((0, 0), (width, height),
+                                             level)))
+
+        # Tiles already fetched are not requested again
+        count = len(requests)
+        img.read_region((300, 300), (100, 100))
+        assert len(requests) == count
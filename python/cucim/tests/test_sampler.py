@@ -0,0 +1,89 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import CuImage
+from cucim.clara import ImageWriter
+from cucim.clara import PatchSampler
+
+
+@pytest.fixture(scope='module')
+def image_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('sampler') / 'image.tif')
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (1024, 768, 3), dtype=np.uint8)
+    with ImageWriter(path, image.shape, compression='deflate',
+                     tile_size=256) as writer:
+        writer.write_region((0, 0), image)
+    return path
+
+
+def random_requests(path, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(path, (int(x), int(y)))
+            for x, y in rng.integers(0, 768 - 64, (count, 2))]
+
+
+def test_schedule(image_path):
+    requests = [(image_path, (300, 600)), (image_path, (10, 20)),
+                (image_path, (500, 30)), (image_path, (100, 520))]
+    sampler = PatchSampler(requests, 64, num_workers=1)
+    groups = sampler._schedule(requests)
+    # Grouped by tile row (256 pixels) and sorted by location
+    assert [[location for _, location in group] for group in groups] == [
+        [(10, 20), (500, 30)], [(100, 520), (300, 600)]]
+
+
+@pytest.mark.parametrize('shuffle', [True, False])
+def test_iterate(image_path, shuffle):
+    requests = random_requests(image_path, 50)
+    sampler = PatchSampler(requests, (64, 32), window=16, num_workers=4,
+                           shuffle=shuffle, seed=1)
+    patches = list(sampler)
+    assert sorted(location for _, location, _ in patches) == sorted(
+        location for _, location in requests)
+
+    img = CuImage(image_path)
+    for path, location, patch in patches[:5]:
+        assert path == image_path
+        assert_array_equal(patch, np.asarray(img.read_region(location,
+                                                             (64, 32))))
+
+    # Each window is read as a whole before the next one
+    windows = [{location for _, location in requests[i:i + 16]}
+               for i in range(0, 50, 16)]
+    for i, window in enumerate(windows):
+        assert {location for _, location, _ in
+                patches[i * 16:i * 16 + len(window)]} == window
+
+    stats = sampler.stats()
+    assert stats['patches'] == 50
+    assert stats['windows'] == 4
+    assert stats['patches_per_second'] > 0
+
+
+def test_sampling_distribution(image_path):
+    def distribution(rng):
+        return image_path, tuple(rng.integers(0, 512, 2))
+
+    sampler = PatchSampler(distribution, 64, num_samples=20, seed=0)
+    locations = [location for _, location, _ in sampler]
+    assert len(locations) == 20
+    sampler = PatchSampler(distribution, 64, num_samples=20, seed=0)
+    assert sorted(location for _, location, _ in sampler) == sorted(
+        locations)
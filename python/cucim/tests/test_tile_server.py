@@ -0,0 +1,275 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import CuImage
+from cucim.clara._tile_cache import TileCache
+
+cv2 = pytest.importorskip('cv2')
+
+from cucim.clara.server.slide import Slide  # noqa: E402
+from cucim.clara.server.tile_server import RESCAN_INTERVAL  # noqa: E402
+from cucim.clara.server.tile_server import HTTPError  # noqa: E402
+from cucim.clara.server.tile_server import TileServer  # noqa: E402
+
+
+@pytest.fixture
+def server(tmp_path, slide_path):
+    shutil.copy(slide_path, str(tmp_path / 'slide.tif'))
+    server = TileServer(str(tmp_path), num_workers=2, cache=None)
+    server._executor = concurrent.futures.ThreadPoolExecutor(2)
+    yield server
+    server._executor.shutdown(wait=True)
+
+
+def get(server, target, headers=None):
+    async def handle():
+        server._semaphore = asyncio.Semaphore(server.max_pending)
+        return await server.handle(target, headers or {})
+    return asyncio.run(handle())
+
+
+def get_error(server, target):
+    with pytest.raises(HTTPError) as excinfo:
+        get(server, target)
+    return excinfo.value.status
+
+
+def decode(body):
+    arr = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_UNCHANGED)
+    if arr.ndim == 3:
+        arr = cv2.cvtColor(arr, cv2.COLOR_BGR2RGB)
+    return arr
+
+
+def test_index(server):
+    status, headers, body = get(server, '/')
+    assert status == 200
+    assert json.loads(body)['slides'][0] == {
+        'name': 'slide.tif',
+        'dzi': '/deepzoom/slide.tif.dzi',
+        'iiif': '/iiif/slide.tif/info.json',
+        'thumbnail': '/thumbnail/slide.tif.jpg',
+    }
+
+
+def test_dz_tile_region(slide_path):
+    slide = Slide(slide_path, tile_size=254, overlap=1)
+    # 700 x 600 -> 350 x 300 -> ... -> 1 x 1
+    assert slide.dz_level_count == 11
+    assert slide.dz_dimensions[9] == (350, 300)
+
+    # The overlap is added on the sides shared with other tiles
+    assert slide.dz_tile_region(10, 0, 0) == ((0, 0, 255, 255), (255, 255))
+    assert slide.dz_tile_region(10, 1, 1) == (
+        (253, 253, 256, 256), (256, 256))
+    assert slide.dz_tile_region(10, 2, 2) == ((507, 507, 193, 93), (193, 93))
+    assert slide.dz_tile_region(9, 1, 1) == ((506, 506, 194, 94), (97, 47))
+    assert slide.dz_tile_region(0, 0, 0) == ((0, 0, 700, 600), (1, 1))
+
+    assert slide.dz_tile_region(10, 3, 0) is None
+    assert slide.dz_tile_region(9, 0, 2) is None
+    assert slide.dz_tile_region(11, 0, 0) is None
+
+
+def test_slide_read_tiles(slide_path, slide_data):
+    # Regions are read from the cache one (256 x 256) tile at a time
+    slide = Slide(slide_path)
+    cache = TileCache()
+    arr = slide.read((100, 100, 300, 200), (300, 200), cache)
+    assert_array_equal(arr, slide_data[100:300, 100:400])
+    assert cache.stats()['items'] == 4
+    assert cache.stats()['nbytes'] == 4 * 256 * 256 * 3
+
+    # An overlapping region reuses the decoded tiles
+    arr = slide.read((200, 150, 200, 200), (200, 200), cache)
+    assert_array_equal(arr, slide_data[150:350, 200:400])
+    assert cache.stats()['items'] == 4
+    assert cache.stats()['hits'] == 4
+
+    # Edge tiles are clipped to the level
+    arr = slide.read((600, 520, 100, 80), (100, 80), cache)
+    assert_array_equal(arr, slide_data[520:600, 600:700])
+    assert cache.stats()['items'] == 5
+    assert cache.stats()['nbytes'] == (4 * 256 * 256 + 188 * 88) * 3
+
+
+def test_deepzoom(server, slide_data):
+    status, headers, body = get(server, '/deepzoom/slide.tif.dzi')
+    assert status == 200
+    assert b'TileSize="254"' in body and b'Overlap="1"' in body
+    assert b'<Size Width="700" Height="600"/>' in body
+
+    status, headers, body = get(server,
+                                '/deepzoom/slide.tif_files/10/1_1.png')
+    assert status == 200
+    assert headers['Content-Type'] == 'image/png'
+    assert_array_equal(decode(body), slide_data[253:509, 253:509])
+
+    status, headers, body = get(server,
+                                '/deepzoom/slide.tif_files/10/2_2.jpeg')
+    assert headers['Content-Type'] == 'image/jpeg'
+    assert decode(body).shape == (93, 193, 3)
+
+    assert get_error(server, '/deepzoom/slide.tif_files/10/3_0.jpeg') == 404
+    assert get_error(server, '/deepzoom/other.tif_files/10/0_0.jpeg') == 404
+    assert get_error(server, '/deepzoom/slide.tif_files/10/0_0.gif') == 404
+
+
+def test_rescan(server, tmp_path, slide_path):
+    # Unknown images are looked for in the folder again
+    shutil.copy(slide_path, str(tmp_path / 'new.tif'))
+    status, _, _ = get(server, '/deepzoom/new.tif.dzi')
+    assert status == 200
+
+    # ... at most once every RESCAN_INTERVAL seconds
+    shutil.copy(slide_path, str(tmp_path / 'other.tif'))
+    assert get_error(server, '/deepzoom/other.tif.dzi') == 404
+    server._scan_time -= RESCAN_INTERVAL
+    status, _, _ = get(server, '/deepzoom/other.tif.dzi')
+    assert status == 200
+
+
+def test_iiif_info(server):
+    status, headers, body = get(server, '/iiif/slide.tif/info.json',
+                                {'host': 'example.com'})
+    info = json.loads(body)
+    assert info['id'] == 'http://example.com/iiif/slide.tif'
+    assert (info['width'], info['height']) == (700, 600)
+    assert info['tiles'] == [{'width': 254, 'scaleFactors': [1, 2, 4]}]
+
+
+def test_iiif_region(slide_path):
+    slide = Slide(slide_path)
+    region = TileServer._iiif_region
+    assert region(slide, 'full') == (0, 0, 700, 600)
+    assert region(slide, 'square') == (50, 0, 600, 600)
+    assert region(slide, '10,20,30,40') == (10, 20, 30, 40)
+    # Regions are clipped to the image
+    assert region(slide, '600,500,200,200') == (600, 500, 100, 100)
+    assert region(slide, 'pct:50,50,50,50') == (350, 300, 350, 300)
+    for spec in ['0,0,0,10', '700,0,1,1', '-1,0,10,10', '0,0,10', 'abc']:
+        with pytest.raises(HTTPError) as excinfo:
+            region(slide, spec)
+        assert excinfo.value.status == 400
+
+
+def test_iiif_size(server):
+    region = (0, 0, 700, 600)
+    size = server._iiif_size
+    assert size(region, 'max') == (700, 600)
+    assert size(region, '!350,350') == (350, 300)
+    assert size(region, '350,') == (350, 300)
+    assert size(region, ',300') == (350, 300)
+    assert size(region, 'pct:50') == (350, 300)
+    assert size(region, '100,100') == (100, 100)
+    for spec, status in [('^max', 501), ('800,', 400), ('a,', 400),
+                         ('0,10', 400), ('!0,0', 400)]:
+        with pytest.raises(HTTPError) as excinfo:
+            size(region, spec)
+        assert excinfo.value.status == status
+
+
+def test_iiif_image(server, slide_path, slide_data):
+    # Downsampled regions are read from the level with that downsample
+    status, headers, body = get(
+        server, '/iiif/slide.tif/0,0,256,256/128,/0/default.png')
+    assert status == 200
+    expected = CuImage(slide_path).read_region((0, 0), (128, 128), 1)
+    assert_array_equal(decode(body), np.asarray(expected))
+
+    status, headers, body = get(
+        server, '/iiif/slide.tif/100,50,64,32/max/0/gray.png')
+    gray = cv2.cvtColor(slide_data[50:82, 100:164], cv2.COLOR_RGB2GRAY)
+    assert_array_equal(decode(body), gray)
+
+    assert get_error(server, '/iiif/slide.tif/full/max/90/default.jpg') == 501
+    assert get_error(server, '/iiif/slide.tif/full/max/0/bitonal.jpg') == 501
+    assert get_error(server, '/iiif/slide.tif/full/max/0/default.gif') == 400
+    assert get_error(server, '/iiif/slide.tif/full/max/0') == 404
+
+
+def test_etag(server, tmp_path):
+    target = '/deepzoom/slide.tif_files/10/0_0.jpeg'
+    status, headers, body = get(server, target)
+    etag = headers['ETag']
+    assert status == 200 and body
+
+    status, headers, body = get(server, target, {'if-none-match': etag})
+    assert status == 304 and body == b''
+    assert headers['ETag'] == etag
+    status, _, _ = get(server, target,
+                       {'if-none-match': f'"other", W/{etag}'})
+    assert status == 304
+    status, _, _ = get(server, target, {'if-none-match': '"other"'})
+    assert status == 200
+
+    # Modifying the file changes the ETag
+    path = str(tmp_path / 'slide.tif')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    status, headers, _ = get(server, target, {'if-none-match': etag})
+    assert status == 200
+    assert headers['ETag'] != etag
+
+
+class BufferWriter:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-1'])
+def test_invalid_content_length(server, content_length):
+    async def handle():
+        reader = asyncio.StreamReader()
+        reader.feed_data(f'Content-Length: {content_length}\r\n\r\n'.encode())
+        reader.feed_eof()
+        writer = BufferWriter()
+        keep_alive = await server._handle_request(b'GET / HTTP/1.1\r\n',
+                                                  reader, writer)
+        return keep_alive, bytes(writer.data)
+
+    keep_alive, response = asyncio.run(handle())
+    assert not keep_alive
+    assert response.startswith(b'HTTP/1.1 400 Bad Request\r\n')
+
+
+@pytest.mark.parametrize('method, status', [('GET', 400), ('POST', 405)])
+def test_request_body(server, method, status):
+    # Request bodies are neither read nor buffered
+    async def handle():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'Content-Length: 1000000000\r\n\r\nbody')
+        writer = BufferWriter()
+        keep_alive = await server._handle_request(
+            f'{method} / HTTP/1.1\r\n'.encode(), reader, writer)
+        return keep_alive, bytes(writer.data), await reader.read(4)
+
+    keep_alive, response, remaining = asyncio.run(handle())
+    assert not keep_alive
+    assert response.startswith(f'HTTP/1.1 {status} '.encode())
+    assert remaining == b'body'
@@ -0,0 +1,74 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import TissueMask
+from cucim.clara._tissue import _compute_mask
+
+
+def make_mask():
+    # 1024 x 512 slide (level 0), 64 x 32 mask: tissue in the left quarter
+    mask = np.zeros((32, 64), bool)
+    mask[:, :16] = True
+    return TissueMask(mask, (1024, 512), (1.0, 4.0))
+
+
+def test_coverage():
+    mask = make_mask()
+    assert mask.downsample == (16.0, 16.0)
+    assert mask.tissue_fraction == 0.25
+    assert mask.coverage((0, 0), (256, 256)) == 1.0
+    assert mask.coverage((128, 0), (256, 256)) == 0.5
+    assert mask.coverage((512, 0), (256, 256)) == 0.0
+    # The size is given at level 1 (4x downsampled)
+    assert mask.coverage((128, 0), (64, 64), level=1) == 0.5
+
+
+def test_regions():
+    mask = make_mask()
+    locations = mask.regions(256)
+    assert_array_equal(locations, [[0, 0], [0, 256]])
+    locations = mask.regions(256, step=128, min_coverage=0.5)
+    assert_array_equal(locations[:, 0], [0, 128, 0, 128, 0, 128])
+    assert len(mask.regions(64, level=1, min_coverage=0)) == 2
+
+
+def test_save_load(tmp_path):
+    mask = make_mask()
+    path = str(tmp_path / 'mask.npz')
+    mask.save(path)
+    loaded = TissueMask.load(path)
+    assert_array_equal(loaded.mask, mask.mask)
+    assert loaded.dimensions == mask.dimensions
+    assert loaded.level_downsamples == mask.level_downsamples
+    assert loaded.threshold is None
+
+
+@pytest.mark.parametrize('channels', [0, 1, 2])
+@pytest.mark.parametrize('method', ['otsu', 'saturation'])
+def test_compute_mask_grayscale(channels, method):
+    # Dark tissue on a bright background, with an opaque alpha channel
+    gray = np.full((64, 64), 230, np.uint8)
+    gray[16:48, 8:40] = 60
+    if channels == 0:
+        image = gray
+    else:
+        image = np.stack([gray, np.full_like(gray, 255)][:channels], axis=-1)
+    mask, threshold = _compute_mask(image, method, min_size=0, closing=0)
+    assert_array_equal(mask, gray < 128)
+    assert 0 < threshold < 230 / 255
@@ -0,0 +1,101 @@
+#
+# Copyright (c) 2021, NVIDIA CORPORATION.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from cucim.clara import CuImage
+from cucim.clara import zarr_store
+
+
+def read_chunk(store, key, shape):
+    return np.frombuffer(store[key], dtype=np.uint8).reshape(shape)
+
+
+def test_metadata(slide_path):
+    store = zarr_store(slide_path)
+    assert json.loads(store['.zgroup']) == {'zarr_format': 2}
+
+    multiscales = json.loads(store['.zattrs'])['multiscales'][0]
+    assert [axis['name'] for axis in multiscales['axes']] == ['c', 'y', 'x']
+    assert [dataset['path'] for dataset in multiscales['datasets']] == [
+        '0', '1', '2']
+    scale = multiscales['datasets'][1]['coordinateTransformations'][0]
+    assert scale == {'type': 'scale', 'scale': [1.0, 2.0, 2.0]}
+
+    zarray = json.loads(store['0/.zarray'])
+    assert zarray['shape'] == [3, 600, 700]
+    assert zarray['chunks'] == [3, 256, 256]
+    assert zarray['dtype'] == '|u1'
+    assert zarray['dimension_separator'] == '.'
+    assert json.loads(store['1/.zarray'])['shape'] == [3, 300, 350]
+    assert json.loads(store['0/.zattrs']) == {}
+
+
+def test_chunk_keys(slide_path):
+    store = zarr_store(slide_path)
+    keys = [key for key in store if key.startswith('0/')]
+    assert keys == ['0/.zarray', '0/.zattrs'] + [
+        f'0/0.{i}.{j}' for i in range(3) for j in range(3)]
+    assert len(store) == len(list(store))
+    assert store.listdir() == ['.zattrs', '.zgroup', '0', '1', '2']
+    assert '0/0.2.2' in store
+    for key in ['0/0.3.0', '0/0.0.3', '0/1.0.0', '0/0.0', '3/0.0.0', 'a/b']:
+        assert key not in store
+        with pytest.raises(KeyError):
+            store[key]
+    with pytest.raises(PermissionError):
+        store['0/0.0.0'] = b''
+
+
+def test_chunks(slide_path, slide_data):
+    store = zarr_store(slide_path, cache=None)
+    assert_array_equal(read_chunk(store, '0/0.0.1', (3, 256, 256)),
+                       slide_data[:256, 256:512].transpose(2, 0, 1))
+
+    # Edge chunks are padded with the background value
+    chunk = read_chunk(store, '0/0.2.2', (3, 256, 256))
+    assert_array_equal(chunk[:, :88, :188],
+                       slide_data[512:, 512:].transpose(2, 0, 1))
+    assert (chunk[:, 88:] == 255).all()
+    assert (chunk[:, :, 188:] == 255).all()
+
+    img = CuImage(slide_path)
+    expected = np.asarray(img.read_region((0, 0), (350, 300), 1))
+    chunk = read_chunk(store, '1/0.1.1', (3, 256, 256))
+    assert_array_equal(chunk[:, :44, :94],
+                       expected[256:, 256:].transpose(2, 0, 1))
+
+
+def test_chunk_size(slide_path):
+    store = zarr_store(slide_path, chunk_size=512)
+    assert json.loads(store['0/.zarray'])['chunks'] == [3, 512, 512]
+    assert '0/0.1.1' in store and '0/0.2.0' not in store
+
+
+def test_zarr(slide_path, slide_data):
+    zarr = pytest.importorskip('zarr')
+    group = zarr.open(zarr_store(slide_path), mode='r')
+    assert_array_equal(group['0'][:, 100:400, 500:700],
+                       slide_data[100:400, 500:700].transpose(2, 0, 1))
+
+
+def test_zarr_store_region(slide_path):
+    region = CuImage(slide_path).read_region((0, 0), (256, 256))
+    with pytest.raises(ValueError):
+        zarr_store(region)
@@ -18,6 +18,8 @@
 #include "cucim_pydoc.h"
 #include "io/init.h"
 #include "filesystem/init.h"
+#include "memory/init.h"
+#include "profiler/init.h"
 
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
@@ -26,6 +28,8 @@
 #include <fmt/format.h>
 #include <fmt/ranges.h>
 
+#include <cstdlib>
+
 using namespace pybind11::literals;
 namespace py = pybind11;
 
@@ -62,6 +66,14 @@ PYBIND11_MODULE(_cucim, m)
     auto m_fs = m.def_submodule("filesystem");
     filesystem::init_filesystem(m_fs);
 
+    // Submodule: memory
+    auto m_memory = m.def_submodule("memory");
+    memory::init_memory(m_memory);
+
+    // Submodule: profiler
+    auto m_profiler = m.def_submodule("profiler");
+    profiler::init_profiler(m_profiler);
+
     // Data structures
     py::enum_<DLDataTypeCode>(m, "DLDataTypeCode") //
         .value("DLInt", kDLInt) //
@@ -89,9 +101,12 @@ PYBIND11_MODULE(_cucim, m)
             },
             py::call_guard<py::gil_scoped_release>());
 
-    py::class_<CuImage, std::shared_ptr<CuImage>>(m, "CuImage") //
+    py::class_<CuImage, std::shared_ptr<CuImage>>(m, "CuImage", py::buffer_protocol()) //
         .def(py::init<const std::string&>(), doc::CuImage::doc_CuImage, py::call_guard<py::gil_scoped_release>(), //
              py::arg("path")) //
+        .def_static("from_buffer", &py_from_buffer, doc::CuImage::doc_from_buffer, //
+                    py::arg("source"), //
+                    py::arg("name") = "<memory>") //
         .def_property("path", &CuImage::path, nullptr, doc::CuImage::doc_path, py::call_guard<py::gil_scoped_release>()) //
         .def_property("is_loaded", &CuImage::is_loaded, nullptr, doc::CuImage::doc_is_loaded,
                       py::call_guard<py::gil_scoped_release>()) //
@@ -139,7 +154,15 @@ PYBIND11_MODULE(_cucim, m)
         .def("associated_image", &CuImage::associated_image, doc::CuImage::doc_associated_image,
              py::call_guard<py::gil_scoped_release>(), //
              py::arg("name") = "") //
-        .def("save", &CuImage::save, doc::CuImage::doc_save, py::call_guard<py::gil_scoped_release>()) //
+        .def("save", &CuImage::save, doc::CuImage::doc_save, py::call_guard<py::gil_scoped_release>(), //
+             py::arg("file_path"), //
+             py::arg("format") = "", //
+             py::arg("compression") = "jpeg", //
+             py::arg("tile_size") = 256, //
+             py::arg("quality") = -1, //
+             py::arg("levels") = 0, //
+             py::arg("num_workers") = 0) //
+        .def("tissue_mask", &py_tissue_mask, doc::CuImage::doc_tissue_mask) //
         .def("__bool__", &CuImage::operator bool, py::call_guard<py::gil_scoped_release>()) //
         .def(
             "__repr__", //
@@ -148,7 +171,35 @@ PYBIND11_MODULE(_cucim, m)
             },
             py::call_guard<py::gil_scoped_release>())
         .def_property("__array_interface__", &get_array_interface, nullptr, doc::CuImage::doc_get_array_interface,
-                      py::call_guard<py::gil_scoped_release>());
+                      py::call_guard<py::gil_scoped_release>()) //
+        .def_property("__array_struct__", &get_array_struct, nullptr, doc::CuImage::doc_get_array_struct) //
+        .def_buffer(&get_buffer_info) //
+        .def("__dlpack__", &py_dlpack, doc::CuImage::doc_dlpack, //
+             py::arg("stream") = py::none()) //
+        .def("__dlpack_device__", &py_dlpack_device, doc::CuImage::doc_dlpack_device);
+    // Raise BufferError for an image without loaded data instead of exporting an empty buffer.
+    reinterpret_cast<PyTypeObject*>(m.attr("CuImage").ptr())->tp_as_buffer->bf_getbuffer = &cuimage_getbuffer;
+
+    py::class_<ImageWriter>(m, "ImageWriter") //
+        .def(py::init(&py_image_writer), doc::ImageWriter::doc_ImageWriter, //
+             py::arg("file_path"), //
+             py::arg("shape"), //
+             py::arg("dtype") = "uint8", //
+             py::arg("compression") = "jpeg", //
+             py::arg("tile_size") = 256, //
+             py::arg("quality") = -1, //
+             py::arg("levels") = 0, //
+             py::arg("num_workers") = 0) //
+        .def("write_region", &py_write_region, doc::ImageWriter::doc_write_region, //
+             py::arg("location"), //
+             py::arg("data")) //
+        .def("close", &ImageWriter::close, doc::ImageWriter::doc_close, py::call_guard<py::gil_scoped_release>()) //
+        .def_property("closed", &ImageWriter::is_closed, nullptr, doc::ImageWriter::doc_closed) //
+        .def("__enter__", [](ImageWriter& writer) -> ImageWriter& { return writer; }) //
+        .def(
+            "__exit__",
+            [](ImageWriter& writer, const py::object&, const py::object&, const py::object&) { writer.close(); },
+            py::call_guard<py::gil_scoped_release>());
 
     // We can use `"cpu"` instead of `Device("cpu")`
     py::implicitly_convertible<const char*, io::Device>();
@@ -221,6 +272,13 @@ json py_metadata(const CuImage& cuimg)
         }
         resolutions_metadata.emplace("level_dimensions", level_dimensions_vec);
         resolutions_metadata.emplace("level_downsamples", resolutions.level_downsamples());
+        std::vector<std::vector<int64_t>> level_tile_sizes_vec;
+        level_tile_sizes_vec.reserve(level_count);
+        for (int level = 0; level < level_count; ++level)
+        {
+            level_tile_sizes_vec.emplace_back(resolutions.level_tile_size(level));
+        }
+        resolutions_metadata.emplace("level_tile_sizes", level_tile_sizes_vec);
     }
     cucim_metadata.emplace("associated_images", cuimg.associated_images());
     return json_obj;
@@ -235,7 +293,8 @@ py::dict py_resolutions(const CuImage& cuimg)
         return py::dict{
             "level_count"_a = pybind11::int_(0), //
             "level_dimensions"_a = pybind11::tuple(), //
-            "level_downsamples"_a = pybind11::tuple() //
+            "level_downsamples"_a = pybind11::tuple(), //
+            "level_tile_sizes"_a = pybind11::tuple() //
         };
     }
 
@@ -246,13 +305,22 @@ py::dict py_resolutions(const CuImage& cuimg)
         level_dimensions_vec.emplace_back(vector2pytuple<pybind11::int_>(resolutions.level_dimension(level)));
     }
 
+    std::vector<py::tuple> level_tile_sizes_vec;
+    level_tile_sizes_vec.reserve(level_count);
+    for (int level = 0; level < level_count; ++level)
+    {
+        level_tile_sizes_vec.emplace_back(vector2pytuple<pybind11::int_>(resolutions.level_tile_size(level)));
+    }
+
     py::tuple level_dimensions = vector2pytuple<const pybind11::tuple&>(level_dimensions_vec);
     py::tuple level_downsamples = vector2pytuple<pybind11::float_>(resolutions.level_downsamples());
+    py::tuple level_tile_sizes = vector2pytuple<const pybind11::tuple&>(level_tile_sizes_vec);
 
     return py::dict{
         "level_count"_a = pybind11::int_(level_count), //
         "level_dimensions"_a = level_dimensions, //
-        "level_downsamples"_a = level_downsamples //
+        "level_downsamples"_a = level_downsamples, //
+        "level_tile_sizes"_a = level_tile_sizes //
     };
 }
 
@@ -305,8 +373,8 @@ CuImage py_read_region(CuImage& cuimg,
 
 py::dict get_array_interface(const CuImage& cuimg)
 {
-    // TODO: using __array_struct__, access to array interface could be faster
-    //       (https://numpy.org/doc/stable/reference/arrays.interface.html#c-struct-access)
+    // Note: NumPy prefers the buffer protocol and `__array_struct__` (see get_buffer_info()/get_array_struct()),
+    //       this is kept for the consumers that only understand `__array_interface__`.
     // TODO: check the performance difference between python int vs python long later.
     const DLTensor* tensor = static_cast<DLTensor*>(cuimg.container());
     if (!tensor)
@@ -330,5 +398,468 @@ py::dict get_array_interface(const CuImage& cuimg)
                      "version"_a = py::int_(3) };
 }
 
+/**
+ * C-struct version of the array interface (`PyArrayInterface` in NumPy's ndarraytypes.h).
+ *
+ * Reference: https://numpy.org/doc/stable/reference/arrays.interface.html#c-struct-access
+ */
+struct ArrayInterfaceStruct
+{
+    int two; /// Must be 2
+    int nd;
+    char typekind;
+    int itemsize;
+    int flags;
+    Py_intptr_t* shape;
+    Py_intptr_t* strides;
+    void* data;
+    PyObject* descr;
+};
+
+// Flags of the array interface (same values with NPY_ARRAY_XXX in NumPy)
+constexpr int kArrayInterfaceContiguous = 0x1;
+constexpr int kArrayInterfaceAligned = 0x100;
+constexpr int kArrayInterfaceNotSwapped = 0x200;
+constexpr int kArrayInterfaceWriteable = 0x400;
+
+static char dtype_typekind(const DLDataType& dtype)
+{
+    switch (dtype.code)
+    {
+    case kDLInt:
+        return 'i';
+    case kDLUInt:
+        return 'u';
+    case kDLFloat:
+        return 'f';
+    }
+    throw std::logic_error(fmt::format("DLDataType(code: {}, bits: {}) is not supported!", dtype.code, dtype.bits));
+}
+
+static const DLTensor* loaded_tensor(const CuImage& cuimg)
+{
+    const DLTensor* tensor = static_cast<DLTensor*>(cuimg.container());
+    if (!tensor || !tensor->data)
+    {
+        return nullptr;
+    }
+    return tensor;
+}
+
+py::capsule get_array_struct(const CuImage& cuimg)
+{
+    const DLTensor* tensor = loaded_tensor(cuimg);
+    if (!tensor)
+    {
+        // NumPy falls back to the other protocols if the attribute is not available
+        throw py::attribute_error("__array_struct__ is available only for the loaded image data.");
+    }
+
+    const int ndim = tensor->ndim;
+    const int itemsize = (tensor->dtype.bits * tensor->dtype.lanes + 7) / 8;
+
+    // Allocate the struct and its shape/strides arrays at once so that the capsule owns a single block.
+    auto interface = static_cast<ArrayInterfaceStruct*>(
+        std::malloc(sizeof(ArrayInterfaceStruct) + sizeof(Py_intptr_t) * ndim * 2));
+    if (!interface)
+    {
+        throw std::bad_alloc();
+    }
+    interface->two = 2;
+    interface->nd = ndim;
+    interface->typekind = dtype_typekind(tensor->dtype);
+    interface->itemsize = itemsize;
+    interface->flags =
+        kArrayInterfaceContiguous | kArrayInterfaceAligned | kArrayInterfaceNotSwapped | kArrayInterfaceWriteable;
+    interface->shape = reinterpret_cast<Py_intptr_t*>(interface + 1);
+    interface->strides = interface->shape + ndim;
+    interface->data = static_cast<uint8_t*>(tensor->data) + tensor->byte_offset;
+    interface->descr = nullptr;
+
+    Py_intptr_t stride = itemsize;
+    for (int i = ndim - 1; i >= 0; --i)
+    {
+        interface->shape[i] = static_cast<Py_intptr_t>(tensor->shape[i]);
+        interface->strides[i] = tensor->strides ? static_cast<Py_intptr_t>(tensor->strides[i] * itemsize) : stride;
+        stride *= interface->shape[i];
+    }
+
+    // NumPy keeps a reference to the CuImage object (as the base of the array) so the data outlives the array.
+    return py::capsule(interface, [](void* ptr) { std::free(ptr); });
+}
+
+static std::string buffer_format(const DLDataType& dtype)
+{
+    switch (dtype.code)
+    {
+    case kDLInt:
+        switch (dtype.bits)
+        {
+        case 8:
+            return py::format_descriptor<int8_t>::format();
+        case 16:
+            return py::format_descriptor<int16_t>::format();
+        case 32:
+            return py::format_descriptor<int32_t>::format();
+        case 64:
+            return py::format_descriptor<int64_t>::format();
+        }
+        break;
+    case kDLUInt:
+        switch (dtype.bits)
+        {
+        case 8:
+            return py::format_descriptor<uint8_t>::format();
+        case 16:
+            return py::format_descriptor<uint16_t>::format();
+        case 32:
+            return py::format_descriptor<uint32_t>::format();
+        case 64:
+            return py::format_descriptor<uint64_t>::format();
+        }
+        break;
+    case kDLFloat:
+        switch (dtype.bits)
+        {
+        case 16:
+            return "e";
+        case 32:
+            return py::format_descriptor<float>::format();
+        case 64:
+            return py::format_descriptor<double>::format();
+        }
+        break;
+    }
+    return std::string{};
+}
+
+py::buffer_info get_buffer_info(CuImage& cuimg)
+{
+    // Note: cuimage_getbuffer() checks that the image can be exported before pybind11 calls this.
+    const DLTensor* tensor = loaded_tensor(cuimg);
+    const py::ssize_t itemsize = (tensor->dtype.bits * tensor->dtype.lanes + 7) / 8;
+    const int ndim = tensor->ndim;
+    std::vector<py::ssize_t> shape(ndim);
+    std::vector<py::ssize_t> strides(ndim);
+    py::ssize_t stride = itemsize;
+    for (int i = ndim - 1; i >= 0; --i)
+    {
+        shape[i] = static_cast<py::ssize_t>(tensor->shape[i]);
+        strides[i] = tensor->strides ? static_cast<py::ssize_t>(tensor->strides[i] * itemsize) : stride;
+        stride *= shape[i];
+    }
+    return py::buffer_info(static_cast<uint8_t*>(tensor->data) + tensor->byte_offset, itemsize,
+                           buffer_format(tensor->dtype), ndim, std::move(shape), std::move(strides));
+}
+
+int cuimage_getbuffer(PyObject* obj, Py_buffer* view, int flags)
+{
+    // pybind11 doesn't translate the exceptions thrown by the def_buffer() function (get_buffer_info()) so the
+    // images that can't be exported are rejected here, before pybind11 fills the view.
+    const char* error = nullptr;
+    try
+    {
+        const DLTensor* tensor = loaded_tensor(py::handle(obj).cast<const CuImage&>());
+        if (!tensor)
+        {
+            error = "The buffer protocol is available only for the loaded image data.";
+        }
+        else if (buffer_format(tensor->dtype).empty())
+        {
+            error = "The data type of the image is not supported by the buffer protocol.";
+        }
+    }
+    catch (const py::cast_error&)
+    {
+        error = "Not a CuImage object.";
+    }
+    if (error)
+    {
+        if (view)
+        {
+            view->obj = nullptr;
+        }
+        PyErr_SetString(PyExc_BufferError, error);
+        return -1;
+    }
+    return py::detail::pybind11_getbuffer(obj, view, flags);
+}
+
+static DLContext dlpack_context(const DLTensor* tensor)
+{
+    DLContext ctx = tensor->ctx;
+    // Map cuCIM's custom device types (e.g., shared memory) to DLPack's ones.
+    switch (static_cast<io::DeviceType>(ctx.device_type))
+    {
+    case io::DeviceType::kCPU:
+    case io::DeviceType::kCPUShared:
+        ctx.device_type = kDLCPU;
+        break;
+    case io::DeviceType::kCUDA:
+    case io::DeviceType::kCUDAShared:
+        ctx.device_type = kDLGPU;
+        break;
+    case io::DeviceType::kPinned:
+        ctx.device_type = kDLCPUPinned;
+        break;
+    }
+    return ctx;
+}
+
+static void dlpack_deleter(DLManagedTensor* self)
+{
+    // The consumer may call the deleter from any thread without holding the GIL.
+    PyGILState_STATE gil_state = PyGILState_Ensure();
+    Py_XDECREF(static_cast<PyObject*>(self->manager_ctx));
+    PyGILState_Release(gil_state);
+    delete self;
+}
+
+static void dlpack_capsule_destructor(PyObject* capsule)
+{
+    // A consumer renames the capsule to 'used_dltensor' when it takes the ownership.
+    if (PyCapsule_IsValid(capsule, "used_dltensor"))
+    {
+        return;
+    }
+
+    PyObject *type, *value, *traceback;
+    PyErr_Fetch(&type, &value, &traceback);
+    auto managed = static_cast<DLManagedTensor*>(PyCapsule_GetPointer(capsule, "dltensor"));
+    if (managed)
+    {
+        managed->deleter(managed);
+    }
+    else
+    {
+        PyErr_WriteUnraisable(capsule);
+    }
+    PyErr_Restore(type, value, traceback);
+}
+
+py::capsule py_dlpack(const py::object& cuimg_obj, const py::object& stream)
+{
+    (void)stream; // Data is on host memory for now so there is nothing to synchronize.
+
+    const CuImage& cuimg = cuimg_obj.cast<const CuImage&>();
+    const DLTensor* tensor = loaded_tensor(cuimg);
+    if (!tensor)
+    {
+        throw std::runtime_error("__dlpack__() is available only for the loaded image data.");
+    }
+
+    auto managed = new DLManagedTensor{};
+    managed->dl_tensor = *tensor; // shape/strides are owned by the CuImage object that is kept alive below
+    managed->dl_tensor.ctx = dlpack_context(tensor);
+    managed->manager_ctx = cuimg_obj.ptr();
+    managed->deleter = dlpack_deleter;
+    Py_INCREF(cuimg_obj.ptr());
+
+    PyObject* capsule = PyCapsule_New(managed, "dltensor", dlpack_capsule_destructor);
+    if (!capsule)
+    {
+        dlpack_deleter(managed);
+        throw py::error_already_set();
+    }
+    return py::reinterpret_steal<py::capsule>(capsule);
+}
+
+py::tuple py_dlpack_device(const CuImage& cuimg)
+{
+    const DLTensor* tensor = loaded_tensor(cuimg);
+    if (!tensor)
+    {
+        return py::make_tuple(static_cast<int>(kDLCPU), 0);
+    }
+    DLContext ctx = dlpack_context(tensor);
+    return py::make_tuple(static_cast<int>(ctx.device_type), ctx.device_id);
+}
+
+/**
+ * Returns the content of a file-like object as an object supporting the buffer protocol.
+ *
+ * Regular files are memory-mapped. Other objects are read (with `readinto()`) into a bytearray.
+ */
+static py::object read_file_object(const py::object& file)
+{
+    if (py::hasattr(file, "fileno"))
+    {
+        try
+        {
+            int fd = file.attr("fileno")().cast<int>();
+            py::module_ mmap = py::module_::import("mmap");
+            return mmap.attr("mmap")(fd, 0, py::arg("access") = mmap.attr("ACCESS_READ"));
+        }
+        catch (py::error_already_set&)
+        {
+            // Not a regular file (e.g., a pipe or io.BytesIO): read it instead.
+        }
+    }
+
+    Py_ssize_t capacity = 1 << 20;
+    Py_ssize_t size = 0;
+    py::object data = py::reinterpret_steal<py::object>(PyByteArray_FromStringAndSize(nullptr, capacity));
+    if (!data)
+    {
+        throw py::error_already_set();
+    }
+    py::object readinto = file.attr("readinto");
+    while (true)
+    {
+        if (size == capacity)
+        {
+            capacity *= 2;
+            if (PyByteArray_Resize(data.ptr(), capacity) != 0)
+            {
+                throw py::error_already_set();
+            }
+        }
+        // The view doesn't hold an export of the bytearray so the bytearray can be resized afterwards.
+        py::object view = py::reinterpret_steal<py::object>(
+            PyMemoryView_FromMemory(PyByteArray_AS_STRING(data.ptr()) + size, capacity - size, PyBUF_WRITE));
+        if (!view)
+        {
+            throw py::error_already_set();
+        }
+        py::object count = readinto(view);
+        view.attr("release")();
+        if (count.is_none())
+        {
+            throw std::runtime_error("Cannot read a file-like object in non-blocking mode!");
+        }
+        Py_ssize_t nbytes = count.cast<Py_ssize_t>();
+        if (nbytes <= 0)
+        {
+            break;
+        }
+        size += nbytes;
+    }
+    if (PyByteArray_Resize(data.ptr(), size) != 0)
+    {
+        throw py::error_already_set();
+    }
+    return data;
+}
+
+py::object py_from_buffer(const py::object& source, const std::string& name)
+{
+    py::object buffer = source;
+    if (!PyObject_CheckBuffer(source.ptr()))
+    {
+        if (!py::hasattr(source, "readinto"))
+        {
+            throw std::invalid_argument(
+                "'source' should be a bytes-like object or a file-like object with a 'readinto()' method!");
+        }
+        buffer = read_file_object(source);
+    }
+
+    // The memoryview holds an export of the buffer so the buffer can't be released (e.g., an mmap object can't be
+    // closed) while the image refers to it.
+    py::object view = py::reinterpret_steal<py::object>(PyMemoryView_FromObject(buffer.ptr()));
+    if (!view)
+    {
+        throw py::error_already_set();
+    }
+    Py_buffer* view_buffer = PyMemoryView_GET_BUFFER(view.ptr());
+    if (!PyBuffer_IsContiguous(view_buffer, 'C'))
+    {
+        throw std::invalid_argument("The buffer should be C-contiguous!");
+    }
+
+    // The C++ object (not only its Python wrapper) owns the memoryview as it can outlive the wrapper.
+    std::shared_ptr<void> view_owner(new py::object(view), [](void* ptr) {
+        if (!Py_IsInitialized())
+        {
+            return; // The interpreter is gone: the buffer can't be released anymore.
+        }
+        py::gil_scoped_acquire acquire;
+        delete static_cast<py::object*>(ptr);
+    });
+
+    std::shared_ptr<CuImage> cuimg;
+    {
+        py::gil_scoped_release release;
+        cuimg = std::make_shared<CuImage>(
+            view_buffer->buf, static_cast<size_t>(view_buffer->len), name, std::move(view_owner));
+    }
+    return py::cast(cuimg);
+}
+
+py::object py_tissue_mask(const py::object& cuimg, const py::args& args, const py::kwargs& kwargs)
+{
+    // Implemented in Python (cucim.clara._tissue) on top of cucim.skimage
+    py::object tissue_mask = py::module_::import("cucim.clara._tissue").attr("tissue_mask");
+    return tissue_mask(cuimg, *args, **kwargs);
+}
+
+std::unique_ptr<ImageWriter> py_image_writer(const std::string& file_path,
+                                             std::vector<int64_t> shape,
+                                             const py::object& dtype,
+                                             const std::string& compression,
+                                             uint32_t tile_size,
+                                             int32_t quality,
+                                             uint16_t levels,
+                                             uint32_t num_workers)
+{
+    if (shape.size() == 2)
+    {
+        shape.push_back(1);
+    }
+    py::dtype np_dtype = py::dtype::from_args(dtype);
+    if (np_dtype.kind() != 'u')
+    {
+        throw std::invalid_argument("Only images of unsigned integer type (uint8, uint16) can be written!");
+    }
+    DLDataType dl_dtype{ kDLUInt, static_cast<uint8_t>(np_dtype.itemsize() * 8), 1 };
+
+    py::gil_scoped_release release;
+    return std::make_unique<ImageWriter>(
+        file_path, shape, dl_dtype, compression, tile_size, quality, levels, num_workers);
+}
+
+void py_write_region(ImageWriter& writer, const std::vector<int64_t>& location, const py::buffer& data)
+{
+    py::buffer_info info = data.request();
+    if (info.ndim != 2 && info.ndim != 3)
+    {
+        throw std::invalid_argument(
+            fmt::format("Invalid data (ndim: {}). It should be an array of (height, width[, channels])!", info.ndim));
+    }
+    py::dtype np_dtype(info);
+    if (np_dtype.kind() != 'u')
+    {
+        throw std::invalid_argument("Only data of unsigned integer type (uint8, uint16) can be written!");
+    }
+
+    // DLPack strides are in number of elements
+    std::vector<int64_t> shape(info.shape.begin(), info.shape.end());
+    std::vector<int64_t> strides;
+    strides.reserve(3);
+    for (auto stride : info.strides)
+    {
+        if (stride % info.itemsize != 0)
+        {
+            throw std::invalid_argument("The strides of the data should be multiples of its item size!");
+        }
+        strides.push_back(stride / info.itemsize);
+    }
+    if (info.ndim == 2)
+    {
+        shape.push_back(1);
+        strides.push_back(1);
+    }
+
+    DLTensor tensor{};
+    tensor.data = info.ptr;
+    tensor.ctx = DLContext{ kDLCPU, 0 };
+    tensor.ndim = 3;
+    tensor.dtype = DLDataType{ kDLUInt, static_cast<uint8_t>(info.itemsize * 8), 1 };
+    tensor.shape = shape.data();
+    tensor.strides = strides.data();
+
+    py::gil_scoped_release release;
+    writer.write_region(location, tensor);
+}
 
 } // namespace cucim
@@ -57,6 +57,23 @@ CuImage py_read_region(CuImage& cuimg,
                     const std::string& shm_name,
                     py::kwargs kwargs);
 py::dict get_array_interface(const CuImage& cuimg);
+py::capsule get_array_struct(const CuImage& cuimg);
+py::buffer_info get_buffer_info(CuImage& cuimg);
+int cuimage_getbuffer(PyObject* obj, Py_buffer* view, int flags);
+py::capsule py_dlpack(const py::object& cuimg_obj, const py::object& stream);
+py::tuple py_dlpack_device(const CuImage& cuimg);
+py::object py_from_buffer(const py::object& source, const std::string& name);
+py::object py_tissue_mask(const py::object& cuimg, const py::args& args, const py::kwargs& kwargs);
+
+std::unique_ptr<ImageWriter> py_image_writer(const std::string& file_path,
+                                             std::vector<int64_t> shape,
+                                             const py::object& dtype,
+                                             const std::string& compression,
+                                             uint32_t tile_size,
+                                             int32_t quality,
+                                             uint16_t levels,
+                                             uint32_t num_workers);
+void py_write_region(ImageWriter& writer, const std::vector<int64_t>& location, const py::buffer& data);
 } // namespace cucim
 
 #endif // PYCUCIM_CUIMAGE_PY_H
@@ -58,6 +58,21 @@ PYDOC(CuImage, R"doc(
 Constructor of CuImage.
 )doc")
 
+// CuImage(const void* buffer, size_t size, const filesystem::Path& name);
+PYDOC(from_buffer, R"doc(
+Opens an image whose file content is in memory, without writing it to a file.
+
+Args:
+    source: A bytes-like object (`bytes`, `bytearray`, `memoryview`, `mmap.mmap`, ...) holding the content of the
+        file, or a file-like object with a `readinto()` method. File objects with a `fileno()` (regular files) are
+        memory-mapped; other file-like objects are read into memory once.
+    name: The name used as the path of the image.
+
+Returns:
+    A CuImage object. Tiles are decoded directly from the buffer (no copy), which is kept alive (and can't be
+    closed/resized) while the image exists.
+)doc")
+
 // CuImage(const filesystem::Path& path, const std::string& plugin_name);
 // CuImage(const CuImage& cuimg) = delete;
 // CuImage(CuImage&& cuimg);
@@ -171,6 +186,12 @@ Returns a dict that includes resolution information.
 - level_count: The number of levels
 - level_dimensions: A tuple of dimension tuples (width, height)
 - level_downsamples: A tuple of down-sample factors
+- level_tile_sizes: A tuple of tile size tuples (tile width, tile height). (0, 0) if the level is not tiled.
+
+If the smallest level of the file is larger than a tile (e.g., a TIFF file with only one level), virtual levels (half
+the size of the previous level) are added until a level fits in a 256x256 tile. Their tiles are computed by area
+averaging when first read, and cached in a `<file path>.cucim-levels` file next to the image (or in
+`$CUCIM_CACHE_DIR/levels` if the folder is not writable). Set `CUCIM_VIRTUAL_LEVELS=0` to disable virtual levels.
 )doc")
 
 // dlpack::DLTContainer container() const;
@@ -214,11 +235,44 @@ PYDOC(associated_image, R"doc(
 Returns an associated image for the given name, as a CuImage object.
 )doc")
 
-// void save(std::string file_path) const;
+// void save(std::string file_path, std::string format, std::string compression, uint32_t tile_size, int32_t quality,
+//           uint16_t level_count, uint32_t num_workers) const;
 PYDOC(save, R"doc(
-Saves image data to the file path.
+Saves the image to the file path.
+
+By default, a tiled, pyramidal BigTIFF file is written: tiles are compressed on a thread pool and the lower-resolution
+levels are generated (2x2 box downsampling) while writing. If the image was opened from a file, its level 0 is read
+and written by bands of tiles. Paths ending with `.ppm` are saved as PPM files (for loaded RGB images).
 
-Currently it supports only .ppm file format that can be viewed by `eog` command in Ubuntu.
+Args:
+    file_path: The path of the file to write.
+    format: 'tiff' or 'ppm' (default: deduced from the file extension).
+    compression: 'jpeg' (8-bit RGB or grayscale images), 'deflate' or 'raw'.
+    tile_size: The size of (square) tiles. It needs to be a multiple of 16.
+    quality: The JPEG quality (1-100) or the deflate compression level (0-12). -1 for the default.
+    levels: The number of resolution levels (default: until a level fits in a tile).
+    num_workers: The number of threads compressing tiles (default: the number of CPU cores).
+)doc")
+
+// py::object py_tissue_mask(const py::object& cuimg, const py::args& args, const py::kwargs& kwargs);
+PYDOC(tissue_mask, R"doc(
+Computes (or loads from the cache) the low-resolution tissue mask of the image.
+
+A resolution level is thresholded with Otsu's method and cleaned with morphological operations on the GPU
+(`cucim.skimage`). The mask is saved in a sidecar file of a cache folder, keyed by a hash of the file content and of
+the parameters, so that it is computed only once per slide.
+
+Args:
+    level: The resolution level read (default: the smallest level).
+    method: 'otsu' (grayscale) or 'saturation' (HSV saturation).
+    min_size: Objects and holes smaller than this number of mask pixels are removed.
+    closing: The radius (in mask pixels) of the disk used by the binary closing.
+    cache: Whether to load/save the mask from/to the cache.
+    cache_dir: The folder of the cache (default: `$CUCIM_CACHE_DIR/tissue` or `~/.cache/cucim/tissue`).
+
+Returns:
+    A `cucim.clara.TissueMask` object. `TissueMask.regions()` returns the locations of the patches holding tissue,
+    to pass to `read_region()`.
 )doc")
 
 // py::dict get_array_interface(const CuImage& cuimg);
@@ -226,8 +280,79 @@ PYDOC(get_array_interface, R"doc(
 Get an array interface for Python.
 )doc")
 
+// py::capsule get_array_struct(const CuImage& cuimg);
+PYDOC(get_array_struct, R"doc(
+Get a C-struct array interface (a `PyCapsule` holding `PyArrayInterface`) for Python.
+
+It is used by NumPy to create an array that shares the memory of the image without building a dictionary.
+)doc")
+
+// py::capsule py_dlpack(const py::object& cuimg_obj, const py::object& stream);
+PYDOC(dlpack, R"doc(
+Export the image data as a DLPack capsule (zero-copy).
+
+The capsule keeps the CuImage object alive until the consumer (e.g., `torch.utils.dlpack.from_dlpack()` or
+`cupy.from_dlpack()`) releases the tensor.
+
+Args:
+    stream: Ignored for now as the image data is in host memory.
+)doc")
+
+// py::tuple py_dlpack_device(const CuImage& cuimg);
+PYDOC(dlpack_device, R"doc(
+Returns a tuple of `(device_type, device_id)` in DLPack's format for the image data.
+)doc")
+
 }; // namespace CuImage
 
+namespace ImageWriter
+{
+
+// ImageWriter(const filesystem::Path& file_path, const Shape& shape, const DLDataType& dtype,
+//             const std::string& compression, uint32_t tile_size, int32_t quality, uint16_t level_count,
+//             uint32_t num_workers);
+PYDOC(ImageWriter, R"doc(
+Writer of tiled, pyramidal BigTIFF images, streaming tiles of the full-resolution image.
+
+Regions given to `write_region()` (in any order) are split into tiles that are compressed on a thread pool and written
+as soon as they are ready. Lower-resolution levels are generated (2x2 box downsampling) from the written tiles, so
+only partially-covered tiles of lower levels are kept in memory. The file is complete once `close()` is called (or
+the `with` block is exited).
+
+Args:
+    file_path: The path of the file to write.
+    shape: The shape of the image: `(height, width[, channels])`.
+    dtype: The data type of the image (uint8 or uint16).
+    compression: 'jpeg' (8-bit RGB or grayscale images), 'deflate' or 'raw'.
+    tile_size: The size of (square) tiles. It needs to be a multiple of 16.
+    quality: The JPEG quality (1-100) or the deflate compression level (0-12). -1 for the default.
+    levels: The number of resolution levels (default: until a level fits in a tile).
+    num_workers: The number of threads compressing tiles (default: the number of CPU cores).
+)doc")
+
+// void write_region(const std::vector<int64_t>& location, const DLTensor& data);
+PYDOC(write_region, R"doc(
+Writes a region of the full-resolution image.
+
+Args:
+    location: The location `(x, y)` of the region. It needs to be a multiple of the tile size.
+    data: An array (numpy array, CuImage on CPU or any object supporting the buffer protocol) of shape
+        `(height, width[, channels])`. Its size needs to be a multiple of the tile size, except at the right and bottom
+        edges of the image. Extra channels (e.g., alpha) are ignored.
+)doc")
+
+// void close();
+PYDOC(close, R"doc(
+Writes the remaining tiles of lower-resolution levels and the directories, and closes the file.
+)doc")
+
+// bool is_closed() const;
+PYDOC(closed, R"doc(
+Whether the writer is closed.
+)doc")
+
+}; // namespace ImageWriter
+
 } // namespace cucim::doc
 
 #endif // PYCUCIM_CUCIM_PYDOC_H
@@ -20,6 +20,7 @@
 
 #include <pybind11/pybind11.h>
 #include <cucim/filesystem/cufile_driver.h>
+#include <fmt/format.h>
 
 namespace py = pybind11;
 
@@ -46,9 +47,84 @@ ssize_t fd_pread(const CuFileDriver& fd, py::object obj, size_t count, off_t fil
         throw std::runtime_error(fmt::format("[Error] 'count' ({}) is larger than the size of the array object ({})!", count, memory_size));
     }
 
-    py::call_guard<py::gil_scoped_release>();
+    py::gil_scoped_release release;
     return fd.pread(buf, count, file_offset, buf_offset);
 }
+std::vector<ssize_t> fd_preadv(const CuFileDriver& fd,
+                               py::object bufs,
+                               const std::vector<std::pair<off_t, size_t>>& ranges,
+                               uint32_t num_workers)
+{
+    const size_t range_count = ranges.size();
+    std::vector<ReadRequest> requests(range_count);
+
+    if (py::isinstance<py::list>(bufs) || py::isinstance<py::tuple>(bufs))
+    {
+        auto buf_list = py::cast<py::sequence>(bufs);
+        if (buf_list.size() != range_count)
+        {
+            throw std::runtime_error(fmt::format("[Error] The number of buffers ({}) doesn't match the number of ranges ({})!",
+                                                 buf_list.size(), range_count));
+        }
+        for (size_t i = 0; i < range_count; ++i)
+        {
+            py::object obj = buf_list[i];
+            void* buf = nullptr;
+            size_t memory_size = 0;
+            bool readonly = false;
+
+            cucim::memory::get_memory_info(obj, &buf, nullptr, &memory_size, &readonly);
+
+            if (buf == nullptr)
+            {
+                throw std::runtime_error(fmt::format("Cannot Recognize the array object at index {}!", i));
+            }
+            if (readonly)
+            {
+                throw std::runtime_error(fmt::format("The buffer at index {} is readonly so cannot be used for pread!", i));
+            }
+            const auto& [file_offset, count] = ranges[i];
+            if (memory_size && count > memory_size)
+            {
+                throw std::runtime_error(fmt::format(
+                    "[Error] 'count' ({}) is larger than the size of the array object ({}) at index {}!", count, memory_size, i));
+            }
+            requests[i] = ReadRequest{ buf, count, file_offset, 0 };
+        }
+    }
+    else
+    {
+        void* buf = nullptr;
+        size_t memory_size = 0;
+        bool readonly = false;
+
+        cucim::memory::get_memory_info(bufs, &buf, nullptr, &memory_size, &readonly);
+
+        if (buf == nullptr)
+        {
+            throw std::runtime_error("Cannot Recognize the array object!");
+        }
+        if (readonly)
+        {
+            throw std::runtime_error("The buffer is readonly so cannot be used for pread!");
+        }
+        size_t buf_offset = 0;
+        for (size_t i = 0; i < range_count; ++i)
+        {
+            const auto& [file_offset, count] = ranges[i];
+            requests[i] = ReadRequest{ buf, count, file_offset, static_cast<off_t>(buf_offset) };
+            buf_offset += count;
+        }
+        if (memory_size && buf_offset > memory_size)
+        {
+            throw std::runtime_error(fmt::format(
+                "[Error] Total size of the ranges ({}) is larger than the size of the array object ({})!", buf_offset, memory_size));
+        }
+    }
+
+    py::gil_scoped_release release;
+    return fd.preadv(requests, num_workers);
+}
 ssize_t fd_pwrite(CuFileDriver& fd, py::object obj, size_t count, off_t file_offset, off_t buf_offset)
 {
     void* buf = nullptr;
@@ -64,7 +140,7 @@ ssize_t fd_pwrite(CuFileDriver& fd, py::object obj, size_t count, off_t file_off
         throw std::runtime_error(fmt::format("[Error] 'count' ({}) is larger than the size of the array object ({})!", count, memory_size));
     }
 
-    py::call_guard<py::gil_scoped_release>();
+    py::gil_scoped_release release;
     return fd.pwrite(buf, count, file_offset, buf_offset);
 }
 } // namespace cucim::filesystem
\ No newline at end of file
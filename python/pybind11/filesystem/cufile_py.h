@@ -19,6 +19,8 @@
 #include "cucim/filesystem/cufile_driver.h"
 
 #include <cstdio>
+#include <utility>
+#include <vector>
 #include <pybind11/pytypes.h>
 
 namespace py = pybind11;
@@ -27,6 +29,10 @@ namespace cucim::filesystem
 {
 // Note: there would be name conflict with pread/pwrite in cufile_driver.h so prefixed 'fd_'.
 ssize_t fd_pread(const CuFileDriver& fd, py::object buf, size_t count, off_t file_offset, off_t buf_offset = 0);
+std::vector<ssize_t> fd_preadv(const CuFileDriver& fd,
+                               py::object bufs,
+                               const std::vector<std::pair<off_t, size_t>>& ranges,
+                               uint32_t num_workers = 0);
 ssize_t fd_pwrite(CuFileDriver& fd, py::object buf, size_t count, off_t file_offset, off_t buf_offset = 0);
 } // namespace cucim::filesystem
 
@@ -46,6 +46,23 @@ Returns:
     The number of bytes read if succeed, -1 otherwise.
 )doc")
 
+// std::vector<ssize_t> preadv(const std::vector<ReadRequest>& requests, uint32_t num_workers = 0);
+PYDOC(preadv, R"doc(
+Reads multiple ranges from the file driver with a single call. The file offset is not changed.
+
+The GIL is released while reading.
+
+Args:
+    buf: A buffer, or a list of buffers (one per range), where read bytes are stored. Buffers can be either in CPU
+        memory or (CUDA) GPU memory. If a single buffer is given, the ranges are stored back-to-back in the buffer
+        (in the order of `ranges`).
+    ranges: A list of `(file_offset, count)` pairs.
+    num_workers: The maximum number of threads used to issue the reads. Default value is 0 (reads are issued
+        sequentially by the calling thread).
+Returns:
+    A list of the number of bytes read for each range (-1 for a failed read).
+)doc")
+
 // ssize_t pwrite(const void* buf, size_t count, off_t file_offset, off_t buf_offset = 0);
 PYDOC(pwrite, R"doc(
 Reads up to `count` bytes from the file driver at offset `file_offset` (from the start of the file) into the buffer
@@ -20,6 +20,7 @@
 #include "cufile_pydoc.h"
 
 #include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
 #include <cucim/filesystem/cufile_driver.h>
 
 namespace py = pybind11;
@@ -49,6 +50,10 @@ void init_filesystem(py::module& fs)
              py::arg("count"), //
              py::arg("file_offset"), //
              py::arg("buf_offset") = 0) //
+        .def("preadv", &fd_preadv, doc::CuFileDriver::doc_preadv, // GIL is released after accessing python objects
+             py::arg("buf"), //
+             py::arg("ranges"), //
+             py::arg("num_workers") = 0) //
         .def("pwrite", &fd_pwrite, doc::CuFileDriver::doc_pwrite, // Do not release GIL as it would access properties of
                                                                   // python object
              py::arg("buf"), //
@@ -72,6 +77,11 @@ void init_filesystem(py::module& fs)
              py::arg("count"), //
              py::arg("file_offset"), //
              py::arg("buf_offset") = 0) //
+        .def("preadv", &py_preadv, doc::doc_preadv, // GIL is released after accessing python objects
+             py::arg("fd"), //
+             py::arg("buf"), //
+             py::arg("ranges"), //
+             py::arg("num_workers") = 0) //
         .def("pwrite", &py_pwrite, doc::doc_pwrite, // Do not release GIL as it would access properties of python object
              py::arg("fd"), //
              py::arg("buf"), //
@@ -100,6 +110,21 @@ ssize_t py_pread(const std::shared_ptr<CuFileDriver>& fd, py::object buf, size_t
         return -1;
     }
 }
+std::vector<ssize_t> py_preadv(const std::shared_ptr<CuFileDriver>& fd,
+                               py::object bufs,
+                               const std::vector<std::pair<off_t, size_t>>& ranges,
+                               uint32_t num_workers)
+{
+    if (fd != nullptr)
+    {
+        return fd_preadv(*fd, bufs, ranges, num_workers);
+    }
+    else
+    {
+        fmt::print(stderr, "fd (CuFileDriver) is None!");
+        return std::vector<ssize_t>(ranges.size(), -1);
+    }
+}
 ssize_t py_pwrite(const std::shared_ptr<CuFileDriver>& fd, py::object buf, size_t count, off_t file_offset, off_t buf_offset)
 {
     if (fd != nullptr)
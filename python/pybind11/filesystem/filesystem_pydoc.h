@@ -90,6 +90,24 @@ Returns:
     The number of bytes read if succeed, -1 otherwise.
 )doc")
 
+// std::vector<ssize_t> preadv(const std::shared_ptr<CuFileDriver>& fd, const std::vector<ReadRequest>& requests, uint32_t num_workers = 0);
+PYDOC(preadv, R"doc(
+Reads multiple ranges from file driver `fd` with a single call. The file offset is not changed.
+
+The GIL is released while reading.
+
+Args:
+    fd: An object of CuFileDriver.
+    buf: A buffer, or a list of buffers (one per range), where read bytes are stored. Buffers can be either in CPU
+        memory or (CUDA) GPU memory. If a single buffer is given, the ranges are stored back-to-back in the buffer
+        (in the order of `ranges`).
+    ranges: A list of `(file_offset, count)` pairs.
+    num_workers: The maximum number of threads used to issue the reads. Default value is 0 (reads are issued
+        sequentially by the calling thread).
+Returns:
+    A list of the number of bytes read for each range (-1 for a failed read).
+)doc")
+
 // ssize_t pread(const std::shared_ptr<CuFileDriver>& fd, const void* buf, size_t count, off_t file_offset, off_t buf_offset = 0);
 PYDOC(pwrite, R"doc(
 Write up to `count` bytes from the buffer `buf` starting at offset `buf_offset` to the file driver `fd` at offset
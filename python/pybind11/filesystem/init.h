@@ -29,6 +29,10 @@ void init_filesystem(py::module& m);
 
 std::shared_ptr<CuFileDriver> py_open(const char* file_path, const char* flags, mode_t mode);
 ssize_t py_pread(const std::shared_ptr<CuFileDriver>& fd, py::object buf, size_t count, off_t file_offset, off_t buf_offset = 0);
+std::vector<ssize_t> py_preadv(const std::shared_ptr<CuFileDriver>& fd,
+                               py::object bufs,
+                               const std::vector<std::pair<off_t, size_t>>& ranges,
+                               uint32_t num_workers = 0);
 ssize_t py_pwrite(const std::shared_ptr<CuFileDriver>& fd, py::object buf, size_t count, off_t file_offset, off_t buf_offset = 0);
 //bool py_close(const std::shared_ptr<CuFileDriver>& fd);
 //bool py_discard_page_cache(const char* file_path);
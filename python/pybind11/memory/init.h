@@ -19,6 +19,8 @@
 #include <pybind11/pybind11.h>
 #include <cucim/io/device.h>
 
+#include <optional>
+
 namespace py = pybind11;
 
 namespace cucim::memory
@@ -26,6 +28,10 @@ namespace cucim::memory
 
 void init_memory(py::module& m);
 
+void py_set_pool_limits(std::optional<size_t> max_cached_bytes, std::optional<size_t> thread_cache_blocks);
+
+py::dict py_pool_stats();
+
 void get_memory_info(py::object& buf_obj,
                      void** out_buf,
                      cucim::io::Device* out_device = nullptr,
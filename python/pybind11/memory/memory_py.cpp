@@ -18,8 +18,11 @@
 #include "init.h"
 
 #include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
 #include <cucim/memory/memory_manager.h>
+#include <cucim/memory/memory_pool.h>
 
+using namespace pybind11::literals;
 namespace py = pybind11;
 
 namespace cucim::memory
@@ -27,6 +30,55 @@ namespace cucim::memory
 
 void init_memory(py::module& memory)
 {
+    memory
+        .def("enable_pool", [](bool enable) { HostMemoryPool::instance().enable(enable); }, doc::doc_enable_pool, //
+             py::arg("enable") = true, //
+             py::call_guard<py::gil_scoped_release>())
+        .def("is_pool_enabled", []() { return HostMemoryPool::instance().is_enabled(); }, doc::doc_is_pool_enabled,
+             py::call_guard<py::gil_scoped_release>())
+        .def("set_pool_limits", &py_set_pool_limits, doc::doc_set_pool_limits, //
+             py::arg("max_cached_bytes") = py::none(), //
+             py::arg("thread_cache_blocks") = py::none(), //
+             py::call_guard<py::gil_scoped_release>())
+        .def("trim_pool", []() { HostMemoryPool::instance().trim(); }, doc::doc_trim_pool,
+             py::call_guard<py::gil_scoped_release>())
+        .def("pool_stats", &py_pool_stats, doc::doc_pool_stats)
+        .def("reset_pool_stats", []() { HostMemoryPool::instance().reset_stats(); }, doc::doc_reset_pool_stats,
+             py::call_guard<py::gil_scoped_release>());
+}
+
+void py_set_pool_limits(std::optional<size_t> max_cached_bytes, std::optional<size_t> thread_cache_blocks)
+{
+    auto& pool = HostMemoryPool::instance();
+    if (max_cached_bytes)
+    {
+        pool.max_cached_bytes(*max_cached_bytes);
+    }
+    if (thread_cache_blocks)
+    {
+        pool.thread_cache_blocks(*thread_cache_blocks);
+    }
+}
+
+py::dict py_pool_stats()
+{
+    auto& pool = HostMemoryPool::instance();
+    HostMemoryPoolStats stats;
+    {
+        py::gil_scoped_release release;
+        stats = pool.stats();
+    }
+    return py::dict{ "enabled"_a = pool.is_enabled(), //
+                     "max_cached_bytes"_a = pool.max_cached_bytes(), //
+                     "thread_cache_blocks"_a = pool.thread_cache_blocks(), //
+                     "allocations"_a = stats.allocations, //
+                     "thread_cache_hits"_a = stats.thread_cache_hits, //
+                     "global_hits"_a = stats.global_hits, //
+                     "misses"_a = stats.misses, //
+                     "bypassed"_a = stats.bypassed, //
+                     "cached_bytes"_a = stats.cached_bytes, //
+                     "cached_blocks"_a = stats.cached_blocks, //
+                     "released_bytes"_a = stats.released_bytes };
 }
 
 static size_t calculate_memory_size(std::vector<size_t> shape, const char* dtype_str)
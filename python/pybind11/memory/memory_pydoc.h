@@ -21,6 +21,58 @@
 namespace cucim::memory::doc
 {
 
+// void enable(bool value = true);
+PYDOC(enable_pool, R"doc(
+Enable/disable the pooled host memory allocator.
+
+Host memory for regions (and scratch buffers used while decoding tiles) is served from a size-class pool that keeps
+freed blocks in per-thread caches and in shared, size-bounded free lists. Disabling the pool releases all cached
+blocks and makes new allocations go directly to the system allocator.
+
+Args:
+    enable: True to enable pooling (default), False to disable it.
+)doc")
+
+// bool is_enabled() const;
+PYDOC(is_pool_enabled, R"doc(
+True if the pooled host memory allocator is enabled.
+)doc")
+
+// void max_cached_bytes(size_t nbytes); void thread_cache_blocks(size_t count);
+PYDOC(set_pool_limits, R"doc(
+Set retention limits of the pooled host memory allocator.
+
+Args:
+    max_cached_bytes: Maximum number of bytes kept in the shared free lists. Cached blocks are released if the
+        limit is changed.
+    thread_cache_blocks: Maximum number of blocks per size class kept in each thread's cache (0 disables thread
+        caching). Blocks cached by other threads are released the next time the threads use the allocator.
+)doc")
+
+// void trim();
+PYDOC(trim_pool, R"doc(
+Release all cached blocks of the pooled host memory allocator to the system.
+)doc")
+
+// HostMemoryPoolStats stats() const;
+PYDOC(pool_stats, R"doc(
+Returns statistics and settings of the pooled host memory allocator as a `dict`.
+
+- enabled: True if pooling is enabled
+- max_cached_bytes/thread_cache_blocks: current retention limits
+- allocations: the number of allocation requests
+- thread_cache_hits/global_hits: requests served from a thread cache/the shared free lists
+- misses: pooled requests that had to allocate a new block
+- bypassed: requests too small/large for the pool (or made while the pool was disabled)
+- cached_bytes/cached_blocks: memory currently retained by the pool
+- released_bytes: bytes given back to the system because of the retention limits or `trim_pool()`
+)doc")
+
+// void reset_stats();
+PYDOC(reset_pool_stats, R"doc(
+Reset the counters returned by `pool_stats()` (memory currently retained is kept).
+)doc")
+
 } // namespace cucim::memory::doc
 
 
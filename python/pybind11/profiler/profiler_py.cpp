@@ -0,0 +1,93 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include "init.h"
+#include "profiler_pydoc.h"
+
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+#include <cucim/profiler/profiler.h>
+
+using namespace pybind11::literals;
+namespace py = pybind11;
+
+namespace cucim::profiler
+{
+
+void init_profiler(py::module& profiler)
+{
+    profiler
+        .def("enable", [](bool trace) { Profiler::instance().enable(trace); }, doc::doc_enable, //
+             py::arg("trace") = false, //
+             py::call_guard<py::gil_scoped_release>())
+        .def("disable", []() { Profiler::instance().disable(); }, doc::doc_disable,
+             py::call_guard<py::gil_scoped_release>())
+        .def("is_enabled", []() { return Profiler::instance().is_enabled(); }, doc::doc_is_enabled,
+             py::call_guard<py::gil_scoped_release>())
+        .def("is_tracing", []() { return Profiler::instance().is_tracing(); }, doc::doc_is_tracing,
+             py::call_guard<py::gil_scoped_release>())
+        .def("reset", []() { Profiler::instance().reset(); }, doc::doc_reset, py::call_guard<py::gil_scoped_release>())
+        .def("stats", &py_stats, doc::doc_stats)
+        .def("trace_events", &py_trace_events, doc::doc_trace_events)
+        .def("dropped_trace_events", []() { return Profiler::instance().dropped_trace_events(); },
+             doc::doc_dropped_trace_events, py::call_guard<py::gil_scoped_release>());
+}
+
+py::dict py_stats()
+{
+    std::vector<StageStats> stats;
+    {
+        py::gil_scoped_release release;
+        stats = Profiler::instance().stats();
+    }
+
+    py::dict result;
+    for (const auto& item : stats)
+    {
+        py::list histogram(kHistogramBins);
+        for (size_t bin = 0; bin < kHistogramBins; ++bin)
+        {
+            histogram[bin] = py::int_(item.histogram[bin]);
+        }
+        result[stage_name(item.stage)] = py::dict{ "count"_a = item.count, //
+                                                   "total_ns"_a = item.total_ns, //
+                                                   "min_ns"_a = item.min_ns, //
+                                                   "max_ns"_a = item.max_ns, //
+                                                   "bytes"_a = item.bytes, //
+                                                   "histogram"_a = histogram };
+    }
+    return result;
+}
+
+py::list py_trace_events()
+{
+    std::vector<TraceEvent> events;
+    {
+        py::gil_scoped_release release;
+        events = Profiler::instance().trace_events();
+    }
+
+    py::list result(events.size());
+    size_t index = 0;
+    for (const auto& event : events)
+    {
+        result[index++] =
+            py::make_tuple(stage_name(event.stage), event.start_ns, event.duration_ns, event.bytes, event.thread_id);
+    }
+    return result;
+}
+
+} // namespace cucim::profiler
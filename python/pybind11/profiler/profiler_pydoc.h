@@ -0,0 +1,82 @@
+/*
+ * Copyright (c) 2021, NVIDIA CORPORATION.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+#ifndef PYCUCIM_PROFILER_PYDOC_H
+#define PYCUCIM_PROFILER_PYDOC_H
+
+#include "../macros.h"
+
+namespace cucim::profiler::doc
+{
+
+// void enable(bool trace = false);
+PYDOC(enable, R"doc(
+Enable the profiler for the region-reading path.
+
+While enabled, the time spent (and bytes processed) in each stage of `read_region()` is accumulated
+(file I/O, JPEG/Deflate decoding, copying/cropping and buffer allocation).
+
+Args:
+    trace: If True, each measured event is also recorded as a trace event (see `trace_events()`).
+)doc")
+
+// void disable();
+PYDOC(disable, R"doc(
+Disable the profiler. Accumulated statistics are kept until `reset()` is called.
+)doc")
+
+// bool is_enabled() const;
+PYDOC(is_enabled, R"doc(
+True if the profiler is enabled.
+)doc")
+
+// bool is_tracing() const;
+PYDOC(is_tracing, R"doc(
+True if the profiler records trace events.
+)doc")
+
+// void reset();
+PYDOC(reset, R"doc(
+Clear accumulated statistics and trace events.
+)doc")
+
+// std::vector<StageStats> stats() const;
+PYDOC(stats, R"doc(
+Returns accumulated statistics per stage as a `dict`.
+
+Each value is a dictionary with the following keys:
+
+- count: the number of events
+- total_ns/min_ns/max_ns: total/minimum/maximum duration in nanoseconds
+- bytes: the number of bytes processed
+- histogram: a list of event counts. Item `i` holds the number of events whose duration `d` (in nanoseconds)
+  satisfies `2**(i-1) <= d < 2**i`.
+)doc")
+
+// std::vector<TraceEvent> trace_events() const;
+PYDOC(trace_events, R"doc(
+Returns recorded trace events as a list of `(stage, start_ns, duration_ns, bytes, thread_id)` tuples.
+
+`start_ns` is relative to the time the profiler was created or last reset.
+)doc")
+
+// uint64_t dropped_trace_events() const;
+PYDOC(dropped_trace_events, R"doc(
+The number of trace events dropped because the trace buffer was full.
+)doc")
+
+} // namespace cucim::profiler::doc
+
+#endif // PYCUCIM_PROFILER_PYDOC_H